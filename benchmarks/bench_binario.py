@@ -0,0 +1,81 @@
+"""
+Benchmark: serialização de cupons, JSON vs binário
+
+Compara, por cupom (ida e volta):
+- to_dict() + json: caminho anterior, com perdas (None vira 'N/A' e
+  não há leitura de volta para o modelo)
+- cupom_para_registro + JSON (orjson se instalado) + registro_para_cupom:
+  JSON sem perdas, como no JSONLRepository
+- pickle (protocolo 5): referência para troca entre processos
+- to_bytes() / from_bytes(): layout binário de src.models.binario
+
+Execute a partir da raiz do projeto:
+    python -m benchmarks.bench_binario [quantidade_cupons]
+"""
+import json
+import pickle
+import sys
+import time
+
+from benchmarks.dados_sinteticos import gerar_cupons
+from src.models.cupom_completo import CupomCompleto
+from src.repositories.jsonl_repository import (
+    cupom_para_registro,
+    desserializar,
+    registro_para_cupom,
+    serializar,
+)
+
+
+CAMINHOS = {
+    'to_dict + json (com perdas)': (
+        lambda cupom: json.dumps(cupom.to_dict()).encode(),
+        json.loads,
+    ),
+    'registro + JSON (sem perdas)': (
+        lambda cupom: serializar(cupom_para_registro(cupom)),
+        lambda dados: registro_para_cupom(desserializar(dados)),
+    ),
+    'pickle 5': (
+        lambda cupom: pickle.dumps(cupom, protocol=5),
+        pickle.loads,
+    ),
+    'to_bytes / from_bytes': (
+        CupomCompleto.to_bytes,
+        CupomCompleto.from_bytes,
+    ),
+}
+
+
+def medir(cupons: list, escrever, ler):
+    """Retorna (bytes por cupom, µs para serializar, µs para ler)"""
+    inicio = time.perf_counter()
+    dados = [escrever(cupom) for cupom in cupons]
+    escrita = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    for item in dados:
+        ler(item)
+    leitura = time.perf_counter() - inicio
+    
+    quantidade = len(cupons)
+    return (sum(map(len, dados)) / quantidade,
+            escrita / quantidade * 1e6,
+            leitura / quantidade * 1e6)
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    cupons = list(gerar_cupons(quantidade))
+    
+    assert all(CupomCompleto.from_bytes(cupom.to_bytes()) == cupom for cupom in cupons[:100])
+    
+    print(f"\n{quantidade:,} cupons (30 produtos cada)".replace(',', '.'))
+    print(f"{'Caminho':<30}{'Bytes/cupom':>12}{'Escrita (µs)':>14}{'Leitura (µs)':>14}")
+    for nome, (escrever, ler) in CAMINHOS.items():
+        tamanho, escrita, leitura = medir(cupons, escrever, ler)
+        print(f"{nome:<30}{tamanho:>12.0f}{escrita:>14.1f}{leitura:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""
+Benchmark: compressão em streaming dos arquivos de saída
+
+Mede tamanho em disco e tempos de escrita/leitura do CSV em lote sem
+compressão, com gzip e com zstd (se o pacote zstandard estiver instalado).
+
+Execute a partir da raiz do projeto:
+    python -m benchmarks.bench_compressao [quantidade_cupons] [layout]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.dados_sinteticos import gerar_cupons
+from src.repositories.csv_repository import CSVRepository
+from src.utils import compressao
+
+
+def medir(diretorio: Path, cupons: list, layout: str, tipo: str):
+    repositorio = CSVRepository(diretorio=diretorio, layout=layout, compressao=tipo)
+    
+    inicio = time.perf_counter()
+    with repositorio.abrir_lote(f'bench_{tipo}', max_bytes=0) as lote:
+        for cupom in cupons:
+            lote.adicionar(cupom)
+    escrita = time.perf_counter() - inicio
+    
+    arquivos = lote.arquivos + getattr(lote, 'arquivos_produtos', [])
+    
+    inicio = time.perf_counter()
+    for arquivo in arquivos:
+        for _ in repositorio.ler_linhas(arquivo):
+            pass
+    leitura = time.perf_counter() - inicio
+    
+    return escrita, sum(a.stat().st_size for a in arquivos), leitura
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    layout = sys.argv[2] if len(sys.argv) > 2 else 'unico'
+    cupons = list(gerar_cupons(quantidade))
+    
+    tipos = ['none', 'gzip'] + (['zstd'] if compressao.zstandard else [])
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        resultados = [(tipo, *medir(Path(tmpdir), cupons, layout, tipo)) for tipo in tipos]
+    
+    tamanho_base = resultados[0][2]
+    
+    print(f"\n{quantidade} cupons x 30 produtos, layout {layout}")
+    print(f"{'Compressão':<12}{'Escrita (s)':>12}{'Tamanho (MB)':>15}{'Redução':>10}{'Leitura (s)':>13}")
+    for tipo, escrita, tamanho, leitura in resultados:
+        print(f"{tipo:<12}{escrita:>12.2f}{tamanho / 1024 / 1024:>15.2f}"
+              f"{tamanho_base / tamanho:>9.1f}x{leitura:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmark: layout CSV único x normalizado
+
+Compara tamanho em disco e tempo de escrita do layout atual (uma linha
+por produto repetindo os dados gerais) com o normalizado (cupons +
+produtos ligados pela chave de acesso).
+
+Execute a partir da raiz do projeto:
+    python -m benchmarks.bench_csv_layouts [quantidade_cupons] [produtos_por_cupom]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.dados_sinteticos import gerar_cupons
+from src.repositories.csv_repository import CSVRepository
+
+
+def escrever(diretorio: Path, layout: str, cupons: list):
+    repositorio = CSVRepository(diretorio=diretorio, layout=layout)
+    
+    inicio = time.perf_counter()
+    with repositorio.abrir_lote(f'bench_{layout}', max_bytes=0) as lote:
+        for cupom in cupons:
+            lote.adicionar(cupom)
+    tempo = time.perf_counter() - inicio
+    
+    arquivos = lote.arquivos + getattr(lote, 'arquivos_produtos', [])
+    return tempo, sum(a.stat().st_size for a in arquivos)
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    produtos_por_cupom = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    cupons = list(gerar_cupons(quantidade, produtos_por_cupom=produtos_por_cupom))
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        resultados = [
+            (layout, *escrever(Path(tmpdir), layout, cupons))
+            for layout in CSVRepository.LAYOUTS
+        ]
+    
+    _, tempo_base, tamanho_base = resultados[0]
+    
+    print(f"\n{quantidade} cupons x {produtos_por_cupom} produtos")
+    print(f"{'Layout':<14}{'Escrita (s)':>12}{'Cupons/s':>12}{'Tamanho (MB)':>15}{'Redução':>10}")
+    for layout, tempo, tamanho in resultados:
+        print(f"{layout:<14}{tempo:>12.2f}{quantidade / tempo:>12,.0f}"
+              f"{tamanho / 1024 / 1024:>15.2f}{tamanho_base / tamanho:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: conversão da data/hora de emissão
+
+Compara, para N textos no formato da SEFAZ ("dd/mm/aaaa - HH:MM:SS"):
+- strptime (caminho anterior de para_datetime)
+- para_datetime (caminho rápido com posições fixas)
+- para_datetimes (lote vetorizado: numpy por posição, pandas no resto)
+- Cupom.emissao lido 3 vezes (ordenar, particionar, filtrar): a
+  conversão acontece só na primeira leitura
+
+Execute a partir da raiz do projeto:
+    python -m benchmarks.bench_datas [quantidade_textos]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from src.models.cupom import Cupom
+from src.utils.datas import FORMATOS_DATA_HORA, para_datetime, para_datetimes
+
+
+def gerar_textos(quantidade: int) -> list:
+    """Datas/horas aleatórias de 2024, como exibidas pela SEFAZ"""
+    aleatorio = random.Random(42)
+    inicio = datetime(2024, 1, 1)
+    return [
+        (inicio + timedelta(seconds=aleatorio.randrange(366 * 86400))).strftime(FORMATOS_DATA_HORA[0])
+        for _ in range(quantidade)
+    ]
+
+
+def cronometrar(funcao, *args) -> float:
+    inicio = time.perf_counter()
+    funcao(*args)
+    return time.perf_counter() - inicio
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    textos = gerar_textos(quantidade)
+    cupons = [Cupom(data_hora=texto) for texto in textos]
+    
+    def tres_leituras_strptime():
+        for _ in range(3):
+            for cupom in cupons:
+                datetime.strptime(cupom.data_hora, FORMATOS_DATA_HORA[0])
+    
+    def tres_leituras_emissao():
+        for _ in range(3):
+            for cupom in cupons:
+                cupom.emissao
+    
+    resultados = {
+        'strptime': cronometrar(lambda: [datetime.strptime(t, FORMATOS_DATA_HORA[0]) for t in textos]),
+        'para_datetime (rápido)': cronometrar(lambda: [para_datetime(t) for t in textos]),
+        'para_datetimes (lote)': cronometrar(para_datetimes, textos),
+        '3 leituras com strptime': cronometrar(tres_leituras_strptime),
+        '3 leituras de Cupom.emissao': cronometrar(tres_leituras_emissao),
+    }
+    
+    print(f"\n{quantidade:,} datas/horas".replace(',', '.'))
+    print(f"{'Caminho':<30}{'Tempo (s)':>10}{'µs/texto':>10}")
+    for nome, duracao in resultados.items():
+        print(f"{nome:<30}{duracao:>10.2f}{duracao / quantidade * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
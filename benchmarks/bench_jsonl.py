@@ -0,0 +1,63 @@
+"""
+Benchmark: serialização JSON Lines
+
+Compara to_dict() + json.dumps com o caminho do JSONLRepository
+(dicionários rasos + orjson, quando instalado) e mede a leitura de volta.
+
+Execute a partir da raiz do projeto:
+    python -m benchmarks.bench_jsonl [quantidade_cupons]
+"""
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.dados_sinteticos import gerar_cupons
+from src.repositories import jsonl_repository
+from src.repositories.jsonl_repository import JSONLRepository
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    cupons = list(gerar_cupons(quantidade))
+    
+    inicio = time.perf_counter()
+    for cupom in cupons:
+        (json.dumps(cupom.to_dict(), ensure_ascii=False) + '\n').encode('utf-8')
+    tempo_to_dict = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    for cupom in cupons:
+        jsonl_repository.serializar(jsonl_repository.cupom_para_registro(cupom))
+    tempo_registro = time.perf_counter() - inicio
+    
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for compactar in (False, True):
+            repo = JSONLRepository(diretorio=Path(tmpdir), compactar=compactar)
+            
+            inicio = time.perf_counter()
+            with repo.abrir_lote() as lote:
+                for cupom in cupons:
+                    lote.adicionar(cupom)
+            escrita = time.perf_counter() - inicio
+            
+            inicio = time.perf_counter()
+            lidos = sum(1 for _ in repo.ler())
+            leitura = time.perf_counter() - inicio
+            
+            assert lidos == quantidade
+            resultados.append((repo.caminho.name, escrita, repo.caminho.stat().st_size, leitura))
+    
+    biblioteca = 'orjson' if jsonl_repository.orjson else 'json'
+    print(f"\n{quantidade} cupons x 30 produtos")
+    print(f"to_dict + json.dumps:      {tempo_to_dict:.2f}s")
+    print(f"registro + {biblioteca:<15}{tempo_registro:.2f}s ({tempo_to_dict / tempo_registro:.1f}x)")
+    print(f"{'Arquivo':<18}{'Escrita (s)':>12}{'Tamanho (MB)':>15}{'Leitura (s)':>13}")
+    for nome, escrita, tamanho, leitura in resultados:
+        print(f"{nome:<18}{escrita:>12.2f}{tamanho / 1024 / 1024:>15.2f}{leitura:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: memória por produto com e sem __slots__
+
+Os modelos são dataclasses com slots=True. Para comparação, o benchmark
+recria o Produto como dataclass comum (com __dict__ por instância, como
+era antes) e mede com tracemalloc a memória retida por N produtos.
+
+Execute a partir da raiz do projeto:
+    python -m benchmarks.bench_memoria_modelos [quantidade_produtos]
+"""
+import gc
+import inspect
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import MISSING, field, fields, make_dataclass
+
+from benchmarks.dados_sinteticos import DESCRICOES, NCMS, formatar_reais
+from src.models.produto import Produto
+
+
+def sem_slots(modelo):
+    """Recria o dataclass sem __slots__ (layout anterior, com __dict__)"""
+    campos = [
+        (campo.name, campo.type, field() if campo.default is MISSING else field(default=campo.default))
+        for campo in fields(modelo)
+    ]
+    metodos = {
+        nome: valor for nome, valor in vars(modelo).items()
+        if (inspect.isfunction(valor) or isinstance(valor, staticmethod))
+        and (not nome.startswith('__') or nome == '__post_init__')
+    }
+    return make_dataclass(f"{modelo.__name__}ComDict", campos, namespace=metodos)
+
+
+def gerar_argumentos(quantidade: int) -> list:
+    """Dados brutos dos produtos, como chegam do scraping"""
+    aleatorio = random.Random(42)
+    argumentos = []
+    
+    for _ in range(quantidade):
+        indice = aleatorio.randrange(len(NCMS))
+        valor = formatar_reais(round(aleatorio.uniform(0.5, 99.9), 2))
+        argumentos.append(dict(
+            codigo_ncm=NCMS[indice],
+            valor_liquido=valor,
+            cod_produto=NCMS[indice],
+            cod_gtin=f"789{aleatorio.randrange(10 ** 9, 10 ** 10)}",
+            valor_total=valor,
+            descricao=DESCRICOES[indice],
+            quantidade="1,0000",
+        ))
+    
+    return argumentos
+
+
+def medir(classe, argumentos: list):
+    """Retorna (bytes retidos por produto, segundos para criar todos)"""
+    gc.collect()
+    
+    inicio = time.perf_counter()
+    produtos = [classe(**kwargs) for kwargs in argumentos]
+    duracao = time.perf_counter() - inicio
+    del produtos
+    
+    gc.collect()
+    tracemalloc.start()
+    produtos = [classe(**kwargs) for kwargs in argumentos]
+    retido, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    # Desconta a própria lista (8 bytes por referência)
+    por_produto = (retido - sys.getsizeof(produtos)) / len(produtos)
+    return por_produto, duracao
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    argumentos = gerar_argumentos(quantidade)
+    
+    antes, tempo_antes = medir(sem_slots(Produto), argumentos)
+    depois, tempo_depois = medir(Produto, argumentos)
+    
+    print(f"\n{quantidade:,} produtos".replace(',', '.'))
+    print(f"{'Modelo':<22}{'Bytes/produto':>15}{'Total (MB)':>12}{'Criação (s)':>13}")
+    for nome, por_produto, duracao in (
+        ('dataclass (__dict__)', antes, tempo_antes),
+        ('slots=True', depois, tempo_depois),
+    ):
+        print(f"{nome:<22}{por_produto:>15.0f}{por_produto * quantidade / 1024 / 1024:>12.1f}{duracao:>13.2f}")
+    print(f"Economia: {antes - depois:.0f} bytes/produto ({(1 - depois / antes) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Benchmark: conversão de valores e quantidades no formato brasileiro
+
+Compara a conversão anterior do Produto (caractere a caractere, sem
+cache) com src.utils.numeros.para_float, em textos repetidos (caso
+real: valores e quantidades se repetem entre produtos) e distintos.
+
+Execute a partir da raiz do projeto:
+    python -m benchmarks.bench_numeros [quantidade_textos]
+"""
+import random
+import sys
+import time
+
+from benchmarks.dados_sinteticos import formatar_reais
+from src.utils.numeros import _texto_para_float, para_float
+
+
+def converter_anterior(valor) -> float:
+    """Implementação anterior de Produto._converter_para_float"""
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    
+    valor_str = str(valor).strip().replace(',', '.')
+    valor_limpo = ''.join(c for c in valor_str if c.isdigit() or c in '.-')
+    
+    try:
+        return float(valor_limpo) if valor_limpo else 0.0
+    except ValueError:
+        return 0.0
+
+
+def medir(funcao, textos: list) -> float:
+    """Segundos para converter todos os textos"""
+    inicio = time.perf_counter()
+    for texto in textos:
+        funcao(texto)
+    return time.perf_counter() - inicio
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    aleatorio = random.Random(42)
+    
+    # Preços de supermercado e quantidades comuns: muitos textos repetidos
+    repetidos = [
+        aleatorio.choice([formatar_reais(round(aleatorio.uniform(0.5, 99.9), 2)), '1,0000', '2,0000'])
+        for _ in range(quantidade)
+    ]
+    # Um texto diferente por conversão (pior caso para o cache)
+    distintos = [formatar_reais(i / 100) for i in range(quantidade)]
+    
+    print(f"\n{quantidade:,} conversões".replace(',', '.'))
+    print(f"{'Textos':<12}{'Anterior (s)':>14}{'para_float (s)':>16}{'Ganho':>8}")
+    
+    for nome, textos in (('repetidos', repetidos), ('distintos', distintos)):
+        _texto_para_float.cache_clear()
+        anterior = medir(converter_anterior, textos)
+        novo = medir(para_float, textos)
+        print(f"{nome:<12}{anterior:>14.2f}{novo:>16.2f}{anterior / novo:>7.1f}x")
+    
+    erros = sum(converter_anterior(t) != para_float(t) for t in distintos)
+    print(f"Valores com milhar que a conversão anterior errava: {erros:,}".replace(',', '.'))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Benchmark: exportação colunar (Parquet/Arrow) x CSV
+
+Mede tempo de escrita, tamanho em disco e tempo de leitura com pandas
+(incluindo a conversão dos valores para número, necessária no CSV).
+
+Execute a partir da raiz do projeto:
+    python -m benchmarks.bench_parquet_vs_csv [quantidade_cupons]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.dados_sinteticos import gerar_cupons
+from src.repositories.csv_repository import CSVRepository
+from src.repositories.parquet_repository import ParquetRepository
+
+
+def tamanho_total(arquivos) -> int:
+    """Soma o tamanho dos arquivos em bytes"""
+    return sum(Path(a).stat().st_size for a in arquivos)
+
+
+def escrever_csv(diretorio: Path, quantidade: int):
+    repositorio = CSVRepository(diretorio=diretorio)
+    
+    inicio = time.perf_counter()
+    with repositorio.abrir_lote('bench', max_bytes=0) as lote:
+        for cupom in gerar_cupons(quantidade):
+            lote.adicionar(cupom)
+    return time.perf_counter() - inicio, lote.arquivos
+
+
+def escrever_colunar(diretorio: Path, quantidade: int, formato: str):
+    repositorio = ParquetRepository(diretorio=diretorio, formato=formato)
+    
+    inicio = time.perf_counter()
+    with repositorio.abrir_lote('bench') as lote:
+        for cupom in gerar_cupons(quantidade):
+            lote.adicionar(cupom)
+    return time.perf_counter() - inicio, [lote.caminho]
+
+
+def ler_csv(arquivo: Path) -> float:
+    """Lê o CSV e converte valores para número, como os jobs downstream fazem"""
+    inicio = time.perf_counter()
+    df = pd.read_csv(arquivo, sep=';', encoding='utf-8-sig', dtype=str)
+    total = (
+        df['Cupom_Total'].str.replace(r'[^\d,]', '', regex=True)
+        .str.replace(',', '.').astype(float)
+    )
+    pd.to_datetime(df['Cupom_Data_Hora'], format='%d/%m/%Y - %H:%M:%S')
+    total.sum()
+    return time.perf_counter() - inicio
+
+
+def ler_parquet(arquivo: Path) -> float:
+    inicio = time.perf_counter()
+    df = pd.read_parquet(arquivo)
+    df['cupom_total'].sum()
+    return time.perf_counter() - inicio
+
+
+def ler_arrow(arquivo: Path) -> float:
+    inicio = time.perf_counter()
+    df = pd.read_feather(arquivo)
+    df['cupom_total'].sum()
+    return time.perf_counter() - inicio
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        diretorio = Path(tmpdir)
+        
+        tempo_csv, arquivos_csv = escrever_csv(diretorio, quantidade)
+        tempo_parquet, arquivos_parquet = escrever_colunar(diretorio, quantidade, 'parquet')
+        tempo_arrow, arquivos_arrow = escrever_colunar(diretorio, quantidade, 'arrow')
+        
+        resultados = [
+            ('CSV', tempo_csv, tamanho_total(arquivos_csv), ler_csv(arquivos_csv[0])),
+            ('Parquet', tempo_parquet, tamanho_total(arquivos_parquet), ler_parquet(arquivos_parquet[0])),
+            ('Arrow IPC', tempo_arrow, tamanho_total(arquivos_arrow), ler_arrow(arquivos_arrow[0])),
+        ]
+    
+    print(f"\n{quantidade} cupons x 30 produtos")
+    print(f"{'Formato':<12}{'Escrita (s)':>14}{'Tamanho (MB)':>15}{'Leitura (s)':>14}")
+    for nome, escrita, tamanho, leitura in resultados:
+        print(f"{nome:<12}{escrita:>14.2f}{tamanho / 1024 / 1024:>15.2f}{leitura:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
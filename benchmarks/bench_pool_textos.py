@@ -0,0 +1,86 @@
+"""
+Benchmark: memória e agrupamento com e sem o pool de textos
+
+Simula a leitura da página: cada cupom traz strings novas para emitente,
+NCM e descrição, mesmo quando o texto se repete. Mede com tracemalloc a
+memória retida pelos textos do lote e o tempo de agrupar produtos por
+descrição e cupons por emitente.
+
+Execute a partir da raiz do projeto:
+    python -m benchmarks.bench_pool_textos [quantidade_cupons]
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+from benchmarks.dados_sinteticos import DESCRICOES, NCMS
+from src.utils.textos import PoolTextos
+
+
+def ler(texto: str) -> str:
+    """String nova com o mesmo conteúdo (como element.text do Selenium)"""
+    return texto.encode().decode()
+
+
+def extrair_lote(quantidade: int, pool) -> list:
+    """Lista de (emitente, produtos) com os textos como lidos da página"""
+    aleatorio = random.Random(42)
+    internar = pool.internar if pool is not None else (lambda texto: texto)
+    lote = []
+    
+    for _ in range(quantidade):
+        loja = aleatorio.randrange(5)
+        emitente = tuple(internar(ler(texto)) for texto in (
+            "SUPERMERCADO EXEMPLO LTDA",
+            f"12.345.678/{loja + 1:04d}-90",
+            f"AVENIDA PAULISTA, {1000 + loja}",
+            "BELA VISTA",
+        ))
+        produtos = []
+        for _ in range(30):
+            indice = aleatorio.randrange(len(NCMS))
+            produtos.append((internar(ler(NCMS[indice])), internar(ler(DESCRICOES[indice]))))
+        lote.append((emitente, produtos))
+    
+    return lote
+
+
+def medir(quantidade: int, pool):
+    """Retorna (MB retidos, segundos para agrupar)"""
+    gc.collect()
+    tracemalloc.start()
+    lote = extrair_lote(quantidade, pool)
+    retido, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    inicio = time.perf_counter()
+    por_descricao = defaultdict(int)
+    por_emitente = defaultdict(int)
+    for emitente, produtos in lote:
+        por_emitente[emitente] += 1
+        for _, descricao in produtos:
+            por_descricao[descricao] += 1
+    agrupamento = time.perf_counter() - inicio
+    
+    return retido / 1024 / 1024, agrupamento
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 30_000
+    
+    sem_pool = medir(quantidade, None)
+    pool = PoolTextos(limite=50_000)
+    com_pool = medir(quantidade, pool)
+    
+    print(f"\n{quantidade:,} cupons (30 produtos cada)".replace(',', '.'))
+    print(f"{'Caminho':<12}{'Memória (MB)':>14}{'Agrupar (s)':>13}")
+    for nome, (memoria, agrupamento) in (('sem pool', sem_pool), ('com pool', com_pool)):
+        print(f"{nome:<12}{memoria:>14.1f}{agrupamento:>13.3f}")
+    print(f"Pool: {pool.resumo()}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
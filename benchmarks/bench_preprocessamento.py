@@ -0,0 +1,90 @@
+"""
+Benchmark: abertura das fotos dos cupons para a leitura do QR Code
+
+Compara, para uma foto JPEG sintética de celular (12 MP, padrão 4000x3000):
+- Image.open + convert('RGB') (imagem entregue à pyzbar antes)
+- Image.open + convert('L') (só tons de cinza)
+- PreprocessadorQR.abrir (modo draft do JPEG + redução a QR_MAX_SIDE)
+- regiao_provavel (estimativa da região do QR Code na imagem reduzida)
+
+A decodificação em si (zbar) não entra na medição: o seu custo cresce
+com o número de pixels entregues, que cai ~6x com a imagem reduzida.
+
+Execute a partir da raiz do projeto:
+    python -m benchmarks.bench_preprocessamento [largura] [altura]
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from src.services.preprocessamento_service import PreprocessadorQR, regiao_provavel
+
+
+REPETICOES = 5
+
+
+def gerar_foto(caminho: Path, largura: int, altura: int):
+    """Foto com ruído, linhas de texto e um quadriculado no lugar do QR Code"""
+    aleatorio = random.Random(42)
+    imagem = Image.effect_noise((largura, altura), 40).convert('RGB')
+    desenho = ImageDraw.Draw(imagem)
+    
+    for y in range(altura // 10, altura // 2, altura // 60):
+        desenho.text((largura // 8, y), "PRODUTO " * 10, fill=(20, 20, 20))
+    
+    lado = min(largura, altura) // 4
+    x0, y0 = largura // 2 - lado // 2, altura * 3 // 5
+    modulo = lado // 33
+    for i in range(33):
+        for j in range(33):
+            if aleatorio.random() < 0.5:
+                desenho.rectangle([x0 + i * modulo, y0 + j * modulo,
+                                   x0 + (i + 1) * modulo, y0 + (j + 1) * modulo], fill=(0, 0, 0))
+    
+    imagem.filter(ImageFilter.GaussianBlur(1)).save(caminho, quality=90)
+
+
+def cronometrar(funcao) -> float:
+    """Menor tempo de REPETICOES execuções (segundos)"""
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def abrir_convertendo(caminho: Path, modo: str) -> Image.Image:
+    with Image.open(caminho) as imagem:
+        return imagem.convert(modo)
+
+
+def main():
+    largura = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    altura = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    preprocessador = PreprocessadorQR()
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        caminho = Path(tmpdir) / "cupom.jpg"
+        gerar_foto(caminho, largura, altura)
+        reduzida, _ = preprocessador.abrir(caminho)
+        
+        resultados = {
+            "open + convert('RGB')": (cronometrar(lambda: abrir_convertendo(caminho, 'RGB')), (largura, altura)),
+            "open + convert('L')": (cronometrar(lambda: abrir_convertendo(caminho, 'L')), (largura, altura)),
+            "PreprocessadorQR.abrir": (cronometrar(lambda: preprocessador.abrir(caminho)), reduzida.size),
+            "regiao_provavel": (cronometrar(lambda: regiao_provavel(reduzida)), reduzida.size),
+        }
+    
+    print(f"\nFoto {largura}x{altura} JPEG (QR_MAX_SIDE={preprocessador.max_lado})")
+    print(f"{'Etapa':<26}{'Tempo (ms)':>12}{'Pixels (MP)':>14}")
+    for nome, (duracao, tamanho) in resultados.items():
+        print(f"{nome:<26}{duracao * 1000:>12.1f}{tamanho[0] * tamanho[1] / 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""
+Benchmark: validação e totais por cupom, objeto a objeto vs ProdutoBatch
+
+Compara o caminho atual (Produto.validar() e somas em laço Python) com
+o ProdutoBatch (colunas numpy, validação e bincount vetorizados).
+
+Execute a partir da raiz do projeto:
+    python -m benchmarks.bench_produto_batch [quantidade_cupons]
+"""
+import sys
+import time
+
+from benchmarks.dados_sinteticos import gerar_cupons
+from src.models.produto_batch import ProdutoBatch
+
+
+def por_objeto(cupons: list):
+    """Valida cada Produto e soma os válidos por cupom"""
+    totais = []
+    for cupom in cupons:
+        total = 0.0
+        for produto in cupom.produtos:
+            if produto.validar()[0]:
+                total += produto.valor_total
+        totais.append(total)
+    return totais
+
+
+def por_coluna(lote: ProdutoBatch):
+    """Valida o lote inteiro e soma os válidos por cupom"""
+    validos, _ = lote.validar()
+    return lote.selecionar(validos).totais_por_cupom()
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 30_000
+    cupons = list(gerar_cupons(quantidade))
+    produtos = sum(len(cupom.produtos) for cupom in cupons)
+    
+    lote, tempo_construcao = cronometrar(ProdutoBatch.de_cupons, cupons)
+    esperado, tempo_objetos = cronometrar(por_objeto, cupons)
+    obtido, tempo_colunas = cronometrar(por_coluna, lote)
+    
+    assert all(abs(a - b) < 1e-6 for a, b in zip(esperado, obtido))
+    
+    print(f"\n{quantidade:,} cupons / {produtos:,} produtos".replace(',', '.'))
+    print(f"{'Caminho':<34}{'Tempo (s)':>10}")
+    print(f"{'Produto.validar() + laço':<34}{tempo_objetos:>10.3f}")
+    print(f"{'ProdutoBatch (construção)':<34}{tempo_construcao:>10.3f}")
+    print(f"{'ProdutoBatch (validar + totais)':<34}{tempo_colunas:>10.3f}")
+    print(f"Ganho na análise: {tempo_objetos / tempo_colunas:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Benchmark: ingestão e consultas no banco SQLite normalizado
+
+Mede a taxa de ingestão (produtos/s) com inserção em lote e a latência
+das consultas indexadas (CNPJ, período, NCM, GTIN).
+
+Execute a partir da raiz do projeto:
+    python -m benchmarks.bench_sqlite [quantidade_cupons]
+
+O padrão (33334 cupons x 30 produtos) gera ~1 milhão de produtos.
+"""
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.dados_sinteticos import gerar_cupons
+from src.repositories.sqlite_repository import SQLiteRepository
+
+
+def medir_consulta(funcao, *argumentos, repeticoes: int = 20) -> float:
+    """Retorna a mediana da latência da consulta em milissegundos"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(*argumentos)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 33334
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        caminho = Path(tmpdir) / "bench.db"
+        repositorio = SQLiteRepository(caminho=caminho)
+        
+        produtos = 0
+        amostra = None
+        inicio = time.perf_counter()
+        for cupom in gerar_cupons(quantidade):
+            repositorio.adicionar(cupom)
+            produtos += len(cupom.produtos)
+            amostra = amostra or cupom
+        repositorio.flush()
+        tempo_ingestao = time.perf_counter() - inicio
+        
+        produto = amostra.produtos[0]
+        consultas = [
+            ('Cupons por CNPJ', repositorio.buscar_cupons_por_cnpj, amostra.emitente.cnpj),
+            ('Cupons em 1 dia', repositorio.buscar_cupons_por_periodo,
+             datetime(2026, 1, 1), datetime(2026, 1, 1, 23, 59, 59)),
+            ('Produtos por NCM', repositorio.buscar_produtos_por_ncm, produto.codigo_ncm),
+            ('Produtos por GTIN', repositorio.buscar_produtos_por_gtin, produto.cod_gtin),
+        ]
+        latencias = [(nome, medir_consulta(funcao, *args)) for nome, funcao, *args in consultas]
+        
+        repositorio.fechar()
+        tamanho = caminho.stat().st_size
+    
+    print(f"\n{quantidade} cupons / {produtos} produtos")
+    print(f"Ingestão: {tempo_ingestao:.2f}s ({produtos / tempo_ingestao:,.0f} produtos/s), "
+          f"banco {tamanho / 1024 / 1024:.1f} MB")
+    print(f"{'Consulta':<20}{'Mediana (ms)':>14}")
+    for nome, latencia in latencias:
+        print(f"{nome:<20}{latencia:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Geração de cupons sintéticos para os benchmarks
+
+Os dados imitam um lote real: poucos estabelecimentos (mesma rede),
+descrições e NCMs repetidos e valores no formato da SEFAZ.
+"""
+import random
+from typing import Iterator, List
+
+from src.models.cupom_completo import CupomCompleto
+from src.models.emitente import Emitente
+from src.models.consumidor import Consumidor
+from src.models.cupom import Cupom
+from src.models.local_entrega import LocalEntrega
+from src.models.produto import Produto
+
+
+NCMS = ['22021000', '19059090', '04012010', '10063021', '17019900',
+        '15079011', '09012100', '34011190', '33051000', '48181000']
+
+DESCRICOES = ['REFRIGERANTE COLA 2L', 'PAO FRANCES KG', 'LEITE INTEGRAL 1L',
+              'ARROZ TIPO 1 5KG', 'ACUCAR REFINADO 1KG', 'OLEO DE SOJA 900ML',
+              'CAFE TORRADO 500G', 'SABONETE 90G', 'SHAMPOO 350ML', 'PAPEL HIGIENICO 12UN']
+
+
+def formatar_reais(valor: float) -> str:
+    """Formata um valor como na página da SEFAZ (ex: '1.234,56')"""
+    inteiro, centavos = f"{valor:.2f}".split('.')
+    inteiro = f"{int(inteiro):,}".replace(',', '.')
+    return f"{inteiro},{centavos}"
+
+
+def gerar_emitentes(quantidade: int) -> List[Emitente]:
+    """Gera estabelecimentos de uma mesma rede"""
+    return [
+        Emitente(
+            ie=f"{110000000000 + i}",
+            im=f"{3000000 + i}",
+            extrato_numero=None,
+            sat_numero=f"{900000000 + i}",
+            nome="SUPERMERCADO EXEMPLO LTDA",
+            cnpj=f"12.345.678/{i + 1:04d}-90",
+            endereco=f"AVENIDA PAULISTA, {1000 + i}",
+            bairro="BELA VISTA",
+            cep="01310-100",
+            uf="SAO PAULO - SP",
+        )
+        for i in range(quantidade)
+    ]
+
+
+def gerar_cupons(
+    quantidade: int,
+    produtos_por_cupom: int = 30,
+    quantidade_emitentes: int = 5,
+    semente: int = 42
+) -> Iterator[CupomCompleto]:
+    """
+    Gera cupons sintéticos sob demanda
+    
+    Args:
+        quantidade: Número de cupons
+        produtos_por_cupom: Produtos em cada cupom
+        quantidade_emitentes: Número de estabelecimentos distintos
+        semente: Semente do gerador aleatório (resultados reprodutíveis)
+    
+    Yields:
+        CupomCompleto
+    """
+    aleatorio = random.Random(semente)
+    emitentes = gerar_emitentes(quantidade_emitentes)
+    
+    for numero in range(quantidade):
+        produtos = []
+        total = 0.0
+        
+        for item in range(produtos_por_cupom):
+            indice = aleatorio.randrange(len(NCMS))
+            quantidade_item = aleatorio.choice([1, 1, 1, 2, 3, 0.5])
+            valor = round(aleatorio.uniform(0.5, 99.9), 2)
+            total += valor
+            
+            produtos.append(Produto(
+                codigo_ncm=NCMS[indice],
+                valor_liquido=formatar_reais(valor),
+                cod_produto=NCMS[indice],
+                cod_gtin=f"789{aleatorio.randrange(10 ** 9, 10 ** 10)}",
+                valor_total=formatar_reais(valor),
+                descricao=DESCRICOES[indice],
+                quantidade=f"{quantidade_item:.4f}".replace('.', ','),
+            ))
+        
+        dia = 1 + numero % 28
+        yield CupomCompleto(
+            emitente=emitentes[numero % quantidade_emitentes],
+            consumidor=Consumidor(cpf_cnpj="***.456.789-**", nome=None),
+            cupom=Cupom(
+                total=f"R$ {formatar_reais(total)}",
+                forma_pagamento="Cartão de Crédito",
+                troco="0,00",
+                tributos=formatar_reais(total * 0.18),
+                data_hora=f"{dia:02d}/01/2026 - {numero % 24:02d}:{numero % 60:02d}:00",
+                qr_code=f"CFe3526011234567800019059000420207000{numero:010d}",
+            ),
+            local_entrega=LocalEntrega(),
+            produtos=produtos,
+        )
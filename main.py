@@ -70,8 +70,9 @@ def processar_lote(controller):
     print("\nOpções de entrada:")
     print("1. Digitar chaves manualmente")
     print("2. Ler de arquivo (uma chave por linha)")
+    print("3. Ler QR Codes de uma pasta de imagens")
     
-    opcao = input("\nEscolha (1-2): ").strip()
+    opcao = input("\nEscolha (1-3): ").strip()
     
     chaves = []
     
@@ -89,8 +90,7 @@ def processar_lote(controller):
         caminho = input("\nCaminho do arquivo: ").strip()
         
         try:
-            with open(caminho, 'r', encoding='utf-8') as f:
-                chaves = [linha.strip() for linha in f if linha.strip()]
+            chaves = list(controller.ler_chaves_arquivo(caminho))
         except FileNotFoundError:
             print(f"\nERRO: Arquivo não encontrado: {caminho}")
             input("\nPressione ENTER para continuar...")
@@ -99,6 +99,12 @@ def processar_lote(controller):
             print(f"\nERRO ao ler arquivo: {str(e)}")
             input("\nPressione ENTER para continuar...")
             return
+    
+    elif opcao == '3':
+        caminho = input("\nPasta ou padrão (ex: fotos/**/*.jpg): ").strip()
+        todas = input("Folhas com vários cupons (TIFF/PDF digitalizados)? (s/n): ").strip().lower() == 's'
+        processar_imagens(controller, caminho, todas)
+        return
     else:
         print("\nOpção inválida")
         input("\nPressione ENTER para continuar...")
@@ -138,6 +144,43 @@ def processar_lote(controller):
     input("\nPressione ENTER para continuar...")
 
 
+def processar_imagens(controller, caminho, todas):
+    """Processa os cupons à medida que os QR Codes da pasta são lidos"""
+    salvar = input("Deseja salvar em CSV? (s/n): ").lower().strip()
+    salvar_csv = salvar == 's'
+    
+    confirmar = input(f"\nProcessar os cupons de {caminho}? (s/n): ").lower().strip()
+    
+    if confirmar != 's':
+        print("\nOperação cancelada")
+        input("\nPressione ENTER para continuar...")
+        return
+    
+    # Cada chave vai para o scraping assim que é lida, sem esperar a pasta inteira
+    print("\nProcessando lote...")
+    resultado = None
+    for resultado in controller.processar_cupons_stream(
+        controller.ler_chaves_imagens(caminho, todas=todas),
+        salvar_csv=salvar_csv
+    ):
+        pass
+    
+    if resultado is None:
+        print("\nNenhuma chave encontrada")
+        input("\nPressione ENTER para continuar...")
+        return
+    
+    # Exibe resumo
+    print("\n" + "="*70)
+    print("RESUMO")
+    print("="*70)
+    print(f"Total: {resultado['indice']}")
+    print(f"Sucesso: {resultado['total_sucesso']}")
+    print(f"Erro: {resultado['total_erro']}")
+    
+    input("\nPressione ENTER para continuar...")
+
+
 def validar_chave(controller):
     """Valida uma chave sem processar"""
     print("\n" + "="*70)
@@ -184,6 +227,7 @@ def main():
         
         elif opcao == '4':
             print("\nEncerrando sistema...")
+            controller.fechar()
             print("Até logo!")
             sys.exit(0)
         
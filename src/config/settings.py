@@ -66,6 +66,11 @@ CSV_SEPARATOR = ';'
 # Decimal CSV (padrão brasileiro)
 CSV_DECIMAL = ','
 
+# Layout do CSV:
+# - 'unico': uma linha por produto repetindo emitente/consumidor/cupom/entrega
+# - 'normalizado': arquivo *_cupons.csv + arquivo *_produtos.csv ligados pela chave
+CSV_LAYOUT = os.getenv('CSV_LAYOUT', 'unico')
+
 # Encoding dos arquivos
 FILE_ENCODING = 'utf-8-sig'  # UTF-8 com BOM (compatível com Excel)
 
@@ -103,4 +108,171 @@ TAMANHO_CHAVE_ACESSO = 44
 MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))
 
 # Tempo de espera entre tentativas (segundos)
-RETRY_DELAY = int(os.getenv('RETRY_DELAY', '5'))
\ No newline at end of file
+RETRY_DELAY = int(os.getenv('RETRY_DELAY', '5'))
+
+# ============================================================
+# PROGRESSO DO LOTE
+# ============================================================
+# Arquivo JSON com o progresso do lote, lido por monitores externos
+# (vazio = não grava arquivo)
+PROGRESS_FILE = os.getenv('PROGRESS_FILE', '')
+
+# Intervalo mínimo entre gravações do arquivo de progresso (segundos)
+PROGRESS_WRITE_INTERVAL = float(os.getenv('PROGRESS_WRITE_INTERVAL', '2'))
+
+# Quantidade de cupons recentes usada para taxa, ETA e percentis
+PROGRESS_WINDOW = int(os.getenv('PROGRESS_WINDOW', '50'))
+
+# ============================================================
+# FILA DE TRABALHO (várias máquinas)
+# ============================================================
+# Arquivo SQLite da fila compartilhada (pode estar em sistema de arquivos em rede)
+QUEUE_DB_PATH = Path(os.getenv('QUEUE_DB_PATH', str(BASE_DIR / 'fila_chaves.db')))
+
+# Tempo que uma chave fica reservada para um worker antes de voltar à fila (segundos)
+# Deve cobrir a resolução do captcha (CAPTCHA_TIMEOUT) mais a extração
+QUEUE_VISIBILITY_TIMEOUT = float(os.getenv('QUEUE_VISIBILITY_TIMEOUT', '900'))
+
+# Número máximo de entregas de uma mesma chave antes de marcá-la como falha
+QUEUE_MAX_ATTEMPTS = int(os.getenv('QUEUE_MAX_ATTEMPTS', '3'))
+
+# Tempo máximo aguardando o lock do banco da fila (segundos)
+QUEUE_LOCK_TIMEOUT = float(os.getenv('QUEUE_LOCK_TIMEOUT', '30'))
+
+# Intervalo entre consultas quando a fila está vazia mas há chaves em andamento (segundos)
+QUEUE_POLL_INTERVAL = float(os.getenv('QUEUE_POLL_INTERVAL', '10'))
+
+# ============================================================
+# CSV EM LOTE (arquivo único por lote)
+# ============================================================
+# Máximo de linhas de dados por arquivo antes de rotacionar (0 = sem limite)
+CSV_BATCH_MAX_ROWS = int(os.getenv('CSV_BATCH_MAX_ROWS', '0'))
+
+# Tamanho máximo por arquivo antes de rotacionar, em bytes (0 = sem limite)
+CSV_BATCH_MAX_BYTES = int(os.getenv('CSV_BATCH_MAX_BYTES', str(256 * 1024 * 1024)))
+
+# Número de cupons entre flushes do arquivo do lote
+CSV_BATCH_FLUSH_EVERY = int(os.getenv('CSV_BATCH_FLUSH_EVERY', '10'))
+
+# Tamanho do buffer de escrita do arquivo do lote (bytes)
+CSV_BATCH_BUFFER_SIZE = int(os.getenv('CSV_BATCH_BUFFER_SIZE', str(1024 * 1024)))
+
+# ============================================================
+# EXPORTAÇÃO COLUNAR (Parquet / Arrow)
+# ============================================================
+# Linhas (produtos) acumuladas antes de gravar cada row group
+PARQUET_ROW_GROUP_SIZE = int(os.getenv('PARQUET_ROW_GROUP_SIZE', '50000'))
+
+# Codec de compressão: snappy, zstd, gzip, lz4 ou none
+PARQUET_COMPRESSION = os.getenv('PARQUET_COMPRESSION', 'zstd')
+
+
+# ============================================================
+# BANCO SQLITE (modelo normalizado)
+# ============================================================
+# Arquivo do banco de cupons
+SQLITE_DB_PATH = Path(os.getenv('SQLITE_DB_PATH', str(OUTPUT_DIR / 'cupons.db')))
+
+# Cupons acumulados antes de cada transação de inserção em lote
+SQLITE_BATCH_SIZE = int(os.getenv('SQLITE_BATCH_SIZE', '500'))
+
+# ============================================================
+# LEITURA DE QR CODES (fotos e pastas de imagens)
+# ============================================================
+# Processos que decodificam as imagens em paralelo (0 = número de CPUs)
+QR_DECODE_WORKERS = int(os.getenv('QR_DECODE_WORKERS', '0'))
+
+# Maior lado (pixels) da imagem na primeira tentativa de leitura (0 = sem redução)
+QR_MAX_SIDE = int(os.getenv('QR_MAX_SIDE', '1600'))
+
+# Transformações tentadas, em ordem, até a primeira leitura:
+# reduzida, recorte, original, limiar, nitidez, rotacao
+QR_TRANSFORMS = os.getenv('QR_TRANSFORMS', 'reduzida,recorte,original,limiar,nitidez,rotacao')
+
+# Resolução das páginas de PDF digitalizado (requer: pip install pymupdf)
+QR_PDF_DPI = int(os.getenv('QR_PDF_DPI', '200'))
+
+# Cache das leituras pelo conteúdo do arquivo (a mesma imagem reenviada não é decodificada de novo)
+QR_CACHE_ENABLED = os.getenv('QR_CACHE_ENABLED', 'false').lower() == 'true'
+QR_CACHE_PATH = Path(os.getenv('QR_CACHE_PATH', str(OUTPUT_DIR / 'qrcode_cache.db')))
+
+# Reconhece também a mesma foto reduzida ou recomprimida (hash perceptual da região do
+# QR Code; a chave é confirmada lendo o recorte)
+QR_CACHE_PHASH = os.getenv('QR_CACHE_PHASH', 'false').lower() == 'true'
+
+# Bits de diferença aceitos entre os hashes perceptuais (de 64; no máximo 7)
+QR_CACHE_PHASH_DISTANCE = int(os.getenv('QR_CACHE_PHASH_DISTANCE', '6'))
+
+# ============================================================
+# ÍNDICE DE CÓDIGOS DE BARRAS (GTIN -> cupom, item)
+# ============================================================
+# Arquivo do índice (destino 'gtin' em OUTPUT_SINKS)
+GTIN_INDEX_PATH = Path(os.getenv('GTIN_INDEX_PATH', str(OUTPUT_DIR / 'gtin.db')))
+
+# ============================================================
+# EXPORTAÇÃO XML (layout CF-e)
+# ============================================================
+# Número de cupons entre flushes do arquivo XML do lote
+XML_FLUSH_EVERY = int(os.getenv('XML_FLUSH_EVERY', '100'))
+
+# ============================================================
+# EXPORTAÇÃO JSON LINES
+# ============================================================
+# Arquivo compartilhado (um cupom por linha) dentro de OUTPUT_DIR
+JSONL_FILE = os.getenv('JSONL_FILE', 'cupons.jsonl')
+
+# Compacta o arquivo com gzip (acrescenta .gz ao nome)
+JSONL_GZIP = os.getenv('JSONL_GZIP', 'false').lower() == 'true'
+
+# ============================================================
+# EXPORTAÇÃO EXCEL
+# ============================================================
+# Linhas por aba (incluindo cabeçalho) antes de continuar em uma nova aba
+# O Excel aceita no máximo 1.048.576
+EXCEL_MAX_ROWS = int(os.getenv('EXCEL_MAX_ROWS', '1048576'))
+
+# ============================================================
+# COMPRESSÃO DOS ARQUIVOS DE SAÍDA (CSV, JSON Lines, XML)
+# ============================================================
+# none, gzip ou zstd (zstd requer: pip install zstandard)
+# Nomes terminados em .gz / .zst também ativam a compressão correspondente
+OUTPUT_COMPRESSION = os.getenv('OUTPUT_COMPRESSION', 'none')
+
+# Nível de compressão (0 = padrão do formato: gzip 6, zstd 3)
+COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', '0'))
+
+# Tamanho do buffer de escrita antes do compressor (bytes)
+COMPRESSION_BUFFER_SIZE = int(os.getenv('COMPRESSION_BUFFER_SIZE', str(1024 * 1024)))
+
+# ============================================================
+# PERSISTÊNCIA EM SEGUNDO PLANO (write-behind)
+# ============================================================
+# Grava os cupons em uma thread dedicada (o scraping não espera o disco)
+WRITE_BEHIND = os.getenv('WRITE_BEHIND', 'false').lower() == 'true'
+
+# Máximo de cupons aguardando gravação (cheia = o scraping espera)
+WRITE_BEHIND_QUEUE_SIZE = int(os.getenv('WRITE_BEHIND_QUEUE_SIZE', '100'))
+
+# Máximo de cupons publicados em cada commit em grupo (um fsync por lote)
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', '20'))
+
+# Destinos que recebem cada cupom, separados por vírgula (vazio = apenas CSV)
+# csv, csv_lote, parquet, sqlite, gtin, jsonl, xml, excel — cada um em sua thread
+OUTPUT_SINKS = os.getenv('OUTPUT_SINKS', '')
+
+# fsync antes de publicar arquivos atômicos (false = mais rápido, menos durável)
+WRITE_FSYNC = os.getenv('WRITE_FSYNC', 'true').lower() == 'true'
+
+# ============================================================
+# TEXTOS REPETIDOS (emitente, NCM, descrição)
+# ============================================================
+# Máximo de textos distintos mantidos no pool compartilhado pelo lote
+# (uma cópia por texto; 0 = desativado)
+INTERN_POOL_SIZE = int(os.getenv('INTERN_POOL_SIZE', '50000'))
+
+# ============================================================
+# TABELA NCM (descrição e capítulo dos produtos)
+# ============================================================
+# Arquivo da tabela: CSV "codigo;descricao" ou JSON da tabela vigente do
+# Siscomex (vazio = sem tabela; carregada só na primeira consulta)
+NCM_TABLE_PATH = os.getenv('NCM_TABLE_PATH', '')
\ No newline at end of file
@@ -1,12 +1,24 @@
 """
 Controller principal para orquestração do fluxo completo de extração
 """
+import time
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-from src.services.qrcode_service import QRCodeService
+from src.config import settings
+from src.services.qrcode_service import STATUS_OK, QRCodeService
+from src.services.qrcode_lote_service import QRCodeLoteService
 from src.services.web_scraper_service import WebScraperService
-from src.repositories.csv_repository import CSVRepository
+from src.services.progresso_service import ProgressoLote
+from src.services.saida_service import (
+    Destino,
+    DestinoRepositorio,
+    DistribuidorSaidas,
+    criar_destinos,
+)
+from src.repositories.csv_repository import CSVRepository, CSVLoteWriter
+from src.repositories.fila_repository import FilaRepository, Tarefa, gerar_worker_id
 from src.models.cupom_completo import CupomCompleto
 
 
@@ -17,26 +29,57 @@ class CupomController:
     Fluxo:
     1. Validação da chave de acesso
     2. Extração dos dados (web scraping)
-    3. Salvamento em arquivo (CSV)
+    3. Salvamento em arquivo (CSV ou os destinos de saída configurados)
     """
     
-    def __init__(self, headless: bool = False, diretorio_saida: Optional[Path] = None):
+    def __init__(
+        self,
+        headless: bool = False,
+        diretorio_saida: Optional[Path] = None,
+        escrita_em_segundo_plano: Optional[bool] = None,
+        destinos: Optional[List[Destino]] = None
+    ):
         """
         Inicializa o controller
         
         Args:
             headless: Se True, executa navegador em modo headless (sem interface)
             diretorio_saida: Diretório onde salvar os arquivos (opcional)
+            escrita_em_segundo_plano: Salva os CSVs em uma thread dedicada,
+                sem bloquear o scraping (padrão: settings.WRITE_BEHIND)
+            destinos: Destinos de saída que recebem cada cupom, cada um em
+                sua própria thread (padrão: settings.OUTPUT_SINKS; se vazio,
+                apenas o CSV)
         """
         self.qrcode_service = QRCodeService()
         self.web_scraper = WebScraperService(headless=headless)
         self.csv_repository = CSVRepository(diretorio=diretorio_saida)
+        
+        if destinos is None and settings.OUTPUT_SINKS:
+            destinos = criar_destinos(settings.OUTPUT_SINKS.split(','), diretorio_saida)
+        
+        if destinos is None:
+            if escrita_em_segundo_plano is None:
+                escrita_em_segundo_plano = settings.WRITE_BEHIND
+            if escrita_em_segundo_plano:
+                destinos = [DestinoRepositorio('csv', self.csv_repository)]
+        
+        # Sem destinos: o CSV é salvo na própria thread do scraping
+        self.saidas = DistribuidorSaidas(destinos) if destinos else None
+        
+        # Tempo gasto em cada etapa do último cupom processado (segundos)
+        self.tempos_ultimo_cupom = {}
+        
+        # Gravação do último cupom processado, por destino (Future com o
+        # Path salvo ou a exceção; em segundo plano, ainda pode estar em curso)
+        self.salvamentos_ultimo_cupom: Dict[str, Future] = {}
     
     def processar_cupom(
-        self, 
-        entrada: str, 
+        self,
+        entrada: str,
         salvar_csv: bool = True,
-        nome_arquivo: Optional[str] = None
+        nome_arquivo: Optional[str] = None,
+        lote_csv: Optional[CSVLoteWriter] = None
     ) -> Tuple[bool, Optional[CupomCompleto], Optional[Path], str]:
         """
         Processa um cupom fiscal completo
@@ -45,18 +88,24 @@ class CupomController:
             entrada: Chave de acesso (digitada, com espaços/hífens) ou caminho para imagem QR
             salvar_csv: Se True, salva automaticamente em CSV
             nome_arquivo: Nome customizado para o arquivo CSV (opcional)
+            lote_csv: Arquivo CSV de lote aberto; se informado, o cupom é
+                acrescentado a ele em vez de gerar um arquivo próprio
         
         Returns:
             Tupla com:
             - sucesso (bool): True se processou com sucesso
             - cupom (CupomCompleto): Dados extraídos (ou None se erro)
-            - arquivo (Path): Caminho do arquivo salvo (ou None se não salvou)
+            - arquivo (Path): Caminho do arquivo salvo (ou None se não salvou
+              ou se o salvamento ficou para a thread de escrita)
             - mensagem (str): Mensagem de status/erro
         """
         print("\n" + "="*70)
         print("INICIANDO PROCESSAMENTO DO CUPOM")
         print("="*70)
         
+        self.tempos_ultimo_cupom = {}
+        self.salvamentos_ultimo_cupom = {}
+        
         # 1. Validação da chave
         print("\n[1/3] Validando chave de acesso...")
         chave = self.qrcode_service.processar_entrada(entrada)
@@ -72,8 +121,11 @@ class CupomController:
         print("\n[2/3] Extraindo dados do cupom (navegador será aberto)...")
         print("IMPORTANTE: Você precisará resolver o captcha manualmente!\n")
         
+        inicio_extracao = time.monotonic()
+        
         try:
             cupom_completo = self.web_scraper.extrair_dados_cupom(chave)
+            self._registrar_tempos_extracao(time.monotonic() - inicio_extracao)
             
             if not cupom_completo:
                 mensagem = "ERRO: Não foi possível extrair os dados do cupom"
@@ -81,8 +133,9 @@ class CupomController:
                 return False, None, None, mensagem
             
             print("\nSUCESSO: Dados extraídos com sucesso!")
-            
+        
         except Exception as e:
+            self._registrar_tempos_extracao(time.monotonic() - inicio_extracao)
             mensagem = f"ERRO na extração: {str(e)}"
             print(f"\n{mensagem}")
             return False, None, None, mensagem
@@ -92,15 +145,31 @@ class CupomController:
         
         if salvar_csv:
             print("\n[3/3] Salvando dados em CSV...")
+            inicio_salvamento = time.monotonic()
             
             try:
-                arquivo_salvo = self.csv_repository.salvar(
-                    cupom_completo, 
-                    nome_arquivo=nome_arquivo
-                )
+                if lote_csv is not None:
+                    arquivo_salvo = lote_csv.adicionar(cupom_completo)
+                elif self.saidas is not None:
+                    self.salvamentos_ultimo_cupom = self.saidas.enviar(cupom_completo, nome_arquivo=nome_arquivo)
+                    self.tempos_ultimo_cupom['salvamento'] = time.monotonic() - inicio_salvamento
+                    print(f"SUCESSO: Cupom enviado para salvamento em segundo plano "
+                          f"({', '.join(self.saidas.canais)})")
+                    return True, cupom_completo, None, "Cupom processado (salvamento em segundo plano)"
+                else:
+                    arquivo_salvo = self.csv_repository.salvar(
+                        cupom_completo,
+                        nome_arquivo=nome_arquivo
+                    )
+                self.tempos_ultimo_cupom['salvamento'] = time.monotonic() - inicio_salvamento
+                self.salvamentos_ultimo_cupom = {'csv': Future()}
+                self.salvamentos_ultimo_cupom['csv'].set_result(arquivo_salvo)
                 print(f"SUCESSO: Arquivo salvo em {arquivo_salvo}")
-                
+            
             except Exception as e:
+                self.tempos_ultimo_cupom['salvamento'] = time.monotonic() - inicio_salvamento
+                self.salvamentos_ultimo_cupom = {'csv': Future()}
+                self.salvamentos_ultimo_cupom['csv'].set_exception(e)
                 mensagem = f"AVISO: Dados extraídos mas erro ao salvar CSV: {str(e)}"
                 print(f"\n{mensagem}")
                 return True, cupom_completo, None, mensagem
@@ -115,17 +184,39 @@ class CupomController:
         mensagem = "Cupom processado e salvo com sucesso" if salvar_csv else "Cupom processado com sucesso"
         return True, cupom_completo, arquivo_salvo, mensagem
     
+    def _registrar_tempos_extracao(self, duracao: float):
+        """
+        Separa o tempo da extração em espera do captcha e extração propriamente dita
+        
+        Args:
+            duracao: Tempo total gasto em extrair_dados_cupom (segundos)
+        """
+        captcha = self.web_scraper.tempos_etapas.get('captcha', 0.0)
+        
+        self.tempos_ultimo_cupom['captcha'] = captcha
+        self.tempos_ultimo_cupom['extracao'] = max(duracao - captcha, 0.0)
+    
     def processar_multiplos_cupons(
         self,
         chaves: list,
-        salvar_csv: bool = True
+        salvar_csv: bool = True,
+        arquivo_progresso: Optional[Path] = None,
+        arquivo_unico: bool = False
     ) -> dict:
         """
         Processa múltiplos cupons em lote
         
+        Após cada cupom exibe uma linha de status (taxa, ETA, percentis por etapa)
+        e, se configurado, atualiza o arquivo JSON de progresso.
+        
+        Para lotes grandes prefira processar_cupons_stream, que não acumula
+        os resultados em memória.
+        
         Args:
             chaves: Lista de chaves de acesso
             salvar_csv: Se True, salva cada cupom em CSV
+            arquivo_progresso: Arquivo JSON de progresso (padrão: settings.PROGRESS_FILE)
+            arquivo_unico: Se True, grava todos os cupons em um único CSV (com rotação)
         
         Returns:
             Dicionário com estatísticas:
@@ -133,6 +224,7 @@ class CupomController:
             - sucesso: número de cupons processados com sucesso
             - erro: número de cupons com erro
             - cupons: lista com resultados individuais
+            - textos: métricas do pool de textos repetidos (PoolTextos.metricas)
         """
         print("\n" + "="*70)
         print(f"PROCESSAMENTO EM LOTE - {len(chaves)} CUPONS")
@@ -145,37 +237,354 @@ class CupomController:
             'cupons': []
         }
         
-        for idx, entrada in enumerate(chaves, 1):
-            print(f"\n\n>>> Processando cupom {idx}/{len(chaves)}")
+        for resultado in self.processar_cupons_stream(
+            chaves,
+            salvar_csv=salvar_csv,
+            arquivo_progresso=arquivo_progresso,
+            arquivo_unico=arquivo_unico
+        ):
+            resultados['sucesso'] = resultado['total_sucesso']
+            resultados['erro'] = resultado['total_erro']
             
-            sucesso, cupom, arquivo, mensagem = self.processar_cupom(
-                entrada, 
-                salvar_csv=salvar_csv
+            entrada = resultado['chave']
+            resultados['cupons'].append({
+                'chave': entrada[:20] + "..." if len(entrada) > 20 else entrada,
+                'sucesso': resultado['sucesso'],
+                'arquivo': resultado['arquivo'],
+                'mensagem': resultado['mensagem']
+            })
+        
+        resultados['textos'] = self.web_scraper.textos.metricas()
+        
+        # Resumo final
+        print("\n\n" + "="*70)
+        print("RESUMO DO PROCESSAMENTO EM LOTE")
+        print("="*70)
+        print(f"Total: {resultados['total']}")
+        print(f"Sucesso: {resultados['sucesso']}")
+        print(f"Erro: {resultados['erro']}")
+        print(f"Textos: {self.web_scraper.textos.resumo()}")
+        print("="*70)
+        
+        return resultados
+    
+    def processar_cupons_stream(
+        self,
+        chaves: Iterable[str],
+        salvar_csv: bool = True,
+        total: Optional[int] = None,
+        arquivo_progresso: Optional[Path] = None,
+        arquivo_unico: bool = False
+    ) -> Iterator[dict]:
+        """
+        Processa cupons sob demanda, devolvendo cada resultado assim que fica pronto
+        
+        Aceita qualquer iterável (lista, gerador, arquivo lido linha a linha) e
+        não guarda resultados: a memória é constante independente do tamanho
+        do lote. O chamador pode persistir cada resultado ou interromper o
+        lote a qualquer momento (break / close()).
+        
+        Args:
+            chaves: Iterável de chaves de acesso (ou caminhos de imagem)
+            salvar_csv: Se True, salva cada cupom em CSV
+            total: Número total de chaves, para o ETA (padrão: len(chaves) se disponível)
+            arquivo_progresso: Arquivo JSON de progresso (padrão: settings.PROGRESS_FILE)
+            arquivo_unico: Se True, grava todos os cupons em um único CSV mantido
+                aberto (com rotação por tamanho/linhas) em vez de um arquivo por cupom.
+                Com destinos de saída configurados, use o destino 'csv_lote'
+        
+        Yields:
+            Dicionário por cupom com:
+            - indice: posição do cupom no lote (começa em 1)
+            - chave: entrada processada
+            - sucesso, cupom, arquivo, mensagem: resultado de processar_cupom
+            - total_sucesso / total_erro: contadores acumulados até este cupom
+        
+        Raises:
+            ValueError: Se arquivo_unico for usado com destinos de saída
+        """
+        if salvar_csv and arquivo_unico and self.saidas is not None:
+            # O lote seria gravado no lugar dos destinos, que não receberiam os cupons
+            raise ValueError(
+                "arquivo_unico não se aplica com destinos de saída "
+                f"({', '.join(self.saidas.canais)}); use o destino 'csv_lote' "
+                "(ex: OUTPUT_SINKS=csv_lote,parquet)"
             )
-            
-            if sucesso:
-                resultados['sucesso'] += 1
+        
+        if total is None and hasattr(chaves, '__len__'):
+            total = len(chaves)
+        
+        progresso = ProgressoLote(
+            total=total,
+            arquivo=arquivo_progresso or settings.PROGRESS_FILE or None
+        )
+        
+        lote_csv = self.csv_repository.abrir_lote() if salvar_csv and arquivo_unico else None
+        
+        total_sucesso = 0
+        total_erro = 0
+        
+        try:
+            for idx, entrada in enumerate(chaves, 1):
+                print(f"\n\n>>> Processando cupom {idx}/{total if total is not None else '?'}")
+                
+                sucesso, cupom, arquivo, mensagem = self.processar_cupom(
+                    entrada,
+                    salvar_csv=salvar_csv,
+                    lote_csv=lote_csv
+                )
+                
+                if sucesso:
+                    total_sucesso += 1
+                else:
+                    total_erro += 1
+                
+                progresso.registrar(sucesso, self.tempos_ultimo_cupom)
+                print(f"\n[PROGRESSO] {progresso.linha_status()}")
+                
+                yield {
+                    'indice': idx,
+                    'chave': entrada,
+                    'sucesso': sucesso,
+                    'cupom': cupom,
+                    'arquivo': str(arquivo) if arquivo else None,
+                    'mensagem': mensagem,
+                    'total_sucesso': total_sucesso,
+                    'total_erro': total_erro,
+                }
+        
+        finally:
+            if lote_csv is not None:
+                lote_csv.fechar()
+            if self.saidas is not None:
+                self.saidas.aguardar()
+            progresso.finalizar()
+    
+    @staticmethod
+    def ler_chaves_arquivo(caminho: Path, encoding: str = 'utf-8') -> Iterator[str]:
+        """
+        Lê chaves de um arquivo texto, uma por linha, sob demanda
+        
+        Linhas vazias são ignoradas. O arquivo nunca é carregado inteiro em memória.
+        
+        Args:
+            caminho: Arquivo com uma chave por linha
+            encoding: Encoding do arquivo
+        
+        Yields:
+            Chaves sem espaços nas pontas
+        """
+        with open(caminho, 'r', encoding=encoding) as arquivo:
+            for linha in arquivo:
+                linha = linha.strip()
+                if linha:
+                    yield linha
+    
+    @staticmethod
+    def ler_chaves_imagens(
+        origem: Union[str, Path, Iterable[Path]],
+        processos: Optional[int] = None,
+        todas: bool = False,
+        cache: Union[bool, str, Path, None] = None
+    ) -> Iterator[str]:
+        """
+        Lê as chaves dos QR Codes de uma pasta de imagens, sob demanda
+        
+        As imagens são decodificadas em paralelo (QRCodeLoteService) enquanto
+        o lote consome as chaves já lidas, ex:
+        controller.processar_cupons_stream(controller.ler_chaves_imagens("fotos/"))
+        
+        Args:
+            origem: Pasta, padrão glob (ex: "fotos/**/*.jpg") ou lista de imagens
+            processos: Processos de decodificação (padrão: settings.QR_DECODE_WORKERS)
+            todas: Lê todos os QR Codes de cada arquivo (folhas digitalizadas
+                com vários cupons, TIFF com vários quadros, PDF)
+            cache: Cache das leituras (padrão: settings.QR_CACHE_ENABLED;
+                ver QRCodeLoteService)
+        
+        Yields:
+            Chaves de acesso distintas
+        """
+        leitor = QRCodeLoteService(processos=processos, todas=todas, cache=cache)
+        
+        for leitura in leitor.decodificar(origem):
+            if leitura.status == STATUS_OK:
+                yield leitura.chave
+            elif leitura.pagina is not None:
+                print(f"AVISO: {leitura.caminho.name} (página {leitura.pagina}): {leitura.status}")
             else:
-                resultados['erro'] += 1
+                print(f"AVISO: {leitura.caminho.name}: {leitura.status}")
+        
+        print(f"QR Codes: {leitor.resumo()}")
+        print(f"Leitura: {leitor.preprocessamento.resumo()}")
+    
+    def processar_fila(
+        self,
+        fila: FilaRepository,
+        salvar_csv: bool = True,
+        worker_id: Optional[str] = None,
+        max_cupons: Optional[int] = None,
+        aguardar_em_andamento: bool = True,
+        arquivo_progresso: Optional[Path] = None
+    ) -> dict:
+        """
+        Processa cupons retirados de uma fila de trabalho compartilhada
+        
+        Vários workers (em uma ou mais máquinas) podem consumir a mesma fila.
+        Cada chave é alugada (lease) por um tempo de visibilidade; se o worker
+        cair, o lease expira e a chave é entregue a outro worker.
+        
+        A chave só é confirmada (ack) depois que o cupom foi gravado em todos
+        os destinos; com escrita em segundo plano o scraping segue para a
+        próxima chave enquanto isso. Se algum destino falhar, a chave é
+        rejeitada e volta para a fila. Destinos de lote só gravam no flush:
+        se o lease mais antigo passar da metade, os destinos são
+        sincronizados antes que ele expire (e sempre ao fim da fila).
+        
+        Args:
+            fila: Fila de trabalho (ex: SQLiteFilaRepository)
+            salvar_csv: Se True, salva cada cupom em CSV
+            worker_id: Identificador deste worker (padrão: hostname-pid)
+            max_cupons: Limite de cupons a processar neste worker (opcional)
+            aguardar_em_andamento: Se True, quando não houver chave disponível mas
+                outras estiverem em andamento, aguarda seus leases (podem expirar)
+            arquivo_progresso: Arquivo JSON de progresso (padrão: settings.PROGRESS_FILE)
+        
+        Returns:
+            Dicionário com estatísticas (mesmo formato de processar_multiplos_cupons)
+        """
+        worker_id = worker_id or gerar_worker_id()
+        
+        print("\n" + "="*70)
+        print(f"PROCESSAMENTO DA FILA - WORKER {worker_id}")
+        print("="*70)
+        
+        resultados = {
+            'total': 0,
+            'sucesso': 0,
+            'erro': 0,
+            'cupons': []
+        }
+        
+        # Cupons extraídos aguardando a gravação para o ack
+        aguardando: List[Tuple[Tarefa, Dict[str, Future], dict]] = []
+        sincronizacao: Dict[str, Future] = {}
+        
+        progresso = ProgressoLote(
+            total=max_cupons,
+            arquivo=arquivo_progresso or settings.PROGRESS_FILE or None
+        )
+        
+        while max_cupons is None or resultados['total'] < max_cupons:
+            tarefa = fila.obter(worker_id)
             
-            resultados['cupons'].append({
-                'chave': entrada[:20] + "..." if len(entrada) > 20 else entrada,
+            if tarefa is None:
+                if aguardando:
+                    # Sem chave nova: confirma as próprias antes de contar as em andamento
+                    if self.saidas is not None:
+                        self.saidas.sincronizar()
+                    aguardando = self._confirmar_gravados(fila, aguardando, resultados, aguardar=True)
+                    continue
+                if aguardar_em_andamento and fila.possui_trabalho():
+                    time.sleep(settings.QUEUE_POLL_INTERVAL)
+                    continue
+                break
+            
+            resultados['total'] += 1
+            print(f"\n\n>>> Processando cupom {resultados['total']} da fila "
+                  f"(tentativa {tarefa.tentativas})")
+            
+            try:
+                sucesso, cupom, arquivo, mensagem = self.processar_cupom(
+                    tarefa.chave,
+                    salvar_csv=salvar_csv
+                )
+            except Exception as e:
+                sucesso, arquivo, mensagem = False, None, f"ERRO inesperado: {str(e)}"
+            
+            registro = {
+                'chave': tarefa.chave[:20] + "..." if len(tarefa.chave) > 20 else tarefa.chave,
                 'sucesso': sucesso,
                 'arquivo': str(arquivo) if arquivo else None,
                 'mensagem': mensagem
-            })
+            }
+            resultados['cupons'].append(registro)
+            
+            if sucesso:
+                aguardando.append((tarefa, dict(self.salvamentos_ultimo_cupom), registro))
+            else:
+                resultados['erro'] += 1
+                fila.rejeitar(tarefa, erro=mensagem)
+            
+            aguardando = self._confirmar_gravados(fila, aguardando, resultados)
+            
+            if (aguardando and self.saidas is not None
+                    and aguardando[0][0].expira_em - time.time() < fila.visibilidade / 2
+                    and all(futuro.done() for futuro in sincronizacao.values())):
+                sincronizacao = self.saidas.sincronizar()
+            
+            progresso.registrar(sucesso, self.tempos_ultimo_cupom)
+            print(f"\n[PROGRESSO] {progresso.linha_status()}")
+        
+        if aguardando and self.saidas is not None:
+            self.saidas.sincronizar()
+        self._confirmar_gravados(fila, aguardando, resultados, aguardar=True)
+        progresso.finalizar()
+        resultados['textos'] = self.web_scraper.textos.metricas()
         
-        # Resumo final
         print("\n\n" + "="*70)
-        print("RESUMO DO PROCESSAMENTO EM LOTE")
+        print(f"RESUMO DO WORKER {worker_id}")
         print("="*70)
         print(f"Total: {resultados['total']}")
         print(f"Sucesso: {resultados['sucesso']}")
         print(f"Erro: {resultados['erro']}")
+        print(f"Textos: {self.web_scraper.textos.resumo()}")
         print("="*70)
         
         return resultados
     
+    @staticmethod
+    def _confirmar_gravados(
+        fila: FilaRepository,
+        aguardando: List[Tuple[Tarefa, Dict[str, Future], dict]],
+        resultados: dict,
+        aguardar: bool = False
+    ) -> List[Tuple[Tarefa, Dict[str, Future], dict]]:
+        """
+        Confirma as tarefas cujo cupom já foi gravado em todos os destinos
+        
+        Args:
+            fila: Fila de trabalho
+            aguardando: (tarefa, Futures da gravação, registro em resultados['cupons'])
+            resultados: Estatísticas de processar_fila (atualizadas aqui)
+            aguardar: Espera as gravações ainda em curso (fim da fila)
+        
+        Returns:
+            Itens cuja gravação ainda não terminou
+        """
+        restantes = []
+        
+        for tarefa, salvamentos, registro in aguardando:
+            if not aguardar and not all(futuro.done() for futuro in salvamentos.values()):
+                restantes.append((tarefa, salvamentos, registro))
+                continue
+            
+            erros = [f"{nome}: {futuro.exception()}" for nome, futuro in salvamentos.items()
+                     if futuro.exception() is not None]
+            
+            if erros:
+                registro['sucesso'] = False
+                registro['mensagem'] = f"ERRO ao salvar ({'; '.join(erros)})"
+                resultados['erro'] += 1
+                fila.rejeitar(tarefa, erro=registro['mensagem'])
+                continue
+            
+            resultados['sucesso'] += 1
+            if not fila.confirmar(tarefa):
+                print("AVISO: Lease expirou antes da confirmação; a chave pode ser reprocessada")
+        
+        return restantes
+    
     def validar_chave(self, entrada: str) -> Tuple[bool, Optional[str], str]:
         """
         Apenas valida uma chave sem processar
@@ -194,4 +603,9 @@ class CupomController:
         if chave:
             return True, chave, "Chave válida"
         else:
-            return False, None, "Chave inválida"
\ No newline at end of file
+            return False, None, "Chave inválida"
+    
+    def fechar(self):
+        """Aguarda os salvamentos em segundo plano pendentes e fecha os destinos de saída"""
+        if self.saidas is not None:
+            self.saidas.fechar()
\ No newline at end of file
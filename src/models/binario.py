@@ -0,0 +1,298 @@
+"""
+Serialização binária dos modelos (cache e troca entre processos)
+
+Layout (little-endian), versão 1:
+
+    cabeçalho    '<2sBBBII' mágico b'CF', versão, tipo, presença, produtos,
+                            bytes do conteúdo
+    textos       N bytes    1 = texto presente, 0 = None
+    números      '<Md'      valor_liquido, valor_total, quantidade por produto
+    quantidade   P bytes    1 = quantidade presente, 0 = None
+    conteúdo     UTF-8      textos presentes separados por NUL
+
+Diferente de to_dict(), não troca None por 'N/A' e mantém os floats
+exatos: from_bytes(to_bytes(x)) == x. Os textos são codificados,
+decodificados e separados de uma só vez (str.split), e os números com
+um único struct.pack. Se algum texto contiver NUL, o bit
+_COM_COMPRIMENTOS da presença indica que, antes do conteúdo, vem o
+tamanho ('<Ki') de cada texto presente, e o conteúdo não tem separador.
+
+Ao mudar os campos de um modelo, atualize CAMPOS_TEXTO e incremente
+VERSAO: dados de outra versão são recusados (ValueError).
+"""
+import struct
+from operator import attrgetter
+from typing import List, Optional, Tuple
+
+from src.models.consumidor import Consumidor
+from src.models.cupom import Cupom
+from src.models.cupom_completo import CupomCompleto
+from src.models.emitente import Emitente
+from src.models.local_entrega import LocalEntrega
+from src.models.produto import Produto
+
+
+MAGICO = b'CF'
+VERSAO = 1
+
+# Identificador de cada modelo no cabeçalho
+TIPOS = {
+    Emitente: 1,
+    Consumidor: 2,
+    Cupom: 3,
+    LocalEntrega: 4,
+    Produto: 5,
+    CupomCompleto: 6,
+}
+_MODELOS = {tipo: modelo for modelo, tipo in TIPOS.items()}
+
+# Campos de texto de cada modelo, na ordem do layout (parte da versão)
+CAMPOS_TEXTO = {
+    Emitente: ('ie', 'im', 'extrato_numero', 'sat_numero', 'nome', 'cnpj', 'endereco', 'bairro', 'cep', 'uf'),
+    Consumidor: ('cpf_cnpj', 'nome'),
+    Cupom: ('total', 'forma_pagamento', 'troco', 'tributos', 'data_hora', 'qr_code'),
+    LocalEntrega: ('endereco', 'bairro', 'municipio', 'uf', 'numero_cfe', 'chave_acesso'),
+    Produto: ('codigo_ncm', 'cod_produto', 'cod_gtin', 'descricao'),
+}
+
+_LER_TEXTOS = {modelo: attrgetter(*campos) for modelo, campos in CAMPOS_TEXTO.items()}
+
+_CABECALHO = struct.Struct('<2sBBBII')
+
+# Bits de presença
+_TEM_CONSUMIDOR = 1
+_TEM_LOCAL_ENTREGA = 2
+_COM_COMPRIMENTOS = 128
+
+_SEPARADOR = '\x00'
+
+# Textos lone surrogate (raros, mas possíveis) também voltam iguais
+_ERROS_UTF8 = 'surrogatepass'
+
+
+def _achatar(objeto) -> Tuple[int, int, List[Optional[str]], List[float], bytearray]:
+    """Separa o objeto em (presença, produtos, textos, números, flags de quantidade)"""
+    tipo = type(objeto)
+    textos: List[Optional[str]] = []
+    numeros: List[float] = []
+    quantidades = bytearray()
+    presenca = 0
+    
+    if tipo is CupomCompleto:
+        produtos = objeto.produtos
+        textos.append(objeto.chave_acesso)
+        textos.extend(_LER_TEXTOS[Emitente](objeto.emitente))
+        textos.extend(_LER_TEXTOS[Cupom](objeto.cupom))
+        if objeto.consumidor is not None:
+            presenca |= _TEM_CONSUMIDOR
+            textos.extend(_LER_TEXTOS[Consumidor](objeto.consumidor))
+        if objeto.local_entrega is not None:
+            presenca |= _TEM_LOCAL_ENTREGA
+            textos.extend(_LER_TEXTOS[LocalEntrega](objeto.local_entrega))
+    elif tipo is Produto:
+        produtos = (objeto,)
+    else:
+        textos.extend(_LER_TEXTOS[tipo](objeto))
+        return presenca, 0, textos, numeros, quantidades
+    
+    ler_textos = _LER_TEXTOS[Produto]
+    for produto in produtos:
+        textos.extend(ler_textos(produto))
+        quantidade = produto.quantidade
+        numeros.append(produto.valor_liquido)
+        numeros.append(produto.valor_total)
+        numeros.append(0.0 if quantidade is None else quantidade)
+        quantidades.append(quantidade is not None)
+    
+    return presenca, len(produtos), textos, numeros, quantidades
+
+
+def _quantidade_textos(tipo: type, presenca: int, produtos: int) -> int:
+    """Número de textos no layout do tipo"""
+    if tipo is CupomCompleto:
+        quantidade = 1 + len(CAMPOS_TEXTO[Emitente]) + len(CAMPOS_TEXTO[Cupom])
+        if presenca & _TEM_CONSUMIDOR:
+            quantidade += len(CAMPOS_TEXTO[Consumidor])
+        if presenca & _TEM_LOCAL_ENTREGA:
+            quantidade += len(CAMPOS_TEXTO[LocalEntrega])
+        return quantidade + produtos * len(CAMPOS_TEXTO[Produto])
+    return len(CAMPOS_TEXTO[tipo])
+
+
+def serializar(objeto) -> bytes:
+    """
+    Serializa um modelo (Emitente, Consumidor, Cupom, LocalEntrega,
+    Produto ou CupomCompleto) no layout binário
+    
+    Args:
+        objeto: Instância de um dos modelos
+    
+    Returns:
+        Bytes no layout da VERSAO atual
+    
+    Raises:
+        TypeError: Se o objeto não for um modelo suportado
+    """
+    tipo = TIPOS.get(type(objeto))
+    if tipo is None:
+        raise TypeError(f"Modelo não suportado: {type(objeto).__name__}")
+    
+    presenca, produtos, textos, numeros, quantidades = _achatar(objeto)
+    
+    presentes = [texto for texto in textos if texto is not None]
+    conteudo = _SEPARADOR.join(presentes)
+    comprimentos = b''
+    
+    if presentes and conteudo.count(_SEPARADOR) != len(presentes) - 1:
+        # Algum texto contém NUL: grava os tamanhos em vez de separar
+        presenca |= _COM_COMPRIMENTOS
+        comprimentos = struct.pack(f'<{len(presentes)}i', *map(len, presentes))
+        conteudo = ''.join(presentes)
+    
+    codificado = conteudo.encode('utf-8', _ERROS_UTF8)
+    
+    return b''.join((
+        _CABECALHO.pack(MAGICO, VERSAO, tipo, presenca, produtos, len(codificado)),
+        bytes([texto is not None for texto in textos]),
+        struct.pack(f'<{len(numeros)}d', *numeros),
+        bytes(quantidades),
+        comprimentos,
+        codificado,
+    ))
+
+
+def desserializar(dados: bytes, modelo: Optional[type] = None):
+    """
+    Reconstrói o modelo a partir dos bytes gerados por serializar()
+    
+    Args:
+        dados: Bytes serializados
+        modelo: Classe esperada (opcional; confere com o tipo do cabeçalho)
+    
+    Returns:
+        Instância do modelo, igual à serializada
+    
+    Raises:
+        ValueError: Se os dados não forem deste formato, forem de outra
+            versão/modelo ou estiverem truncados
+    """
+    try:
+        magico, versao, tipo, presenca, produtos, tamanho = _CABECALHO.unpack_from(dados, 0)
+    except struct.error:
+        raise ValueError("Dados binários truncados") from None
+    
+    if magico != MAGICO:
+        raise ValueError("Dados não estão no formato binário dos cupons")
+    if versao != VERSAO:
+        raise ValueError(f"Versão {versao} não suportada (atual: {VERSAO})")
+    
+    classe = _MODELOS.get(tipo)
+    if classe is None:
+        raise ValueError(f"Tipo de modelo desconhecido: {tipo}")
+    if modelo is not None and classe is not modelo:
+        raise ValueError(f"Dados de {classe.__name__}, esperado {modelo.__name__}")
+    
+    quantidade_textos = _quantidade_textos(classe, presenca, produtos)
+    posicao = _CABECALHO.size
+    
+    mascara = dados[posicao:posicao + quantidade_textos]
+    quantidade_presentes = quantidade_textos - mascara.count(0)
+    posicao += quantidade_textos
+    
+    try:
+        numeros = struct.unpack_from(f'<{3 * produtos}d', dados, posicao)
+        posicao += 24 * produtos
+        quantidades = dados[posicao:posicao + produtos]
+        posicao += produtos
+        
+        comprimentos = None
+        if presenca & _COM_COMPRIMENTOS:
+            comprimentos = struct.unpack_from(f'<{quantidade_presentes}i', dados, posicao)
+            posicao += 4 * quantidade_presentes
+    except struct.error:
+        raise ValueError("Dados binários truncados") from None
+    
+    if len(dados) - posicao != tamanho:
+        raise ValueError("Dados binários truncados")
+    
+    conteudo = dados[posicao:].decode('utf-8', _ERROS_UTF8)
+    
+    if comprimentos is not None:
+        presentes, inicio = [], 0
+        for comprimento in comprimentos:
+            presentes.append(conteudo[inicio:inicio + comprimento])
+            inicio += comprimento
+        completo = inicio == len(conteudo)
+    else:
+        presentes = conteudo.split(_SEPARADOR) if quantidade_presentes else []
+        completo = len(presentes) == quantidade_presentes
+    
+    if not completo or len(mascara) != quantidade_textos or len(quantidades) != produtos:
+        raise ValueError("Dados binários truncados")
+    
+    if quantidade_presentes == quantidade_textos:
+        textos = presentes
+    else:
+        proximo = iter(presentes).__next__
+        textos = [proximo() if presente else None for presente in mascara]
+    
+    return _montar(classe, presenca, produtos, textos, numeros, quantidades)
+
+
+def _novo_produto(ncm, valor_liquido, codigo, gtin, valor_total, descricao, quantidade) -> Produto:
+    """
+    Cria o Produto sem __post_init__
+    
+    Os valores serializados já passaram pela conversão do modelo; refazê-la
+    custaria ~10x a leitura do produto.
+    """
+    produto = object.__new__(Produto)
+    produto.codigo_ncm = ncm
+    produto.valor_liquido = valor_liquido
+    produto.cod_produto = codigo
+    produto.cod_gtin = gtin
+    produto.valor_total = valor_total
+    produto.descricao = descricao
+    produto.quantidade = quantidade
+    return produto
+
+
+def _montar(classe, presenca, produtos, textos, numeros, quantidades):
+    """Cria os objetos a partir das partes lidas"""
+    if classe not in (CupomCompleto, Produto):
+        return classe(*textos)
+    
+    itens = []
+    posicao = len(textos) - produtos * 4
+    for indice in range(produtos):
+        ncm, codigo, gtin, descricao = textos[posicao:posicao + 4]
+        posicao += 4
+        itens.append(_novo_produto(
+            ncm,
+            numeros[3 * indice],
+            codigo,
+            gtin,
+            numeros[3 * indice + 1],
+            descricao,
+            numeros[3 * indice + 2] if quantidades[indice] else None,
+        ))
+    
+    if classe is Produto:
+        return itens[0]
+    
+    posicao = 1
+    partes = {}
+    for modelo, atributo, bit in (
+        (Emitente, 'emitente', None),
+        (Cupom, 'cupom', None),
+        (Consumidor, 'consumidor', _TEM_CONSUMIDOR),
+        (LocalEntrega, 'local_entrega', _TEM_LOCAL_ENTREGA),
+    ):
+        if bit is not None and not presenca & bit:
+            partes[atributo] = None
+            continue
+        quantidade = len(CAMPOS_TEXTO[modelo])
+        partes[atributo] = modelo(*textos[posicao:posicao + quantidade])
+        posicao += quantidade
+    
+    return CupomCompleto(produtos=itens, chave_acesso=textos[0], **partes)
\ No newline at end of file
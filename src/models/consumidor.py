@@ -4,9 +4,11 @@ Modelo de dados para Consumidor (Destinatário / Cliente)
 from dataclasses import dataclass
 from typing import Optional
 
+from src.models.serializavel import Serializavel
 
-@dataclass
-class Consumidor:
+
+@dataclass(slots=True)
+class Consumidor(Serializavel):
     """
     Representa o consumidor / destinatário do cupom
     
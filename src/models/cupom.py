@@ -1,12 +1,18 @@
 """
 Modelo de dados para Cupom (Dados gerais da venda)
 """
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional, Tuple
 
+from src.utils.datas import para_datetime
+from src.utils.numeros import para_decimal
+from src.models.serializavel import Serializavel
 
-@dataclass
-class Cupom:
+
+@dataclass(slots=True)
+class Cupom(Serializavel):
     """
     Representa os dados gerais do cupom fiscal
     """
@@ -17,6 +23,39 @@ class Cupom:
     data_hora: Optional[str] = None             # Data e hora da emissão
     qr_code: Optional[str] = None               # Dados do QR Code
     
+    # (texto, datetime) da última conversão de data_hora
+    _emissao: Optional[Tuple[str, Optional[datetime]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    
+    @property
+    def emissao(self) -> Optional[datetime]:
+        """
+        Data/hora de emissão como datetime (None se ausente ou não reconhecida)
+        
+        Convertida na primeira leitura e guardada; se data_hora for
+        alterado, a conversão é refeita.
+        """
+        cache = self._emissao
+        if cache is None or cache[0] is not self.data_hora:
+            cache = self._emissao = (self.data_hora, para_datetime(self.data_hora))
+        return cache[1]
+    
+    @property
+    def valor_total(self) -> Optional[Decimal]:
+        """Total como Decimal (None se ausente ou não numérico)"""
+        return para_decimal(self.total)
+    
+    @property
+    def valor_troco(self) -> Optional[Decimal]:
+        """Troco como Decimal (None se ausente ou não numérico)"""
+        return para_decimal(self.troco)
+    
+    @property
+    def valor_tributos(self) -> Optional[Decimal]:
+        """Tributos aproximados como Decimal (None se ausente ou não numérico)"""
+        return para_decimal(self.tributos)
+    
     def to_dict(self) -> dict:
         """Converte para dicionário"""
         return {
@@ -1,6 +1,7 @@
 """
 Modelo completo que agrupa todos os dados extraídos do cupom fiscal
 """
+import re
 from dataclasses import dataclass
 from typing import List, Optional
 
@@ -9,10 +10,11 @@ from src.models.consumidor import Consumidor
 from src.models.cupom import Cupom
 from src.models.local_entrega import LocalEntrega
 from src.models.produto import Produto
+from src.models.serializavel import Serializavel
 
 
-@dataclass
-class CupomCompleto:
+@dataclass(slots=True)
+class CupomCompleto(Serializavel):
     """
     Representa todos os dados extraídos de um cupom fiscal
     
@@ -23,6 +25,7 @@ class CupomCompleto:
     produtos: List[Produto]
     consumidor: Optional[Consumidor] = None
     local_entrega: Optional[LocalEntrega] = None
+    chave_acesso: Optional[str] = None          # Chave de acesso consultada (44 dígitos)
     
     def to_dict(self) -> dict:
         """
@@ -32,6 +35,7 @@ class CupomCompleto:
             Dicionário com todos os dados do cupom
         """
         return {
+            'chave_acesso': self.chave_acesso or 'N/A',
             'emitente': self.emitente.to_dict(),
             'consumidor': self.consumidor.to_dict() if self.consumidor else None,
             'cupom': self.cupom.to_dict(),
@@ -45,6 +49,32 @@ class CupomCompleto:
             }
         }
     
+    def obter_chave(self) -> Optional[str]:
+        """
+        Retorna a chave de acesso do cupom
+        
+        Usa a chave consultada; na falta dela, procura 44 dígitos na chave do
+        local de entrega ou no identificador do QR Code exibidos na página
+        
+        Returns:
+            Chave com 44 dígitos ou None se não encontrada
+        """
+        if self.chave_acesso:
+            return self.chave_acesso
+        
+        candidatos = [
+            self.local_entrega.chave_acesso if self.local_entrega else None,
+            self.cupom.qr_code,
+        ]
+        
+        for texto in candidatos:
+            if texto:
+                match = re.search(r'\d{44}', re.sub(r'[\s.\-]', '', texto))
+                if match:
+                    return match.group(0)
+        
+        return None
+    
     def __str__(self) -> str:
         """Representação em string"""
         linhas = [
@@ -4,9 +4,11 @@ Modelo de dados para Emitente (Estabelecimento comercial)
 from dataclasses import dataclass
 from typing import Optional
 
+from src.models.serializavel import Serializavel
 
-@dataclass
-class Emitente:
+
+@dataclass(slots=True)
+class Emitente(Serializavel):
     """
     Representa o estabelecimento comercial que emitiu o cupom
     """
@@ -4,9 +4,11 @@ Modelo de dados para Local de Entrega
 from dataclasses import dataclass
 from typing import Optional
 
+from src.models.serializavel import Serializavel
 
-@dataclass
-class LocalEntrega:
+
+@dataclass(slots=True)
+class LocalEntrega(Serializavel):
     """
     Representa o local de entrega do cupom
     
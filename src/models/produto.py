@@ -2,8 +2,12 @@ from dataclasses import dataclass, field
 from typing import Optional
 from decimal import Decimal
 
-@dataclass
-class Produto:
+from src.utils.gtin import gtin_valido
+from src.utils.numeros import para_float
+from src.models.serializavel import Serializavel
+
+@dataclass(slots=True)
+class Produto(Serializavel):
     """
     Representa um produto do cupom fiscal SAT
     
@@ -17,6 +21,9 @@ class Produto:
         cod_gtin: Código GTIN/EAN (código de barras) - opcional
         descricao: Descrição do produto - opcional
         quantidade: Quantidade vendida - opcional
+    
+    Usa __slots__ (sem __dict__ por instância): lotes com milhões de
+    produtos em memória ocupam menos RAM.
     """
     codigo_ncm: str
     valor_liquido: float
@@ -50,25 +57,16 @@ class Produto:
         """
         Converte um valor para float, aceitando strings e números
         
+        Strings no formato brasileiro ("R$ 1.234,56") são convertidas por
+        src.utils.numeros (com cache dos textos repetidos)
+        
         Args:
             valor: Valor a ser convertido (str, int, float)
         
         Returns:
-            Valor float
+            Valor float (0.0 se vazio ou não numérico)
         """
-        if isinstance(valor, (int, float)):
-            return float(valor)
-        
-        # Remove espaços e substitui vírgula por ponto
-        valor_str = str(valor).strip().replace(',', '.')
-        
-        # Remove caracteres não numéricos (exceto ponto e sinal negativo)
-        valor_limpo = ''.join(c for c in valor_str if c.isdigit() or c in '.-')
-        
-        try:
-            return float(valor_limpo) if valor_limpo else 0.0
-        except ValueError:
-            return 0.0
+        return para_float(valor, padrao=0.0)
     
     def to_dict(self) -> dict:
         """
@@ -121,4 +119,8 @@ class Produto:
         if not self.cod_produto:
             erros.append("Código do produto está vazio")
         
-        return (len(erros) == 0, erros)
+        # Valida GTIN se presente (tamanho e dígito verificador)
+        if self.cod_gtin and not gtin_valido(self.cod_gtin):
+            erros.append(f"GTIN inválido: {self.cod_gtin} (dígito verificador ou tamanho)")
+        
+        return (len(erros) == 0, erros)
\ No newline at end of file
@@ -0,0 +1,395 @@
+"""
+Produtos de vários cupons armazenados por coluna (para análise em lote)
+"""
+from array import array
+from operator import attrgetter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    # numpy é opcional: sem ele as colunas usam array e as operações são laços Python
+    np = None
+
+from src.models.cupom_completo import CupomCompleto
+from src.models.produto import Produto
+from src.utils.gtin import gtin_valido
+from src.utils.numeros import para_float
+
+
+class ColunaTexto:
+    """
+    Coluna de texto codificada por dicionário
+    
+    Cada valor distinto é guardado uma única vez em `valores`; cada linha
+    guarda apenas o índice (`codigos`). NCMs, descrições e GTINs se
+    repetem muito, então a coluna ocupa pouco e as validações por valor
+    rodam uma vez por valor distinto, não por linha.
+    """
+    
+    def __init__(self, valores: Optional[List[Optional[str]]] = None, codigos: Sequence[int] = ()):
+        self.valores: List[Optional[str]] = list(valores or [])
+        self.codigos = _inteiros(codigos)
+    
+    @classmethod
+    def codificar(cls, textos: Iterable[Optional[str]]) -> 'ColunaTexto':
+        """Cria a coluna a partir dos textos de cada linha"""
+        textos = textos if isinstance(textos, list) else list(textos)
+        valores = list(dict.fromkeys(textos))
+        indice = dict(zip(valores, range(len(valores))))
+        return cls(valores, list(map(indice.__getitem__, textos)))
+    
+    def __len__(self) -> int:
+        return len(self.codigos)
+    
+    def __getitem__(self, linha: int) -> Optional[str]:
+        return self.valores[self.codigos[linha]]
+    
+    def tolist(self) -> List[Optional[str]]:
+        """Textos de todas as linhas"""
+        valores = self.valores
+        return [valores[codigo] for codigo in self.codigos]
+    
+    def mapear(self, funcao: Callable[[Optional[str]], bool]):
+        """
+        Aplica `funcao` a cada valor distinto e expande o resultado por linha
+        
+        Returns:
+            Máscara booleana (numpy) ou lista de bool, uma posição por linha
+        """
+        por_valor = [bool(funcao(valor)) for valor in self.valores]
+        
+        if np is not None:
+            return np.array(por_valor, dtype=bool)[self.codigos]
+        return [por_valor[codigo] for codigo in self.codigos]
+    
+    def derivar(self, funcao: Callable[[Optional[str]], Optional[str]]) -> 'ColunaTexto':
+        """
+        Nova coluna com funcao(valor), calculada uma vez por valor distinto
+        
+        Reaproveita os códigos desta coluna (ex: NCM -> capítulo). Valores
+        distintos podem passar a se repetir no dicionário da nova coluna.
+        """
+        return ColunaTexto([funcao(valor) for valor in self.valores], self.codigos)
+    
+    def selecionar(self, linhas) -> 'ColunaTexto':
+        """Nova coluna só com as linhas indicadas (mesmo dicionário de valores)"""
+        if np is not None:
+            return ColunaTexto(self.valores, self.codigos[linhas])
+        return ColunaTexto(self.valores, [self.codigos[linha] for linha in linhas])
+
+
+def _inteiros(valores):
+    """Coluna de inteiros (índices)"""
+    if np is not None:
+        return np.asarray(valores, dtype=np.int32)
+    return array('i', valores)
+
+
+def _floats(valores):
+    """Coluna de floats (None vira NaN)"""
+    if np is not None:
+        return np.asarray(valores, dtype=np.float64)
+    return array('d', [float('nan') if valor is None else valor for valor in valores])
+
+
+def _ncm_valido(ncm: Optional[str]) -> bool:
+    return ncm is not None and len(ncm) == 8 and ncm.isdigit()
+
+
+class ProdutoBatch:
+    """
+    Produtos de vários cupons em colunas
+    
+    - Texto (codigo_ncm, cod_produto, cod_gtin, descricao): ColunaTexto
+    - Números (valor_liquido, valor_total, quantidade): float64
+      (quantidade ausente = NaN)
+    - indice_cupom: posição do cupom de cada produto em `chaves`
+    
+    Com numpy, validação e agregações rodam vetorizadas sobre o lote
+    inteiro; sem numpy, as mesmas operações funcionam com laços Python.
+    """
+    
+    CAMPOS_TEXTO = ('codigo_ncm', 'cod_produto', 'cod_gtin', 'descricao')
+    CAMPOS_NUMERICOS = ('valor_liquido', 'valor_total', 'quantidade')
+    
+    def __init__(
+        self,
+        texto: Dict[str, ColunaTexto],
+        numeros: Dict[str, Sequence[float]],
+        indice_cupom: Sequence[int],
+        chaves: Optional[List[Optional[str]]] = None
+    ):
+        """
+        Args:
+            texto: ColunaTexto de cada campo de CAMPOS_TEXTO
+            numeros: Coluna de cada campo de CAMPOS_NUMERICOS
+            indice_cupom: Posição do cupom de cada produto
+            chaves: Chave de acesso de cada cupom (padrão: sem chaves)
+        """
+        self.texto = texto
+        self.numeros = {nome: _floats(valores) for nome, valores in numeros.items()}
+        self.indice_cupom = _inteiros(indice_cupom)
+        
+        if chaves is None:
+            chaves = [None] * ((max(self.indice_cupom) + 1) if len(self.indice_cupom) else 0)
+        self.chaves = chaves
+    
+    # ------------------------------------------------------------------
+    # Construção
+    # ------------------------------------------------------------------
+    
+    @classmethod
+    def de_produtos(
+        cls,
+        produtos: Iterable[Produto],
+        indice_cupom: Optional[Sequence[int]] = None,
+        chaves: Optional[List[Optional[str]]] = None
+    ) -> 'ProdutoBatch':
+        """
+        Cria o lote a partir de objetos Produto
+        
+        Args:
+            produtos: Produtos (já convertidos pelo modelo)
+            indice_cupom: Cupom de cada produto (padrão: todos do cupom 0)
+            chaves: Chave de acesso de cada cupom
+        """
+        produtos = list(produtos)
+        
+        if indice_cupom is None:
+            indice_cupom = [0] * len(produtos)
+            chaves = chaves if chaves is not None else ([None] if produtos else [])
+        
+        return cls(
+            {campo: ColunaTexto.codificar(list(map(attrgetter(campo), produtos))) for campo in cls.CAMPOS_TEXTO},
+            {campo: list(map(attrgetter(campo), produtos)) for campo in cls.CAMPOS_NUMERICOS},
+            indice_cupom,
+            chaves
+        )
+    
+    @classmethod
+    def de_cupons(cls, cupons: Iterable[CupomCompleto]) -> 'ProdutoBatch':
+        """
+        Cria o lote com os produtos de vários cupons
+        
+        Args:
+            cupons: Cupons extraídos
+        
+        Returns:
+            ProdutoBatch com `chaves` na ordem dos cupons
+        """
+        produtos: List[Produto] = []
+        indice_cupom: List[int] = []
+        chaves: List[Optional[str]] = []
+        
+        for posicao, cupom in enumerate(cupons):
+            chaves.append(cupom.obter_chave())
+            produtos.extend(cupom.produtos)
+            indice_cupom.extend([posicao] * len(cupom.produtos))
+        
+        return cls.de_produtos(produtos, indice_cupom, chaves)
+    
+    @classmethod
+    def de_registros(
+        cls,
+        registros: Iterable[dict],
+        indice_cupom: Optional[Sequence[int]] = None,
+        chaves: Optional[List[Optional[str]]] = None
+    ) -> 'ProdutoBatch':
+        """
+        Cria o lote direto dos textos lidos da página, sem criar objetos Produto
+        
+        Args:
+            registros: Dicionários com os campos do Produto como texto
+                (ex: {'codigo_ncm': '22021000', 'valor_total': '1.234,56', ...})
+            indice_cupom: Cupom de cada registro (padrão: todos do cupom 0)
+            chaves: Chave de acesso de cada cupom
+        
+        Returns:
+            ProdutoBatch com os valores convertidos como no Produto
+            (valor inválido = 0.0; quantidade ausente = NaN)
+        """
+        registros = list(registros)
+        
+        if indice_cupom is None:
+            indice_cupom = [0] * len(registros)
+            chaves = chaves if chaves is not None else ([None] if registros else [])
+        
+        def texto(valor):
+            if valor is None:
+                return None
+            return str(valor).strip() or None
+        
+        return cls(
+            {
+                campo: ColunaTexto.codificar([texto(r.get(campo)) for r in registros])
+                for campo in cls.CAMPOS_TEXTO
+            },
+            {
+                'valor_liquido': [para_float(r.get('valor_liquido'), padrao=0.0) for r in registros],
+                'valor_total': [para_float(r.get('valor_total'), padrao=0.0) for r in registros],
+                'quantidade': [para_float(r.get('quantidade')) for r in registros],
+            },
+            indice_cupom,
+            chaves
+        )
+    
+    # ------------------------------------------------------------------
+    # Acesso
+    # ------------------------------------------------------------------
+    
+    def __len__(self) -> int:
+        return len(self.indice_cupom)
+    
+    def __getitem__(self, campo: str):
+        """Coluna pelo nome (ColunaTexto ou coluna de floats)"""
+        if campo in self.texto:
+            return self.texto[campo]
+        return self.numeros[campo]
+    
+    @property
+    def quantidade_cupons(self) -> int:
+        return len(self.chaves)
+    
+    def produto(self, linha: int) -> Produto:
+        """Reconstrói o Produto de uma linha"""
+        quantidade = self.numeros['quantidade'][linha]
+        
+        return Produto(
+            codigo_ncm=self.texto['codigo_ncm'][linha],
+            valor_liquido=float(self.numeros['valor_liquido'][linha]),
+            cod_produto=self.texto['cod_produto'][linha],
+            cod_gtin=self.texto['cod_gtin'][linha],
+            valor_total=float(self.numeros['valor_total'][linha]),
+            descricao=self.texto['descricao'][linha],
+            quantidade=None if quantidade != quantidade else float(quantidade),
+        )
+    
+    def __iter__(self) -> Iterator[Produto]:
+        for linha in range(len(self)):
+            yield self.produto(linha)
+    
+    def selecionar(self, mascara) -> 'ProdutoBatch':
+        """
+        Novo lote só com as linhas em que a máscara é verdadeira
+        
+        Os cupons (`chaves`) são mantidos, mesmo os que ficarem sem produtos.
+        """
+        if np is not None:
+            linhas = np.flatnonzero(np.asarray(mascara, dtype=bool))
+        else:
+            linhas = [linha for linha, marcado in enumerate(mascara) if marcado]
+        
+        def pegar(coluna):
+            if np is not None:
+                return coluna[linhas]
+            return [coluna[linha] for linha in linhas]
+        
+        return ProdutoBatch(
+            {campo: coluna.selecionar(linhas) for campo, coluna in self.texto.items()},
+            {campo: pegar(coluna) for campo, coluna in self.numeros.items()},
+            pegar(self.indice_cupom),
+            self.chaves
+        )
+    
+    # ------------------------------------------------------------------
+    # Validação (mesmas regras de Produto.validar)
+    # ------------------------------------------------------------------
+    
+    def validar(self) -> Tuple[object, Dict[str, object]]:
+        """
+        Valida todos os produtos de uma vez
+        
+        Returns:
+            Tupla (validos, erros):
+            - validos: máscara com True nos produtos sem erro
+            - erros: máscara de cada regra violada
+              (ncm_invalido, valor_liquido_negativo, valor_total_negativo,
+              quantidade_invalida, cod_produto_vazio, gtin_invalido)
+        """
+        valor_liquido = self.numeros['valor_liquido']
+        valor_total = self.numeros['valor_total']
+        quantidade = self.numeros['quantidade']
+        
+        ncm_invalido = self.texto['codigo_ncm'].mapear(lambda ncm: not _ncm_valido(ncm))
+        cod_produto_vazio = self.texto['cod_produto'].mapear(lambda codigo: not codigo)
+        gtin_invalido = self.texto['cod_gtin'].mapear(lambda gtin: bool(gtin) and not gtin_valido(gtin))
+        
+        if np is not None:
+            erros = {
+                'ncm_invalido': ncm_invalido,
+                'valor_liquido_negativo': valor_liquido < 0,
+                'valor_total_negativo': valor_total < 0,
+                # NaN (quantidade ausente) não é inválido: NaN <= 0 é False
+                'quantidade_invalida': quantidade <= 0,
+                'cod_produto_vazio': cod_produto_vazio,
+                'gtin_invalido': gtin_invalido,
+            }
+            validos = ~np.logical_or.reduce(list(erros.values())) if len(self) else np.ones(0, dtype=bool)
+            return validos, erros
+        
+        erros = {
+            'ncm_invalido': ncm_invalido,
+            'valor_liquido_negativo': [valor < 0 for valor in valor_liquido],
+            'valor_total_negativo': [valor < 0 for valor in valor_total],
+            'quantidade_invalida': [valor <= 0 for valor in quantidade],
+            'cod_produto_vazio': cod_produto_vazio,
+            'gtin_invalido': gtin_invalido,
+        }
+        validos = [not any(linha) for linha in zip(*erros.values())]
+        return validos, erros
+    
+    # ------------------------------------------------------------------
+    # Agregações
+    # ------------------------------------------------------------------
+    
+    def _somar_por(self, grupos, quantidade_grupos: int, pesos=None) -> list:
+        """Soma dos pesos (ou contagem) de cada grupo"""
+        if np is not None:
+            if not len(grupos):
+                return [0.0] * quantidade_grupos
+            return np.bincount(grupos, weights=pesos, minlength=quantidade_grupos).tolist()
+        
+        somas = [0.0] * quantidade_grupos
+        for linha, grupo in enumerate(grupos):
+            somas[grupo] += 1 if pesos is None else pesos[linha]
+        return somas
+    
+    def totais_por_cupom(self, campo: str = 'valor_total') -> List[float]:
+        """
+        Soma de uma coluna numérica por cupom
+        
+        Args:
+            campo: 'valor_total' ou 'valor_liquido'
+        
+        Returns:
+            Lista na ordem de `chaves` (0.0 para cupons sem produtos)
+        """
+        return self._somar_por(self.indice_cupom, self.quantidade_cupons, self.numeros[campo])
+    
+    def quantidade_por_cupom(self) -> List[int]:
+        """Número de produtos de cada cupom, na ordem de `chaves`"""
+        return [int(total) for total in self._somar_por(self.indice_cupom, self.quantidade_cupons)]
+    
+    def totais_por(self, campo_texto: str, campo: str = 'valor_total') -> Dict[Optional[str], float]:
+        """
+        Soma de uma coluna numérica por valor de uma coluna de texto
+        
+        Ex: totais_por('codigo_ncm') -> {'22021000': 1234.5, ...}
+        """
+        coluna = self.texto[campo_texto]
+        somas = self._somar_por(coluna.codigos, len(coluna.valores), self.numeros[campo])
+        
+        # Colunas derivadas podem repetir valores no dicionário
+        totais: Dict[Optional[str], float] = {}
+        for valor, soma in zip(coluna.valores, somas):
+            if valor is not None:
+                totais[valor] = totais.get(valor, 0.0) + soma
+        return totais
+    
+    def para_dict(self) -> Dict[str, list]:
+        """Colunas como listas (ex: pandas.DataFrame(batch.para_dict()))"""
+        colunas = {'chave_acesso': [self.chaves[indice] for indice in self.indice_cupom]}
+        colunas.update({campo: coluna.tolist() for campo, coluna in self.texto.items()})
+        colunas.update({campo: list(coluna) for campo, coluna in self.numeros.items()})
+        return colunas
\ No newline at end of file
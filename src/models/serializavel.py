@@ -0,0 +1,29 @@
+"""
+Base comum dos modelos: serialização binária (to_bytes / from_bytes)
+"""
+
+
+class Serializavel:
+    """
+    Acrescenta to_bytes()/from_bytes() aos modelos
+    
+    O layout está em src.models.binario. __slots__ vazio mantém os
+    modelos sem __dict__ por instância.
+    """
+    __slots__ = ()
+    
+    def to_bytes(self) -> bytes:
+        """Serializa sem perdas (None e floats preservados)"""
+        from src.models.binario import serializar
+        return serializar(self)
+    
+    @classmethod
+    def from_bytes(cls, dados: bytes):
+        """
+        Reconstrói o objeto serializado por to_bytes()
+        
+        Raises:
+            ValueError: Se os dados forem de outro modelo, versão ou formato
+        """
+        from src.models.binario import desserializar
+        return desserializar(dados, cls)
\ No newline at end of file
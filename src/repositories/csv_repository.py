@@ -1,13 +1,49 @@
 """
 Repositório para salvar dados em formato CSV
 """
+import codecs
 import csv
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
 
 from src.config import settings
 from src.models.cupom_completo import CupomCompleto
+from src.utils.arquivos import abrir_atomico, nome_reservado
+from src.utils.compressao import (
+    abrir_escrita,
+    abrir_leitura,
+    com_extensao_compressao,
+    compressao_da_extensao,
+    resolver_compressao,
+    sem_extensao_compressao,
+    tamanho_em_disco,
+)
+from src.utils.numeros import para_decimal
+
+
+class _ContadorBytes:
+    """
+    Repassa a escrita do csv.writer ao arquivo contando os bytes gravados
+    
+    Evita TextIOWrapper.tell(), que esvazia o buffer a cada chamada.
+    Deve ser criado com o arquivo ainda vazio.
+    """
+    
+    def __init__(self, arquivo: TextIO, encoding: str):
+        self.arquivo = arquivo
+        self.encoding = encoding
+        self.bytes = 0
+        
+        # O BOM do utf-8-sig é escrito uma única vez, antes do primeiro texto:
+        # conta os 3 bytes aqui e codifica o texto sem ele
+        if codecs.lookup(encoding).name == 'utf-8-sig':
+            self.encoding = 'utf-8'
+            self.bytes = len(codecs.BOM_UTF8)
+    
+    def write(self, texto: str) -> int:
+        self.bytes += len(texto.encode(self.encoding, 'replace'))
+        return self.arquivo.write(texto)
 
 
 class CSVRepository:
@@ -16,26 +52,53 @@ class CSVRepository:
     
     Gera arquivo CSV com todos os dados do cupom:
     - Emitente
-    - Consumidor  
+    - Consumidor
     - Cupom
     - Local de Entrega
     - Produtos (uma linha por produto)
     """
     
-    def __init__(self, diretorio: Optional[Path] = None):
+    LAYOUTS = ('unico', 'normalizado')
+    
+    def __init__(
+        self,
+        diretorio: Optional[Path] = None,
+        layout: Optional[str] = None,
+        compressao: Optional[str] = None
+    ):
         """
         Inicializa o repositório CSV
         
         Args:
             diretorio: Diretório onde salvar os arquivos (padrão: settings.OUTPUT_DIR)
+            layout: 'unico' (uma linha por produto com todos os dados) ou
+                'normalizado' (arquivo de cupons + arquivo de produtos ligados
+                pela chave de acesso). Padrão: settings.CSV_LAYOUT
+            compressao: 'gzip', 'zstd' ou 'none' (padrão: extensão do nome
+                ou settings.OUTPUT_COMPRESSION)
+        
+        Raises:
+            ValueError: Se o layout ou a compressão não forem suportados
         """
         self.diretorio = diretorio or settings.OUTPUT_DIR
         self.diretorio.mkdir(exist_ok=True, parents=True)
+        
+        self.layout = layout or settings.CSV_LAYOUT
+        if self.layout not in self.LAYOUTS:
+            raise ValueError(f"Layout CSV não suportado: {self.layout}. Use: {', '.join(self.LAYOUTS)}")
+        
+        # Valida a compressão já na criação (ValueError se desconhecida)
+        resolver_compressao('', compressao)
+        self.compressao = compressao
     
     def salvar(self, cupom: CupomCompleto, nome_arquivo: Optional[str] = None) -> Path:
         """
         Salva um cupom completo em arquivo CSV
         
+        O arquivo é escrito em um temporário e só recebe o nome final
+        quando está completo: uma falha no meio da escrita nunca deixa um
+        CSV truncado no diretório.
+        
         Args:
             cupom: Objeto CupomCompleto com todos os dados
             nome_arquivo: Nome customizado do arquivo (opcional)
@@ -43,36 +106,257 @@ class CSVRepository:
         Returns:
             Path do arquivo salvo
         """
-        # Gera nome do arquivo se não fornecido
-        if not nome_arquivo:
-            timestamp = datetime.now().strftime(settings.DATETIME_FORMAT)
-            cnpj_limpo = cupom.emitente.cnpj.replace('.', '').replace('/', '').replace('-', '') if cupom.emitente.cnpj else 'sem_cnpj'
-            nome_arquivo = f"cupom_{cnpj_limpo}_{timestamp}.csv"
-        
-        # Garante extensão .csv
-        if not nome_arquivo.endswith('.csv'):
-            nome_arquivo += '.csv'
+        if self.layout == 'normalizado':
+            return self._salvar_normalizado(cupom, nome_arquivo)
         
-        caminho = self.diretorio / nome_arquivo
+        # Nome customizado: sobrescreve se já existir
+        if nome_arquivo:
+            caminho, arquivo = self._abrir_arquivo_nomeado(nome_arquivo, atomico=True)
+        else:
+            # Nome automático: nunca sobrescreve outro cupom
+            caminho, arquivo = self._criar_arquivo_unico(f"cupom_{self._cnpj_limpo(cupom)}", atomico=True)
         
         # Escreve o CSV
-        with open(caminho, 'w', newline='', encoding=settings.FILE_ENCODING) as arquivo:
-            writer = csv.writer(
-                arquivo, 
-                delimiter=settings.CSV_SEPARATOR,
-                quoting=csv.QUOTE_MINIMAL
-            )
+        with arquivo:
+            writer = self._criar_writer(arquivo)
             
             # Cabeçalho
             writer.writerow(self._gerar_cabecalho())
             
             # Dados
-            for linha in self._gerar_linhas(cupom):
-                writer.writerow(linha)
+            writer.writerows(self._gerar_linhas(cupom))
         
+        # Em modo exclusivo o nome publicado pode ter ganhado sufixo (ver publicar)
+        caminho = arquivo.destino
         print(f"SUCESSO: Arquivo CSV salvo em {caminho}")
         return caminho
     
+    def abrir_lote(
+        self,
+        nome_base: str = 'lote',
+        max_linhas: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ) -> 'CSVLoteWriter':
+        """
+        Abre um arquivo CSV único para gravar vários cupons em sequência
+        
+        Args:
+            nome_base: Prefixo dos arquivos gerados
+            max_linhas: Rotaciona o arquivo ao atingir este número de linhas
+                (padrão: settings.CSV_BATCH_MAX_ROWS)
+            max_bytes: Rotaciona o arquivo ao atingir este tamanho
+                (padrão: settings.CSV_BATCH_MAX_BYTES)
+        
+        Returns:
+            CSVLoteWriter (use com "with" ou chame fechar())
+        """
+        classe = CSVNormalizadoLoteWriter if self.layout == 'normalizado' else CSVLoteWriter
+        
+        return classe(
+            self,
+            nome_base=nome_base,
+            max_linhas=max_linhas,
+            max_bytes=max_bytes
+        )
+    
+    def _salvar_normalizado(self, cupom: CupomCompleto, nome_arquivo: Optional[str] = None) -> Path:
+        """
+        Salva o cupom no layout normalizado (arquivo de cupons + de produtos)
+        
+        Args:
+            cupom: Objeto CupomCompleto
+            nome_arquivo: Nome base customizado (sobrescreve se já existir)
+        
+        Returns:
+            Path do arquivo de cupons (o de produtos fica ao lado, com
+            "_produtos" no lugar de "_cupons")
+        """
+        if nome_arquivo:
+            caminho, arquivo = self._abrir_arquivo_nomeado(nome_arquivo, sufixo='_cupons', atomico=True)
+        else:
+            caminho, arquivo = self._criar_arquivo_unico(
+                f"cupom_{self._cnpj_limpo(cupom)}_cupons", atomico=True, com_produtos=True
+            )
+        
+        caminho_produtos, arquivo_produtos = self._abrir_arquivo_produtos(
+            caminho, atomico=True, modo='w' if nome_arquivo else 'x'
+        )
+        
+        with arquivo, arquivo_produtos:
+            writer = self._criar_writer(arquivo)
+            writer.writerow(self._gerar_cabecalho_cupons())
+            writer.writerow(self._gerar_linha_cupom(cupom))
+            
+            writer = self._criar_writer(arquivo_produtos)
+            writer.writerow(self._gerar_cabecalho_produtos())
+            writer.writerows(self._gerar_linhas_produtos(cupom))
+        
+        caminho, caminho_produtos = arquivo.destino, arquivo_produtos.destino
+        print(f"SUCESSO: Arquivos CSV salvos em {caminho} e {caminho_produtos.name}")
+        return caminho
+    
+    @staticmethod
+    def _caminho_produtos(caminho_cupons: Path) -> Path:
+        """
+        Arquivo de produtos de um arquivo de cupons
+        
+        Troca o último "_cupons" do nome (o sufixo acrescentado pelo
+        repositório) por "_produtos"; o nome escolhido pelo usuário pode
+        conter "_cupons" e não é alterado.
+        """
+        antes, sufixo, depois = caminho_cupons.name.rpartition('_cupons')
+        if not sufixo:
+            raise ValueError(f"Arquivo de cupons sem o sufixo _cupons: {caminho_cupons.name}")
+        return caminho_cupons.with_name(f"{antes}_produtos{depois}")
+    
+    @staticmethod
+    def _abrir_arquivo_produtos(
+        caminho_cupons: Path,
+        buffering: Optional[int] = None,
+        atomico: bool = False,
+        modo: str = 'x'
+    ) -> Tuple[Path, TextIO]:
+        """
+        Abre o arquivo de produtos que acompanha um arquivo de cupons
+        
+        Args:
+            caminho_cupons: Arquivo de cupons (nome com o sufixo _cupons)
+            buffering: Tamanho do buffer de escrita
+            atomico: Escreve em temporário e publica ao fechar (ver abrir_atomico)
+            modo: 'x' (falha se já existir) ou 'w' (nome customizado: sobrescreve),
+                o mesmo do arquivo de cupons
+        
+        Raises:
+            FileExistsError: Em modo 'x', se o arquivo já existir
+        """
+        caminho = CSVRepository._caminho_produtos(caminho_cupons)
+        abrir = abrir_atomico if atomico else abrir_escrita
+        arquivo = abrir(
+            caminho, modo, compressao_da_extensao(caminho),
+            newline='', buffer_bytes=buffering
+        )
+        return caminho, arquivo
+    
+    def _abrir_arquivo_nomeado(
+        self,
+        nome_arquivo: str,
+        sufixo: str = '',
+        atomico: bool = False
+    ) -> Tuple[Path, TextIO]:
+        """
+        Abre um arquivo com nome customizado (sobrescreve se já existir)
+        
+        Garante a extensão .csv e acrescenta .gz/.zst conforme a compressão
+        
+        Args:
+            nome_arquivo: Nome escolhido (com ou sem .csv/.gz/.zst)
+            sufixo: Texto inserido antes da extensão (ex: '_cupons')
+            atomico: Escreve em temporário e publica ao fechar (ver abrir_atomico)
+        
+        Returns:
+            Tupla (caminho, arquivo aberto para escrita)
+        """
+        compressao = resolver_compressao(nome_arquivo, self.compressao)
+        
+        nome_base = sem_extensao_compressao(nome_arquivo)
+        if nome_base.endswith('.csv'):
+            nome_base = nome_base[:-4]
+        
+        nome = com_extensao_compressao(f"{nome_base}{sufixo}.csv", compressao)
+        caminho = self.diretorio / nome
+        
+        abrir = abrir_atomico if atomico else abrir_escrita
+        return caminho, abrir(caminho, 'w', compressao, newline='')
+    
+    @staticmethod
+    def ler_linhas(caminho: Path) -> Iterator[Dict[str, str]]:
+        """
+        Lê um CSV gerado pelo repositório em streaming
+        
+        Arquivos .gz/.zst são descompactados durante a leitura
+        
+        Args:
+            caminho: Arquivo CSV (compactado ou não)
+        
+        Yields:
+            Dicionário coluna -> valor de cada linha
+        """
+        with abrir_leitura(caminho, newline='') as arquivo:
+            yield from csv.DictReader(arquivo, delimiter=settings.CSV_SEPARATOR)
+    
+    @staticmethod
+    def _cnpj_limpo(cupom: CupomCompleto) -> str:
+        """Retorna o CNPJ do emitente apenas com dígitos (ou 'sem_cnpj')"""
+        if not cupom.emitente.cnpj:
+            return 'sem_cnpj'
+        return cupom.emitente.cnpj.replace('.', '').replace('/', '').replace('-', '')
+    
+    def _criar_arquivo_unico(
+        self,
+        prefixo: str,
+        buffering: Optional[int] = None,
+        atomico: bool = False,
+        com_produtos: bool = False
+    ) -> Tuple[Path, TextIO]:
+        """
+        Cria um arquivo CSV com nome inédito no diretório
+        
+        O arquivo é criado em modo exclusivo ('x'); se o nome já existir
+        (mesmo prefixo no mesmo segundo, inclusive por outro processo)
+        tenta novamente com sufixo _2, _3, ...
+        
+        Args:
+            prefixo: Início do nome do arquivo
+            buffering: Tamanho do buffer de escrita (padrão: settings.COMPRESSION_BUFFER_SIZE)
+            atomico: Escreve em temporário e publica ao fechar. Os arquivos
+                de lote não usam: são gravados aos poucos, com flush periódico,
+                e o que já foi escrito deve ficar visível mesmo se o lote cair
+            com_produtos: Arquivo de cupons do layout normalizado: o nome
+                do arquivo de produtos (_caminho_produtos) também deve estar livre
+        
+        Returns:
+            Tupla (caminho, arquivo aberto para escrita)
+        """
+        timestamp = datetime.now().strftime(settings.DATETIME_FORMAT)
+        base = f"{prefixo}_{timestamp}"
+        sufixo = 1
+        compressao = resolver_compressao('', self.compressao)
+        abrir = abrir_atomico if atomico else abrir_escrita
+        
+        while True:
+            nome = f"{base}.csv" if sufixo == 1 else f"{base}_{sufixo}.csv"
+            caminho = self.diretorio / com_extensao_compressao(nome, compressao)
+            
+            # O arquivo de lote é criado direto no nome final: respeita os
+            # nomes reservados por arquivos atômicos ainda não publicados
+            if not atomico and nome_reservado(caminho):
+                sufixo += 1
+                continue
+            
+            if com_produtos:
+                produtos = self._caminho_produtos(caminho)
+                if produtos.exists() or nome_reservado(produtos):
+                    sufixo += 1
+                    continue
+            
+            try:
+                arquivo = abrir(
+                    caminho, 'x', compressao,
+                    newline='', buffer_bytes=buffering
+                )
+                return caminho, arquivo
+            except FileExistsError:
+                sufixo += 1
+    
+    @staticmethod
+    def _criar_writer(arquivo: TextIO):
+        """Cria o csv.writer no padrão brasileiro"""
+        return csv.writer(
+            arquivo,
+            delimiter=settings.CSV_SEPARATOR,
+            quoting=csv.QUOTE_MINIMAL
+        )
+    
     def _gerar_cabecalho(self) -> list:
         """
         Gera o cabeçalho do CSV
@@ -122,6 +406,97 @@ class CSVRepository:
             'Produto_Cod_GTIN',
         ]
     
+    def _gerar_cabecalho_cupons(self) -> list:
+        """
+        Gera o cabeçalho do arquivo de cupons (layout normalizado)
+        
+        Returns:
+            Chave de acesso seguida das colunas gerais (sem as de produto)
+        """
+        return ['Chave_Acesso'] + [
+            coluna for coluna in self._gerar_cabecalho()
+            if not coluna.startswith('Produto_')
+        ]
+    
+    def _gerar_cabecalho_produtos(self) -> list:
+        """
+        Gera o cabeçalho do arquivo de produtos (layout normalizado)
+        
+        Returns:
+            Lista com nomes das colunas
+        """
+        return [
+            'Chave_Acesso',
+            'Produto_Item',
+            'Produto_Descricao',
+            'Produto_NCM',
+            'Produto_Cod_Produto',
+            'Produto_Quantidade',
+            'Produto_Valor_Liquido',
+            'Produto_Valor_Total',
+            'Produto_Cod_GTIN',
+        ]
+    
+    def _gerar_linha_cupom(self, cupom: CupomCompleto) -> list:
+        """
+        Gera a linha do arquivo de cupons (layout normalizado)
+        
+        Args:
+            cupom: Objeto CupomCompleto
+        
+        Returns:
+            Lista com valores da linha
+        """
+        return [cupom.obter_chave() or 'N/A'] + self._gerar_dados_cupom(cupom)
+    
+    def _gerar_linhas_produtos(self, cupom: CupomCompleto) -> list:
+        """
+        Gera as linhas do arquivo de produtos (layout normalizado)
+        
+        Valores numéricos usam settings.CSV_DECIMAL como separador decimal
+        
+        Args:
+            cupom: Objeto CupomCompleto
+        
+        Returns:
+            Lista de listas (uma linha por produto)
+        """
+        chave = cupom.obter_chave() or 'N/A'
+        
+        return [
+            [
+                chave,
+                item,
+                produto.descricao or 'N/A',
+                produto.codigo_ncm or 'N/A',
+                produto.cod_produto or 'N/A',
+                self._formatar_numero(produto.quantidade, 4),
+                self._formatar_numero(produto.valor_liquido, 2),
+                self._formatar_numero(produto.valor_total, 2),
+                produto.cod_gtin or 'N/A',
+            ]
+            for item, produto in enumerate(cupom.produtos, 1)
+        ]
+    
+    @staticmethod
+    def _formatar_numero(valor, casas: int) -> str:
+        """Formata um número com settings.CSV_DECIMAL ('N/A' se ausente)"""
+        if valor is None:
+            return 'N/A'
+        return f"{valor:.{casas}f}".replace('.', settings.CSV_DECIMAL)
+    
+    def _valor_cupom(self, texto: Optional[str]) -> str:
+        """
+        Valor monetário do cupom como exibido na página (layout único)
+        ou normalizado com settings.CSV_DECIMAL (layout normalizado)
+        """
+        if self.layout == 'normalizado':
+            decimal = para_decimal(texto)
+            if decimal is not None:
+                return self._formatar_numero(decimal, 2)
+        
+        return texto or 'N/A'
+    
     def _gerar_linhas(self, cupom: CupomCompleto) -> list:
         """
         Gera as linhas de dados do CSV
@@ -159,6 +534,33 @@ class CSVRepository:
         Returns:
             Lista com valores da linha
         """
+        linha = self._gerar_dados_cupom(cupom)
+        
+        # Produto
+        if produto:
+            linha.extend([
+                produto.descricao or 'N/A',
+                produto.codigo_ncm or 'N/A',
+                produto.quantidade or 'N/A',
+                produto.valor_liquido or 'N/A',
+                produto.valor_total or 'N/A',
+                produto.cod_gtin or 'N/A',
+            ])
+        else:
+            linha.extend(['N/A', 'N/A', 'N/A', 'N/A', 'N/A', 'N/A'])
+        
+        return linha
+    
+    def _gerar_dados_cupom(self, cupom: CupomCompleto) -> list:
+        """
+        Gera as colunas de emitente, consumidor, cupom e local de entrega
+        
+        Args:
+            cupom: CupomCompleto
+        
+        Returns:
+            Lista com valores (na ordem do cabeçalho)
+        """
         # Emitente
         linha = [
             cupom.emitente.nome or 'N/A',
@@ -184,11 +586,11 @@ class CSVRepository:
         
         # Cupom
         linha.extend([
-            cupom.cupom.total or 'N/A',
+            self._valor_cupom(cupom.cupom.total),
             cupom.cupom.data_hora or 'N/A',
             cupom.cupom.forma_pagamento or 'N/A',
-            cupom.cupom.troco or 'N/A',
-            cupom.cupom.tributos or 'N/A',
+            self._valor_cupom(cupom.cupom.troco),
+            self._valor_cupom(cupom.cupom.tributos),
             cupom.cupom.qr_code or 'N/A',
         ])
         
@@ -205,17 +607,248 @@ class CSVRepository:
         else:
             linha.extend(['N/A', 'N/A', 'N/A', 'N/A', 'N/A', 'N/A'])
         
-        # Produto
-        if produto:
-            linha.extend([
-                produto.descricao or 'N/A',
-                produto.codigo_ncm or 'N/A',
-                produto.quantidade or 'N/A',
-                produto.valor_liquido or 'N/A',
-                produto.valor_total or 'N/A',
-                produto.cod_gtin or 'N/A',
-            ])
-        else:
-            linha.extend(['N/A', 'N/A', 'N/A', 'N/A', 'N/A', 'N/A'])
+        return linha
+
+
+class CSVLoteWriter:
+    """
+    Grava vários cupons em um único arquivo CSV mantido aberto
+    
+    - Cabeçalho (e BOM) escrito uma vez por arquivo
+    - Linhas de cada cupom acrescentadas assim que ele termina
+    - Escrita bufferizada, com flush a cada N cupons
+    - Rotação para um novo arquivo por número de linhas ou tamanho
+      (as linhas de um mesmo cupom nunca são divididas entre arquivos)
+    
+    Uso:
+        with repositorio.abrir_lote('mercado') as lote:
+            for cupom in cupons:
+                lote.adicionar(cupom)
+    """
+    
+    def __init__(
+        self,
+        repositorio: CSVRepository,
+        nome_base: str = 'lote',
+        max_linhas: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        flush_a_cada: Optional[int] = None,
+        buffer_bytes: Optional[int] = None
+    ):
+        """
+        Args:
+            repositorio: CSVRepository que define diretório e formato
+            nome_base: Prefixo dos arquivos gerados
+            max_linhas: Máximo de linhas de dados por arquivo (0/None = sem limite)
+            max_bytes: Tamanho máximo por arquivo (0/None = sem limite)
+            flush_a_cada: Número de cupons entre flushes
+            buffer_bytes: Tamanho do buffer de escrita
+        """
+        self.repositorio = repositorio
+        self.nome_base = nome_base
+        self.max_linhas = max_linhas if max_linhas is not None else settings.CSV_BATCH_MAX_ROWS
+        self.max_bytes = max_bytes if max_bytes is not None else settings.CSV_BATCH_MAX_BYTES
+        self.flush_a_cada = flush_a_cada or settings.CSV_BATCH_FLUSH_EVERY
+        self.buffer_bytes = buffer_bytes or settings.CSV_BATCH_BUFFER_SIZE
         
-        return linha
\ No newline at end of file
+        self.arquivos: List[Path] = []
+        self.cupons_escritos = 0
+        
+        self._arquivo = None
+        self._writer = None
+        self._contador: Optional[_ContadorBytes] = None
+        self._linhas_arquivo = 0
+        self._cupons_desde_flush = 0
+    
+    @property
+    def caminho_atual(self) -> Optional[Path]:
+        """Arquivo em que os próximos cupons serão gravados"""
+        return self.arquivos[-1] if self._arquivo else None
+    
+    @property
+    def pendentes(self) -> int:
+        """Últimos cupons adicionados que ainda estão só no buffer"""
+        return self._cupons_desde_flush
+    
+    def adicionar(self, cupom: CupomCompleto) -> Path:
+        """
+        Acrescenta as linhas de um cupom ao arquivo do lote
+        
+        Args:
+            cupom: Objeto CupomCompleto
+        
+        Returns:
+            Path do arquivo em que o cupom foi gravado
+        """
+        linhas = self.repositorio._gerar_linhas(cupom)
+        
+        if self._arquivo is None or self._precisa_rotacionar(len(linhas)):
+            self._abrir_novo_arquivo()
+        
+        self._writer.writerows(linhas)
+        self._linhas_arquivo += len(linhas)
+        self.cupons_escritos += 1
+        self._cupons_desde_flush += 1
+        
+        if self._cupons_desde_flush >= self.flush_a_cada:
+            self.flush()
+        
+        return self.arquivos[-1]
+    
+    def _precisa_rotacionar(self, novas_linhas: int) -> bool:
+        """Verifica se o cupom seguinte deve ir para um novo arquivo"""
+        # Arquivo vazio sempre recebe o cupom, mesmo que ultrapasse os limites
+        if self._linhas_arquivo == 0:
+            return False
+        
+        if self.max_linhas and self._linhas_arquivo + novas_linhas > self.max_linhas:
+            return True
+        
+        if self.max_bytes and self._tamanho_arquivo() >= self.max_bytes:
+            return True
+        
+        return False
+    
+    def _tamanho_arquivo(self) -> int:
+        """Tamanho do arquivo atual (compactado, se houver compressão)"""
+        if self._contador is not None:
+            return self._contador.bytes
+        return tamanho_em_disco(self._arquivo)
+    
+    def _criar_writer_medido(self, arquivo: TextIO, caminho: Path):
+        """
+        csv.writer do arquivo medido na rotação por tamanho
+        
+        Sem compressão, os bytes são contados na escrita; compactado, o
+        tamanho vem do disco (fstat). Nos dois casos o buffer não é esvaziado.
+        """
+        self._contador = None
+        if self.max_bytes and not compressao_da_extensao(caminho):
+            self._contador = _ContadorBytes(arquivo, settings.FILE_ENCODING)
+            return self.repositorio._criar_writer(self._contador)
+        return self.repositorio._criar_writer(arquivo)
+    
+    def _abrir_novo_arquivo(self):
+        """Fecha o arquivo atual (se houver) e abre o próximo com cabeçalho"""
+        self._fechar_arquivo()
+        
+        parte = len(self.arquivos) + 1
+        caminho, self._arquivo = self.repositorio._criar_arquivo_unico(
+            f"{self.nome_base}_parte{parte:04d}",
+            buffering=self.buffer_bytes
+        )
+        self._writer = self._criar_writer_medido(self._arquivo, caminho)
+        self._writer.writerow(self.repositorio._gerar_cabecalho())
+        self._linhas_arquivo = 0
+        self.arquivos.append(caminho)
+    
+    def flush(self):
+        """Envia o buffer para o sistema operacional"""
+        if self._arquivo:
+            self._arquivo.flush()
+        self._cupons_desde_flush = 0
+    
+    def _fechar_arquivo(self):
+        """Fecha o arquivo atual"""
+        if self._arquivo:
+            self._arquivo.close()
+            self._arquivo = None
+            self._writer = None
+            self._contador = None
+            self._cupons_desde_flush = 0
+    
+    def fechar(self):
+        """Grava o que estiver no buffer e fecha o arquivo do lote"""
+        self._fechar_arquivo()
+        
+        if self.arquivos:
+            print(f"SUCESSO: Lote CSV com {self.cupons_escritos} cupons salvo em "
+                  f"{len(self.arquivos)} arquivo(s)")
+    
+    def __enter__(self) -> 'CSVLoteWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.fechar()
+
+
+class CSVNormalizadoLoteWriter(CSVLoteWriter):
+    """
+    Grava um lote no layout normalizado: arquivo de cupons + arquivo de produtos
+    
+    Os dados gerais do cupom são escritos uma única vez (arquivo de cupons)
+    e cada produto leva apenas a chave de acesso para a ligação. A rotação
+    por linhas/tamanho é medida no arquivo de produtos (o maior) e troca
+    os dois arquivos juntos.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        self.arquivos_produtos: List[Path] = []
+        
+        self._arquivo_cupons = None
+        self._writer_cupons = None
+    
+    def adicionar(self, cupom: CupomCompleto) -> Path:
+        """
+        Acrescenta o cupom ao arquivo de cupons e seus itens ao de produtos
+        
+        Args:
+            cupom: Objeto CupomCompleto
+        
+        Returns:
+            Path do arquivo de cupons em que o cupom foi gravado
+        """
+        linhas = self.repositorio._gerar_linhas_produtos(cupom)
+        
+        if self._arquivo is None or self._precisa_rotacionar(max(len(linhas), 1)):
+            self._abrir_novo_arquivo()
+        
+        self._writer_cupons.writerow(self.repositorio._gerar_linha_cupom(cupom))
+        self._writer.writerows(linhas)
+        self._linhas_arquivo += max(len(linhas), 1)
+        self.cupons_escritos += 1
+        self._cupons_desde_flush += 1
+        
+        if self._cupons_desde_flush >= self.flush_a_cada:
+            self.flush()
+        
+        return self.arquivos[-1]
+    
+    def _abrir_novo_arquivo(self):
+        """Fecha o par atual (se houver) e abre o próximo com cabeçalhos"""
+        self._fechar_arquivo()
+        
+        parte = len(self.arquivos) + 1
+        caminho, self._arquivo_cupons = self.repositorio._criar_arquivo_unico(
+            f"{self.nome_base}_parte{parte:04d}_cupons",
+            buffering=self.buffer_bytes,
+            com_produtos=True
+        )
+        caminho_produtos, self._arquivo = self.repositorio._abrir_arquivo_produtos(
+            caminho, buffering=self.buffer_bytes
+        )
+        
+        self._writer_cupons = self.repositorio._criar_writer(self._arquivo_cupons)
+        self._writer_cupons.writerow(self.repositorio._gerar_cabecalho_cupons())
+        self._writer = self._criar_writer_medido(self._arquivo, caminho_produtos)
+        self._writer.writerow(self.repositorio._gerar_cabecalho_produtos())
+        
+        self._linhas_arquivo = 0
+        self.arquivos.append(caminho)
+        self.arquivos_produtos.append(caminho_produtos)
+    
+    def flush(self):
+        """Envia os buffers dos dois arquivos para o sistema operacional"""
+        if self._arquivo_cupons:
+            self._arquivo_cupons.flush()
+        super().flush()
+    
+    def _fechar_arquivo(self):
+        """Fecha o par de arquivos atual"""
+        if self._arquivo_cupons:
+            self._arquivo_cupons.close()
+            self._arquivo_cupons = None
+            self._writer_cupons = None
+        super()._fechar_arquivo()
\ No newline at end of file
@@ -0,0 +1,328 @@
+"""
+Repositório para exportar cupons em planilha Excel (.xlsx)
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+from src.config import settings
+from src.models.cupom_completo import CupomCompleto
+from src.utils.arquivos import criar_com_nome_livre, liberar_nome, reservar_nome
+from src.utils.numeros import para_decimal
+
+
+# Limite de linhas por planilha do Excel (inclui o cabeçalho)
+LIMITE_LINHAS_EXCEL = 1_048_576
+
+FORMATO_DINHEIRO = '#,##0.00'
+FORMATO_QUANTIDADE = '#,##0.0000'
+FORMATO_DATA_HORA = 'dd/mm/yyyy hh:mm:ss'
+
+# (coluna, formato numérico) de cada planilha
+COLUNAS_CUPONS = [
+    ('Chave_Acesso', None),
+    ('Emitente_CNPJ', None),
+    ('Emitente_Nome', None),
+    ('Emitente_UF', None),
+    ('Emitente_Extrato_Numero', None),
+    ('Emitente_SAT_Numero', None),
+    ('Consumidor_CPF_CNPJ', None),
+    ('Cupom_Data_Hora', FORMATO_DATA_HORA),
+    ('Cupom_Total', FORMATO_DINHEIRO),
+    ('Cupom_Troco', FORMATO_DINHEIRO),
+    ('Cupom_Tributos', FORMATO_DINHEIRO),
+    ('Cupom_Forma_Pagamento', None),
+    ('Entrega_Municipio', None),
+    ('Entrega_UF', None),
+    ('Quantidade_Produtos', None),
+]
+
+COLUNAS_PRODUTOS = [
+    ('Chave_Acesso', None),
+    ('Item', None),
+    ('Produto_Descricao', None),
+    ('Produto_NCM', None),
+    ('Produto_Cod_Produto', None),
+    ('Produto_Cod_GTIN', None),
+    ('Produto_Quantidade', FORMATO_QUANTIDADE),
+    ('Produto_Valor_Liquido', FORMATO_DINHEIRO),
+    ('Produto_Valor_Total', FORMATO_DINHEIRO),
+]
+
+
+def _numero(texto) -> Optional[float]:
+    """Valor monetário da página como número (None se ausente)"""
+    decimal = para_decimal(texto)
+    return float(decimal) if decimal is not None else None
+
+
+class ExcelRepository:
+    """
+    Repositório para exportar cupons fiscais em Excel
+    
+    Usa o modo write-only do openpyxl: as linhas são enviadas para o
+    arquivo à medida que são adicionadas, sem montar a planilha inteira em
+    memória. Gera duas abas ligadas pela chave de acesso:
+    - cupons: uma linha por cupom
+    - produtos: uma linha por produto
+    
+    Valores e datas são gravados como número/data do Excel (não texto).
+    Ao atingir o limite de linhas de uma aba, continua em cupons_2,
+    produtos_2, ...
+    """
+    
+    def __init__(self, diretorio: Optional[Path] = None):
+        """
+        Inicializa o repositório Excel
+        
+        Args:
+            diretorio: Diretório onde salvar os arquivos (padrão: settings.OUTPUT_DIR)
+        """
+        self.diretorio = diretorio or settings.OUTPUT_DIR
+        self.diretorio.mkdir(exist_ok=True, parents=True)
+    
+    def salvar(self, cupom: CupomCompleto, nome_arquivo: Optional[str] = None) -> Path:
+        """
+        Salva um cupom completo em arquivo Excel
+        
+        Args:
+            cupom: Objeto CupomCompleto com todos os dados
+            nome_arquivo: Nome do arquivo (opcional, gera automaticamente se None)
+        
+        Returns:
+            Path do arquivo salvo
+        """
+        if nome_arquivo is None:
+            cnpj = ''.join(c for c in cupom.emitente.cnpj or '' if c.isdigit()) or 'sem_cnpj'
+            timestamp = datetime.now().strftime(settings.DATETIME_FORMAT)
+            nome_arquivo = f"cupom_{cnpj}_{timestamp}"
+        
+        with self.abrir_lote(nome_arquivo) as lote:
+            lote.adicionar(cupom)
+        
+        return lote.caminho
+    
+    def abrir_lote(self, nome_arquivo: str = 'lote', max_linhas: Optional[int] = None) -> 'ExcelLoteWriter':
+        """
+        Abre uma planilha para gravar vários cupons em sequência
+        
+        Nunca sobrescreve: se o nome já existir ou estiver reservado por
+        outra planilha ainda aberta (ex: dois lotes no mesmo segundo), usa o
+        próximo sufixo livre (_2, _3, ...).
+        
+        Args:
+            nome_arquivo: Nome do arquivo (sem extensão)
+            max_linhas: Linhas por aba, incluindo o cabeçalho
+                (padrão: settings.EXCEL_MAX_ROWS)
+        
+        Returns:
+            ExcelLoteWriter (use com `with` ou chame fechar())
+        """
+        if not nome_arquivo.endswith('.xlsx'):
+            nome_arquivo += '.xlsx'
+        
+        return criar_com_nome_livre(
+            self.diretorio / nome_arquivo,
+            lambda livre: ExcelLoteWriter(livre, max_linhas=max_linhas)
+        )
+    
+    @staticmethod
+    def gerar_linha_cupom(cupom: CupomCompleto) -> list:
+        """
+        Gera a linha da aba cupons com valores tipados
+        
+        Args:
+            cupom: Objeto CupomCompleto
+        
+        Returns:
+            Lista na ordem de COLUNAS_CUPONS
+        """
+        emitente = cupom.emitente
+        entrega = cupom.local_entrega
+        
+        return [
+            cupom.obter_chave(),
+            emitente.cnpj,
+            emitente.nome,
+            emitente.uf,
+            emitente.extrato_numero,
+            emitente.sat_numero,
+            cupom.consumidor.cpf_cnpj if cupom.consumidor else None,
+            cupom.cupom.emissao,
+            _numero(cupom.cupom.total),
+            _numero(cupom.cupom.troco),
+            _numero(cupom.cupom.tributos),
+            cupom.cupom.forma_pagamento,
+            entrega.municipio if entrega else None,
+            entrega.uf if entrega else None,
+            len(cupom.produtos),
+        ]
+    
+    @staticmethod
+    def gerar_linhas_produtos(cupom: CupomCompleto) -> List[list]:
+        """
+        Gera as linhas da aba produtos com valores tipados
+        
+        Args:
+            cupom: Objeto CupomCompleto
+        
+        Returns:
+            Lista de linhas na ordem de COLUNAS_PRODUTOS
+        """
+        chave = cupom.obter_chave()
+        
+        return [
+            [
+                chave,
+                item,
+                produto.descricao,
+                produto.codigo_ncm,
+                produto.cod_produto,
+                produto.cod_gtin,
+                produto.quantidade,
+                produto.valor_liquido,
+                produto.valor_total,
+            ]
+            for item, produto in enumerate(cupom.produtos, 1)
+        ]
+
+
+class _AbaRotativa:
+    """
+    Aba write-only que continua em uma nova aba ao atingir o limite
+    
+    As colunas numéricas usam uma WriteOnlyCell formatada por coluna,
+    criada uma vez por aba e reaproveitada: o openpyxl serializa a linha
+    no append(), então basta trocar o valor da célula a cada linha.
+    As demais colunas são escritas como valores simples (mais rápido).
+    """
+    
+    def __init__(self, planilha: Workbook, nome: str, colunas: list, max_linhas: int):
+        self.planilha = planilha
+        self.nome = nome
+        self.cabecalho = [coluna for coluna, _ in colunas]
+        self.formatos = [formato for _, formato in colunas]
+        self.max_linhas = max_linhas
+        self.abas: List[str] = []
+        self._aba = None
+        self._celulas: List[Optional[WriteOnlyCell]] = []
+        self._linhas = 0
+    
+    def escrever(self, linhas: List[list]):
+        """Escreve as linhas na mesma aba, abrindo outra se não couberem"""
+        if self._aba is None or (self._linhas + len(linhas) > self.max_linhas and self._linhas > 1):
+            self._nova_aba()
+        
+        for linha in linhas:
+            # Só divide o grupo se ele não couber nem em uma aba vazia
+            if self._linhas >= self.max_linhas:
+                self._nova_aba()
+            
+            valores = list(linha)
+            for indice, celula in enumerate(self._celulas):
+                if celula is not None and valores[indice] is not None:
+                    celula.value = valores[indice]
+                    valores[indice] = celula
+            
+            self._aba.append(valores)
+            self._linhas += 1
+    
+    def _nova_aba(self):
+        nome = self.nome if not self.abas else f"{self.nome}_{len(self.abas) + 1}"
+        self._aba = self.planilha.create_sheet(title=nome)
+        self._aba.append(self.cabecalho)
+        self._linhas = 1
+        self.abas.append(nome)
+        
+        self._celulas = []
+        for formato in self.formatos:
+            celula = None
+            if formato:
+                celula = WriteOnlyCell(self._aba)
+                celula.number_format = formato
+            self._celulas.append(celula)
+
+
+class ExcelLoteWriter:
+    """
+    Grava vários cupons em uma única planilha Excel, em streaming
+    
+    A memória fica estável: o openpyxl (write-only) grava as linhas em
+    arquivos temporários e monta o .xlsx apenas em fechar(). Até lá o
+    nome fica reservado (reservar_nome), para que outro escritor não o use.
+    """
+    
+    def __init__(self, caminho: Path, max_linhas: Optional[int] = None):
+        """
+        Cria a planilha com as abas cupons e produtos
+        
+        Args:
+            caminho: Arquivo .xlsx de destino (novo)
+            max_linhas: Linhas por aba, incluindo o cabeçalho
+                (padrão: settings.EXCEL_MAX_ROWS)
+        
+        Raises:
+            FileExistsError: Se o arquivo já existir ou o nome estiver reservado
+        """
+        if not reservar_nome(caminho):
+            raise FileExistsError(caminho)
+        
+        max_linhas = min(max_linhas or settings.EXCEL_MAX_ROWS, LIMITE_LINHAS_EXCEL)
+        
+        self.caminho = caminho
+        self.cupons_escritos = 0
+        self._planilha = Workbook(write_only=True)
+        self._cupons = _AbaRotativa(self._planilha, 'cupons', COLUNAS_CUPONS, max_linhas)
+        self._produtos = _AbaRotativa(self._planilha, 'produtos', COLUNAS_PRODUTOS, max_linhas)
+        self._fechado = False
+    
+    @property
+    def abas(self) -> List[str]:
+        """Nomes das abas criadas até o momento"""
+        return self._cupons.abas + self._produtos.abas
+    
+    def adicionar(self, cupom: CupomCompleto) -> Path:
+        """
+        Adiciona um cupom (e seus produtos) à planilha
+        
+        Os produtos de um cupom nunca são divididos entre duas abas.
+        
+        Args:
+            cupom: Objeto CupomCompleto
+        
+        Returns:
+            Path do arquivo do lote
+        """
+        self._cupons.escrever([ExcelRepository.gerar_linha_cupom(cupom)])
+        
+        produtos = ExcelRepository.gerar_linhas_produtos(cupom)
+        if produtos:
+            self._produtos.escrever(produtos)
+        
+        self.cupons_escritos += 1
+        return self.caminho
+    
+    def fechar(self):
+        """Monta e grava o arquivo .xlsx"""
+        if self._fechado:
+            return
+        
+        # Planilha sem cupons ainda precisa das abas com cabeçalho
+        for aba in (self._cupons, self._produtos):
+            if not aba.abas:
+                aba._nova_aba()
+        
+        try:
+            self._planilha.save(self.caminho)
+        finally:
+            liberar_nome(self.caminho)
+        self._fechado = True
+    
+    def __enter__(self) -> 'ExcelLoteWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.fechar()
\ No newline at end of file
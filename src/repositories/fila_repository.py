@@ -0,0 +1,521 @@
+"""
+Repositórios de fila de trabalho para distribuir chaves entre várias máquinas
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: sem flock, usa apenas o lock interno do SQLite
+    fcntl = None
+
+from src.config import settings
+
+
+# Status possíveis de uma tarefa
+STATUS_PENDENTE = 'pendente'
+STATUS_PROCESSANDO = 'processando'
+STATUS_CONCLUIDA = 'concluida'
+STATUS_FALHA = 'falha'
+
+
+def gerar_worker_id() -> str:
+    """
+    Gera um identificador para o worker atual
+    
+    Returns:
+        String no formato "<hostname>-<pid>"
+    """
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+@dataclass
+class Tarefa:
+    """
+    Representa uma chave alugada (lease) por um worker
+    
+    Attributes:
+        id: Identificador da tarefa na fila
+        chave: Chave de acesso (ou entrada) a processar
+        tentativas: Número de vezes que a tarefa já foi entregue
+        token: Token do lease (só quem tem o token pode confirmar/rejeitar)
+        expira_em: Instante (epoch) em que o lease expira
+    """
+    id: int
+    chave: str
+    tentativas: int
+    token: str
+    expira_em: float
+
+
+class FilaRepository(ABC):
+    """
+    Interface de fila de trabalho com lease, visibilidade e ack/nack
+    
+    Semântica:
+    - obter(): entrega uma tarefa pendente e a torna invisível por
+      `visibilidade` segundos (lease)
+    - confirmar(): ack, remove a tarefa da fila definitivamente
+    - rejeitar(): nack, devolve a tarefa para a fila (ou marca falha)
+    - Se o worker morrer, o lease expira e a tarefa volta a ser entregue
+      para outro worker
+    - Após `max_tentativas` entregas a tarefa vai para STATUS_FALHA
+    
+    Implementações para brokers (Redis, SQS, RabbitMQ...) devem seguir
+    a mesma interface; MemoriaFilaRepository serve de referência.
+    """
+    
+    def __init__(
+        self,
+        visibilidade: Optional[float] = None,
+        max_tentativas: Optional[int] = None
+    ):
+        """
+        Args:
+            visibilidade: Duração padrão do lease (segundos)
+            max_tentativas: Número máximo de entregas por tarefa
+        """
+        self.visibilidade = visibilidade or settings.QUEUE_VISIBILITY_TIMEOUT
+        self.max_tentativas = max_tentativas or settings.QUEUE_MAX_ATTEMPTS
+    
+    @abstractmethod
+    def adicionar(self, chaves: Iterable[str]) -> int:
+        """
+        Adiciona chaves à fila (chaves repetidas são ignoradas)
+        
+        Returns:
+            Número de chaves efetivamente adicionadas
+        """
+    
+    @abstractmethod
+    def obter(self, worker_id: str, visibilidade: Optional[float] = None) -> Optional[Tarefa]:
+        """
+        Aluga a próxima tarefa disponível
+        
+        Returns:
+            Tarefa alugada ou None se não há tarefa disponível no momento
+        """
+    
+    @abstractmethod
+    def confirmar(self, tarefa: Tarefa) -> bool:
+        """
+        Confirma (ack) o processamento de uma tarefa
+        
+        Returns:
+            False se o lease já expirou e a tarefa foi entregue a outro worker
+        """
+    
+    @abstractmethod
+    def rejeitar(
+        self,
+        tarefa: Tarefa,
+        erro: Optional[str] = None,
+        reenfileirar: bool = True,
+        atraso: float = 0
+    ) -> bool:
+        """
+        Rejeita (nack) uma tarefa
+        
+        Args:
+            tarefa: Tarefa alugada
+            erro: Mensagem de erro (opcional)
+            reenfileirar: Se False, marca falha definitiva
+            atraso: Segundos até a tarefa voltar a ficar visível
+        
+        Returns:
+            False se o lease já não pertence a este worker
+        """
+    
+    @abstractmethod
+    def estender(self, tarefa: Tarefa, visibilidade: Optional[float] = None) -> bool:
+        """
+        Renova o lease de uma tarefa em andamento (heartbeat)
+        
+        Returns:
+            False se o lease já expirou
+        """
+    
+    @abstractmethod
+    def contagem(self) -> Dict[str, int]:
+        """
+        Conta tarefas por status
+        
+        Returns:
+            Dicionário {status: quantidade}
+        """
+    
+    def possui_trabalho(self) -> bool:
+        """Verifica se ainda há tarefas pendentes ou em andamento"""
+        contagem = self.contagem()
+        return bool(contagem.get(STATUS_PENDENTE) or contagem.get(STATUS_PROCESSANDO))
+
+
+class MemoriaFilaRepository(FilaRepository):
+    """
+    Fila em memória, segura para threads
+    
+    Serve como implementação de referência da interface de broker e como
+    substituto local em testes. Não é compartilhada entre processos.
+    """
+    
+    def __init__(self, visibilidade: Optional[float] = None, max_tentativas: Optional[int] = None):
+        super().__init__(visibilidade, max_tentativas)
+        self._lock = threading.Lock()
+        self._tarefas: Dict[int, dict] = {}
+        self._chaves = set()
+        self._proximo_id = 1
+    
+    def adicionar(self, chaves: Iterable[str]) -> int:
+        adicionadas = 0
+        
+        with self._lock:
+            for chave in chaves:
+                if chave in self._chaves:
+                    continue
+                
+                self._chaves.add(chave)
+                self._tarefas[self._proximo_id] = {
+                    'chave': chave,
+                    'status': STATUS_PENDENTE,
+                    'tentativas': 0,
+                    'token': None,
+                    'disponivel_em': 0.0,
+                    'expira_em': 0.0,
+                    'worker': None,
+                    'erro': None,
+                }
+                self._proximo_id += 1
+                adicionadas += 1
+        
+        return adicionadas
+    
+    def obter(self, worker_id: str, visibilidade: Optional[float] = None) -> Optional[Tarefa]:
+        visibilidade = visibilidade or self.visibilidade
+        
+        with self._lock:
+            agora = time.time()
+            
+            for id_tarefa, registro in self._tarefas.items():
+                disponivel = (
+                    (registro['status'] == STATUS_PENDENTE and registro['disponivel_em'] <= agora)
+                    or (registro['status'] == STATUS_PROCESSANDO and registro['expira_em'] <= agora)
+                )
+                
+                if not disponivel:
+                    continue
+                
+                # Lease expirado de tarefa que já esgotou as tentativas
+                if registro['tentativas'] >= self.max_tentativas:
+                    registro['status'] = STATUS_FALHA
+                    registro['erro'] = registro['erro'] or "Tentativas esgotadas"
+                    continue
+                
+                registro['status'] = STATUS_PROCESSANDO
+                registro['tentativas'] += 1
+                registro['token'] = uuid.uuid4().hex
+                registro['expira_em'] = agora + visibilidade
+                registro['worker'] = worker_id
+                
+                return Tarefa(
+                    id=id_tarefa,
+                    chave=registro['chave'],
+                    tentativas=registro['tentativas'],
+                    token=registro['token'],
+                    expira_em=registro['expira_em']
+                )
+        
+        return None
+    
+    def _registro_do_lease(self, tarefa: Tarefa) -> Optional[dict]:
+        """Retorna o registro se o lease ainda pertence à tarefa informada"""
+        registro = self._tarefas.get(tarefa.id)
+        
+        if (
+            registro is None
+            or registro['status'] != STATUS_PROCESSANDO
+            or registro['token'] != tarefa.token
+        ):
+            return None
+        
+        return registro
+    
+    def confirmar(self, tarefa: Tarefa) -> bool:
+        with self._lock:
+            registro = self._registro_do_lease(tarefa)
+            
+            if registro is None:
+                return False
+            
+            registro['status'] = STATUS_CONCLUIDA
+            registro['token'] = None
+            return True
+    
+    def rejeitar(
+        self,
+        tarefa: Tarefa,
+        erro: Optional[str] = None,
+        reenfileirar: bool = True,
+        atraso: float = 0
+    ) -> bool:
+        with self._lock:
+            registro = self._registro_do_lease(tarefa)
+            
+            if registro is None:
+                return False
+            
+            registro['erro'] = erro
+            registro['token'] = None
+            
+            if reenfileirar and registro['tentativas'] < self.max_tentativas:
+                registro['status'] = STATUS_PENDENTE
+                registro['disponivel_em'] = time.time() + atraso
+            else:
+                registro['status'] = STATUS_FALHA
+            
+            return True
+    
+    def estender(self, tarefa: Tarefa, visibilidade: Optional[float] = None) -> bool:
+        with self._lock:
+            registro = self._registro_do_lease(tarefa)
+            
+            if registro is None:
+                return False
+            
+            registro['expira_em'] = time.time() + (visibilidade or self.visibilidade)
+            tarefa.expira_em = registro['expira_em']
+            return True
+    
+    def contagem(self) -> Dict[str, int]:
+        with self._lock:
+            contagem: Dict[str, int] = {}
+            
+            for registro in self._tarefas.values():
+                contagem[registro['status']] = contagem.get(registro['status'], 0) + 1
+            
+            return contagem
+
+
+class SQLiteFilaRepository(FilaRepository):
+    """
+    Fila persistida em um arquivo SQLite
+    
+    Funciona para vários processos na mesma máquina ou em máquinas que
+    compartilham o arquivo por um sistema de arquivos em rede. Cada operação
+    roda em uma transação BEGIN IMMEDIATE; opcionalmente a transação também
+    é protegida por um flock em "<arquivo>.lock", pois o lock nativo do
+    SQLite não é confiável em alguns sistemas de arquivos em rede.
+    """
+    
+    def __init__(
+        self,
+        caminho: Optional[Path] = None,
+        visibilidade: Optional[float] = None,
+        max_tentativas: Optional[int] = None,
+        usar_lock_arquivo: bool = True
+    ):
+        """
+        Args:
+            caminho: Arquivo SQLite da fila (padrão: settings.QUEUE_DB_PATH)
+            visibilidade: Duração padrão do lease (segundos)
+            max_tentativas: Número máximo de entregas por tarefa
+            usar_lock_arquivo: Se True, usa flock adicional (quando disponível)
+        """
+        super().__init__(visibilidade, max_tentativas)
+        self.caminho = Path(caminho or settings.QUEUE_DB_PATH)
+        self.caminho.parent.mkdir(exist_ok=True, parents=True)
+        
+        self._caminho_lock = self.caminho.with_name(self.caminho.name + '.lock')
+        self._usar_lock_arquivo = usar_lock_arquivo and fcntl is not None
+        self._lock = threading.Lock()
+        
+        # isolation_level=None: transações controladas manualmente
+        self._conexao = sqlite3.connect(
+            str(self.caminho),
+            timeout=settings.QUEUE_LOCK_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._criar_tabela()
+    
+    def _criar_tabela(self):
+        """Cria a tabela de tarefas se não existir"""
+        with self._transacao() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS tarefas (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    chave TEXT NOT NULL UNIQUE,
+                    status TEXT NOT NULL,
+                    tentativas INTEGER NOT NULL DEFAULT 0,
+                    token TEXT,
+                    worker TEXT,
+                    disponivel_em REAL NOT NULL DEFAULT 0,
+                    expira_em REAL NOT NULL DEFAULT 0,
+                    erro TEXT,
+                    atualizado_em REAL
+                )
+            """)
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_tarefas_status ON tarefas (status, disponivel_em, expira_em)"
+            )
+    
+    @contextmanager
+    def _transacao(self):
+        """Executa um bloco em transação exclusiva de escrita"""
+        with self._lock:
+            arquivo_lock = None
+            
+            if self._usar_lock_arquivo:
+                arquivo_lock = open(self._caminho_lock, 'a')
+                fcntl.flock(arquivo_lock, fcntl.LOCK_EX)
+            
+            try:
+                cursor = self._conexao.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                
+                try:
+                    yield cursor
+                    cursor.execute("COMMIT")
+                except Exception:
+                    cursor.execute("ROLLBACK")
+                    raise
+            
+            finally:
+                if arquivo_lock is not None:
+                    fcntl.flock(arquivo_lock, fcntl.LOCK_UN)
+                    arquivo_lock.close()
+    
+    def adicionar(self, chaves: Iterable[str]) -> int:
+        agora = time.time()
+        
+        with self._transacao() as cursor:
+            antes = self._conexao.total_changes
+            cursor.executemany(
+                "INSERT OR IGNORE INTO tarefas (chave, status, atualizado_em) VALUES (?, ?, ?)",
+                ((chave, STATUS_PENDENTE, agora) for chave in chaves)
+            )
+            return self._conexao.total_changes - antes
+    
+    def obter(self, worker_id: str, visibilidade: Optional[float] = None) -> Optional[Tarefa]:
+        visibilidade = visibilidade or self.visibilidade
+        
+        with self._transacao() as cursor:
+            agora = time.time()
+            
+            # Leases expirados que já esgotaram as tentativas vão para falha
+            cursor.execute(
+                """
+                UPDATE tarefas SET status = ?, token = NULL, atualizado_em = ?,
+                       erro = COALESCE(erro, 'Tentativas esgotadas')
+                WHERE status = ? AND expira_em <= ? AND tentativas >= ?
+                """,
+                (STATUS_FALHA, agora, STATUS_PROCESSANDO, agora, self.max_tentativas)
+            )
+            
+            cursor.execute(
+                """
+                SELECT id, chave, tentativas FROM tarefas
+                WHERE (status = ? AND disponivel_em <= ?)
+                   OR (status = ? AND expira_em <= ?)
+                ORDER BY id
+                LIMIT 1
+                """,
+                (STATUS_PENDENTE, agora, STATUS_PROCESSANDO, agora)
+            )
+            linha = cursor.fetchone()
+            
+            if linha is None:
+                return None
+            
+            id_tarefa, chave, tentativas = linha
+            token = uuid.uuid4().hex
+            expira_em = agora + visibilidade
+            
+            cursor.execute(
+                """
+                UPDATE tarefas SET status = ?, tentativas = ?, token = ?, worker = ?,
+                       expira_em = ?, atualizado_em = ?
+                WHERE id = ?
+                """,
+                (STATUS_PROCESSANDO, tentativas + 1, token, worker_id, expira_em, agora, id_tarefa)
+            )
+            
+            return Tarefa(
+                id=id_tarefa,
+                chave=chave,
+                tentativas=tentativas + 1,
+                token=token,
+                expira_em=expira_em
+            )
+    
+    def confirmar(self, tarefa: Tarefa) -> bool:
+        with self._transacao() as cursor:
+            cursor.execute(
+                """
+                UPDATE tarefas SET status = ?, token = NULL, atualizado_em = ?
+                WHERE id = ? AND token = ? AND status = ?
+                """,
+                (STATUS_CONCLUIDA, time.time(), tarefa.id, tarefa.token, STATUS_PROCESSANDO)
+            )
+            return cursor.rowcount == 1
+    
+    def rejeitar(
+        self,
+        tarefa: Tarefa,
+        erro: Optional[str] = None,
+        reenfileirar: bool = True,
+        atraso: float = 0
+    ) -> bool:
+        agora = time.time()
+        
+        if reenfileirar and tarefa.tentativas < self.max_tentativas:
+            novo_status = STATUS_PENDENTE
+        else:
+            novo_status = STATUS_FALHA
+        
+        with self._transacao() as cursor:
+            cursor.execute(
+                """
+                UPDATE tarefas SET status = ?, token = NULL, erro = ?,
+                       disponivel_em = ?, atualizado_em = ?
+                WHERE id = ? AND token = ? AND status = ?
+                """,
+                (novo_status, erro, agora + atraso, agora, tarefa.id, tarefa.token, STATUS_PROCESSANDO)
+            )
+            return cursor.rowcount == 1
+    
+    def estender(self, tarefa: Tarefa, visibilidade: Optional[float] = None) -> bool:
+        expira_em = time.time() + (visibilidade or self.visibilidade)
+        
+        with self._transacao() as cursor:
+            cursor.execute(
+                """
+                UPDATE tarefas SET expira_em = ?
+                WHERE id = ? AND token = ? AND status = ?
+                """,
+                (expira_em, tarefa.id, tarefa.token, STATUS_PROCESSANDO)
+            )
+            
+            if cursor.rowcount != 1:
+                return False
+        
+        tarefa.expira_em = expira_em
+        return True
+    
+    def contagem(self) -> Dict[str, int]:
+        with self._lock:
+            cursor = self._conexao.execute("SELECT status, COUNT(*) FROM tarefas GROUP BY status")
+            return dict(cursor.fetchall())
+    
+    def fechar(self):
+        """Fecha a conexão com o banco"""
+        self._conexao.close()
@@ -0,0 +1,218 @@
+"""
+Índice persistente de códigos de barras: GTIN -> (chave, item) dos cupons
+"""
+import sqlite3
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from src.config import settings
+from src.models.cupom_completo import CupomCompleto
+from src.utils.gtin import normalizar_gtin
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocorrencia (
+    gtin TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    item INTEGER NOT NULL,
+    PRIMARY KEY (gtin, chave, item)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_ocorrencia_chave ON ocorrencia (chave);
+"""
+
+SQL_OCORRENCIA = "INSERT OR IGNORE INTO ocorrencia (gtin, chave, item) VALUES (?, ?, ?)"
+
+
+class GTINRepository:
+    """
+    Índice de todas as compras de cada código de barras
+    
+    Guarda, para cada GTIN válido, a chave de acesso e a posição (item,
+    a partir de 1) de cada produto: "todas as compras de 7891234567895"
+    é uma consulta pela chave primária, sem ler os arquivos de saída.
+    
+    Os GTINs são gravados com 14 dígitos (normalizar_gtin), então o
+    mesmo produto é encontrado como GTIN-13 ou GTIN-14. Códigos ausentes
+    ou com dígito verificador errado não entram no índice. Reindexar um
+    cupom substitui as ocorrências anteriores dele.
+    """
+    
+    def __init__(self, caminho: Optional[Path] = None, tamanho_lote: Optional[int] = None):
+        """
+        Args:
+            caminho: Arquivo do índice (padrão: settings.GTIN_INDEX_PATH)
+            tamanho_lote: Cupons acumulados antes de cada transação
+                (padrão: settings.SQLITE_BATCH_SIZE)
+        """
+        self.caminho = Path(caminho or settings.GTIN_INDEX_PATH)
+        self.caminho.parent.mkdir(exist_ok=True, parents=True)
+        self.tamanho_lote = tamanho_lote or settings.SQLITE_BATCH_SIZE
+        
+        self.conexao = sqlite3.connect(str(self.caminho))
+        self.conexao.execute("PRAGMA journal_mode = WAL")
+        self.conexao.execute("PRAGMA synchronous = NORMAL")
+        self.conexao.executescript(SCHEMA)
+        
+        self._pendentes: List[CupomCompleto] = []
+        self._falhas: List[Tuple[CupomCompleto, Exception]] = []
+    
+    def salvar(self, cupom: CupomCompleto, nome_arquivo: Optional[str] = None) -> Path:
+        """
+        Indexa um cupom imediatamente
+        
+        Args:
+            cupom: Objeto CupomCompleto
+            nome_arquivo: Ignorado (mantido por compatibilidade com CSVRepository)
+        
+        Returns:
+            Path do índice
+        """
+        self.salvar_varios([cupom])
+        return self.caminho
+    
+    def adicionar(self, cupom: CupomCompleto) -> Path:
+        """
+        Acumula um cupom e indexa quando o lote atinge `tamanho_lote`
+        
+        Returns:
+            Path do índice
+        
+        Raises:
+            ValueError: Se o cupom não tiver chave de acesso (não é acumulado)
+        """
+        if not cupom.obter_chave():
+            raise ValueError("Cupom sem chave de acesso não pode ser indexado")
+        
+        self._pendentes.append(cupom)
+        
+        if len(self._pendentes) >= self.tamanho_lote:
+            self.flush()
+        
+        return self.caminho
+    
+    @property
+    def pendentes(self) -> int:
+        """Cupons adicionados que ainda não foram indexados (aguardam o próximo commit)"""
+        return len(self._pendentes)
+    
+    def flush(self):
+        """
+        Indexa os cupons acumulados por adicionar()
+        
+        Se a transação do lote falhar, cada cupom é indexado em separado; o
+        que falhar de novo sai do lote e fica em retirar_falhas().
+        """
+        if not self._pendentes:
+            return
+        
+        pendentes, self._pendentes = self._pendentes, []
+        
+        try:
+            self.salvar_varios(pendentes)
+        except Exception:
+            for cupom in pendentes:
+                try:
+                    self.salvar_varios([cupom])
+                except Exception as e:
+                    print(f"ERRO: Cupom {cupom.obter_chave()} não foi indexado: {e}")
+                    self._falhas.append((cupom, e))
+    
+    def retirar_falhas(self) -> List[Tuple[CupomCompleto, Exception]]:
+        """
+        Cupons descartados pelos flushes desde a última chamada
+        
+        Returns:
+            Lista de (cupom, exceção da indexação)
+        """
+        falhas, self._falhas = self._falhas, []
+        return falhas
+    
+    def salvar_varios(self, cupons: Iterable[CupomCompleto]) -> int:
+        """
+        Indexa vários cupons em uma única transação
+        
+        Também serve para montar o índice de cupons já exportados, ex:
+        indice.salvar_varios(XMLRepository().ler(arquivo))
+        
+        Args:
+            cupons: Cupons a indexar
+        
+        Returns:
+            Número de cupons indexados
+        
+        Raises:
+            ValueError: Se algum cupom não tiver chave de acesso
+        """
+        chaves, ocorrencias = [], []
+        
+        for cupom in cupons:
+            chave = cupom.obter_chave()
+            
+            if not chave:
+                raise ValueError("Cupom sem chave de acesso não pode ser indexado")
+            
+            chaves.append((chave,))
+            for item, produto in enumerate(cupom.produtos, 1):
+                gtin = normalizar_gtin(produto.cod_gtin)
+                if gtin is not None:
+                    ocorrencias.append((gtin, chave, item))
+        
+        if not chaves:
+            return 0
+        
+        with self.conexao:
+            self.conexao.executemany("DELETE FROM ocorrencia WHERE chave = ?", chaves)
+            self.conexao.executemany(SQL_OCORRENCIA, ocorrencias)
+        
+        return len(chaves)
+    
+    # ------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------
+    def buscar(self, gtin: str) -> List[Tuple[str, int]]:
+        """
+        Lista as ocorrências de um código de barras
+        
+        Args:
+            gtin: GTIN-8, 12, 13 ou 14
+        
+        Returns:
+            Lista de (chave, item), ordenada pela chave (vazia se o código
+            for inválido ou não tiver compras)
+        """
+        gtin = normalizar_gtin(gtin)
+        if gtin is None:
+            return []
+        
+        return self.conexao.execute(
+            "SELECT chave, item FROM ocorrencia WHERE gtin = ? ORDER BY chave, item",
+            (gtin,)
+        ).fetchall()
+    
+    def contar(self, gtin: str) -> int:
+        """Número de compras do código de barras"""
+        gtin = normalizar_gtin(gtin)
+        if gtin is None:
+            return 0
+        
+        return self.conexao.execute(
+            "SELECT COUNT(*) FROM ocorrencia WHERE gtin = ?", (gtin,)
+        ).fetchone()[0]
+    
+    def gtins(self, chave: str) -> List[Tuple[int, str]]:
+        """Lista (item, GTIN) dos produtos indexados de um cupom"""
+        return self.conexao.execute(
+            "SELECT item, gtin FROM ocorrencia WHERE chave = ? ORDER BY item", (chave,)
+        ).fetchall()
+    
+    def fechar(self):
+        """Indexa cupons pendentes e fecha a conexão"""
+        self.flush()
+        self.conexao.close()
+    
+    def __enter__(self) -> 'GTINRepository':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.fechar()
\ No newline at end of file
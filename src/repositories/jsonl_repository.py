@@ -0,0 +1,247 @@
+"""
+Repositório para salvar e ler cupons em JSON Lines (um cupom por linha)
+"""
+import json
+from dataclasses import fields
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    # orjson é opcional: acelera a serialização quando instalado
+    orjson = None
+
+from src.config import settings
+from src.models.cupom_completo import CupomCompleto
+from src.models.emitente import Emitente
+from src.models.consumidor import Consumidor
+from src.models.cupom import Cupom
+from src.models.local_entrega import LocalEntrega
+from src.models.produto import Produto
+from src.utils.compressao import (
+    abrir_escrita,
+    abrir_leitura,
+    com_extensao_compressao,
+    resolver_compressao,
+)
+
+
+# Campos de cada modelo, calculados uma única vez (sem caches internos, init=False)
+_CAMPOS = {
+    modelo: tuple(campo.name for campo in fields(modelo) if campo.init)
+    for modelo in (Emitente, Consumidor, Cupom, LocalEntrega, Produto)
+}
+
+
+def _registro_modelo(objeto) -> Optional[dict]:
+    """Dicionário raso com os atributos do modelo (sem cópia profunda)"""
+    if objeto is None:
+        return None
+    return {nome: getattr(objeto, nome) for nome in _CAMPOS[type(objeto)]}
+
+
+def cupom_para_registro(cupom: CupomCompleto) -> dict:
+    """
+    Converte o cupom para um dicionário serializável sem perdas
+    
+    Diferente de to_dict(), mantém None (não 'N/A') e os valores numéricos
+    dos produtos, para que o cupom possa ser reconstruído na leitura.
+    
+    Args:
+        cupom: Objeto CupomCompleto
+    
+    Returns:
+        Dicionário pronto para JSON
+    """
+    return {
+        'chave_acesso': cupom.chave_acesso,
+        'emitente': _registro_modelo(cupom.emitente),
+        'consumidor': _registro_modelo(cupom.consumidor),
+        'cupom': _registro_modelo(cupom.cupom),
+        'local_entrega': _registro_modelo(cupom.local_entrega),
+        'produtos': [_registro_modelo(p) for p in cupom.produtos],
+    }
+
+
+def registro_para_cupom(registro: dict) -> CupomCompleto:
+    """
+    Reconstrói o cupom a partir do dicionário gerado por cupom_para_registro()
+    
+    Args:
+        registro: Dicionário lido do JSON
+    
+    Returns:
+        CupomCompleto
+    """
+    consumidor = registro.get('consumidor')
+    local_entrega = registro.get('local_entrega')
+    
+    return CupomCompleto(
+        emitente=Emitente(**registro['emitente']),
+        cupom=Cupom(**registro['cupom']),
+        produtos=[Produto(**p) for p in registro['produtos']],
+        consumidor=Consumidor(**consumidor) if consumidor else None,
+        local_entrega=LocalEntrega(**local_entrega) if local_entrega else None,
+        chave_acesso=registro.get('chave_acesso'),
+    )
+
+
+if orjson is not None:
+    def serializar(registro: dict) -> bytes:
+        """Serializa o registro em uma linha JSON (UTF-8, com quebra de linha)"""
+        return orjson.dumps(registro, option=orjson.OPT_APPEND_NEWLINE)
+    
+    desserializar = orjson.loads
+else:
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    
+    def serializar(registro: dict) -> bytes:
+        """Serializa o registro em uma linha JSON (UTF-8, com quebra de linha)"""
+        return (_encoder.encode(registro) + '\n').encode('utf-8')
+    
+    desserializar = json.loads
+
+
+class JSONLRepository:
+    """
+    Repositório para salvar cupons fiscais em JSON Lines
+    
+    Todos os cupons são acrescentados ao mesmo arquivo, uma linha por
+    cupom, opcionalmente compactado (gzip ou zstd). Serve como formato de troca
+    entre as máquinas de coleta e a análise: ler() devolve os modelos.
+    """
+    
+    def __init__(
+        self,
+        diretorio: Optional[Path] = None,
+        nome_arquivo: Optional[str] = None,
+        compactar: Optional[bool] = None,
+        compressao: Optional[str] = None
+    ):
+        """
+        Inicializa o repositório JSON Lines
+        
+        Args:
+            diretorio: Diretório do arquivo (padrão: settings.OUTPUT_DIR)
+            nome_arquivo: Nome do arquivo (padrão: settings.JSONL_FILE)
+            compactar: Atalho para compressao='gzip' (padrão: settings.JSONL_GZIP)
+            compressao: 'gzip', 'zstd' ou 'none' (padrão: extensão do nome
+                ou settings.OUTPUT_COMPRESSION)
+        """
+        self.diretorio = diretorio or settings.OUTPUT_DIR
+        self.diretorio.mkdir(exist_ok=True, parents=True)
+        
+        nome_arquivo = nome_arquivo or settings.JSONL_FILE
+        if compressao is None and (compactar or (compactar is None and settings.JSONL_GZIP)):
+            compressao = 'gzip'
+        
+        self.compressao = resolver_compressao(nome_arquivo, compressao)
+        self.caminho = self.diretorio / com_extensao_compressao(nome_arquivo, self.compressao)
+    
+    def salvar(self, cupom: CupomCompleto, nome_arquivo: Optional[str] = None) -> Path:
+        """
+        Acrescenta um cupom ao arquivo
+        
+        Args:
+            cupom: Objeto CupomCompleto com todos os dados
+            nome_arquivo: Ignorado (todos os cupons vão para o mesmo arquivo)
+        
+        Returns:
+            Path do arquivo
+        """
+        with self.abrir_lote() as lote:
+            lote.adicionar(cupom)
+        
+        return self.caminho
+    
+    def abrir_lote(self) -> 'JSONLLoteWriter':
+        """
+        Mantém o arquivo aberto para acrescentar vários cupons
+        
+        Returns:
+            JSONLLoteWriter (use com `with` ou chame fechar())
+        """
+        return JSONLLoteWriter(self.caminho, self.compressao)
+    
+    def ler(self, caminho: Optional[Union[str, Path]] = None) -> Iterator[CupomCompleto]:
+        """
+        Lê os cupons em streaming
+        
+        Detecta a compressão pelo conteúdo do arquivo, não pela extensão.
+        
+        Args:
+            caminho: Arquivo a ler (padrão: arquivo do repositório)
+        
+        Yields:
+            CupomCompleto de cada linha
+        """
+        with abrir_leitura(caminho or self.caminho, texto=False) as arquivo:
+            for linha in arquivo:
+                if linha.strip():
+                    yield registro_para_cupom(desserializar(linha))
+
+
+class JSONLLoteWriter:
+    """
+    Acrescenta cupons a um arquivo JSON Lines mantendo-o aberto
+    
+    Sem compactação o arquivo não tem buffer: cada cupom é uma única
+    escrita em modo append, então vários processos podem acrescentar ao
+    mesmo arquivo sem misturar linhas. Com compressão cada lote vira um
+    membro gzip / quadro zstd independente, legível mesmo com vários
+    lotes em sequência.
+    """
+    
+    def __init__(self, caminho: Path, compressao: Optional[str] = None):
+        """
+        Abre o arquivo em modo de acréscimo
+        
+        Args:
+            caminho: Arquivo de destino
+            compressao: 'gzip', 'zstd' ou None
+        """
+        self.caminho = caminho
+        self.cupons_escritos = 0
+        self._compactado = bool(compressao)
+        self._cupons_desde_flush = 0
+        self._arquivo: BinaryIO = (
+            abrir_escrita(caminho, 'a', compressao, texto=False)
+            if compressao else open(caminho, 'ab', buffering=0)
+        )
+    
+    def adicionar(self, cupom: CupomCompleto) -> Path:
+        """
+        Escreve um cupom como uma linha do arquivo
+        
+        Args:
+            cupom: Objeto CupomCompleto
+        
+        Returns:
+            Path do arquivo
+        """
+        self._arquivo.write(serializar(cupom_para_registro(cupom)))
+        self.cupons_escritos += 1
+        if self._compactado:
+            self._cupons_desde_flush += 1
+        return self.caminho
+    
+    @property
+    def pendentes(self) -> int:
+        """Últimos cupons adicionados que ainda estão no buffer do compressor"""
+        return self._cupons_desde_flush
+    
+    def flush(self):
+        """Força a escrita do buffer no arquivo"""
+        self._arquivo.flush()
+        self._cupons_desde_flush = 0
+    
+    def fechar(self):
+        """Fecha o arquivo"""
+        self._arquivo.close()
+    
+    def __enter__(self) -> 'JSONLLoteWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.fechar()
\ No newline at end of file
@@ -0,0 +1,380 @@
+"""
+Repositório para salvar dados em formato colunar (Parquet / Arrow IPC)
+"""
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # pyarrow é opcional: só é necessário para exportar Parquet/Arrow
+    pa = None
+    pq = None
+
+from src.config import settings
+from src.models.cupom_completo import CupomCompleto
+from src.utils.numeros import para_decimal
+
+
+# Colunas de texto com muitos valores repetidos (gravadas com dictionary encoding)
+COLUNAS_DICIONARIO = [
+    'emitente_nome', 'emitente_cnpj', 'emitente_ie', 'emitente_im',
+    'emitente_endereco', 'emitente_bairro', 'emitente_cep', 'emitente_uf',
+    'emitente_sat_numero', 'cupom_forma_pagamento',
+    'entrega_bairro', 'entrega_municipio', 'entrega_uf',
+    'produto_ncm', 'produto_descricao',
+]
+
+
+def criar_schema():
+    """
+    Cria o schema Arrow da exportação (uma linha por produto)
+    
+    Returns:
+        pyarrow.Schema
+    """
+    _verificar_pyarrow()
+    
+    dinheiro = pa.decimal128(12, 2)
+    texto_dicionario = pa.dictionary(pa.int32(), pa.string())
+    
+    campos = []
+    for nome in (
+        'emitente_nome', 'emitente_cnpj', 'emitente_ie', 'emitente_im',
+        'emitente_endereco', 'emitente_bairro', 'emitente_cep', 'emitente_uf',
+        'emitente_extrato_numero', 'emitente_sat_numero',
+        'consumidor_nome', 'consumidor_cpf_cnpj',
+    ):
+        campos.append(pa.field(nome, texto_dicionario if nome in COLUNAS_DICIONARIO else pa.string()))
+    
+    campos.extend([
+        pa.field('cupom_total', dinheiro),
+        pa.field('cupom_data_hora', pa.timestamp('s')),
+        pa.field('cupom_forma_pagamento', texto_dicionario),
+        pa.field('cupom_troco', dinheiro),
+        pa.field('cupom_tributos', dinheiro),
+        pa.field('cupom_qr_code', pa.string()),
+    ])
+    
+    for nome in (
+        'entrega_endereco', 'entrega_bairro', 'entrega_municipio', 'entrega_uf',
+        'entrega_numero_cfe', 'entrega_chave_acesso',
+    ):
+        campos.append(pa.field(nome, texto_dicionario if nome in COLUNAS_DICIONARIO else pa.string()))
+    
+    campos.extend([
+        pa.field('produto_descricao', texto_dicionario),
+        pa.field('produto_ncm', texto_dicionario),
+        pa.field('produto_quantidade', pa.float64()),
+        pa.field('produto_valor_liquido', dinheiro),
+        pa.field('produto_valor_total', dinheiro),
+        pa.field('produto_cod_gtin', pa.string()),
+    ])
+    
+    return pa.schema(campos)
+
+
+def _verificar_pyarrow():
+    """Garante que o pyarrow está instalado"""
+    if pa is None:
+        raise ImportError(
+            "pyarrow não está instalado. Instale com: pip install pyarrow"
+        )
+
+
+class ParquetRepository:
+    """
+    Repositório para salvar cupons fiscais em formato colunar
+    
+    Diferente do CSV, os valores são gravados com tipo:
+    - Valores monetários: decimal(12, 2)
+    - Quantidade: float64
+    - Data/hora de emissão: timestamp
+    - Campos repetitivos (emitente, NCM, descrição): dictionary encoding
+    
+    Formatos:
+    - 'parquet' (padrão): Parquet comprimido, ideal para pandas/SQL
+    - 'arrow': Arrow IPC (Feather v2), leitura sem desserialização
+    """
+    
+    EXTENSOES = {'parquet': '.parquet', 'arrow': '.arrow'}
+    
+    def __init__(
+        self,
+        diretorio: Optional[Path] = None,
+        formato: str = 'parquet',
+        tamanho_row_group: Optional[int] = None,
+        compressao: Optional[str] = None
+    ):
+        """
+        Inicializa o repositório colunar
+        
+        Args:
+            diretorio: Diretório onde salvar os arquivos (padrão: settings.OUTPUT_DIR)
+            formato: 'parquet' ou 'arrow'
+            tamanho_row_group: Linhas acumuladas antes de gravar um row group
+                (padrão: settings.PARQUET_ROW_GROUP_SIZE)
+            compressao: Codec de compressão (padrão: settings.PARQUET_COMPRESSION)
+        
+        Raises:
+            ImportError: Se o pyarrow não estiver instalado
+            ValueError: Se o formato não for suportado
+        """
+        _verificar_pyarrow()
+        
+        if formato not in self.EXTENSOES:
+            raise ValueError(f"Formato não suportado: {formato}. Use: {', '.join(self.EXTENSOES)}")
+        
+        self.diretorio = diretorio or settings.OUTPUT_DIR
+        self.diretorio.mkdir(exist_ok=True, parents=True)
+        self.formato = formato
+        self.tamanho_row_group = tamanho_row_group or settings.PARQUET_ROW_GROUP_SIZE
+        self.compressao = compressao or settings.PARQUET_COMPRESSION
+        self.schema = criar_schema()
+    
+    def salvar(self, cupom: CupomCompleto, nome_arquivo: Optional[str] = None) -> Path:
+        """
+        Salva um cupom em um arquivo próprio
+        
+        Args:
+            cupom: Objeto CupomCompleto com todos os dados
+            nome_arquivo: Nome customizado do arquivo (opcional)
+        
+        Returns:
+            Path do arquivo salvo
+        """
+        if not nome_arquivo:
+            timestamp = datetime.now().strftime(settings.DATETIME_FORMAT)
+            cnpj_limpo = re.sub(r'\D', '', cupom.emitente.cnpj or '') or 'sem_cnpj'
+            nome_arquivo = f"cupom_{cnpj_limpo}_{timestamp}"
+        
+        with self.abrir_lote(nome_arquivo=nome_arquivo) as lote:
+            lote.adicionar(cupom)
+        
+        return lote.caminho
+    
+    def abrir_lote(self, nome_arquivo: str = 'lote') -> 'ParquetLoteWriter':
+        """
+        Abre um arquivo colunar para receber cupons durante o scraping
+        
+        Args:
+            nome_arquivo: Nome do arquivo (a extensão é adicionada se faltar)
+        
+        Returns:
+            ParquetLoteWriter (use com "with" ou chame fechar())
+        """
+        extensao = self.EXTENSOES[self.formato]
+        
+        if not nome_arquivo.endswith(extensao):
+            nome_arquivo += extensao
+        
+        return ParquetLoteWriter(self, self.diretorio / nome_arquivo)
+    
+    def gerar_colunas(self, cupom: CupomCompleto) -> Dict[str, list]:
+        """
+        Converte um cupom em colunas tipadas (uma posição por produto)
+        
+        Args:
+            cupom: Objeto CupomCompleto
+        
+        Returns:
+            Dicionário {coluna: lista de valores}
+        """
+        emitente = cupom.emitente
+        consumidor = cupom.consumidor if cupom.consumidor and cupom.consumidor.esta_presente() else None
+        entrega = cupom.local_entrega if cupom.local_entrega and cupom.local_entrega.esta_presente() else None
+        dados = cupom.cupom
+        
+        # Valores do cupom (iguais em todas as linhas)
+        base = {
+            'emitente_nome': emitente.nome,
+            'emitente_cnpj': emitente.cnpj,
+            'emitente_ie': emitente.ie,
+            'emitente_im': emitente.im,
+            'emitente_endereco': emitente.endereco,
+            'emitente_bairro': emitente.bairro,
+            'emitente_cep': emitente.cep,
+            'emitente_uf': emitente.uf,
+            'emitente_extrato_numero': emitente.extrato_numero,
+            'emitente_sat_numero': emitente.sat_numero,
+            'consumidor_nome': consumidor.nome if consumidor else None,
+            'consumidor_cpf_cnpj': consumidor.cpf_cnpj if consumidor else None,
+            'cupom_total': dados.valor_total,
+            'cupom_data_hora': dados.emissao,
+            'cupom_forma_pagamento': dados.forma_pagamento,
+            'cupom_troco': dados.valor_troco,
+            'cupom_tributos': dados.valor_tributos,
+            'cupom_qr_code': dados.qr_code,
+            'entrega_endereco': entrega.endereco if entrega else None,
+            'entrega_bairro': entrega.bairro if entrega else None,
+            'entrega_municipio': entrega.municipio if entrega else None,
+            'entrega_uf': entrega.uf if entrega else None,
+            'entrega_numero_cfe': entrega.numero_cfe if entrega else None,
+            'entrega_chave_acesso': entrega.chave_acesso if entrega else None,
+        }
+        
+        # Sem produtos: uma linha só com dados gerais (como no CSV)
+        produtos = cupom.produtos or [None]
+        linhas = len(produtos)
+        
+        colunas = {nome: [valor] * linhas for nome, valor in base.items()}
+        colunas['produto_descricao'] = [p.descricao if p else None for p in produtos]
+        colunas['produto_ncm'] = [p.codigo_ncm if p else None for p in produtos]
+        colunas['produto_quantidade'] = [p.quantidade if p else None for p in produtos]
+        colunas['produto_valor_liquido'] = [para_decimal(p.valor_liquido) if p else None for p in produtos]
+        colunas['produto_valor_total'] = [para_decimal(p.valor_total) if p else None for p in produtos]
+        colunas['produto_cod_gtin'] = [p.cod_gtin if p else None for p in produtos]
+        
+        return colunas
+
+
+class ParquetLoteWriter:
+    """
+    Grava cupons em um arquivo colunar à medida que são extraídos
+    
+    As linhas ficam em buffer por coluna e viram um row group (Parquet)
+    ou record batch (Arrow) a cada `tamanho_row_group` linhas, então a
+    memória usada é limitada pelo tamanho do row group.
+    """
+    
+    def __init__(self, repositorio: ParquetRepository, caminho: Path):
+        """
+        Args:
+            repositorio: ParquetRepository com formato, schema e compressão
+            caminho: Arquivo de destino
+        """
+        self.repositorio = repositorio
+        self.caminho = caminho
+        self.linhas_escritas = 0
+        self.cupons_escritos = 0
+        
+        self._buffer: Dict[str, List] = {nome: [] for nome in repositorio.schema.names}
+        self._linhas_buffer = 0
+        self._cupons_buffer = 0
+        self._writer = None
+        
+        # Arrow IPC: dicionário acumulado de cada coluna (valor -> índice)
+        self._dicionarios: Dict[str, Dict[str, int]] = {}
+    
+    def adicionar(self, cupom: CupomCompleto) -> Path:
+        """
+        Acrescenta um cupom ao arquivo
+        
+        Args:
+            cupom: Objeto CupomCompleto
+        
+        Returns:
+            Path do arquivo
+        """
+        colunas = self.repositorio.gerar_colunas(cupom)
+        
+        for nome, valores in colunas.items():
+            self._buffer[nome].extend(valores)
+        
+        self._linhas_buffer += len(colunas['produto_ncm'])
+        self._cupons_buffer += 1
+        self.cupons_escritos += 1
+        
+        if self._linhas_buffer >= self.repositorio.tamanho_row_group:
+            self.flush()
+        
+        return self.caminho
+    
+    @property
+    def pendentes(self) -> int:
+        """Últimos cupons adicionados que ainda não estão em um row group"""
+        return self._cupons_buffer
+    
+    def flush(self):
+        """Grava as linhas em buffer como um novo row group"""
+        if not self._linhas_buffer:
+            self._cupons_buffer = 0
+            return
+        
+        schema = self.repositorio.schema
+        arrays = []
+        
+        for campo in schema:
+            valores = self._buffer[campo.name]
+            
+            if pa.types.is_dictionary(campo.type):
+                if self.repositorio.formato == 'parquet':
+                    arrays.append(pa.array(valores, type=pa.string()).dictionary_encode())
+                else:
+                    arrays.append(self._array_dicionario(campo.name, valores))
+            else:
+                arrays.append(pa.array(valores, type=campo.type))
+        
+        tabela = pa.Table.from_arrays(arrays, schema=schema)
+        
+        if self._writer is None:
+            self._writer = self._abrir_writer(schema)
+        
+        if self.repositorio.formato == 'parquet':
+            self._writer.write_table(tabela, row_group_size=self._linhas_buffer)
+        else:
+            self._writer.write_table(tabela)
+        
+        self.linhas_escritas += self._linhas_buffer
+        self._buffer = {nome: [] for nome in schema.names}
+        self._linhas_buffer = 0
+        self._cupons_buffer = 0
+    
+    def _array_dicionario(self, nome: str, valores: List[Optional[str]]):
+        """
+        Coluna codificada com o dicionário acumulado desde o primeiro batch
+        
+        O arquivo Arrow IPC não aceita trocar o dicionário entre batches,
+        só acrescentar valores (delta): cada batch usa o dicionário anterior
+        mais os valores novos.
+        """
+        indice_por_valor = self._dicionarios.setdefault(nome, {})
+        indices = []
+        
+        for valor in valores:
+            if valor is None:
+                indices.append(None)
+                continue
+            indice = indice_por_valor.get(valor)
+            if indice is None:
+                indice = indice_por_valor[valor] = len(indice_por_valor)
+            indices.append(indice)
+        
+        return pa.DictionaryArray.from_arrays(
+            pa.array(indices, type=pa.int32()),
+            pa.array(list(indice_por_valor), type=pa.string())
+        )
+    
+    def _abrir_writer(self, schema):
+        """Abre o writer do formato configurado"""
+        if self.repositorio.formato == 'parquet':
+            return pq.ParquetWriter(
+                str(self.caminho),
+                schema,
+                compression=self.repositorio.compressao,
+                use_dictionary=COLUNAS_DICIONARIO
+            )
+        
+        # Arrow IPC só suporta lz4 e zstd
+        compressao = self.repositorio.compressao if self.repositorio.compressao in ('lz4', 'zstd') else None
+        opcoes = pa.ipc.IpcWriteOptions(compression=compressao, emit_dictionary_deltas=True)
+        return pa.ipc.new_file(str(self.caminho), schema, options=opcoes)
+    
+    def fechar(self):
+        """Grava o buffer restante e fecha o arquivo (mesmo se a gravação falhar)"""
+        try:
+            self.flush()
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+                print(f"SUCESSO: Arquivo {self.repositorio.formato} salvo em {self.caminho}")
+    
+    def __enter__(self) -> 'ParquetLoteWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.fechar()
\ No newline at end of file
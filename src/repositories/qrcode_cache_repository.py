@@ -0,0 +1,219 @@
+"""
+Cache persistente da leitura de QR Codes: conteúdo do arquivo -> chaves lidas
+"""
+import hashlib
+import json
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from src.config import settings
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leitura (
+    sha256 TEXT NOT NULL,
+    modo TEXT NOT NULL,
+    configuracao TEXT NOT NULL,
+    status TEXT NOT NULL,
+    itens TEXT NOT NULL,
+    phash TEXT,
+    PRIMARY KEY (sha256, modo)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS phash_faixa (
+    modo TEXT NOT NULL,
+    posicao INTEGER NOT NULL,
+    valor TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    PRIMARY KEY (modo, posicao, valor, sha256)
+) WITHOUT ROWID;
+"""
+
+# Faixas do hash perceptual indexadas: hashes a até FAIXAS - 1 bits de
+# distância têm ao menos uma faixa idêntica
+FAIXAS = 8
+
+# Leitura guardada: (itens, status), itens = [(chave, página, caixa)]
+Registro = Tuple[List[tuple], str]
+
+
+def sha256_arquivo(caminho: Union[str, Path], tamanho_bloco: int = 1 << 20) -> str:
+    """SHA-256 do conteúdo do arquivo (hex)"""
+    resumo = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def distancia_hamming(hash_a: str, hash_b: str) -> int:
+    """Bits diferentes entre dois hashes hex do mesmo tamanho"""
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count('1')
+
+
+def _faixas(phash: str) -> List[Tuple[int, str]]:
+    tamanho = max(len(phash) // FAIXAS, 1)
+    return [(posicao, phash[inicio:inicio + tamanho])
+            for posicao, inicio in enumerate(range(0, len(phash), tamanho))]
+
+
+class QRCodeCacheRepository:
+    """
+    Leituras de QR Code já feitas, endereçadas pelo conteúdo do arquivo
+    
+    A mesma foto reenviada (outra execução, outro operador, outro nome de
+    arquivo) é reconhecida pelo SHA-256 do conteúdo e não é decodificada
+    de novo. Cada modo de leitura ('uma' chave por imagem ou 'todas' as
+    chaves da folha) tem o próprio registro.
+    
+    Leituras sem chave (sem_qrcode, sem_chave) também são guardadas, mas
+    só valem para a mesma configuração do PreprocessadorQR: com outras
+    transformações ou outra resolução a imagem é lida de novo.
+    
+    Com phash=True, leituras com chave também são indexadas pelo hash
+    perceptual (dHash de 64 bits da região do QR Code): buscar_semelhante
+    encontra a mesma foto reduzida ou recomprimida se os hashes diferirem
+    em até `distancia` bits. A semelhança não identifica o cupom: quem
+    busca confirma as chaves antes de usar a leitura (registrar_acerto).
+    """
+    
+    def __init__(
+        self,
+        caminho: Optional[Union[str, Path]] = None,
+        phash: Optional[bool] = None,
+        distancia: Optional[int] = None
+    ):
+        """
+        Args:
+            caminho: Arquivo do cache (padrão: settings.QR_CACHE_PATH)
+            phash: Busca também por hash perceptual (padrão: settings.QR_CACHE_PHASH)
+            distancia: Bits de diferença aceitos no hash perceptual, até
+                FAIXAS - 1 (padrão: settings.QR_CACHE_PHASH_DISTANCE)
+        """
+        self.caminho = Path(caminho or settings.QR_CACHE_PATH)
+        self.caminho.parent.mkdir(exist_ok=True, parents=True)
+        self.phash = settings.QR_CACHE_PHASH if phash is None else phash
+        self.distancia = settings.QR_CACHE_PHASH_DISTANCE if distancia is None else distancia
+        
+        # Vários processos do pool gravam no mesmo arquivo: WAL + espera pelo lock
+        self.conexao = sqlite3.connect(str(self.caminho), timeout=30)
+        self.conexao.execute("PRAGMA journal_mode = WAL")
+        self.conexao.execute("PRAGMA synchronous = NORMAL")
+        self.conexao.executescript(SCHEMA)
+        
+        # Acertos por tipo ('conteudo', 'phash') e o tipo do último
+        self.acertos: Counter = Counter()
+        self.ultimo_acerto: Optional[str] = None
+    
+    @staticmethod
+    def _registro(status: str, itens: str) -> Registro:
+        return [(chave, pagina, tuple(caixa) if caixa else None)
+                for chave, pagina, caixa in json.loads(itens)], status
+    
+    def buscar(self, sha256: str, modo: str, configuracao: str) -> Optional[Registro]:
+        """
+        Leitura guardada para o conteúdo
+        
+        Args:
+            sha256: sha256_arquivo do arquivo
+            modo: 'uma' ou 'todas'
+            configuracao: PreprocessadorQR.configuracao (só para leituras sem chave)
+        
+        Returns:
+            (itens, status) ou None se o arquivo não tiver sido lido
+        """
+        self.ultimo_acerto = None
+        linha = self.conexao.execute(
+            "SELECT status, itens, configuracao FROM leitura WHERE sha256 = ? AND modo = ?",
+            (sha256, modo)
+        ).fetchone()
+        
+        if linha is None or (linha[1] == '[]' and linha[2] != configuracao):
+            return None
+        
+        self.registrar_acerto('conteudo')
+        return self._registro(linha[0], linha[1])
+    
+    def buscar_semelhante(self, phash: str, modo: str) -> Optional[Registro]:
+        """
+        Leitura com chave de uma imagem visualmente igual (chamar após buscar)
+        
+        Apenas uma candidata: não conta como acerto até o chamador confirmar
+        que as chaves são as mesmas e chamar registrar_acerto('phash').
+        
+        Returns:
+            (itens, status) da imagem mais próxima, ou None se nenhuma
+            estiver a até `distancia` bits
+        """
+        faixas = _faixas(phash)
+        condicoes = ' OR '.join(['(f.posicao = ? AND f.valor = ?)'] * len(faixas))
+        parametros = [valor for faixa in faixas for valor in faixa]
+        
+        candidatos = self.conexao.execute(
+            f"SELECT DISTINCT l.phash, l.status, l.itens FROM phash_faixa f "
+            f"JOIN leitura l ON l.sha256 = f.sha256 AND l.modo = f.modo "
+            f"WHERE f.modo = ? AND ({condicoes})",
+            [modo, *parametros]
+        ).fetchall()
+        
+        melhor = min(candidatos, key=lambda linha: distancia_hamming(phash, linha[0]), default=None)
+        if melhor is None or distancia_hamming(phash, melhor[0]) > self.distancia:
+            return None
+        
+        return self._registro(melhor[1], melhor[2])
+    
+    def registrar_acerto(self, tipo: str):
+        """Conta uma leitura aproveitada do cache ('conteudo' ou 'phash')"""
+        self.acertos[tipo] += 1
+        self.ultimo_acerto = tipo
+    
+    def salvar(
+        self,
+        sha256: str,
+        modo: str,
+        configuracao: str,
+        status: str,
+        itens: List[tuple],
+        phash: Optional[str] = None
+    ):
+        """
+        Guarda a leitura de um arquivo (substitui a anterior do mesmo modo)
+        
+        Args:
+            itens: Lista de (chave, página, caixa); vazia se não houver chave
+            phash: Hash perceptual (só indexado em leituras com chave)
+        """
+        with self.conexao:
+            self.conexao.execute("DELETE FROM phash_faixa WHERE sha256 = ? AND modo = ?", (sha256, modo))
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO leitura (sha256, modo, configuracao, status, itens, phash) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (sha256, modo, configuracao, status, json.dumps([list(item) for item in itens]), phash)
+            )
+            if phash and itens:
+                self.conexao.executemany(
+                    "INSERT OR IGNORE INTO phash_faixa (modo, posicao, valor, sha256) VALUES (?, ?, ?, ?)",
+                    [(modo, posicao, valor, sha256) for posicao, valor in _faixas(phash)]
+                )
+    
+    def contar(self) -> int:
+        """Número de leituras guardadas"""
+        return self.conexao.execute("SELECT COUNT(*) FROM leitura").fetchone()[0]
+    
+    def limpar(self):
+        """Apaga todas as leituras (ex: depois de trocar a biblioteca de leitura)"""
+        with self.conexao:
+            self.conexao.execute("DELETE FROM phash_faixa")
+            self.conexao.execute("DELETE FROM leitura")
+    
+    def fechar(self):
+        """Fecha a conexão"""
+        self.conexao.close()
+    
+    def __enter__(self) -> 'QRCodeCacheRepository':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.fechar()
\ No newline at end of file
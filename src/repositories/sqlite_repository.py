@@ -0,0 +1,387 @@
+"""
+Repositório para salvar dados em banco SQLite normalizado
+"""
+import re
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.config import settings
+from src.models.cupom import Cupom
+from src.models.cupom_completo import CupomCompleto
+from src.utils.numeros import para_decimal
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS emitente (
+    cnpj TEXT PRIMARY KEY,
+    nome TEXT,
+    ie TEXT,
+    im TEXT,
+    endereco TEXT,
+    bairro TEXT,
+    cep TEXT,
+    uf TEXT,
+    sat_numero TEXT
+);
+
+CREATE TABLE IF NOT EXISTS cupom (
+    chave TEXT PRIMARY KEY,
+    emitente_cnpj TEXT REFERENCES emitente (cnpj),
+    extrato_numero TEXT,
+    total REAL,
+    data_hora TEXT,
+    forma_pagamento TEXT,
+    troco REAL,
+    tributos REAL,
+    qr_code TEXT,
+    atualizado_em TEXT
+);
+
+CREATE TABLE IF NOT EXISTS produto (
+    chave TEXT NOT NULL REFERENCES cupom (chave) ON DELETE CASCADE,
+    item INTEGER NOT NULL,
+    codigo_ncm TEXT,
+    cod_produto TEXT,
+    cod_gtin TEXT,
+    descricao TEXT,
+    quantidade REAL,
+    valor_liquido REAL,
+    valor_total REAL,
+    PRIMARY KEY (chave, item)
+);
+
+CREATE TABLE IF NOT EXISTS consumidor (
+    chave TEXT PRIMARY KEY REFERENCES cupom (chave) ON DELETE CASCADE,
+    cpf_cnpj TEXT,
+    nome TEXT
+);
+
+CREATE TABLE IF NOT EXISTS local_entrega (
+    chave TEXT PRIMARY KEY REFERENCES cupom (chave) ON DELETE CASCADE,
+    endereco TEXT,
+    bairro TEXT,
+    municipio TEXT,
+    uf TEXT,
+    numero_cfe TEXT,
+    chave_acesso TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_cupom_emitente ON cupom (emitente_cnpj, data_hora);
+CREATE INDEX IF NOT EXISTS idx_cupom_data_hora ON cupom (data_hora);
+CREATE INDEX IF NOT EXISTS idx_produto_ncm ON produto (codigo_ncm);
+CREATE INDEX IF NOT EXISTS idx_produto_gtin ON produto (cod_gtin);
+"""
+
+SQL_EMITENTE = """
+INSERT INTO emitente (cnpj, nome, ie, im, endereco, bairro, cep, uf, sat_numero)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (cnpj) DO UPDATE SET
+    nome = COALESCE(excluded.nome, nome),
+    ie = COALESCE(excluded.ie, ie),
+    im = COALESCE(excluded.im, im),
+    endereco = COALESCE(excluded.endereco, endereco),
+    bairro = COALESCE(excluded.bairro, bairro),
+    cep = COALESCE(excluded.cep, cep),
+    uf = COALESCE(excluded.uf, uf),
+    sat_numero = COALESCE(excluded.sat_numero, sat_numero)
+"""
+
+SQL_CUPOM = """
+INSERT INTO cupom (chave, emitente_cnpj, extrato_numero, total, data_hora, forma_pagamento,
+                   troco, tributos, qr_code, atualizado_em)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (chave) DO UPDATE SET
+    emitente_cnpj = excluded.emitente_cnpj,
+    extrato_numero = excluded.extrato_numero,
+    total = excluded.total,
+    data_hora = excluded.data_hora,
+    forma_pagamento = excluded.forma_pagamento,
+    troco = excluded.troco,
+    tributos = excluded.tributos,
+    qr_code = excluded.qr_code,
+    atualizado_em = excluded.atualizado_em
+"""
+
+SQL_PRODUTO = """
+INSERT INTO produto (chave, item, codigo_ncm, cod_produto, cod_gtin, descricao,
+                     quantidade, valor_liquido, valor_total)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_CONSUMIDOR = "INSERT OR REPLACE INTO consumidor (chave, cpf_cnpj, nome) VALUES (?, ?, ?)"
+
+SQL_LOCAL_ENTREGA = """
+INSERT OR REPLACE INTO local_entrega (chave, endereco, bairro, municipio, uf, numero_cfe, chave_acesso)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _valor(texto) -> Optional[float]:
+    """Converte texto monetário da página para número (None se ausente)"""
+    decimal = para_decimal(texto)
+    return float(decimal) if decimal is not None else None
+
+
+def _data_iso(cupom: Cupom) -> Optional[str]:
+    """Converte a data/hora da página para ISO (ordenável no SQLite)"""
+    data = cupom.emissao
+    return data.isoformat(sep=' ') if data else cupom.data_hora
+
+
+class SQLiteRepository:
+    """
+    Repositório para salvar cupons fiscais em banco SQLite normalizado
+    
+    Tabelas:
+    - emitente: um registro por CNPJ
+    - cupom: um registro por chave de acesso (reprocessar atualiza o registro)
+    - produto: itens do cupom (chave, item)
+    - consumidor / local_entrega: opcionais, um por cupom
+    
+    Usa WAL, inserções em lote com executemany dentro de uma transação
+    e índices para as consultas mais comuns (CNPJ, data, NCM, GTIN).
+    """
+    
+    def __init__(self, caminho: Optional[Path] = None, tamanho_lote: Optional[int] = None):
+        """
+        Inicializa o repositório SQLite
+        
+        Args:
+            caminho: Arquivo do banco (padrão: settings.SQLITE_DB_PATH)
+            tamanho_lote: Cupons acumulados antes de cada transação
+                (padrão: settings.SQLITE_BATCH_SIZE)
+        """
+        self.caminho = Path(caminho or settings.SQLITE_DB_PATH)
+        self.caminho.parent.mkdir(exist_ok=True, parents=True)
+        self.tamanho_lote = tamanho_lote or settings.SQLITE_BATCH_SIZE
+        
+        self.conexao = sqlite3.connect(str(self.caminho))
+        self.conexao.execute("PRAGMA journal_mode = WAL")
+        self.conexao.execute("PRAGMA synchronous = NORMAL")
+        self.conexao.execute("PRAGMA foreign_keys = ON")
+        self.conexao.executescript(SCHEMA)
+        
+        self._pendentes: List[CupomCompleto] = []
+        self._falhas: List[Tuple[CupomCompleto, Exception]] = []
+    
+    def salvar(self, cupom: CupomCompleto, nome_arquivo: Optional[str] = None) -> Path:
+        """
+        Salva (ou atualiza) um cupom imediatamente
+        
+        Args:
+            cupom: Objeto CupomCompleto com todos os dados
+            nome_arquivo: Ignorado (mantido por compatibilidade com CSVRepository)
+        
+        Returns:
+            Path do banco
+        """
+        self.salvar_varios([cupom])
+        return self.caminho
+    
+    def adicionar(self, cupom: CupomCompleto) -> Path:
+        """
+        Acumula um cupom e grava quando o lote atinge `tamanho_lote`
+        
+        Args:
+            cupom: Objeto CupomCompleto
+        
+        Returns:
+            Path do banco
+        
+        Raises:
+            ValueError: Se o cupom não tiver chave de acesso (não é acumulado)
+        """
+        if not cupom.obter_chave():
+            raise ValueError("Cupom sem chave de acesso não pode ser salvo no SQLite")
+        
+        self._pendentes.append(cupom)
+        
+        if len(self._pendentes) >= self.tamanho_lote:
+            self.flush()
+        
+        return self.caminho
+    
+    @property
+    def pendentes(self) -> int:
+        """Cupons adicionados que ainda não foram gravados (aguardam o próximo commit)"""
+        return len(self._pendentes)
+    
+    def flush(self):
+        """
+        Grava os cupons acumulados por adicionar()
+        
+        Se a transação do lote falhar, cada cupom é gravado em sua própria
+        transação: o que falhar de novo sai do lote e fica em retirar_falhas(),
+        sem travar nem ser repetido nos próximos flushes.
+        """
+        if not self._pendentes:
+            return
+        
+        pendentes, self._pendentes = self._pendentes, []
+        
+        try:
+            self.salvar_varios(pendentes)
+        except Exception:
+            for cupom in pendentes:
+                try:
+                    self.salvar_varios([cupom])
+                except Exception as e:
+                    print(f"ERRO: Cupom {cupom.obter_chave()} não foi salvo no SQLite: {e}")
+                    self._falhas.append((cupom, e))
+    
+    def retirar_falhas(self) -> List[Tuple[CupomCompleto, Exception]]:
+        """
+        Cupons descartados pelos flushes desde a última chamada
+        
+        Returns:
+            Lista de (cupom, exceção da gravação)
+        """
+        falhas, self._falhas = self._falhas, []
+        return falhas
+    
+    def salvar_varios(self, cupons: Iterable[CupomCompleto]) -> int:
+        """
+        Salva vários cupons em uma única transação
+        
+        A mesma chave repetida no lote (cupom extraído de novo) é gravada
+        uma vez, com os dados da última ocorrência.
+        
+        Args:
+            cupons: Cupons a salvar
+        
+        Returns:
+            Número de cupons (chaves distintas) salvos
+        
+        Raises:
+            ValueError: Se algum cupom não tiver chave de acesso
+        """
+        emitentes, cupons_linhas, produtos, consumidores, locais = [], [], [], [], []
+        chaves = []
+        agora = datetime.now().isoformat(sep=' ', timespec='seconds')
+        
+        # Última ocorrência de cada chave, na ordem da primeira
+        por_chave: Dict[str, CupomCompleto] = {}
+        for cupom in cupons:
+            chave = cupom.obter_chave()
+            
+            if not chave:
+                raise ValueError("Cupom sem chave de acesso não pode ser salvo no SQLite")
+            
+            por_chave[chave] = cupom
+        
+        for chave, cupom in por_chave.items():
+            chaves.append((chave,))
+            cnpj = self._cnpj_limpo(cupom.emitente.cnpj)
+            e = cupom.emitente
+            c = cupom.cupom
+            
+            emitentes.append((cnpj, e.nome, e.ie, e.im, e.endereco, e.bairro, e.cep, e.uf, e.sat_numero))
+            cupons_linhas.append((
+                chave, cnpj, e.extrato_numero, _valor(c.total), _data_iso(c),
+                c.forma_pagamento, _valor(c.troco), _valor(c.tributos), c.qr_code, agora
+            ))
+            
+            for item, p in enumerate(cupom.produtos, 1):
+                produtos.append((
+                    chave, item, p.codigo_ncm, p.cod_produto, p.cod_gtin, p.descricao,
+                    p.quantidade, p.valor_liquido, p.valor_total
+                ))
+            
+            if cupom.consumidor and cupom.consumidor.esta_presente():
+                consumidores.append((chave, cupom.consumidor.cpf_cnpj, cupom.consumidor.nome))
+            
+            if cupom.local_entrega and cupom.local_entrega.esta_presente():
+                l = cupom.local_entrega
+                locais.append((chave, l.endereco, l.bairro, l.municipio, l.uf, l.numero_cfe, l.chave_acesso))
+        
+        if not chaves:
+            return 0
+        
+        with self.conexao:
+            self.conexao.executemany(SQL_EMITENTE, emitentes)
+            self.conexao.executemany(SQL_CUPOM, cupons_linhas)
+            
+            # Reprocessamento substitui os itens e dados opcionais do cupom
+            self.conexao.executemany("DELETE FROM produto WHERE chave = ?", chaves)
+            self.conexao.executemany("DELETE FROM consumidor WHERE chave = ?", chaves)
+            self.conexao.executemany("DELETE FROM local_entrega WHERE chave = ?", chaves)
+            
+            self.conexao.executemany(SQL_PRODUTO, produtos)
+            self.conexao.executemany(SQL_CONSUMIDOR, consumidores)
+            self.conexao.executemany(SQL_LOCAL_ENTREGA, locais)
+        
+        return len(chaves)
+    
+    @staticmethod
+    def _cnpj_limpo(cnpj: Optional[str]) -> str:
+        """Normaliza o CNPJ para apenas dígitos ('' se ausente)"""
+        return re.sub(r'\D', '', cnpj or '')
+    
+    # ------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------
+    def buscar_cupons_por_cnpj(self, cnpj: str) -> List[sqlite3.Row]:
+        """
+        Lista os cupons de um estabelecimento, do mais recente ao mais antigo
+        
+        Args:
+            cnpj: CNPJ com ou sem pontuação
+        """
+        return self._consultar(
+            "SELECT * FROM cupom WHERE emitente_cnpj = ? ORDER BY data_hora DESC",
+            (self._cnpj_limpo(cnpj),)
+        )
+    
+    def buscar_cupons_por_periodo(self, inicio: datetime, fim: datetime) -> List[sqlite3.Row]:
+        """
+        Lista os cupons emitidos no intervalo [inicio, fim]
+        """
+        return self._consultar(
+            "SELECT * FROM cupom WHERE data_hora BETWEEN ? AND ? ORDER BY data_hora",
+            (inicio.isoformat(sep=' '), fim.isoformat(sep=' '))
+        )
+    
+    def buscar_produtos_por_ncm(self, codigo_ncm: str) -> List[sqlite3.Row]:
+        """
+        Lista os itens de um NCM (com data e emitente do cupom)
+        """
+        return self._consultar(
+            """
+            SELECT p.*, c.data_hora, c.emitente_cnpj FROM produto p
+            JOIN cupom c ON c.chave = p.chave
+            WHERE p.codigo_ncm = ?
+            """,
+            (codigo_ncm,)
+        )
+    
+    def buscar_produtos_por_gtin(self, cod_gtin: str) -> List[sqlite3.Row]:
+        """
+        Lista todas as compras de um código de barras
+        """
+        return self._consultar(
+            """
+            SELECT p.*, c.data_hora, c.emitente_cnpj FROM produto p
+            JOIN cupom c ON c.chave = p.chave
+            WHERE p.cod_gtin = ?
+            """,
+            (cod_gtin,)
+        )
+    
+    def _consultar(self, sql: str, parametros: tuple) -> List[sqlite3.Row]:
+        """Executa uma consulta retornando linhas acessíveis por nome"""
+        cursor = self.conexao.cursor()
+        cursor.row_factory = sqlite3.Row
+        return cursor.execute(sql, parametros).fetchall()
+    
+    def fechar(self):
+        """Grava cupons pendentes e fecha a conexão"""
+        self.flush()
+        self.conexao.close()
+    
+    def __enter__(self) -> 'SQLiteRepository':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.fechar()
\ No newline at end of file
@@ -0,0 +1,395 @@
+"""
+Repositório para salvar e ler cupons em XML (layout inspirado no CF-e SAT)
+"""
+import re
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from lxml import etree
+
+from src.config import settings
+from src.models.cupom_completo import CupomCompleto
+from src.models.emitente import Emitente
+from src.models.consumidor import Consumidor
+from src.models.cupom import Cupom
+from src.models.local_entrega import LocalEntrega
+from src.models.produto import Produto
+from src.utils.arquivos import criar_com_nome_livre
+from src.utils.compressao import (
+    abrir_escrita,
+    abrir_leitura,
+    com_extensao_compressao,
+    resolver_compressao,
+    sem_extensao_compressao,
+)
+from src.utils.numeros import para_decimal
+
+
+TAG_RAIZ = 'CFes'
+TAG_CFE = 'CFe'
+
+
+def _sub(pai: etree._Element, tag: str, texto) -> None:
+    """Cria o elemento filho apenas se houver valor"""
+    if texto is None or texto == '' or texto == 'N/A':
+        return
+    etree.SubElement(pai, tag).text = str(texto)
+
+
+def _texto(elemento: Optional[etree._Element], caminho: str) -> Optional[str]:
+    """Texto de um filho (None se ausente)"""
+    if elemento is None:
+        return None
+    return elemento.findtext(caminho)
+
+
+def _valor_xml(texto: Optional[str]) -> Optional[str]:
+    """Valor monetário da página no formato do XML ("1234.56")"""
+    decimal = para_decimal(texto)
+    return str(decimal) if decimal is not None else None
+
+
+def _valor_pagina(texto: Optional[str]) -> Optional[str]:
+    """Valor do XML no formato exibido pela SEFAZ ("1.234,56")"""
+    decimal = para_decimal(texto)
+    if decimal is None:
+        return None
+    return f"{decimal:,.2f}".translate(str.maketrans(',.', '.,'))
+
+
+class XMLRepository:
+    """
+    Repositório para salvar cupons fiscais em XML
+    
+    Cada cupom vira um elemento <CFe> com as seções do CF-e (ide, emit,
+    dest, entrega, det, total, pgto). Vários cupons são gravados em um
+    único arquivo com raiz <CFes>, escrito incrementalmente (lxml xmlfile),
+    e a leitura usa iterparse liberando cada cupom já processado, de modo
+    que arquivos de vários GB são escritos e lidos com memória constante.
+    """
+    
+    def __init__(self, diretorio: Optional[Path] = None, compressao: Optional[str] = None):
+        """
+        Inicializa o repositório XML
+        
+        Args:
+            diretorio: Diretório onde salvar os arquivos (padrão: settings.OUTPUT_DIR)
+            compressao: 'gzip', 'zstd' ou 'none' (padrão: extensão do nome
+                ou settings.OUTPUT_COMPRESSION)
+        """
+        self.diretorio = diretorio or settings.OUTPUT_DIR
+        self.diretorio.mkdir(exist_ok=True, parents=True)
+        self.compressao = compressao
+    
+    def salvar(self, cupom: CupomCompleto, nome_arquivo: Optional[str] = None) -> Path:
+        """
+        Salva um cupom completo em arquivo XML
+        
+        Args:
+            cupom: Objeto CupomCompleto com todos os dados
+            nome_arquivo: Nome do arquivo (opcional, gera automaticamente se None)
+        
+        Returns:
+            Path do arquivo salvo
+        """
+        if nome_arquivo is None:
+            cnpj = re.sub(r'\D', '', cupom.emitente.cnpj or '') or 'sem_cnpj'
+            timestamp = datetime.now().strftime(settings.DATETIME_FORMAT)
+            nome_arquivo = f"cupom_{cnpj}_{timestamp}"
+        
+        with self.abrir_lote(nome_arquivo) as lote:
+            lote.adicionar(cupom)
+        
+        return lote.caminho
+    
+    def abrir_lote(self, nome_arquivo: str = 'lote') -> 'XMLLoteWriter':
+        """
+        Abre um arquivo XML para gravar vários cupons em sequência
+        
+        Nunca sobrescreve: se o nome já existir (ex: dois cupons do mesmo
+        emitente no mesmo segundo), usa o próximo sufixo livre (_2, _3, ...).
+        
+        Args:
+            nome_arquivo: Nome do arquivo (sem extensão, ou .xml/.xml.gz/.xml.zst)
+        
+        Returns:
+            XMLLoteWriter (use com `with` ou chame fechar())
+        """
+        compressao = resolver_compressao(nome_arquivo, self.compressao)
+        
+        nome_arquivo = sem_extensao_compressao(nome_arquivo)
+        if not nome_arquivo.endswith('.xml'):
+            nome_arquivo += '.xml'
+        
+        caminho = self.diretorio / com_extensao_compressao(nome_arquivo, compressao)
+        return criar_com_nome_livre(caminho, lambda livre: XMLLoteWriter(livre, compressao=compressao))
+    
+    @staticmethod
+    def ler(caminho: Union[str, Path]) -> Iterator[CupomCompleto]:
+        """
+        Lê os cupons de um arquivo XML em streaming
+        
+        Args:
+            caminho: Arquivo gerado por salvar() ou abrir_lote()
+                (.gz/.zst são descompactados durante a leitura)
+        
+        Yields:
+            CupomCompleto de cada elemento <CFe>
+        """
+        with abrir_leitura(caminho, texto=False) as arquivo:
+            for _, elemento in etree.iterparse(arquivo, events=('end',), tag=TAG_CFE):
+                yield XMLRepository.elemento_para_cupom(elemento)
+                
+                # Libera o cupom e os irmãos já lidos para manter a memória constante
+                elemento.clear()
+                while elemento.getprevious() is not None:
+                    del elemento.getparent()[0]
+    
+    @staticmethod
+    def cupom_para_elemento(cupom: CupomCompleto) -> etree._Element:
+        """
+        Monta o elemento <CFe> de um cupom
+        
+        Args:
+            cupom: Objeto CupomCompleto
+        
+        Returns:
+            Elemento lxml
+        """
+        cfe = etree.Element(TAG_CFE)
+        inf = etree.SubElement(cfe, 'infCFe')
+        chave = cupom.obter_chave()
+        if chave:
+            inf.set('Id', f"CFe{chave}")
+        
+        emitente = cupom.emitente
+        data_hora = cupom.cupom.emissao
+        
+        ide = etree.SubElement(inf, 'ide')
+        _sub(ide, 'nserieSAT', emitente.sat_numero)
+        _sub(ide, 'nCFe', emitente.extrato_numero)
+        if data_hora:
+            _sub(ide, 'dEmi', data_hora.strftime('%Y%m%d'))
+            _sub(ide, 'hEmi', data_hora.strftime('%H%M%S'))
+        
+        emit = etree.SubElement(inf, 'emit')
+        _sub(emit, 'CNPJ', re.sub(r'\D', '', emitente.cnpj or ''))
+        _sub(emit, 'xNome', emitente.nome)
+        ender = etree.SubElement(emit, 'enderEmit')
+        _sub(ender, 'xLgr', emitente.endereco)
+        _sub(ender, 'xBairro', emitente.bairro)
+        _sub(ender, 'CEP', re.sub(r'\D', '', emitente.cep or ''))
+        _sub(ender, 'UF', emitente.uf)
+        _sub(emit, 'IE', emitente.ie)
+        _sub(emit, 'IM', emitente.im)
+        
+        if cupom.consumidor and cupom.consumidor.esta_presente():
+            dest = etree.SubElement(inf, 'dest')
+            documento = re.sub(r'\D', '', cupom.consumidor.cpf_cnpj or '')
+            _sub(dest, 'CPF' if len(documento) == 11 else 'CNPJ', documento)
+            _sub(dest, 'xNome', cupom.consumidor.nome)
+        
+        if cupom.local_entrega and cupom.local_entrega.esta_presente():
+            local = cupom.local_entrega
+            entrega = etree.SubElement(inf, 'entrega')
+            _sub(entrega, 'xLgr', local.endereco)
+            _sub(entrega, 'xBairro', local.bairro)
+            _sub(entrega, 'xMun', local.municipio)
+            _sub(entrega, 'UF', local.uf)
+            _sub(entrega, 'nCFe', local.numero_cfe)
+            _sub(entrega, 'chCFe', local.chave_acesso)
+        
+        for item, produto in enumerate(cupom.produtos, 1):
+            det = etree.SubElement(inf, 'det', nItem=str(item))
+            prod = etree.SubElement(det, 'prod')
+            _sub(prod, 'cProd', produto.cod_produto)
+            _sub(prod, 'cEAN', produto.cod_gtin)
+            _sub(prod, 'xProd', produto.descricao)
+            _sub(prod, 'NCM', produto.codigo_ncm)
+            if produto.quantidade is not None:
+                _sub(prod, 'qCom', f"{produto.quantidade:.4f}")
+            _sub(prod, 'vProd', f"{produto.valor_liquido:.2f}")
+            _sub(prod, 'vItem', f"{produto.valor_total:.2f}")
+        
+        total = etree.SubElement(inf, 'total')
+        _sub(total, 'vCFe', _valor_xml(cupom.cupom.total))
+        _sub(total, 'vCFeLei12741', _valor_xml(cupom.cupom.tributos))
+        
+        pgto = etree.SubElement(inf, 'pgto')
+        mp = etree.SubElement(pgto, 'MP')
+        _sub(mp, 'cMP', cupom.cupom.forma_pagamento)
+        _sub(pgto, 'vTroco', _valor_xml(cupom.cupom.troco))
+        
+        if cupom.cupom.qr_code:
+            inf_adic = etree.SubElement(inf, 'infAdic')
+            _sub(inf_adic, 'qrCode', cupom.cupom.qr_code)
+        
+        return cfe
+    
+    @staticmethod
+    def elemento_para_cupom(cfe: etree._Element) -> CupomCompleto:
+        """
+        Converte um elemento <CFe> de volta para o modelo
+        
+        Valores e data/hora voltam no formato exibido pela SEFAZ
+        ("1.234,56" e "dd/mm/aaaa - hh:mm:ss").
+        
+        Args:
+            cfe: Elemento lxml <CFe>
+        
+        Returns:
+            CupomCompleto
+        """
+        inf = cfe.find('infCFe')
+        ide = inf.find('ide')
+        emit = inf.find('emit')
+        
+        data_hora = None
+        d_emi, h_emi = _texto(ide, 'dEmi'), _texto(ide, 'hEmi')
+        if d_emi and h_emi:
+            data_hora = datetime.strptime(d_emi + h_emi, '%Y%m%d%H%M%S').strftime('%d/%m/%Y - %H:%M:%S')
+        
+        emitente = Emitente(
+            nome=_texto(emit, 'xNome'),
+            cnpj=_texto(emit, 'CNPJ'),
+            ie=_texto(emit, 'IE'),
+            im=_texto(emit, 'IM'),
+            endereco=_texto(emit, 'enderEmit/xLgr'),
+            bairro=_texto(emit, 'enderEmit/xBairro'),
+            cep=_texto(emit, 'enderEmit/CEP'),
+            uf=_texto(emit, 'enderEmit/UF'),
+            extrato_numero=_texto(ide, 'nCFe'),
+            sat_numero=_texto(ide, 'nserieSAT'),
+        )
+        
+        cupom = Cupom(
+            total=_valor_pagina(_texto(inf, 'total/vCFe')),
+            tributos=_valor_pagina(_texto(inf, 'total/vCFeLei12741')),
+            troco=_valor_pagina(_texto(inf, 'pgto/vTroco')),
+            forma_pagamento=_texto(inf, 'pgto/MP/cMP'),
+            data_hora=data_hora,
+            qr_code=_texto(inf, 'infAdic/qrCode'),
+        )
+        
+        produtos = [
+            Produto(
+                codigo_ncm=_texto(prod, 'NCM') or '',
+                cod_produto=_texto(prod, 'cProd') or '',
+                cod_gtin=_texto(prod, 'cEAN'),
+                descricao=_texto(prod, 'xProd'),
+                quantidade=_texto(prod, 'qCom'),
+                valor_liquido=_texto(prod, 'vProd') or 0.0,
+                valor_total=_texto(prod, 'vItem') or 0.0,
+            )
+            for prod in inf.iterfind('det/prod')
+        ]
+        
+        consumidor = None
+        dest = inf.find('dest')
+        if dest is not None:
+            consumidor = Consumidor(
+                cpf_cnpj=_texto(dest, 'CPF') or _texto(dest, 'CNPJ'),
+                nome=_texto(dest, 'xNome'),
+            )
+        
+        local_entrega = None
+        entrega = inf.find('entrega')
+        if entrega is not None:
+            local_entrega = LocalEntrega(
+                endereco=_texto(entrega, 'xLgr'),
+                bairro=_texto(entrega, 'xBairro'),
+                municipio=_texto(entrega, 'xMun'),
+                uf=_texto(entrega, 'UF'),
+                numero_cfe=_texto(entrega, 'nCFe'),
+                chave_acesso=_texto(entrega, 'chCFe'),
+            )
+        
+        identificador = inf.get('Id') or ''
+        
+        return CupomCompleto(
+            emitente=emitente,
+            cupom=cupom,
+            produtos=produtos,
+            consumidor=consumidor,
+            local_entrega=local_entrega,
+            chave_acesso=identificador[3:] or None,
+        )
+
+
+class XMLLoteWriter:
+    """
+    Escreve vários cupons em um único arquivo XML, incrementalmente
+    
+    Mantém aberto apenas o elemento raiz; cada cupom é montado, escrito
+    e descartado, então a memória não cresce com o tamanho do arquivo.
+    """
+    
+    def __init__(
+        self,
+        caminho: Path,
+        flush_a_cada: Optional[int] = None,
+        compressao: Optional[str] = None
+    ):
+        """
+        Abre o arquivo e escreve o início do documento
+        
+        Args:
+            caminho: Arquivo de destino (novo)
+            flush_a_cada: Cupons entre flushes (padrão: settings.XML_FLUSH_EVERY)
+            compressao: 'gzip', 'zstd' ou None
+        
+        Raises:
+            FileExistsError: Se o arquivo já existir
+        """
+        self.caminho = caminho
+        self.flush_a_cada = flush_a_cada or settings.XML_FLUSH_EVERY
+        self.cupons_escritos = 0
+        self._cupons_desde_flush = 0
+        
+        self._pilha = ExitStack()
+        self._arquivo = self._pilha.enter_context(abrir_escrita(caminho, 'x', compressao, texto=False))
+        self._xf = self._pilha.enter_context(etree.xmlfile(self._arquivo, encoding='utf-8'))
+        self._xf.write_declaration()
+        self._pilha.enter_context(self._xf.element(TAG_RAIZ))
+    
+    def adicionar(self, cupom: CupomCompleto) -> Path:
+        """
+        Escreve um cupom no arquivo
+        
+        Args:
+            cupom: Objeto CupomCompleto
+        
+        Returns:
+            Path do arquivo do lote
+        """
+        self._xf.write(XMLRepository.cupom_para_elemento(cupom))
+        self.cupons_escritos += 1
+        self._cupons_desde_flush += 1
+        
+        if self._cupons_desde_flush >= self.flush_a_cada:
+            self.flush()
+        
+        return self.caminho
+    
+    @property
+    def pendentes(self) -> int:
+        """Últimos cupons adicionados que ainda estão só no buffer"""
+        return self._cupons_desde_flush
+    
+    def flush(self):
+        """Força a escrita do buffer no arquivo"""
+        self._xf.flush()
+        self._arquivo.flush()
+        self._cupons_desde_flush = 0
+    
+    def fechar(self):
+        """Fecha o elemento raiz e o arquivo"""
+        self._pilha.close()
+    
+    def __enter__(self) -> 'XMLLoteWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.fechar()
\ No newline at end of file
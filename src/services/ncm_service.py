@@ -0,0 +1,247 @@
+"""
+Serviço de consulta à tabela NCM (descrição, capítulo e posição dos produtos)
+"""
+import csv
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from src.config import settings
+from src.models.produto_batch import ProdutoBatch
+
+
+# Dígitos do código em cada nível da NCM
+NIVEIS = {
+    'capitulo': 2,
+    'posicao': 4,
+    'subposicao': 6,
+    'item': 7,
+    'subitem': 8,
+}
+
+_RE_NAO_DIGITO = re.compile(r'\D')
+_RE_TAG = re.compile(r'<[^>]+>')
+
+
+def normalizar_codigo(codigo: Optional[str]) -> str:
+    """Código só com dígitos (ex: "2202.10.00" -> "22021000")"""
+    return _RE_NAO_DIGITO.sub('', codigo or '')
+
+
+def _limpar_descricao(descricao: str) -> str:
+    """Remove tags HTML e os hífens de nível ("-- Outros" -> "Outros")"""
+    return _RE_TAG.sub('', descricao).strip().lstrip('-– ').strip()
+
+
+class TabelaNCM:
+    """
+    Tabela NCM local, carregada sob demanda
+    
+    Todos os níveis (capítulo, posição, subposição, item e subitem) ficam
+    em um único dicionário indexado pelo código só com dígitos: a
+    descrição de um NCM e a de qualquer nível acima dele (prefixo do
+    código) são consultas O(1).
+    
+    Formatos aceitos:
+    - CSV "codigo;descricao" (com ou sem cabeçalho; código com ou sem pontos)
+    - JSON da tabela vigente do Siscomex ({"Nomenclaturas": [{"Codigo", "Descricao"}]})
+    
+    O arquivo só é lido na primeira consulta.
+    """
+    
+    def __init__(self, caminho: Optional[Union[str, Path]] = None, encoding: str = 'utf-8-sig'):
+        """
+        Args:
+            caminho: Arquivo da tabela (padrão: settings.NCM_TABLE_PATH)
+            encoding: Codificação do CSV (se falhar, tenta latin-1)
+        """
+        if caminho is None and settings.NCM_TABLE_PATH:
+            caminho = settings.NCM_TABLE_PATH
+        
+        self.caminho = Path(caminho) if caminho else None
+        self.encoding = encoding
+        self._descricoes: Optional[Dict[str, str]] = None
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def de_registros(cls, registros: Iterable[Tuple[str, str]]) -> 'TabelaNCM':
+        """Cria a tabela a partir de pares (código, descrição) já em memória"""
+        tabela = cls(caminho=None)
+        tabela._descricoes = cls._indexar(registros)
+        return tabela
+    
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _indexar(registros: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+        descricoes = {}
+        for codigo, descricao in registros:
+            codigo = normalizar_codigo(codigo)
+            if codigo and descricao:
+                descricoes[codigo] = _limpar_descricao(descricao)
+        return descricoes
+    
+    def _ler_csv(self) -> List[Tuple[str, str]]:
+        for encoding in (self.encoding, 'latin-1'):
+            try:
+                with open(self.caminho, newline='', encoding=encoding) as arquivo:
+                    return [
+                        (linha[0], linha[1]) for linha in csv.reader(arquivo, delimiter=';')
+                        if len(linha) >= 2
+                    ]
+            except UnicodeDecodeError:
+                continue
+        return []
+    
+    def _ler_json(self) -> List[Tuple[str, str]]:
+        with open(self.caminho, 'rb') as arquivo:
+            dados = json.load(arquivo)
+        
+        itens = dados.get('Nomenclaturas', []) if isinstance(dados, dict) else dados
+        return [(item.get('Codigo'), item.get('Descricao')) for item in itens]
+    
+    def _carregar(self) -> Dict[str, str]:
+        """Lê o arquivo na primeira consulta"""
+        if self._descricoes is not None:
+            return self._descricoes
+        
+        with self._lock:
+            if self._descricoes is None:
+                if self.caminho is None:
+                    raise FileNotFoundError(
+                        "Tabela NCM não configurada. Informe o arquivo ou defina NCM_TABLE_PATH"
+                    )
+                if not self.caminho.exists():
+                    raise FileNotFoundError(f"Tabela NCM não encontrada: {self.caminho}")
+                
+                if self.caminho.suffix.lower() == '.json':
+                    registros = self._ler_json()
+                else:
+                    registros = self._ler_csv()
+                
+                self._descricoes = self._indexar(registros)
+                print(f"SUCESSO: Tabela NCM carregada - {len(self._descricoes)} códigos")
+        
+        return self._descricoes
+    
+    @property
+    def carregada(self) -> bool:
+        return self._descricoes is not None
+    
+    def __len__(self) -> int:
+        return len(self._carregar())
+    
+    def __contains__(self, codigo: str) -> bool:
+        return normalizar_codigo(codigo) in self._carregar()
+    
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    
+    def descricao(self, ncm: Optional[str], nivel: str = 'subitem') -> Optional[str]:
+        """
+        Descrição do NCM em um nível
+        
+        Args:
+            ncm: Código (8 dígitos, com ou sem pontos)
+            nivel: Chave de NIVEIS (padrão: o próprio código)
+        
+        Returns:
+            Descrição ou None se o código não estiver na tabela
+        """
+        codigo = normalizar_codigo(ncm)
+        digitos = NIVEIS[nivel]
+        if len(codigo) < digitos:
+            return None
+        return self._carregar().get(codigo[:digitos])
+    
+    def capitulo(self, ncm: Optional[str]) -> Optional[str]:
+        """Descrição do capítulo (2 primeiros dígitos)"""
+        return self.descricao(ncm, 'capitulo')
+    
+    def posicao(self, ncm: Optional[str]) -> Optional[str]:
+        """Descrição da posição (4 primeiros dígitos)"""
+        return self.descricao(ncm, 'posicao')
+    
+    def hierarquia(self, ncm: Optional[str]) -> List[Tuple[str, str]]:
+        """
+        Níveis encontrados, do capítulo ao subitem
+        
+        Returns:
+            Lista de (código, descrição), ex:
+            [('22', 'Bebidas...'), ('2202', 'Águas...'), ..., ('22021000', '...')]
+        """
+        codigo = normalizar_codigo(ncm)
+        descricoes = self._carregar()
+        niveis = []
+        
+        # Todos os prefixos: o Siscomex também tem subposições de 5 dígitos
+        for digitos in range(2, min(len(codigo), NIVEIS['subitem']) + 1):
+            prefixo = codigo[:digitos]
+            if prefixo in descricoes:
+                niveis.append((prefixo, descricoes[prefixo]))
+        
+        return niveis
+    
+    # ------------------------------------------------------------------
+    # Lotes
+    # ------------------------------------------------------------------
+    
+    def enriquecer(self, lote: ProdutoBatch, niveis: Iterable[str] = ('capitulo',)) -> ProdutoBatch:
+        """
+        Acrescenta ao lote as colunas de classificação NCM
+        
+        Cada NCM distinto é consultado uma única vez; as novas colunas
+        reaproveitam os códigos da coluna codigo_ncm.
+        
+        Colunas criadas:
+        - ncm_descricao
+        - ncm_<nivel> (código do nível) e ncm_<nivel>_descricao, para cada nível
+        
+        Args:
+            lote: ProdutoBatch
+            niveis: Níveis de NIVEIS a acrescentar (padrão: capítulo)
+        
+        Returns:
+            O próprio lote
+        """
+        ncm = lote.texto['codigo_ncm']
+        lote.texto['ncm_descricao'] = ncm.derivar(self.descricao)
+        
+        for nivel in niveis:
+            digitos = NIVEIS[nivel]
+            
+            def codigo_nivel(valor, digitos=digitos):
+                codigo = normalizar_codigo(valor)
+                return codigo[:digitos] if len(codigo) >= digitos else None
+            
+            lote.texto[f'ncm_{nivel}'] = ncm.derivar(codigo_nivel)
+            lote.texto[f'ncm_{nivel}_descricao'] = ncm.derivar(
+                lambda valor, nivel=nivel: self.descricao(valor, nivel)
+            )
+        
+        return lote
+    
+    def totais_por_nivel(
+        self,
+        lote: ProdutoBatch,
+        nivel: str = 'capitulo',
+        campo: str = 'valor_total'
+    ) -> Dict[str, Tuple[Optional[str], float]]:
+        """
+        Soma de uma coluna numérica por capítulo/posição
+        
+        Returns:
+            {código do nível: (descrição, total)}, ex: {'22': ('Bebidas...', 1234.5)}
+        """
+        if f'ncm_{nivel}' not in lote.texto:
+            self.enriquecer(lote, niveis=(nivel,))
+        
+        return {
+            codigo: (self.descricao(codigo, nivel), total)
+            for codigo, total in lote.totais_por(f'ncm_{nivel}', campo).items()
+        }
\ No newline at end of file
@@ -0,0 +1,319 @@
+"""
+Serviço de persistência em segundo plano (write-behind)
+"""
+import atexit
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional
+
+from src.config import settings
+from src.models.cupom_completo import CupomCompleto
+from src.utils.arquivos import GrupoCommit, commit_em_grupo
+
+
+# Marca de fim da fila (encerra a thread de escrita)
+_FIM = object()
+
+# Marca de sincronização (pede um flush do repositório)
+_SINCRONIZAR = object()
+
+
+class PersistenciaAssincrona:
+    """
+    Salva cupons em uma thread dedicada, fora da thread de scraping
+    
+    O scraping apenas enfileira o cupom e segue para o próximo; a thread
+    de escrita retira da fila até `tamanho_lote` cupons por vez e os
+    grava dentro de um GrupoCommit: os arquivos atômicos do lote recebem
+    um único ciclo de fsync + rename, em vez de um por cupom.
+    
+    A fila é limitada: se o disco (ou o compartilhamento de rede) ficar
+    para trás, salvar() bloqueia até abrir espaço, em vez de acumular
+    cupons sem limite em memória. Ao fechar (ou na saída do interpretador)
+    a fila é drenada antes de a thread terminar.
+    
+    O Future de um cupom só é resolvido quando ele está gravado de fato.
+    Repositórios com buffer (Destino.pendentes) retêm os últimos cupons
+    até o próximo flush, que acontece no ritmo do próprio escritor, em
+    sincronizar() ou ao fechar.
+    """
+    
+    def __init__(
+        self,
+        repositorio,
+        tamanho_fila: Optional[int] = None,
+        tamanho_lote: Optional[int] = None,
+        fechar_repositorio: bool = False
+    ):
+        """
+        Inicia a thread de escrita
+        
+        Args:
+            repositorio: Objeto com salvar(cupom, nome_arquivo) -> Path
+                (ex: CSVRepository ou um Destino de saida_service)
+            tamanho_fila: Máximo de cupons aguardando gravação
+                (padrão: settings.WRITE_BEHIND_QUEUE_SIZE)
+            tamanho_lote: Máximo de cupons por commit em grupo
+                (padrão: settings.WRITE_BEHIND_BATCH_SIZE)
+            fechar_repositorio: Chama repositorio.fechar() na própria thread
+                de escrita ao encerrar (para repositórios com conexão ou
+                arquivo aberto, como SQLite e escritores de lote)
+        """
+        self.repositorio = repositorio
+        self.tamanho_lote = max(tamanho_lote or settings.WRITE_BEHIND_BATCH_SIZE, 1)
+        self.fechar_repositorio = fechar_repositorio
+        
+        self.salvos = 0
+        self.erros = 0
+        self.lotes = 0
+        self.tempo_gravacao = 0.0
+        
+        self._fila: queue.Queue = queue.Queue(maxsize=tamanho_fila or settings.WRITE_BEHIND_QUEUE_SIZE)
+        
+        # Cupons aceitos pelo repositório cujo Future espera o flush: (cupom, futuro, caminho)
+        self._aguardando_flush: deque = deque()
+        self._com_buffer = hasattr(type(repositorio), 'pendentes')
+        self._fechado = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._executar, name='persistencia', daemon=True)
+        self._thread.start()
+        
+        # Thread daemon não impede a saída: drena a fila antes de o processo terminar
+        atexit.register(self.fechar)
+    
+    @property
+    def pendentes(self) -> int:
+        """Cupons na fila aguardando gravação (aproximado)"""
+        return self._fila.qsize()
+    
+    def metricas(self) -> dict:
+        """
+        Contadores da gravação
+        
+        Returns:
+            Dicionário com pendentes, salvos, erros, lotes, tempo total de
+            gravação (segundos) e tempo médio por cupom (ms)
+        """
+        gravados = self.salvos + self.erros
+        return {
+            'pendentes': self.pendentes,
+            'salvos': self.salvos,
+            'erros': self.erros,
+            'lotes': self.lotes,
+            'tempo_gravacao': round(self.tempo_gravacao, 3),
+            'ms_por_cupom': round(self.tempo_gravacao * 1000 / gravados, 2) if gravados else None,
+        }
+    
+    def salvar(self, cupom: CupomCompleto, nome_arquivo: Optional[str] = None) -> Future:
+        """
+        Enfileira um cupom para gravação
+        
+        Bloqueia apenas se a fila estiver cheia.
+        
+        Args:
+            cupom: Objeto CupomCompleto
+            nome_arquivo: Repassado para repositorio.salvar()
+        
+        Returns:
+            Future com o Path do arquivo salvo (ou a exceção da gravação)
+        
+        Raises:
+            RuntimeError: Se a persistência já foi fechada
+        """
+        futuro = Future()
+        
+        # O put fica sob o lock para nunca entrar na fila depois da marca de fim
+        with self._lock:
+            if self._fechado:
+                raise RuntimeError("Persistência em segundo plano já foi fechada")
+            self._fila.put((cupom, nome_arquivo, futuro))
+        
+        return futuro
+    
+    def sincronizar(self) -> Future:
+        """
+        Pede à thread de escrita um flush do repositório
+        
+        Returns:
+            Future resolvido depois do flush, quando os cupons enfileirados
+            antes já têm seus Futures resolvidos (ou a exceção do flush)
+        
+        Raises:
+            RuntimeError: Se a persistência já foi fechada
+        """
+        futuro = Future()
+        
+        with self._lock:
+            if self._fechado:
+                raise RuntimeError("Persistência em segundo plano já foi fechada")
+            self._fila.put((_SINCRONIZAR, None, futuro))
+        
+        return futuro
+    
+    def aguardar(self):
+        """Bloqueia até todos os cupons enfileirados serem gravados"""
+        self._fila.join()
+    
+    def fechar(self):
+        """Drena a fila, encerra a thread de escrita e aguarda seu término"""
+        with self._lock:
+            if self._fechado:
+                return
+            self._fechado = True
+        
+        atexit.unregister(self.fechar)
+        self._fila.put(_FIM)
+        self._thread.join()
+    
+    def _executar(self):
+        """Laço da thread de escrita"""
+        while True:
+            itens = [self._fila.get()]
+            
+            # Junta ao lote o que já estiver na fila, sem esperar
+            while len(itens) < self.tamanho_lote and itens[-1] is not _FIM:
+                try:
+                    itens.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            
+            fim = itens[-1] is _FIM
+            if fim:
+                itens.pop()
+            
+            cupons = [item for item in itens if item[0] is not _SINCRONIZAR]
+            sincronizacoes = [futuro for marca, _, futuro in itens if marca is _SINCRONIZAR]
+            
+            if cupons:
+                self._gravar_lote(cupons)
+            if sincronizacoes:
+                self._sincronizar(sincronizacoes)
+            
+            if fim:
+                erro = self._fechar_repositorio() if self.fechar_repositorio else None
+                self._confirmar_gravados(erro, todos=True)
+            
+            for _ in range(len(itens) + fim):
+                self._fila.task_done()
+            
+            if fim:
+                return
+    
+    def _fechar_repositorio(self) -> Optional[Exception]:
+        """Fecha o repositório na thread que o utilizou; retorna o erro, se houver"""
+        try:
+            self.repositorio.fechar()
+        except Exception as e:
+            self.erros += 1
+            print(f"ERRO: Falha ao fechar saída em segundo plano: {e}")
+            return e
+        return None
+    
+    def _sincronizar(self, futuros: list):
+        """Faz o flush do repositório e resolve os Futures de sincronizar()"""
+        erro = None
+        
+        try:
+            if self._com_buffer:
+                self.repositorio.sincronizar()
+        except Exception as e:
+            erro = e
+            print(f"ERRO: Falha ao sincronizar saída em segundo plano: {e}")
+        
+        self._confirmar_gravados(erro)
+        
+        for futuro in futuros:
+            if erro is None:
+                futuro.set_result(None)
+            else:
+                futuro.set_exception(erro)
+    
+    def _confirmar_gravados(self, erro: Optional[Exception] = None, todos: bool = False):
+        """
+        Resolve os Futures dos cupons que já saíram do buffer do repositório
+        
+        Os `pendentes` do repositório são sempre os últimos cupons aceitos,
+        então os anteriores a eles já estão gravados. Com `erro` (flush ou
+        fechamento falhou), todos os que aguardam recebem a exceção.
+        
+        Args:
+            erro: Exceção do flush/fechamento, se houver
+            todos: Resolve todos os que aguardam (repositório já fechado)
+        """
+        if self._com_buffer:
+            self._descartar_falhas()
+        
+        pendentes = 0
+        if erro is None and not todos and self._com_buffer:
+            pendentes = self.repositorio.pendentes
+        
+        while len(self._aguardando_flush) > pendentes:
+            _, futuro, caminho = self._aguardando_flush.popleft()
+            
+            if erro is None:
+                self.salvos += 1
+                futuro.set_result(caminho)
+            else:
+                self.erros += 1
+                futuro.set_exception(erro)
+    
+    def _descartar_falhas(self):
+        """Passa para o Future de cada cupom descartado pelo repositório o erro dele"""
+        falhas = {id(cupom): erro for cupom, erro in self.repositorio.retirar_falhas()}
+        if not falhas:
+            return
+        
+        aguardando = deque()
+        for cupom, futuro, caminho in self._aguardando_flush:
+            if id(cupom) in falhas:
+                self.erros += 1
+                futuro.set_exception(falhas[id(cupom)])
+            else:
+                aguardando.append((cupom, futuro, caminho))
+        self._aguardando_flush = aguardando
+    
+    def _gravar_lote(self, itens: list):
+        """
+        Grava um lote de cupons com um único commit em grupo
+        
+        Um cupom com erro não impede a gravação dos demais: o erro vai
+        para o Future dele.
+        """
+        inicio = time.perf_counter()
+        grupo = GrupoCommit()
+        resultados = []
+        
+        with commit_em_grupo(grupo):
+            for cupom, nome_arquivo, futuro in itens:
+                try:
+                    resultados.append((cupom, futuro, self.repositorio.salvar(cupom, nome_arquivo), None))
+                except Exception as e:
+                    resultados.append((cupom, futuro, None, e))
+        
+        try:
+            grupo.confirmar()
+        except Exception as e:
+            # O lote não foi confirmado por inteiro: reporta erro para todos
+            resultados = [(cupom, futuro, None, erro or e) for cupom, futuro, _, erro in resultados]
+        
+        self.lotes += 1
+        self.tempo_gravacao += time.perf_counter() - inicio
+        
+        for cupom, futuro, caminho, erro in resultados:
+            if erro is None:
+                self._aguardando_flush.append((cupom, futuro, caminho))
+            else:
+                self.erros += 1
+                print(f"ERRO: Falha ao salvar cupom em segundo plano: {erro}")
+                futuro.set_exception(erro)
+        
+        self._confirmar_gravados()
+    
+    def __enter__(self) -> 'PersistenciaAssincrona':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.fechar()
\ No newline at end of file
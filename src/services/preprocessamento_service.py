@@ -0,0 +1,596 @@
+"""
+Pré-processamento das fotos dos cupons para leitura do QR Code
+"""
+import math
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Sequence, Tuple, Union
+
+from PIL import Image, ImageFilter, ImageOps, ImageSequence, ImageStat
+from pyzbar import pyzbar
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+try:
+    from pdf2image import convert_from_path
+except ImportError:
+    convert_from_path = None
+
+from src.config import settings
+
+
+# Transformações na ordem em que são tentadas (da mais barata para a mais cara)
+TRANSFORMACOES = ('reduzida', 'recorte', 'original', 'limiar', 'nitidez', 'rotacao')
+
+# Grade usada para localizar a região do QR Code (células por lado)
+_GRADE = 16
+
+# Ângulo da transformação 'rotacao' (graus, anti-horário)
+_ANGULO = 45
+
+
+def _decodificar_qr(imagem: Image.Image) -> list:
+    """pyzbar procurando só QR Codes (sem os leitores de código de barras 1D)"""
+    return pyzbar.decode(imagem, symbols=[pyzbar.ZBarSymbol.QRCODE])
+
+
+def regiao_provavel(imagem: Image.Image) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Estima a região do QR Code: a janela com mais bordas da imagem
+    
+    O QR Code é a área de maior contraste local da foto do cupom (o texto
+    impresso tem bordas mais espaçadas). A imagem é reduzida a uma grade
+    de _GRADE x _GRADE células com a intensidade média de bordas, e a
+    janela de 1/4 da grade com a maior soma é escolhida, com uma célula
+    de margem.
+    
+    Args:
+        imagem: Imagem em tons de cinza
+    
+    Returns:
+        Caixa (esquerda, topo, direita, base) em pixels da imagem, ou None
+        se a imagem for pequena demais para recortar
+    """
+    largura, altura = imagem.size
+    if min(largura, altura) < _GRADE * 8:
+        return None
+    
+    bordas = imagem.resize((_GRADE * 8, _GRADE * 8), Image.BILINEAR).filter(ImageFilter.FIND_EDGES)
+    celulas = list(bordas.resize((_GRADE, _GRADE), Image.BOX).getdata())
+    
+    janela = _GRADE // 4
+    melhor, melhor_soma = (0, 0), -1
+    for linha in range(_GRADE - janela + 1):
+        for coluna in range(_GRADE - janela + 1):
+            soma = sum(
+                sum(celulas[(linha + i) * _GRADE + coluna:(linha + i) * _GRADE + coluna + janela])
+                for i in range(janela)
+            )
+            if soma > melhor_soma:
+                melhor, melhor_soma = (linha, coluna), soma
+    
+    linha, coluna = melhor
+    celula_x, celula_y = largura / _GRADE, altura / _GRADE
+    return (
+        int(max(coluna - 1, 0) * celula_x),
+        int(max(linha - 1, 0) * celula_y),
+        int(min(coluna + janela + 1, _GRADE) * celula_x),
+        int(min(linha + janela + 1, _GRADE) * celula_y),
+    )
+
+
+def dhash(imagem: Image.Image, tamanho: int = 8) -> str:
+    """
+    Hash perceptual por diferença (dHash) com tamanho² bits, em hex
+    
+    Cada bit compara dois pixels vizinhos da imagem reduzida a
+    (tamanho + 1) x tamanho: a mesma foto reduzida ou recomprimida
+    gera um hash igual ou a poucos bits de distância.
+    """
+    largura = tamanho + 1
+    pixels = imagem.convert('L').resize((largura, tamanho), Image.BOX).tobytes()
+    
+    bits = 0
+    for linha in range(tamanho):
+        inicio = linha * largura
+        for coluna in range(inicio, inicio + tamanho):
+            bits = (bits << 1) | (pixels[coluna] > pixels[coluna + 1])
+    return f"{bits:0{tamanho * tamanho // 4}x}"
+
+
+def paginas_pdf(caminho: Union[str, Path], dpi: int) -> Iterator[Tuple[int, Image.Image]]:
+    """
+    Renderiza as páginas de um PDF digitalizado em tons de cinza
+    
+    Usa PyMuPDF (uma página por vez) ou, sem ele, pdf2image (requer poppler).
+    
+    Raises:
+        ImportError: Se nenhuma das duas bibliotecas estiver instalada
+    """
+    if fitz is not None:
+        with fitz.open(str(caminho)) as documento:
+            for numero, pagina in enumerate(documento, 1):
+                pixmap = pagina.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+                yield numero, Image.frombytes('L', (pixmap.width, pixmap.height), pixmap.samples,
+                                              'raw', 'L', pixmap.stride)
+        return
+    
+    if convert_from_path is not None:
+        for numero, pagina in enumerate(convert_from_path(str(caminho), dpi=dpi, grayscale=True), 1):
+            yield numero, pagina.convert('L')
+        return
+    
+    raise ImportError(
+        "Leitura de PDF requer PyMuPDF ou pdf2image. Instale com: pip install pymupdf"
+    )
+
+
+def _desfazer_rotacao(tamanho: Tuple[int, int], tamanho_girada: Tuple[int, int], depois):
+    """Função que leva um ponto da imagem girada (rotate com expand) de volta à imagem base"""
+    radianos = math.radians(_ANGULO)
+    cos, sen = math.cos(radianos), math.sin(radianos)
+    centro_x, centro_y = tamanho[0] / 2, tamanho[1] / 2
+    centro_gx, centro_gy = tamanho_girada[0] / 2, tamanho_girada[1] / 2
+    
+    def mapear(x, y):
+        dx, dy = x - centro_gx, y - centro_gy
+        return depois(cos * dx - sen * dy + centro_x, sen * dx + cos * dy + centro_y)
+    
+    return mapear
+
+
+def _caixa(codigo, mapear) -> Optional[Tuple[int, int, int, int]]:
+    """Caixa (esquerda, topo, largura, altura) do símbolo na página original"""
+    pontos = getattr(codigo, 'polygon', None)
+    if not pontos:
+        retangulo = getattr(codigo, 'rect', None)
+        if retangulo is None:
+            return None
+        esquerda, topo, largura, altura = retangulo
+        pontos = [(esquerda, topo), (esquerda + largura, topo + altura)]
+    
+    mapeados = [mapear(x, y) for x, y in pontos]
+    xs = [x for x, _ in mapeados]
+    ys = [y for _, y in mapeados]
+    return (round(min(xs)), round(min(ys)), round(max(xs) - min(xs)), round(max(ys) - min(ys)))
+
+
+@dataclass
+class SimboloQR:
+    """
+    QR Code encontrado por decodificar_todos
+    
+    Attributes:
+        dados: Conteúdo do QR Code
+        pagina: Página (ou quadro do TIFF), a partir de 1
+        caixa: (esquerda, topo, largura, altura) em pixels da página na
+            resolução original (None se a leitura não informar a posição)
+    """
+    dados: bytes
+    pagina: int
+    caixa: Optional[Tuple[int, int, int, int]] = None
+
+
+@dataclass
+class DecodificacaoQR:
+    """
+    Resultado da leitura de uma imagem
+    
+    Attributes:
+        codigos: Símbolos decodificados pela pyzbar (vazio se nenhum)
+        transformacao: Transformação que encontrou o QR Code (None se nenhuma)
+        tentativas: Transformações tentadas
+        duracao: Tempo total (abertura + tentativas), em segundos
+        pagina: Página em que o QR Code foi lido (decodificar)
+    """
+    codigos: list = field(default_factory=list)
+    transformacao: Optional[str] = None
+    tentativas: int = 0
+    duracao: float = 0.0
+    pagina: Optional[int] = None
+
+
+@dataclass
+class RegiaoQR:
+    """
+    Recorte da região provável do QR Code (regiao_qr)
+    
+    Attributes:
+        imagem: Recorte em tons de cinza, na resolução reduzida
+        mapear: Converte um ponto do recorte para a página na resolução original
+    """
+    imagem: Image.Image
+    mapear: Callable[[float, float], Tuple[float, float]]
+
+
+class PreprocessadorQR:
+    """
+    Prepara a foto do cupom e tenta a leitura em etapas crescentes
+    
+    Fotos de celular têm 12+ MP: decodificar a imagem RGB inteira é lento
+    e, em fotos tremidas, muitas vezes não encontra nada. A imagem é
+    aberta já em tons de cinza e reduzida (no JPEG, com o modo draft do
+    PIL a redução acontece na própria decodificação do arquivo, sem
+    criar a imagem inteira) e as transformações de TRANSFORMACOES são
+    tentadas em ordem até a primeira leitura:
+    
+    - reduzida: tons de cinza com no máximo `max_lado` pixels
+    - recorte: região provável do QR Code, na resolução original
+    - original: imagem inteira na resolução original
+    - limiar: contraste automático e binarização pela média
+    - nitidez: máscara de nitidez (fotos tremidas)
+    - rotacao: imagem girada 45° (cupom fotografado inclinado)
+    
+    Registra o tempo de cada imagem e a transformação que funcionou.
+    """
+    
+    def __init__(
+        self,
+        max_lado: Optional[int] = None,
+        transformacoes: Optional[Sequence[str]] = None,
+        decodificar: Optional[Callable[[Image.Image], list]] = None,
+        dpi: Optional[int] = None
+    ):
+        """
+        Args:
+            max_lado: Maior lado da imagem reduzida (padrão: settings.QR_MAX_SIDE;
+                0 = sem redução)
+            transformacoes: Nomes de TRANSFORMACOES, em ordem
+                (padrão: settings.QR_TRANSFORMS)
+            decodificar: Função imagem -> símbolos (padrão: pyzbar, só QR Code)
+            dpi: Resolução das páginas de PDF (padrão: settings.QR_PDF_DPI)
+        """
+        self.max_lado = settings.QR_MAX_SIDE if max_lado is None else max_lado
+        self.dpi = dpi or settings.QR_PDF_DPI
+        
+        if transformacoes is None:
+            transformacoes = [nome.strip() for nome in settings.QR_TRANSFORMS.split(',') if nome.strip()]
+        desconhecidas = set(transformacoes) - set(TRANSFORMACOES)
+        if desconhecidas:
+            raise ValueError(f"Transformações desconhecidas: {', '.join(sorted(desconhecidas))}")
+        self.transformacoes = tuple(transformacoes) or ('reduzida',)
+        
+        self._decodificar = decodificar or _decodificar_qr
+        
+        self.imagens = 0
+        self.sucessos = 0
+        self.duracao_total = 0.0
+        self.por_transformacao: Counter = Counter()
+        self._duracoes = deque(maxlen=1000)
+        
+        # Resultado da última imagem lida
+        self.ultima: Optional[DecodificacaoQR] = None
+    
+    @property
+    def configuracao(self) -> str:
+        """Parâmetros que mudam o resultado da leitura (chave do cache de falhas)"""
+        return f"{','.join(self.transformacoes)}|{self.max_lado}|{self.dpi}"
+    
+    # ------------------------------------------------------------------
+    # Abertura
+    # ------------------------------------------------------------------
+    
+    def abrir(self, caminho: Union[str, Path]) -> Tuple[Image.Image, bool]:
+        """
+        Abre a imagem em tons de cinza, reduzida a `max_lado`
+        
+        Returns:
+            Tupla (imagem, reduzida): reduzida indica se a imagem ficou
+            menor que a original
+        """
+        with Image.open(caminho) as imagem:
+            largura, altura = imagem.size
+            maior = max(largura, altura)
+            reduzir = bool(self.max_lado) and maior > self.max_lado
+            
+            if reduzir and imagem.format == 'JPEG':
+                # Decodifica direto em escala 1/2, 1/4 ou 1/8 e só o canal Y (cinza)
+                fator = self.max_lado / maior
+                imagem.draft('L', (int(largura * fator), int(altura * fator)))
+            
+            cinza = imagem.convert('L')
+        
+        if reduzir:
+            cinza.thumbnail((self.max_lado, self.max_lado), Image.BILINEAR)
+        return cinza, reduzir
+    
+    @staticmethod
+    def abrir_original(caminho: Union[str, Path]) -> Image.Image:
+        """Imagem em tons de cinza na resolução original"""
+        with Image.open(caminho) as imagem:
+            return imagem.convert('L')
+    
+    def regiao_qr(self, caminho: Union[str, Path]) -> Optional[RegiaoQR]:
+        """
+        Recorte da região provável do QR Code na imagem reduzida
+        
+        Usado pelo cache por hash perceptual: o hash do recorte não depende
+        do leiaute do cupom (cabeçalho da loja, itens), e o próprio recorte
+        é lido para confirmar a chave.
+        
+        Returns:
+            RegiaoQR, ou None para PDF, arquivos com vários quadros, imagens
+            pequenas demais ou ilegíveis
+        """
+        if Path(caminho).suffix.lower() == '.pdf':
+            return None
+        
+        try:
+            with Image.open(caminho) as imagem:
+                if getattr(imagem, 'n_frames', 1) > 1:
+                    return None
+                largura = imagem.width
+            base, _ = self.abrir(caminho)
+        except OSError:
+            return None
+        
+        regiao = regiao_provavel(base)
+        if regiao is None:
+            return None
+        
+        escala = largura / base.width
+        return RegiaoQR(
+            base.crop(regiao),
+            lambda x, y: ((x + regiao[0]) * escala, (y + regiao[1]) * escala)
+        )
+    
+    def paginas(self, caminho: Union[str, Path]) -> Iterator[Tuple[int, Image.Image]]:
+        """
+        Páginas do arquivo em tons de cinza, na resolução original
+        
+        TIFF/GIF com vários quadros geram uma página por quadro; PDF, uma
+        por página, renderizada em `dpi` (requer PyMuPDF ou pdf2image).
+        
+        Yields:
+            Tupla (número da página a partir de 1, imagem)
+        """
+        if Path(caminho).suffix.lower() == '.pdf':
+            yield from paginas_pdf(caminho, self.dpi)
+            return
+        
+        with Image.open(caminho) as imagem:
+            for numero, quadro in enumerate(ImageSequence.Iterator(imagem), 1):
+                yield numero, quadro.convert('L')
+    
+    def _reduzir(self, imagem: Image.Image) -> Tuple[Image.Image, bool]:
+        """Cópia reduzida a `max_lado` (ou a própria imagem, se já for menor)"""
+        if not self.max_lado or max(imagem.size) <= self.max_lado:
+            return imagem, False
+        reduzida = imagem.copy()
+        reduzida.thumbnail((self.max_lado, self.max_lado), Image.BILINEAR)
+        return reduzida, True
+    
+    def _fontes(self, caminho: Union[str, Path]) -> Iterator[tuple]:
+        """
+        Gera (página, base, reduzida, tamanho original, abrir original) de cada página
+        
+        Imagens de um quadro são abertas por abrir() (draft no JPEG) e a
+        original só é lida se alguma transformação precisar dela.
+        """
+        if Path(caminho).suffix.lower() != '.pdf':
+            with Image.open(caminho) as imagem:
+                quadros = getattr(imagem, 'n_frames', 1)
+                tamanho = imagem.size
+            
+            if quadros == 1:
+                base, reduzida = self.abrir(caminho)
+                yield 1, base, reduzida, tamanho, lambda: self.abrir_original(caminho)
+                return
+        
+        for numero, pagina in self.paginas(caminho):
+            base, reduzida = self._reduzir(pagina)
+            yield numero, base, reduzida, pagina.size, lambda pagina=pagina: pagina
+    
+    # ------------------------------------------------------------------
+    # Transformações
+    # ------------------------------------------------------------------
+    
+    def _tentativas(
+        self,
+        base: Image.Image,
+        reduzida: bool,
+        tamanho_original: Tuple[int, int],
+        abrir_original: Callable[[], Image.Image],
+        transformacoes: Sequence[str]
+    ) -> Iterator[Tuple[str, Image.Image, Callable[[float, float], Tuple[float, float]]]]:
+        """
+        Gera (nome, imagem, mapear) de cada transformação, sob demanda
+        
+        mapear converte um ponto da imagem transformada para a página
+        na resolução original (posição dos QR Codes).
+        """
+        original = None
+        escala = tamanho_original[0] / base.width
+        
+        def escalar(x, y):
+            return x * escala, y * escala
+        
+        for nome in transformacoes:
+            if nome == 'reduzida':
+                yield nome, base, escalar
+            
+            elif nome == 'recorte':
+                regiao = regiao_provavel(base)
+                if regiao is None:
+                    continue
+                if reduzida:
+                    if original is None:
+                        original = abrir_original()
+                    regiao = tuple(int(valor * escala) for valor in regiao)
+                    imagem = original.crop(regiao)
+                else:
+                    imagem = base.crop(regiao)
+                yield nome, imagem, lambda x, y, regiao=regiao: (x + regiao[0], y + regiao[1])
+            
+            elif nome == 'original':
+                # Sem redução a original é a própria imagem base
+                if reduzida:
+                    if original is None:
+                        original = abrir_original()
+                    yield nome, original, lambda x, y: (x, y)
+            
+            elif nome == 'limiar':
+                contraste = ImageOps.autocontrast(base, cutoff=1)
+                limiar = ImageStat.Stat(contraste).mean[0]
+                yield nome, contraste.point(lambda pixel: 255 if pixel > limiar else 0), escalar
+            
+            elif nome == 'nitidez':
+                yield nome, base.filter(ImageFilter.UnsharpMask(radius=2, percent=200, threshold=3)), escalar
+            
+            elif nome == 'rotacao':
+                girada = base.rotate(_ANGULO, resample=Image.BILINEAR, expand=True, fillcolor=255)
+                yield nome, girada, _desfazer_rotacao(base.size, girada.size, escalar)
+    
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+    
+    def decodificar_recorte(self, regiao: RegiaoQR) -> list:
+        """
+        Lê o recorte de regiao_qr, sem transformações nem métricas
+        
+        Returns:
+            Lista de SimboloQR (página 1, caixa na página original)
+        """
+        return [SimboloQR(codigo.data, 1, _caixa(codigo, regiao.mapear))
+                for codigo in self._decodificar(regiao.imagem)]
+    
+    def decodificar(self, caminho: Union[str, Path]) -> DecodificacaoQR:
+        """
+        Lê os QR Codes da imagem, parando na primeira transformação que encontrar algum
+        
+        Em arquivos com várias páginas (TIFF, PDF), para na primeira página
+        com QR Code.
+        
+        Args:
+            caminho: Arquivo da imagem
+        
+        Returns:
+            DecodificacaoQR com os símbolos lidos
+        
+        Raises:
+            OSError: Se a imagem não puder ser aberta
+        """
+        inicio = time.perf_counter()
+        resultado = DecodificacaoQR()
+        
+        try:
+            for pagina, base, reduzida, tamanho, abrir_original in self._fontes(caminho):
+                for nome, imagem, _ in self._tentativas(base, reduzida, tamanho, abrir_original,
+                                                        self.transformacoes):
+                    resultado.tentativas += 1
+                    codigos = self._decodificar(imagem)
+                    if codigos:
+                        resultado.codigos = codigos
+                        resultado.transformacao = nome
+                        resultado.pagina = pagina
+                        break
+                if resultado.codigos:
+                    break
+        finally:
+            resultado.duracao = time.perf_counter() - inicio
+        
+        self.ultima = resultado
+        self.registrar(resultado.transformacao, resultado.duracao)
+        return resultado
+    
+    def decodificar_todos(self, caminho: Union[str, Path]) -> DecodificacaoQR:
+        """
+        Lê todos os QR Codes de todas as páginas (folhas com vários cupons)
+        
+        Diferente de decodificar(), não para no primeiro QR Code: cada
+        página passa por todas as transformações (exceto 'recorte', que
+        procura um único QR Code) e os símbolos encontrados são somados,
+        sem repetir o mesmo conteúdo na mesma página.
+        
+        Args:
+            caminho: Imagem, TIFF com vários quadros ou PDF
+        
+        Returns:
+            DecodificacaoQR com codigos = lista de SimboloQR (dados, página
+            e caixa na página); transformacao é a primeira que leu algum
+        
+        Raises:
+            OSError: Se o arquivo não puder ser aberto
+            ImportError: Se for PDF e não houver PyMuPDF nem pdf2image
+        """
+        inicio = time.perf_counter()
+        resultado = DecodificacaoQR()
+        transformacoes = [nome for nome in self.transformacoes if nome != 'recorte'] or ['reduzida']
+        
+        try:
+            for pagina, base, reduzida, tamanho, abrir_original in self._fontes(caminho):
+                lidos = set()
+                for nome, imagem, mapear in self._tentativas(base, reduzida, tamanho, abrir_original,
+                                                             transformacoes):
+                    resultado.tentativas += 1
+                    for codigo in self._decodificar(imagem):
+                        if codigo.data in lidos:
+                            continue
+                        lidos.add(codigo.data)
+                        resultado.codigos.append(SimboloQR(codigo.data, pagina, _caixa(codigo, mapear)))
+                        if resultado.transformacao is None:
+                            resultado.transformacao = nome
+        finally:
+            resultado.duracao = time.perf_counter() - inicio
+        
+        self.ultima = resultado
+        self.registrar(resultado.transformacao, resultado.duracao)
+        return resultado
+    
+    def registrar(self, transformacao: Optional[str], duracao: float):
+        """
+        Acumula as métricas de uma imagem
+        
+        Também usado para somar leituras feitas em outros processos.
+        
+        Args:
+            transformacao: Transformação que leu o QR Code (None = falha)
+            duracao: Tempo da leitura (segundos)
+        """
+        self.imagens += 1
+        self.duracao_total += duracao
+        self._duracoes.append(duracao)
+        
+        if transformacao is not None:
+            self.sucessos += 1
+            self.por_transformacao[transformacao] += 1
+    
+    def metricas(self) -> dict:
+        """
+        Métricas das leituras
+        
+        Returns:
+            Dicionário com:
+            - imagens, sucessos, taxa_sucesso (0 a 1)
+            - tempo_medio_ms: média de todas as imagens
+            - tempo_p95_ms: percentil 95 das últimas 1000 imagens
+            - por_transformacao: leituras bem-sucedidas de cada transformação
+        """
+        duracoes = sorted(self._duracoes)
+        p95 = duracoes[max(int(round(0.95 * len(duracoes))) - 1, 0)] if duracoes else 0.0
+        
+        return {
+            'imagens': self.imagens,
+            'sucessos': self.sucessos,
+            'taxa_sucesso': round(self.sucessos / self.imagens, 4) if self.imagens else 0.0,
+            'tempo_medio_ms': round(self.duracao_total / self.imagens * 1000, 1) if self.imagens else 0.0,
+            'tempo_p95_ms': round(p95 * 1000, 1),
+            'por_transformacao': dict(self.por_transformacao),
+        }
+    
+    def resumo(self) -> str:
+        """Linha de resumo para o console"""
+        metricas = self.metricas()
+        transformacoes = ', '.join(
+            f"{nome} {quantidade}" for nome, quantidade in self.por_transformacao.most_common()
+        )
+        return (f"{metricas['sucessos']}/{metricas['imagens']} lidas "
+                f"({metricas['taxa_sucesso'] * 100:.1f}%), "
+                f"média {metricas['tempo_medio_ms']:.0f} ms, p95 {metricas['tempo_p95_ms']:.0f} ms"
+                + (f" [{transformacoes}]" if transformacoes else ""))
\ No newline at end of file
@@ -0,0 +1,259 @@
+"""
+Serviço para acompanhamento do progresso de processamento em lote
+"""
+import json
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Optional
+
+from src.config import settings
+
+
+class ProgressoLote:
+    """
+    Acompanha o progresso de um lote de cupons
+    
+    Mantém, sobre uma janela dos cupons mais recentes:
+    - Taxa de processamento (cupons por minuto)
+    - ETA (tempo restante estimado)
+    - Taxas de sucesso e erro
+    - Percentis p50/p95 do tempo de cada etapa
+    
+    Gera uma linha de status compacta e grava um arquivo JSON com o
+    mesmo conteúdo para monitores externos. A gravação é limitada por
+    intervalo e atômica (arquivo temporário + rename), então o monitor
+    nunca lê um arquivo pela metade e o worker não paga I/O a cada cupom.
+    """
+    
+    # Etapas medidas por cupom
+    ETAPAS = ('captcha', 'extracao', 'salvamento')
+    
+    def __init__(
+        self,
+        total: Optional[int] = None,
+        arquivo: Optional[Path] = None,
+        intervalo_escrita: Optional[float] = None,
+        janela: Optional[int] = None
+    ):
+        """
+        Inicializa o acompanhamento
+        
+        Args:
+            total: Número total de cupons do lote (None se desconhecido)
+            arquivo: Caminho do arquivo JSON de progresso (opcional)
+            intervalo_escrita: Intervalo mínimo entre gravações (segundos)
+            janela: Quantidade de cupons recentes usada nas estatísticas
+        """
+        self.total = total
+        self.arquivo = Path(arquivo) if arquivo else None
+        self.intervalo_escrita = (
+            settings.PROGRESS_WRITE_INTERVAL if intervalo_escrita is None else intervalo_escrita
+        )
+        janela = janela or settings.PROGRESS_WINDOW
+        
+        self.processados = 0
+        self.sucesso = 0
+        self.erro = 0
+        
+        self.inicio = time.monotonic()
+        self.inicio_epoch = time.time()
+        self._ultima_escrita = None
+        
+        # Instantes de conclusão dos cupons recentes (para taxa/ETA)
+        self._conclusoes = deque(maxlen=janela + 1)
+        self._conclusoes.append(self.inicio)
+        
+        # Amostras recentes de tempo por etapa (segundos)
+        self._tempos: Dict[str, deque] = {etapa: deque(maxlen=janela) for etapa in self.ETAPAS}
+    
+    def registrar(self, sucesso: bool, tempos: Optional[dict] = None):
+        """
+        Registra a conclusão de um cupom
+        
+        Args:
+            sucesso: True se o cupom foi processado com sucesso
+            tempos: Tempo gasto em cada etapa (segundos), ex: {'captcha': 12.3}
+        """
+        self.processados += 1
+        
+        if sucesso:
+            self.sucesso += 1
+        else:
+            self.erro += 1
+        
+        self._conclusoes.append(time.monotonic())
+        
+        for etapa, duracao in (tempos or {}).items():
+            if etapa in self._tempos and duracao is not None:
+                self._tempos[etapa].append(duracao)
+        
+        self.salvar_arquivo()
+    
+    def taxa_por_minuto(self) -> float:
+        """
+        Calcula a taxa de processamento sobre a janela recente
+        
+        Returns:
+            Cupons por minuto (0.0 se nada foi processado)
+        """
+        if len(self._conclusoes) < 2:
+            return 0.0
+        
+        intervalo = self._conclusoes[-1] - self._conclusoes[0]
+        
+        if intervalo <= 0:
+            return 0.0
+        
+        return (len(self._conclusoes) - 1) * 60.0 / intervalo
+    
+    def eta_segundos(self) -> Optional[float]:
+        """
+        Estima o tempo restante com base na taxa recente
+        
+        Returns:
+            Segundos restantes ou None se o total ou a taxa forem desconhecidos
+        """
+        if self.total is None:
+            return None
+        
+        restantes = max(self.total - self.processados, 0)
+        
+        if restantes == 0:
+            return 0.0
+        
+        taxa = self.taxa_por_minuto()
+        
+        if taxa <= 0:
+            return None
+        
+        return restantes * 60.0 / taxa
+    
+    def percentis(self, etapa: str) -> Dict[str, Optional[float]]:
+        """
+        Calcula p50 e p95 do tempo de uma etapa
+        
+        Args:
+            etapa: Nome da etapa (ver ETAPAS)
+        
+        Returns:
+            Dicionário {'p50': ..., 'p95': ...} (None se não há amostras)
+        """
+        amostras = sorted(self._tempos.get(etapa, ()))
+        
+        if not amostras:
+            return {'p50': None, 'p95': None}
+        
+        return {
+            'p50': self._percentil(amostras, 50),
+            'p95': self._percentil(amostras, 95),
+        }
+    
+    @staticmethod
+    def _percentil(amostras_ordenadas: list, percentil: float) -> float:
+        """Percentil pelo método nearest-rank sobre amostras já ordenadas"""
+        indice = max(int(round(percentil / 100.0 * len(amostras_ordenadas))) - 1, 0)
+        return amostras_ordenadas[min(indice, len(amostras_ordenadas) - 1)]
+    
+    def snapshot(self) -> dict:
+        """
+        Gera o estado atual do progresso
+        
+        Returns:
+            Dicionário serializável em JSON
+        """
+        decorrido = time.monotonic() - self.inicio
+        
+        return {
+            'total': self.total,
+            'processados': self.processados,
+            'sucesso': self.sucesso,
+            'erro': self.erro,
+            'taxa_sucesso': self.sucesso / self.processados if self.processados else None,
+            'taxa_erro': self.erro / self.processados if self.processados else None,
+            'cupons_por_minuto': round(self.taxa_por_minuto(), 3),
+            'eta_segundos': self.eta_segundos(),
+            'decorrido_segundos': round(decorrido, 3),
+            'inicio': self.inicio_epoch,
+            'atualizado_em': time.time(),
+            'etapas': {etapa: self.percentis(etapa) for etapa in self.ETAPAS},
+        }
+    
+    def linha_status(self) -> str:
+        """
+        Gera a linha de status compacta
+        
+        Exemplo:
+            [12/100] ok=11 err=1 | 2.4 cup/min | ETA 36m40s | captcha p50=14.2s p95=31.0s | ...
+        
+        Returns:
+            Linha de status
+        """
+        total = self.total if self.total is not None else '?'
+        partes = [
+            f"[{self.processados}/{total}] ok={self.sucesso} err={self.erro}",
+            f"{self.taxa_por_minuto():.1f} cup/min",
+            f"ETA {self._formatar_duracao(self.eta_segundos())}",
+        ]
+        
+        for etapa in self.ETAPAS:
+            p = self.percentis(etapa)
+            if p['p50'] is not None:
+                partes.append(f"{etapa} p50={p['p50']:.1f}s p95={p['p95']:.1f}s")
+        
+        return " | ".join(partes)
+    
+    @staticmethod
+    def _formatar_duracao(segundos: Optional[float]) -> str:
+        """Formata segundos como '1h02m', '3m05s' ou '42s'"""
+        if segundos is None:
+            return "--"
+        
+        segundos = int(segundos)
+        horas, resto = divmod(segundos, 3600)
+        minutos, segs = divmod(resto, 60)
+        
+        if horas:
+            return f"{horas}h{minutos:02d}m"
+        if minutos:
+            return f"{minutos}m{segs:02d}s"
+        return f"{segs}s"
+    
+    def salvar_arquivo(self, forcar: bool = False):
+        """
+        Grava o arquivo de progresso (respeitando o intervalo mínimo)
+        
+        Args:
+            forcar: Se True, grava mesmo antes do intervalo mínimo
+        """
+        if not self.arquivo:
+            return
+        
+        agora = time.monotonic()
+        
+        if (
+            not forcar
+            and self._ultima_escrita is not None
+            and agora - self._ultima_escrita < self.intervalo_escrita
+        ):
+            return
+        
+        self._ultima_escrita = agora
+        
+        try:
+            self.arquivo.parent.mkdir(exist_ok=True, parents=True)
+            temporario = self.arquivo.with_name(self.arquivo.name + '.tmp')
+            
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False)
+            
+            os.replace(temporario, self.arquivo)
+        
+        except OSError as e:
+            # Monitoramento nunca deve interromper o lote
+            print(f"AVISO: Não foi possível gravar progresso: {str(e)}")
+    
+    def finalizar(self):
+        """Grava o estado final do lote, ignorando o intervalo mínimo"""
+        self.salvar_arquivo(forcar=True)
@@ -0,0 +1,352 @@
+"""
+Serviço de leitura em lote de QR Codes (pastas com milhares de imagens)
+"""
+import glob
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from src.config import settings
+from src.repositories.qrcode_cache_repository import QRCodeCacheRepository
+from src.services.preprocessamento_service import PreprocessadorQR
+from src.services.qrcode_service import (
+    STATUS_ERRO,
+    STATUS_OK,
+    STATUS_SEM_CHAVE,
+    STATUS_SEM_QRCODE,
+    QRCodeService,
+)
+
+
+# Chave já lida em outra imagem do mesmo lote
+STATUS_DUPLICADA = 'duplicada'
+
+
+@dataclass
+class LeituraQR:
+    """
+    Resultado da leitura de uma imagem (ou de uma chave, em folhas com vários cupons)
+    
+    Attributes:
+        caminho: Imagem lida
+        chave: Chave de acesso (None se não encontrada)
+        status: STATUS_OK, STATUS_DUPLICADA ou o status de
+            QRCodeService.decodificar_imagem
+        transformacao: Transformação do PreprocessadorQR que leu o QR Code
+        duracao: Tempo de leitura da imagem (segundos)
+        pagina: Página do PDF ou quadro do TIFF em que a chave foi lida
+        caixa: (esquerda, topo, largura, altura) do QR Code na página
+            (só na leitura de todos os QR Codes)
+        cache: 'conteudo' ou 'phash' se a leitura veio do cache
+    """
+    caminho: Path
+    chave: Optional[str]
+    status: str
+    transformacao: Optional[str] = None
+    duracao: float = 0.0
+    pagina: Optional[int] = None
+    caixa: Optional[Tuple[int, int, int, int]] = None
+    cache: Optional[str] = None
+
+
+# Cache aberto em cada processo do pool (uma conexão por processo e arquivo)
+_caches: Dict[Tuple[str, bool], QRCodeCacheRepository] = {}
+
+
+def _cache_do_processo(caminho: Optional[str], phash: bool) -> Optional[QRCodeCacheRepository]:
+    if caminho is None:
+        return None
+    if (caminho, phash) not in _caches:
+        _caches[caminho, phash] = QRCodeCacheRepository(caminho, phash=phash)
+    return _caches[caminho, phash]
+
+
+def _resumo_leitura(preprocessador: PreprocessadorQR, cache: Optional[QRCodeCacheRepository]) -> tuple:
+    """(transformação, duração, acerto do cache) da última leitura"""
+    acerto = cache.ultimo_acerto if cache is not None else None
+    ultima = preprocessador.ultima
+    if acerto or ultima is None:
+        return None, 0.0, acerto
+    return ultima.transformacao, ultima.duracao, None
+
+
+def _ler_imagem(caminho: str, cache: Optional[str] = None, phash: bool = False) -> tuple:
+    """
+    Lê uma imagem no processo do pool (função de módulo: precisa ser serializável)
+    
+    Args:
+        caminho: Imagem
+        cache: Arquivo do QRCodeCacheRepository (None = sem cache)
+        phash: Busca no cache também por hash perceptual
+    
+    Returns:
+        (caminho, [(chave, página, caixa)], status, transformação, duração, acerto do cache)
+    """
+    preprocessador = PreprocessadorQR()
+    repositorio = _cache_do_processo(cache, phash)
+    chave, status = QRCodeService.decodificar_imagem(caminho, preprocessador=preprocessador,
+                                                     cache=repositorio)
+    
+    pagina = preprocessador.ultima.pagina if preprocessador.ultima is not None else None
+    itens = [(chave, pagina, None)] if chave else []
+    return (caminho, itens, status, *_resumo_leitura(preprocessador, repositorio))
+
+
+def _ler_todas(caminho: str, cache: Optional[str] = None, phash: bool = False) -> tuple:
+    """Como _ler_imagem, com todas as chaves da folha (QRCodeService.extrair_chaves)"""
+    preprocessador = PreprocessadorQR()
+    repositorio = _cache_do_processo(cache, phash)
+    chaves, status = QRCodeService.extrair_chaves(caminho, preprocessador=preprocessador,
+                                                  cache=repositorio)
+    
+    itens = [(item.chave, item.pagina, item.caixa) for item in chaves]
+    return (caminho, itens, status, *_resumo_leitura(preprocessador, repositorio))
+
+
+def _leitura_com_erro(caminho: str, erro: Exception) -> tuple:
+    """Resultado de uma imagem cuja leitura falhou (no formato de _ler_imagem)"""
+    print(f"ERRO: Falha ao ler {Path(caminho).name}: {erro}")
+    return (caminho, [], STATUS_ERRO, None, 0.0, None)
+
+
+def listar_imagens(origem: Union[str, Path], recursivo: bool = True) -> Iterator[Path]:
+    """
+    Lista as imagens suportadas de uma pasta, padrão glob ou arquivo
+    
+    Args:
+        origem: Pasta (ex: "fotos/"), padrão glob (ex: "fotos/**/*.jpg")
+            ou caminho de uma imagem
+        recursivo: Em pastas, inclui as subpastas
+    
+    Yields:
+        Caminhos das imagens, em ordem alfabética por pasta
+    """
+    formatos = QRCodeService.FORMATOS_SUPORTADOS
+    caminho = Path(origem)
+    
+    if caminho.is_dir():
+        for raiz, pastas, arquivos in os.walk(caminho):
+            pastas.sort()
+            if not recursivo:
+                pastas.clear()
+            for nome in sorted(arquivos):
+                if Path(nome).suffix.lower() in formatos:
+                    yield Path(raiz) / nome
+    elif caminho.is_file():
+        yield caminho
+    else:
+        for nome in sorted(glob.iglob(str(origem), recursive=True)):
+            if Path(nome).suffix.lower() in formatos:
+                yield Path(nome)
+
+
+class QRCodeLoteService:
+    """
+    Decodifica os QR Codes de muitas imagens em paralelo
+    
+    A decodificação (pyzbar) ocupa a CPU e segura o GIL: cada imagem é
+    lida em um processo do pool, que carrega a própria instância da
+    zbar. As imagens são enviadas aos poucos (no máximo `janela` por
+    processo em andamento) e os resultados chegam na ordem em que ficam
+    prontos: a memória não depende do tamanho da pasta e o scraping pode
+    começar pelo primeiro cupom lido.
+    
+    Chaves repetidas (o mesmo cupom fotografado duas vezes) são
+    informadas como STATUS_DUPLICADA e não voltam em chaves().
+    
+    Com todas=True, cada arquivo pode ter vários cupons (folhas A4
+    digitalizadas, TIFF com vários quadros, PDF): cada chave vem em uma
+    LeituraQR própria, com página e posição do QR Code.
+    
+    Com o cache (QRCodeCacheRepository), imagens já lidas em outras
+    execuções são reconhecidas pelo conteúdo e não são decodificadas de novo.
+    """
+    
+    def __init__(
+        self,
+        processos: Optional[int] = None,
+        janela: int = 4,
+        todas: bool = False,
+        cache: Union[bool, str, Path, None] = None,
+        phash: Optional[bool] = None
+    ):
+        """
+        Args:
+            processos: Processos do pool (padrão: settings.QR_DECODE_WORKERS;
+                0 = número de CPUs; 1 = sem pool, no próprio processo)
+            janela: Imagens pendentes por processo
+            todas: Lê todos os QR Codes de cada arquivo (em vez de um por imagem)
+            cache: True (settings.QR_CACHE_PATH), False ou arquivo do cache
+                (padrão: settings.QR_CACHE_ENABLED)
+            phash: Busca no cache também por hash perceptual (padrão: settings.QR_CACHE_PHASH)
+        """
+        if processos is None:
+            processos = settings.QR_DECODE_WORKERS
+        self.processos = processos or os.cpu_count() or 1
+        self.janela = max(janela, 1)
+        self._ler = _ler_todas if todas else _ler_imagem
+        
+        if cache is None:
+            cache = settings.QR_CACHE_ENABLED
+        if cache is True:
+            cache = settings.QR_CACHE_PATH
+        self.cache = str(cache) if cache else None
+        self.phash = settings.QR_CACHE_PHASH if phash is None else phash
+        self.acertos_cache: Counter = Counter()
+        
+        self.imagens = 0
+        self.contagem: Counter = Counter()
+        self.duracao = 0.0
+        
+        # Tempo e transformação de cada imagem, somados dos processos do pool
+        self.preprocessamento = PreprocessadorQR()
+        self._chaves_lidas = set()
+    
+    def _leituras(self, caminhos: Iterable[Path]) -> Iterator[tuple]:
+        """
+        Resultados brutos, do próprio processo ou do pool
+        
+        Uma imagem que falha (erro do cache, processo do pool derrubado
+        pela zbar) vira STATUS_ERRO sem interromper o lote. Se o pool
+        quebrar, as imagens em andamento nele voltam como erro e um novo
+        pool recebe as seguintes.
+        """
+        if self.processos == 1:
+            for caminho in caminhos:
+                try:
+                    resultado = self._ler(str(caminho), self.cache, self.phash)
+                except Exception as e:
+                    resultado = _leitura_com_erro(str(caminho), e)
+                yield resultado
+            return
+        
+        limite = self.processos * self.janela
+        executor = ProcessPoolExecutor(max_workers=self.processos)
+        pendentes: Dict[Future, str] = {}
+        
+        try:
+            for caminho in map(str, caminhos):
+                try:
+                    futuro = executor.submit(self._ler, caminho, self.cache, self.phash)
+                except BrokenProcessPool:
+                    executor.shutdown(wait=False)
+                    executor = ProcessPoolExecutor(max_workers=self.processos)
+                    futuro = executor.submit(self._ler, caminho, self.cache, self.phash)
+                
+                pendentes[futuro] = caminho
+                if len(pendentes) >= limite:
+                    yield from self._prontos(pendentes)
+            
+            while pendentes:
+                yield from self._prontos(pendentes)
+        finally:
+            # Interrompido pelo chamador (break): descarta as imagens ainda na fila
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    @staticmethod
+    def _prontos(pendentes: Dict[Future, str]) -> Iterator[tuple]:
+        """Espera ao menos uma leitura do pool e retira de `pendentes` as que terminaram"""
+        prontos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+        
+        for futuro in prontos:
+            caminho = pendentes.pop(futuro)
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                resultado = _leitura_com_erro(caminho, e)
+            yield resultado
+    
+    def decodificar(self, origem: Union[str, Path, Iterable[Path]]) -> Iterator[LeituraQR]:
+        """
+        Lê todas as imagens da origem
+        
+        Args:
+            origem: Pasta, padrão glob, arquivo ou iterável de caminhos
+        
+        Yields:
+            LeituraQR de cada imagem (de cada chave, com todas=True), na
+            ordem em que ficam prontas
+        """
+        if isinstance(origem, (str, Path)):
+            origem = listar_imagens(origem)
+        
+        leituras = self._leituras(origem)
+        try:
+            while True:
+                # Só o tempo esperando as leituras (não o de quem consome)
+                inicio = time.perf_counter()
+                try:
+                    caminho, itens, status, transformacao, duracao, acerto = next(leituras)
+                except StopIteration:
+                    return
+                finally:
+                    self.duracao += time.perf_counter() - inicio
+                
+                self.imagens += 1
+                if acerto:
+                    self.acertos_cache[acerto] += 1
+                elif status != STATUS_ERRO:
+                    self.preprocessamento.registrar(transformacao, duracao)
+                
+                if not itens:
+                    self.contagem[status] += 1
+                    yield LeituraQR(Path(caminho), None, status, transformacao, duracao, cache=acerto)
+                    continue
+                
+                for chave, pagina, caixa in itens:
+                    if chave in self._chaves_lidas:
+                        status = STATUS_DUPLICADA
+                    else:
+                        status = STATUS_OK
+                        self._chaves_lidas.add(chave)
+                    
+                    self.contagem[status] += 1
+                    yield LeituraQR(Path(caminho), chave, status, transformacao, duracao, pagina, caixa, acerto)
+        finally:
+            leituras.close()
+    
+    def chaves(self, origem: Union[str, Path, Iterable[Path]]) -> Iterator[str]:
+        """
+        Chaves distintas lidas da origem (entrada de processar_cupons_stream)
+        
+        Yields:
+            Chaves de acesso, sem repetição
+        """
+        for leitura in self.decodificar(origem):
+            if leitura.status == STATUS_OK:
+                yield leitura.chave
+    
+    def metricas(self) -> dict:
+        """
+        Métricas das leituras feitas até agora
+        
+        Returns:
+            Dicionário com imagens (arquivos lidos), imagens_por_segundo,
+            a contagem de cada status (ok e duplicada por chave; sem_qrcode,
+            sem_chave e erro por arquivo),
+            cache (imagens encontradas no cache, por 'conteudo' e 'phash') e
+            preprocessamento (PreprocessadorQR.metricas das imagens
+            decodificadas: tempo por imagem, taxa de sucesso e transformações usadas)
+        """
+        return {
+            'imagens': self.imagens,
+            'imagens_por_segundo': round(self.imagens / self.duracao, 1) if self.duracao else 0.0,
+            **self.contagem,
+            'cache': dict(self.acertos_cache),
+            'preprocessamento': self.preprocessamento.metricas(),
+        }
+    
+    def resumo(self) -> str:
+        """Linha de resumo para o console"""
+        metricas = self.metricas()
+        return (f"{metricas['imagens']} imagens ({metricas['imagens_por_segundo']}/s): "
+                f"{self.contagem[STATUS_OK]} chaves, "
+                f"{self.contagem[STATUS_DUPLICADA]} duplicadas, "
+                f"{sum(self.contagem[status] for status in (STATUS_SEM_QRCODE, STATUS_SEM_CHAVE, STATUS_ERRO))} "
+                f"imagens sem chave"
+                + (f", {sum(self.acertos_cache.values())} do cache" if self.acertos_cache else ""))
\ No newline at end of file
@@ -1,13 +1,46 @@
 """
 Serviço para leitura de QR Codes de cupons fiscais SAT
 """
-from pyzbar import pyzbar
-from PIL import Image
-from typing import Optional
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
 from pathlib import Path
 import re
 
 from src.config import settings
+from src.repositories.qrcode_cache_repository import QRCodeCacheRepository, sha256_arquivo
+from src.services.preprocessamento_service import PreprocessadorQR, dhash
+
+
+# Resultado da leitura de uma imagem (decodificar_imagem)
+STATUS_OK = 'ok'
+STATUS_SEM_QRCODE = 'sem_qrcode'
+STATUS_SEM_CHAVE = 'sem_chave'
+STATUS_ERRO = 'erro'
+
+# Modos de leitura guardados no cache (uma chave por imagem ou todas da folha)
+MODO_UMA = 'uma'
+MODO_TODAS = 'todas'
+
+
+def _ordem_de_leitura(simbolo) -> tuple:
+    """Página, depois de cima para baixo e da esquerda para a direita"""
+    return (simbolo.pagina, *(simbolo.caixa[1::-1] if simbolo.caixa else (0, 0)))
+
+
+@dataclass
+class ChaveQR:
+    """
+    Chave de acesso encontrada em uma folha digitalizada (extrair_chaves)
+    
+    Attributes:
+        chave: Chave de acesso (44 dígitos)
+        pagina: Página do PDF ou quadro do TIFF (1 em imagens simples)
+        caixa: (esquerda, topo, largura, altura) do QR Code, em pixels da
+            página (None se a leitura não informar a posição)
+    """
+    chave: str
+    pagina: int
+    caixa: Optional[Tuple[int, int, int, int]] = None
 
 
 class QRCodeService:
@@ -15,14 +48,16 @@ class QRCodeService:
     Serviço para decodificar QR Codes de cupons fiscais
     
     Suporta:
-    - Leitura de QR Code de imagens (PNG, JPG, JPEG, BMP)
+    - Leitura de QR Code de imagens (PNG, JPG, JPEG, BMP, GIF, TIFF)
+    - PDF digitalizado (requer PyMuPDF ou pdf2image)
     - Chave de acesso digitada manualmente
     
-    Cada imagem deve conter apenas um QR Code de cupom fiscal
+    extrair_chave_acesso lê um cupom por imagem; extrair_chaves lê todos
+    os cupons de folhas digitalizadas (vários QR Codes por página).
     """
     
     # Formatos de imagem suportados
-    FORMATOS_SUPORTADOS = {'.png', '.jpg', '.jpeg', '.bmp', '.gif'}
+    FORMATOS_SUPORTADOS = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff', '.pdf'}
     
     @staticmethod
     def processar_entrada(entrada: str) -> Optional[str]:
@@ -72,12 +107,17 @@ class QRCodeService:
         return chave_limpa
     
     @staticmethod
-    def extrair_chave_acesso(caminho_imagem: str) -> Optional[str]:
+    def extrair_chave_acesso(
+        caminho_imagem: str,
+        cache: Optional[QRCodeCacheRepository] = None
+    ) -> Optional[str]:
         """
         Extrai a chave de acesso de um QR Code de cupom fiscal
         
         Args:
             caminho_imagem: Caminho para a imagem do QR Code
+            cache: Leituras já feitas (padrão: QRCodeCacheRepository de
+                settings.QR_CACHE_PATH se QR_CACHE_ENABLED)
         
         Returns:
             Chave de acesso (44 dígitos) ou None se não encontrada
@@ -99,52 +139,256 @@ class QRCodeService:
                 f"Use: {', '.join(QRCodeService.FORMATOS_SUPORTADOS)}"
             )
         
+        preprocessador = PreprocessadorQR()
+        
+        def ler() -> Tuple[list, str]:
+            # Decodifica o QR Code (tons de cinza, reduzida e, se preciso, transformada)
+            decodificacao = preprocessador.decodificar(caminho)
+            codigos = decodificacao.codigos
+            print(f"Leitura: {decodificacao.duracao * 1000:.0f} ms, "
+                  f"{decodificacao.tentativas} tentativa(s)"
+                  + (f" ({decodificacao.transformacao})" if decodificacao.transformacao else ""))
+            
+            if not codigos:
+                print("ERRO: Nenhum QR Code encontrado na imagem")
+                print("DICA: Certifique-se de que a imagem está nítida e bem iluminada")
+                return [], STATUS_SEM_QRCODE
+            
+            # Pega o primeiro QR Code (assumimos apenas um por imagem)
+            codigo = codigos[0]
+            
+            if len(codigos) > 1:
+                print(f"AVISO: Múltiplos QR Codes encontrados ({len(codigos)}). Usando o primeiro.")
+            
+            try:
+                # Decodifica os dados
+                dados = codigo.data.decode('utf-8')
+                print(f"Dados extraídos: {dados[:60]}{'...' if len(dados) > 60 else ''}")
+            except UnicodeDecodeError:
+                print("ERRO: Não foi possível decodificar o QR Code")
+                return [], STATUS_SEM_CHAVE
+            
+            # Extrai a chave de acesso
+            chave = QRCodeService.extrair_chave_da_url(dados)
+            
+            if not chave:
+                print("ERRO: Nenhuma chave de acesso encontrada no QR Code")
+                return [], STATUS_SEM_CHAVE
+            
+            # Valida a chave extraída
+            if not QRCodeService.validar_chave_acesso(chave):
+                print(f"ERRO: Chave inválida encontrada: {chave}")
+                return [], STATUS_SEM_CHAVE
+            
+            return [(chave, decodificacao.pagina, None)], STATUS_OK
+        
+        proprio = cache is None and settings.QR_CACHE_ENABLED
+        if proprio:
+            cache = QRCodeCacheRepository()
+        
         try:
-            # Carrega a imagem
-            with Image.open(caminho_imagem) as imagem:
-                print(f"Processando imagem: {caminho.name}")
-                
-                # Decodifica o QR Code
-                codigos = pyzbar.decode(imagem)
-                
-                if not codigos:
-                    print("ERRO: Nenhum QR Code encontrado na imagem")
-                    print("DICA: Certifique-se de que a imagem está nítida e bem iluminada")
-                    return None
-                
-                # Pega o primeiro QR Code (assumimos apenas um por imagem)
-                codigo = codigos[0]
-                
-                if len(codigos) > 1:
-                    print(f"AVISO: Múltiplos QR Codes encontrados ({len(codigos)}). Usando o primeiro.")
-                
-                try:
-                    # Decodifica os dados
-                    dados = codigo.data.decode('utf-8')
-                    print(f"Dados extraídos: {dados[:60]}{'...' if len(dados) > 60 else ''}")
-                    
-                    # Extrai a chave de acesso
-                    chave = QRCodeService.extrair_chave_da_url(dados)
-                    
-                    if chave:
-                        # Valida a chave extraída
-                        if QRCodeService.validar_chave_acesso(chave):
-                            print(f"SUCESSO: Chave de acesso extraída: {chave}")
-                            return chave
-                        else:
-                            print(f"ERRO: Chave inválida encontrada: {chave}")
-                            return None
-                    else:
-                        print("ERRO: Nenhuma chave de acesso encontrada no QR Code")
-                        return None
-                
-                except UnicodeDecodeError:
-                    print("ERRO: Não foi possível decodificar o QR Code")
-                    return None
-                
+            print(f"Processando imagem: {caminho.name}")
+            
+            if cache is None:
+                itens, status = ler()
+            else:
+                itens, status = QRCodeService._ler_com_cache(caminho, MODO_UMA, preprocessador, cache, ler)
+                if cache.ultimo_acerto:
+                    print(f"Cache: imagem já lida ({status}, por {cache.ultimo_acerto})")
+            
+            if itens:
+                print(f"SUCESSO: Chave de acesso extraída: {itens[0][0]}")
+                return itens[0][0]
+            return None
+        
         except Exception as e:
             print(f"ERRO ao processar QR Code: {str(e)}")
             raise
+        finally:
+            if proprio:
+                cache.fechar()
+    
+    @staticmethod
+    def _ler_com_cache(
+        caminho: Path,
+        modo: str,
+        preprocessador: PreprocessadorQR,
+        cache: QRCodeCacheRepository,
+        ler: Callable[[], Tuple[list, str]]
+    ) -> Tuple[list, str]:
+        """
+        Consulta o cache antes de ler o arquivo e guarda a leitura nova
+        
+        Args:
+            ler: Leitura do arquivo -> (itens, status), itens = [(chave, página, caixa)]
+        
+        A busca por hash perceptual é só uma pista: cupons da mesma loja
+        têm o mesmo leiaute. A leitura semelhante só é aproveitada se o
+        recorte do QR Code desta imagem tiver exatamente as mesmas chaves,
+        e então vale a leitura do próprio recorte (página e posição dos QR
+        Codes desta imagem, não da semelhante); senão o arquivo é lido
+        normalmente.
+        
+        Returns:
+            (itens, status) do cache ou de ler(); leituras com STATUS_ERRO
+            não são guardadas
+        """
+        sha256 = sha256_arquivo(caminho)
+        registro = cache.buscar(sha256, modo, preprocessador.configuracao)
+        
+        if registro is not None:
+            return registro
+        
+        phash = None
+        regiao = preprocessador.regiao_qr(caminho) if cache.phash else None
+        
+        if regiao is not None:
+            phash = dhash(regiao.imagem)
+            semelhante = cache.buscar_semelhante(phash, modo)
+            
+            if semelhante is not None:
+                lidas = [(QRCodeService.extrair_chave_da_url(simbolo.dados.decode('utf-8', 'replace')), simbolo)
+                         for simbolo in sorted(preprocessador.decodificar_recorte(regiao), key=_ordem_de_leitura)]
+                
+                if {chave for chave, _ in lidas} == {item[0] for item in semelhante[0]}:
+                    itens, vistas = [], set()
+                    for chave, simbolo in lidas:
+                        if chave not in vistas:
+                            vistas.add(chave)
+                            # Só o modo 'todas' informa a posição (como ler())
+                            itens.append((chave, simbolo.pagina, simbolo.caixa if modo == MODO_TODAS else None))
+                    
+                    status = semelhante[1]
+                    cache.salvar(sha256, modo, preprocessador.configuracao, status, itens, phash)
+                    cache.registrar_acerto('phash')
+                    return itens, status
+        
+        itens, status = ler()
+        if status != STATUS_ERRO:
+            cache.salvar(sha256, modo, preprocessador.configuracao, status, itens, phash)
+        return itens, status
+    
+    @staticmethod
+    def decodificar_imagem(
+        caminho_imagem,
+        preprocessador: Optional[PreprocessadorQR] = None,
+        cache: Optional[QRCodeCacheRepository] = None
+    ) -> Tuple[Optional[str], str]:
+        """
+        Lê a chave de acesso de uma imagem sem mensagens no console
+        
+        Usado na leitura em lote (cada imagem em um processo), onde o
+        resultado é informado pelo status em vez de print/exceção.
+        
+        Args:
+            caminho_imagem: Caminho para a imagem do QR Code
+            preprocessador: PreprocessadorQR que lê a imagem e acumula as
+                métricas (padrão: um novo, com as configurações de settings)
+            cache: Leituras já feitas (a imagem só é lida se não estiver nele)
+        
+        Returns:
+            Tupla (chave, status):
+            - STATUS_OK: chave válida do primeiro QR Code que contém uma
+            - STATUS_SEM_QRCODE: nenhum QR Code encontrado
+            - STATUS_SEM_CHAVE: QR Code sem chave de acesso válida
+            - STATUS_ERRO: arquivo inexistente, ilegível ou formato não suportado
+        """
+        caminho = Path(caminho_imagem)
+        if cache is not None:
+            cache.ultimo_acerto = None
+        
+        if caminho.suffix.lower() not in QRCodeService.FORMATOS_SUPORTADOS or not caminho.is_file():
+            return None, STATUS_ERRO
+        
+        preprocessador = preprocessador or PreprocessadorQR()
+        
+        def ler() -> Tuple[list, str]:
+            try:
+                decodificacao = preprocessador.decodificar(caminho)
+            except Exception:
+                return [], STATUS_ERRO
+            
+            if not decodificacao.codigos:
+                return [], STATUS_SEM_QRCODE
+            
+            for codigo in decodificacao.codigos:
+                chave = QRCodeService.extrair_chave_da_url(codigo.data.decode('utf-8', 'replace'))
+                if QRCodeService.validar_chave_acesso(chave):
+                    return [(chave, decodificacao.pagina, None)], STATUS_OK
+            
+            return [], STATUS_SEM_CHAVE
+        
+        try:
+            if cache is None:
+                itens, status = ler()
+            else:
+                itens, status = QRCodeService._ler_com_cache(caminho, MODO_UMA, preprocessador, cache, ler)
+        except Exception:
+            return None, STATUS_ERRO
+        
+        return (itens[0][0] if itens else None), status
+    
+    @staticmethod
+    def extrair_chaves(
+        caminho_imagem,
+        preprocessador: Optional[PreprocessadorQR] = None,
+        cache: Optional[QRCodeCacheRepository] = None
+    ) -> Tuple[List[ChaveQR], str]:
+        """
+        Lê todas as chaves de acesso de uma folha digitalizada
+        
+        Cada página (imagem, quadro do TIFF ou página do PDF) pode ter
+        vários cupons. Chaves repetidas no mesmo arquivo aparecem uma vez,
+        na primeira posição encontrada.
+        
+        Args:
+            caminho_imagem: Imagem, TIFF com vários quadros ou PDF
+            preprocessador: PreprocessadorQR que lê o arquivo e acumula as
+                métricas (padrão: um novo, com as configurações de settings)
+            cache: Leituras já feitas (o arquivo só é lido se não estiver nele)
+        
+        Returns:
+            Tupla (chaves, status): lista de ChaveQR em ordem de página e
+            o status do arquivo (STATUS_OK se houver ao menos uma chave)
+        """
+        caminho = Path(caminho_imagem)
+        if cache is not None:
+            cache.ultimo_acerto = None
+        
+        if caminho.suffix.lower() not in QRCodeService.FORMATOS_SUPORTADOS or not caminho.is_file():
+            return [], STATUS_ERRO
+        
+        preprocessador = preprocessador or PreprocessadorQR()
+        
+        def ler() -> Tuple[list, str]:
+            try:
+                simbolos = preprocessador.decodificar_todos(caminho).codigos
+            except Exception:
+                return [], STATUS_ERRO
+            
+            if not simbolos:
+                return [], STATUS_SEM_QRCODE
+            
+            simbolos = sorted(simbolos, key=_ordem_de_leitura)
+            
+            itens, vistas = [], set()
+            for simbolo in simbolos:
+                chave = QRCodeService.extrair_chave_da_url(simbolo.dados.decode('utf-8', 'replace'))
+                if QRCodeService.validar_chave_acesso(chave) and chave not in vistas:
+                    vistas.add(chave)
+                    itens.append((chave, simbolo.pagina, simbolo.caixa))
+            
+            return itens, STATUS_OK if itens else STATUS_SEM_CHAVE
+        
+        try:
+            if cache is None:
+                itens, status = ler()
+            else:
+                itens, status = QRCodeService._ler_com_cache(caminho, MODO_TODAS, preprocessador, cache, ler)
+        except Exception:
+            return [], STATUS_ERRO
+        
+        return [ChaveQR(*item) for item in itens], status
     
     @staticmethod
     def extrair_chave_da_url(url: str) -> Optional[str]:
@@ -0,0 +1,320 @@
+"""
+Serviço de saída: envia cada cupom para vários destinos (CSV, Parquet, SQLite...)
+"""
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.config import settings
+from src.models.cupom_completo import CupomCompleto
+from src.repositories.csv_repository import CSVRepository
+from src.repositories.excel_repository import ExcelRepository
+from src.repositories.gtin_repository import GTINRepository
+from src.repositories.jsonl_repository import JSONLRepository
+from src.repositories.parquet_repository import ParquetRepository
+from src.repositories.sqlite_repository import SQLiteRepository
+from src.repositories.xml_repository import XMLRepository
+from src.services.persistencia_service import PersistenciaAssincrona
+
+
+class Destino(ABC):
+    """
+    Destino de saída dos cupons
+    
+    Cada destino é usado por uma única thread de escrita (a do seu canal
+    no DistribuidorSaidas), do primeiro salvar() até fechar().
+    
+    Destinos com buffer informam em `pendentes` quantos dos últimos
+    cupons salvos ainda não chegaram ao arquivo/banco; o canal só
+    resolve o Future desses cupons depois de um flush (sincronizar).
+    """
+    
+    def __init__(self, nome: str):
+        """
+        Args:
+            nome: Identificador do destino (chave das métricas)
+        """
+        self.nome = nome
+    
+    @abstractmethod
+    def salvar(self, cupom: CupomCompleto, nome_arquivo: Optional[str] = None) -> Optional[Path]:
+        """Grava (ou acumula) um cupom; retorna o arquivo de destino"""
+    
+    @property
+    def pendentes(self) -> int:
+        """Últimos cupons salvos que ainda estão só em buffer"""
+        return 0
+    
+    def sincronizar(self):
+        """Grava o que estiver em buffer (pendentes passa a ser 0)"""
+    
+    def retirar_falhas(self) -> List[Tuple[CupomCompleto, Exception]]:
+        """Cupons já aceitos que o destino descartou ao gravar o buffer"""
+        return []
+    
+    def fechar(self):
+        """Grava o que estiver pendente e libera arquivos/conexões"""
+
+
+class DestinoRepositorio(Destino):
+    """
+    Destino que grava cada cupom com repositorio.salvar()
+    
+    Para repositórios que geram um arquivo por cupom (ex: CSVRepository).
+    """
+    
+    def __init__(self, nome: str, repositorio):
+        """
+        Args:
+            nome: Identificador do destino
+            repositorio: Objeto com salvar(cupom, nome_arquivo) -> Path
+        """
+        super().__init__(nome)
+        self.repositorio = repositorio
+    
+    def salvar(self, cupom: CupomCompleto, nome_arquivo: Optional[str] = None) -> Optional[Path]:
+        return self.repositorio.salvar(cupom, nome_arquivo=nome_arquivo)
+
+
+class DestinoLote(Destino):
+    """
+    Destino que acrescenta todos os cupons a um escritor de lote
+    
+    O escritor (ex: ParquetLoteWriter, SQLiteRepository) só é criado no
+    primeiro cupom, já na thread de escrita: conexões SQLite, por
+    exemplo, só podem ser usadas pela thread que as criou.
+    
+    Escritores sem flush (ExcelLoteWriter, que só monta o .xlsx ao
+    fechar) são fechados em sincronizar(); o próximo cupom abre um novo
+    arquivo de lote.
+    """
+    
+    def __init__(self, nome: str, abrir: Callable[[], object]):
+        """
+        Args:
+            nome: Identificador do destino
+            abrir: Função sem argumentos que retorna o escritor
+                (objeto com adicionar(cupom) e fechar())
+        """
+        super().__init__(nome)
+        self._abrir = abrir
+        self._escritor = None
+        self._adicionados = 0
+    
+    def salvar(self, cupom: CupomCompleto, nome_arquivo: Optional[str] = None) -> Optional[Path]:
+        # nome_arquivo não se aplica: todos os cupons vão para o mesmo lote
+        if self._escritor is None:
+            self._escritor = self._abrir()
+            self._adicionados = 0
+        caminho = self._escritor.adicionar(cupom)
+        self._adicionados += 1
+        return caminho
+    
+    @property
+    def pendentes(self) -> int:
+        if self._escritor is None:
+            return 0
+        # Sem flush, nada do arquivo aberto está gravado até fechar()
+        return getattr(self._escritor, 'pendentes', self._adicionados)
+    
+    def sincronizar(self):
+        if self._escritor is None:
+            return
+        if hasattr(self._escritor, 'flush'):
+            self._escritor.flush()
+        else:
+            self.fechar()
+    
+    def retirar_falhas(self) -> List[Tuple[CupomCompleto, Exception]]:
+        retirar = getattr(self._escritor, 'retirar_falhas', None)
+        return retirar() if retirar else []
+    
+    def fechar(self):
+        if self._escritor is not None:
+            escritor, self._escritor = self._escritor, None
+            escritor.fechar()
+
+
+def _nome_lote() -> str:
+    """Nome base dos arquivos de lote de uma execução"""
+    return f"lote_{datetime.now().strftime(settings.DATETIME_FORMAT)}"
+
+
+def _destino_csv(diretorio: Optional[Path]) -> Destino:
+    return DestinoRepositorio('csv', CSVRepository(diretorio=diretorio))
+
+
+def _destino_csv_lote(diretorio: Optional[Path]) -> Destino:
+    repositorio = CSVRepository(diretorio=diretorio)
+    return DestinoLote('csv_lote', lambda: repositorio.abrir_lote(_nome_lote()))
+
+
+def _destino_parquet(diretorio: Optional[Path]) -> Destino:
+    repositorio = ParquetRepository(diretorio=diretorio)
+    return DestinoLote('parquet', lambda: repositorio.abrir_lote(_nome_lote()))
+
+
+def _destino_sqlite(diretorio: Optional[Path]) -> Destino:
+    caminho = diretorio / settings.SQLITE_DB_PATH.name if diretorio else None
+    return DestinoLote('sqlite', lambda: SQLiteRepository(caminho))
+
+
+def _destino_gtin(diretorio: Optional[Path]) -> Destino:
+    caminho = diretorio / settings.GTIN_INDEX_PATH.name if diretorio else None
+    return DestinoLote('gtin', lambda: GTINRepository(caminho))
+
+
+def _destino_jsonl(diretorio: Optional[Path]) -> Destino:
+    repositorio = JSONLRepository(diretorio=diretorio)
+    return DestinoLote('jsonl', repositorio.abrir_lote)
+
+
+def _destino_xml(diretorio: Optional[Path]) -> Destino:
+    repositorio = XMLRepository(diretorio=diretorio)
+    return DestinoLote('xml', lambda: repositorio.abrir_lote(_nome_lote()))
+
+
+def _destino_excel(diretorio: Optional[Path]) -> Destino:
+    repositorio = ExcelRepository(diretorio=diretorio)
+    return DestinoLote('excel', lambda: repositorio.abrir_lote(_nome_lote()))
+
+
+# Destinos disponíveis em settings.OUTPUT_SINKS
+DESTINOS = {
+    'csv': _destino_csv,
+    'csv_lote': _destino_csv_lote,
+    'parquet': _destino_parquet,
+    'sqlite': _destino_sqlite,
+    'gtin': _destino_gtin,
+    'jsonl': _destino_jsonl,
+    'xml': _destino_xml,
+    'excel': _destino_excel,
+}
+
+
+def criar_destinos(nomes: Iterable[str], diretorio: Optional[Path] = None) -> List[Destino]:
+    """
+    Cria destinos a partir dos nomes (ex: settings.OUTPUT_SINKS)
+    
+    Args:
+        nomes: Nomes de DESTINOS (ex: ['csv', 'parquet', 'sqlite'])
+        diretorio: Diretório de saída (padrão: settings.OUTPUT_DIR)
+    
+    Returns:
+        Lista de destinos, na ordem dos nomes
+    
+    Raises:
+        ValueError: Se algum nome não for suportado
+    """
+    destinos = []
+    
+    for nome in nomes:
+        nome = nome.strip().lower()
+        if not nome:
+            continue
+        if nome not in DESTINOS:
+            raise ValueError(f"Destino não suportado: {nome}. Use: {', '.join(DESTINOS)}")
+        destinos.append(DESTINOS[nome](diretorio))
+    
+    return destinos
+
+
+class DistribuidorSaidas:
+    """
+    Envia cada cupom, uma única vez, para vários destinos
+    
+    Cada destino tem seu próprio canal (PersistenciaAssincrona): fila
+    limitada e thread de escrita. Assim:
+    - o scraping só enfileira o cupom; um destino lento não atrasa os
+      outros nem o scraping, até a fila dele encher
+    - o erro de um destino fica nas métricas/Future dele, sem afetar os
+      demais
+    - cada destino acumula à sua maneira (row groups do Parquet,
+      transações do SQLite, commit em grupo dos CSVs atômicos)
+    """
+    
+    def __init__(
+        self,
+        destinos: Iterable[Destino],
+        tamanho_fila: Optional[int] = None,
+        tamanho_lote: Optional[int] = None
+    ):
+        """
+        Inicia um canal por destino
+        
+        Args:
+            destinos: Destinos de saída (nomes únicos)
+            tamanho_fila: Cupons aguardando por destino
+                (padrão: settings.WRITE_BEHIND_QUEUE_SIZE)
+            tamanho_lote: Cupons por commit em grupo
+                (padrão: settings.WRITE_BEHIND_BATCH_SIZE)
+        
+        Raises:
+            ValueError: Se não houver destinos ou se algum nome se repetir
+        """
+        destinos = list(destinos)
+        nomes = [destino.nome for destino in destinos]
+        
+        if not destinos:
+            raise ValueError("Informe ao menos um destino de saída")
+        if len(set(nomes)) != len(nomes):
+            raise ValueError(f"Destinos com nome repetido: {', '.join(nomes)}")
+        
+        self.canais: Dict[str, PersistenciaAssincrona] = {
+            destino.nome: PersistenciaAssincrona(
+                destino,
+                tamanho_fila=tamanho_fila,
+                tamanho_lote=tamanho_lote,
+                fechar_repositorio=True
+            )
+            for destino in destinos
+        }
+    
+    def enviar(self, cupom: CupomCompleto, nome_arquivo: Optional[str] = None) -> Dict[str, Future]:
+        """
+        Enfileira o cupom em todos os destinos
+        
+        Args:
+            cupom: Objeto CupomCompleto
+            nome_arquivo: Nome customizado (usado pelos destinos de arquivo por cupom)
+        
+        Returns:
+            Future de cada destino, com o Path gravado ou a exceção
+        """
+        return {nome: canal.salvar(cupom, nome_arquivo) for nome, canal in self.canais.items()}
+    
+    def aguardar(self):
+        """Bloqueia até todos os destinos gravarem o que foi enviado"""
+        for canal in self.canais.values():
+            canal.aguardar()
+    
+    def sincronizar(self) -> Dict[str, Future]:
+        """
+        Pede um flush a todos os destinos
+        
+        Returns:
+            Future de cada destino, resolvido depois do flush; os cupons
+            enviados antes já têm seus Futures resolvidos
+        """
+        return {nome: canal.sincronizar() for nome, canal in self.canais.items()}
+    
+    def metricas(self) -> Dict[str, dict]:
+        """Métricas de cada destino (ver PersistenciaAssincrona.metricas)"""
+        return {nome: canal.metricas() for nome, canal in self.canais.items()}
+    
+    def fechar(self):
+        """Drena as filas, fecha os destinos e exibe o resumo de cada um"""
+        for canal in self.canais.values():
+            canal.fechar()
+        
+        for nome, metricas in self.metricas().items():
+            print(f"SAÍDA {nome}: {metricas['salvos']} salvos, {metricas['erros']} erros, "
+                  f"{metricas['ms_por_cupom'] or 0} ms/cupom")
+    
+    def __enter__(self) -> 'DistribuidorSaidas':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.fechar()
\ No newline at end of file
@@ -17,6 +17,8 @@ from src.models.consumidor import Consumidor
 from src.models.cupom import Cupom
 from src.models.local_entrega import LocalEntrega
 from src.models.cupom_completo import CupomCompleto
+from src.utils.gtin import SEM_GTIN, gtin_valido
+from src.utils.textos import CAMPOS_EMITENTE, CAMPOS_LOCAL_ENTREGA, PoolTextos
 
 
 class WebScraperService:
@@ -34,16 +36,24 @@ class WebScraperService:
     Suporta navegadores: Chrome e Firefox
     """
     
-    def __init__(self, headless: bool = False):
+    def __init__(self, headless: bool = False, textos: Optional[PoolTextos] = None):
         """
         Inicializa o serviço de web scraping
         
         Args:
             headless: Se True, executa o navegador sem interface gráfica
+            textos: Pool de textos repetidos compartilhado pelo lote
+                (padrão: um pool novo para este serviço)
         """
         self.headless = headless
         self.driver = None
         self.wait = None
+        
+        # Emitente, NCM e descrição se repetem entre cupons: uma cópia de cada
+        self.textos = textos if textos is not None else PoolTextos()
+        
+        # Tempo gasto em cada etapa da última extração (segundos)
+        self.tempos_etapas = {}
     
     def iniciar_navegador(self):
         """Inicia o navegador Chrome com as configurações necessárias"""
@@ -266,6 +276,8 @@ class WebScraperService:
                 except:
                     pass
             
+            self.textos.internar_campos(emitente, CAMPOS_EMITENTE)
+            
             print(f"SUCESSO: Dados do emitente extraídos - {emitente.nome}")
             return emitente
             
@@ -571,6 +583,7 @@ class WebScraperService:
                     pass
             
             if local.esta_presente():
+                self.textos.internar_campos(local, CAMPOS_LOCAL_ENTREGA)
                 print(f"SUCESSO: Local de entrega encontrado - {local.municipio}/{local.uf}")
                 return local
             else:
@@ -691,7 +704,7 @@ class WebScraperService:
                             f"conteudo_grvProdutosServicos_lblProdutoServicoGtin_{linha_idx}"
                         )
                         cod_gtin = gtin_element.text.strip()
-                        if not cod_gtin or cod_gtin == "Não Informado":
+                        if not cod_gtin or cod_gtin in SEM_GTIN:
                             cod_gtin = None
                     except:
                         cod_gtin = None
@@ -699,6 +712,11 @@ class WebScraperService:
                     
                     print(f"Produto {idx}: NCM={codigo_ncm}, Desc={descricao[:40]}, Qtd={quantidade}, Valor={valor_liquido}")
                     
+                    # NCM, descrição e GTIN se repetem entre cupons do lote
+                    codigo_ncm = self.textos.internar(codigo_ncm)
+                    descricao = self.textos.internar(descricao)
+                    cod_gtin = self.textos.internar(cod_gtin)
+                    
                     # Cria o objeto Produto
                     produto = Produto(
                         codigo_ncm=codigo_ncm,
@@ -713,9 +731,16 @@ class WebScraperService:
                     # Valida o produto
                     valido, erros = produto.validar()
                     
+                    # GTIN com dígito verificador errado fica como veio do portal
+                    # (o índice de GTIN o ignora): se for o único erro, mantém o item
+                    gtin_invalido = bool(cod_gtin) and not gtin_valido(cod_gtin)
+                    
                     if valido:
                         produtos.append(produto)
                         print(f"Produto {idx}: {descricao[:30]}... - OK")
+                    elif gtin_invalido and len(erros) == 1:
+                        produtos.append(produto)
+                        print(f"AVISO: Produto {idx} mantido com {erros[0]}")
                     else:
                         print(f"AVISO: Produto {idx} inválido: {erros}")
                 
@@ -743,6 +768,8 @@ class WebScraperService:
         Returns:
             CupomCompleto com todos os dados ou None em caso de erro
         """
+        self.tempos_etapas = {}
+        
         try:
             # 1. Inicia o navegador
             self.iniciar_navegador()
@@ -756,7 +783,9 @@ class WebScraperService:
                 return None
             
             # 4. PAUSA para resolver captcha
+            inicio_captcha = time.monotonic()
             self.aguardar_captcha_manual()
+            self.tempos_etapas['captcha'] = time.monotonic() - inicio_captcha
             
             # 5. Clica em Consultar
             if not self.clicar_consultar():
@@ -810,7 +839,8 @@ class WebScraperService:
                 consumidor=consumidor,
                 cupom=cupom,
                 local_entrega=local_entrega,
-                produtos=produtos
+                produtos=produtos,
+                chave_acesso=chave
             )
             
             print("\n" + "="*70)
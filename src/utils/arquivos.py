@@ -0,0 +1,366 @@
+"""
+Escrita atômica de arquivos (arquivo temporário + rename)
+"""
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Callable, Iterator, List, Optional, Tuple, TypeVar
+
+from src.config import settings
+from src.utils.compressao import abrir_escrita
+
+
+# Grupo de commit ativo na thread atual (ver commit_em_grupo)
+_contexto = threading.local()
+
+T = TypeVar('T')
+
+
+def caminho_temporario(caminho: Path) -> Path:
+    """Arquivo temporário oculto no mesmo diretório (rename atômico exige o mesmo sistema de arquivos)"""
+    return caminho.with_name(f".{caminho.name}.{uuid.uuid4().hex[:8]}.tmp")
+
+
+def caminho_reserva(caminho: Path) -> Path:
+    """Marcador oculto que reserva o nome final enquanto o arquivo é escrito"""
+    return caminho.with_name(f".{caminho.name}.reserva")
+
+
+def reservar_nome(caminho: Path) -> bool:
+    """
+    Reserva o nome final de um arquivo exclusivo
+    
+    O marcador é criado com O_EXCL: entre vários escritores (threads ou
+    processos) apenas um consegue reservar o mesmo nome.
+    
+    Returns:
+        False se o nome já existir ou já estiver reservado
+    """
+    if caminho.exists():
+        return False
+    
+    try:
+        os.close(os.open(caminho_reserva(caminho), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return False
+    
+    # Criado por quem não reserva (ex: lote CSV) entre a verificação e o marcador
+    if caminho.exists():
+        liberar_nome(caminho)
+        return False
+    
+    return True
+
+
+def liberar_nome(caminho: Path):
+    """Remove a reserva do nome"""
+    caminho_reserva(caminho).unlink(missing_ok=True)
+
+
+def nome_reservado(caminho: Path) -> bool:
+    """Se o nome está reservado por um arquivo atômico ainda não publicado"""
+    return caminho_reserva(caminho).exists()
+
+
+def nome_com_sufixo(caminho: Path, sufixo: int) -> Path:
+    """Mesmo nome com _<sufixo> antes das extensões (saida.csv.gz -> saida_2.csv.gz)"""
+    nome, ponto, extensoes = caminho.name.partition('.')
+    return caminho.with_name(f"{nome}_{sufixo}{ponto}{extensoes}")
+
+
+def criar_com_nome_livre(caminho: Path, criar: Callable[[Path], T]) -> T:
+    """
+    Cria um arquivo no primeiro nome livre: caminho, caminho_2, caminho_3...
+    
+    Os nomes reservados por arquivos atômicos ainda não publicados são
+    pulados. `criar` deve falhar com FileExistsError se o nome já existir
+    (modo 'x' ou reservar_nome): outro escritor pode ocupá-lo entre a
+    verificação e a criação.
+    
+    Args:
+        caminho: Nome desejado
+        criar: Cria o arquivo no nome recebido
+    
+    Returns:
+        O retorno de `criar`
+    """
+    sufixo = 1
+    
+    while True:
+        candidato = caminho if sufixo == 1 else nome_com_sufixo(caminho, sufixo)
+        sufixo += 1
+        
+        if nome_reservado(candidato):
+            continue
+        
+        try:
+            return criar(candidato)
+        except FileExistsError:
+            continue
+
+
+def sincronizar_arquivo(caminho: Path):
+    """Força a gravação do conteúdo do arquivo em disco (fsync)"""
+    descritor = os.open(caminho, os.O_RDONLY)
+    try:
+        os.fsync(descritor)
+    finally:
+        os.close(descritor)
+
+
+def sincronizar_diretorio(diretorio: Path):
+    """Força a gravação das entradas do diretório (torna o rename durável)"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return  # Windows: não há fsync de diretório
+    
+    descritor = os.open(diretorio, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(descritor)
+    finally:
+        os.close(descritor)
+
+
+def _publicar_sem_sobrescrever(temporario: Path, destino: Path) -> bool:
+    """Move o temporário para o destino; False (temporário intacto) se o destino existir"""
+    try:
+        # link falha se o destino existir: publica sem risco de sobrescrever
+        os.link(temporario, destino)
+    except FileExistsError:
+        return False
+    except OSError:
+        # Sistemas de arquivos sem hard link
+        if destino.exists():
+            return False
+        os.replace(temporario, destino)
+        return True
+    
+    os.unlink(temporario)
+    return True
+
+
+def publicar(temporario: Path, destino: Path, exclusivo: bool = False) -> Path:
+    """
+    Move o arquivo temporário para o nome final de forma atômica
+    
+    No modo exclusivo o nome foi reservado na abertura (reservar_nome), mas
+    quem não usa reserva ainda pode ocupá-lo antes da publicação; nesse
+    caso o arquivo é publicado com o próximo sufixo livre (_2, _3, ...) em
+    vez de ser descartado. A reserva é liberada ao final.
+    
+    Args:
+        temporario: Arquivo já escrito e fechado
+        destino: Nome final
+        exclusivo: Se True, nunca sobrescreve um arquivo existente
+    
+    Returns:
+        Caminho publicado (difere de destino só se o nome tiver sido ocupado)
+    """
+    if not exclusivo:
+        os.replace(temporario, destino)
+        return destino
+    
+    try:
+        if _publicar_sem_sobrescrever(temporario, destino):
+            return destino
+        
+        sufixo = 2
+        while True:
+            candidato = nome_com_sufixo(destino, sufixo)
+            sufixo += 1
+            
+            if not reservar_nome(candidato):
+                continue
+            try:
+                if _publicar_sem_sobrescrever(temporario, candidato):
+                    print(f"AVISO: {destino.name} foi ocupado antes da publicação; salvo como {candidato.name}")
+                    return candidato
+            finally:
+                liberar_nome(candidato)
+    finally:
+        liberar_nome(destino)
+
+
+class GrupoCommit:
+    """
+    Publica vários arquivos atômicos de uma vez
+    
+    Em vez de um fsync por arquivo no momento em que ele é fechado, o
+    grupo sincroniza todos os temporários, renomeia todos e sincroniza cada
+    diretório uma única vez.
+    """
+    
+    def __init__(self, sincronizar: Optional[bool] = None):
+        """
+        Args:
+            sincronizar: Faz fsync antes de publicar (padrão: settings.WRITE_FSYNC)
+        """
+        self.sincronizar = settings.WRITE_FSYNC if sincronizar is None else sincronizar
+        self.pendentes: List[Tuple[Path, Path, bool]] = []
+    
+    def adicionar(self, temporario: Path, destino: Path, exclusivo: bool):
+        """Registra um arquivo pronto para publicação"""
+        self.pendentes.append((temporario, destino, exclusivo))
+    
+    def confirmar(self) -> List[Path]:
+        """
+        Sincroniza e publica os arquivos pendentes
+        
+        Se a publicação falhar, os arquivos já publicados ficam; os demais
+        são descartados.
+        
+        Returns:
+            Caminhos finais publicados
+        """
+        pendentes, self.pendentes = self.pendentes, []
+        publicados: List[Path] = []
+        
+        try:
+            if self.sincronizar:
+                for temporario, _, _ in pendentes:
+                    sincronizar_arquivo(temporario)
+            
+            for temporario, destino, exclusivo in pendentes:
+                publicados.append(publicar(temporario, destino, exclusivo))
+        except BaseException:
+            _descartar_pendentes(pendentes[len(publicados):])
+            raise
+        
+        if self.sincronizar:
+            for diretorio in {destino.parent for destino in publicados}:
+                sincronizar_diretorio(diretorio)
+        
+        return publicados
+    
+    def descartar(self):
+        """Remove os temporários (e as reservas de nome) sem publicar"""
+        _descartar_pendentes(self.pendentes)
+        self.pendentes = []
+
+
+def _descartar_pendentes(pendentes: List[Tuple[Path, Path, bool]]):
+    for temporario, destino, exclusivo in pendentes:
+        temporario.unlink(missing_ok=True)
+        if exclusivo:
+            liberar_nome(destino)
+
+
+@contextmanager
+def commit_em_grupo(grupo: GrupoCommit) -> Iterator[GrupoCommit]:
+    """
+    Adia a publicação dos arquivos atômicos fechados nesta thread
+    
+    Dentro do bloco, fechar um arquivo de abrir_atomico() apenas o registra
+    no grupo; a publicação acontece em grupo.confirmar().
+    """
+    anterior = getattr(_contexto, 'grupo', None)
+    _contexto.grupo = grupo
+    try:
+        yield grupo
+    finally:
+        _contexto.grupo = anterior
+
+
+class ArquivoAtomico:
+    """
+    Arquivo escrito em um temporário e publicado só ao ser fechado
+    
+    Leitores nunca veem um arquivo pela metade: até o fechamento existe
+    apenas o temporário oculto; se ocorrer erro dentro do `with`, o
+    temporário é removido e o destino não é criado/alterado.
+    
+    Em modo exclusivo, `destino` passa a ser o nome efetivamente publicado
+    (ver publicar).
+    """
+    
+    def __init__(self, destino: Path, arquivo: IO, temporario: Path, exclusivo: bool):
+        self.destino = destino
+        self.temporario = temporario
+        self.exclusivo = exclusivo
+        self._arquivo = arquivo
+        self._grupo: Optional[GrupoCommit] = getattr(_contexto, 'grupo', None)
+        self._fechado = False
+    
+    def __getattr__(self, nome):
+        # write, flush, tell, fileno... vão para o arquivo real
+        return getattr(self._arquivo, nome)
+    
+    def close(self):
+        """Fecha o temporário e publica (ou registra no grupo de commit)"""
+        if self._fechado:
+            return
+        self._fechado = True
+        self._arquivo.close()
+        
+        if self._grupo is not None:
+            self._grupo.adicionar(self.temporario, self.destino, self.exclusivo)
+            return
+        
+        try:
+            if settings.WRITE_FSYNC:
+                sincronizar_arquivo(self.temporario)
+            self.destino = publicar(self.temporario, self.destino, self.exclusivo)
+        except BaseException:
+            _descartar_pendentes([(self.temporario, self.destino, self.exclusivo)])
+            raise
+        
+        if settings.WRITE_FSYNC:
+            sincronizar_diretorio(self.destino.parent)
+    
+    def descartar(self):
+        """Fecha e remove o temporário sem publicar"""
+        if self._fechado:
+            return
+        self._fechado = True
+        self._arquivo.close()
+        _descartar_pendentes([(self.temporario, self.destino, self.exclusivo)])
+    
+    def __enter__(self) -> 'ArquivoAtomico':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.descartar()
+
+
+def abrir_atomico(
+    caminho: Path,
+    modo: str = 'w',
+    compressao: Optional[str] = None,
+    **kwargs
+) -> ArquivoAtomico:
+    """
+    Abre um arquivo para escrita atômica (temporário + rename no fechamento)
+    
+    Args:
+        caminho: Nome final do arquivo
+        modo: 'w' (substitui o existente) ou 'x' (falha se já existir)
+        compressao: 'gzip', 'zstd' ou None
+        **kwargs: Repassados para abrir_escrita (texto, encoding, newline, buffer_bytes...)
+    
+    Returns:
+        ArquivoAtomico (use com `with` ou chame close())
+    
+    Raises:
+        FileExistsError: Em modo 'x', se o destino já existir ou já estiver
+            reservado por outro arquivo atômico ainda não publicado (deste ou
+            de outro processo)
+    """
+    exclusivo = modo == 'x'
+    
+    # Reserva o nome já na abertura (evita dois cupons com o mesmo nome)
+    if exclusivo and not reservar_nome(caminho):
+        raise FileExistsError(caminho)
+    
+    temporario = caminho_temporario(caminho)
+    try:
+        arquivo = abrir_escrita(temporario, 'w', compressao, **kwargs)
+    except BaseException:
+        if exclusivo:
+            liberar_nome(caminho)
+        raise
+    
+    return ArquivoAtomico(caminho, arquivo, temporario, exclusivo)
\ No newline at end of file
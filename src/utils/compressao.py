@@ -0,0 +1,233 @@
+"""
+Abertura de arquivos com compressão em streaming (gzip e zstd)
+"""
+import gzip
+import io
+import os
+from pathlib import Path
+from typing import IO, Optional, Union
+
+try:
+    import zstandard
+except ImportError:
+    # zstandard é opcional: só é necessário para arquivos .zst
+    zstandard = None
+
+from src.config import settings
+
+
+# Extensão de cada formato de compressão
+EXTENSOES = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+# Primeiros bytes de cada formato (para detectar na leitura)
+ASSINATURAS = {
+    b'\x1f\x8b': 'gzip',
+    b'\x28\xb5\x2f\xfd': 'zstd',
+}
+
+# Nível padrão quando settings.COMPRESSION_LEVEL não está definido
+NIVEIS_PADRAO = {
+    'gzip': 6,
+    'zstd': 3,
+}
+
+
+class _BufferCompressao(io.BufferedWriter):
+    """
+    Buffer à frente do compressor cujo flush() chega até o disco
+    
+    O BufferedWriter padrão só entrega os dados ao compressor; aqui o
+    flush também esvazia o compressor, para que flush() dos repositórios
+    deixe no arquivo tudo o que foi escrito até então.
+    """
+    
+    def flush(self):
+        super().flush()
+        self.raw.flush()
+
+
+def _verificar_zstandard():
+    """Garante que o zstandard está instalado"""
+    if zstandard is None:
+        raise ImportError(
+            "zstandard não está instalado. Instale com: pip install zstandard"
+        )
+
+
+def compressao_da_extensao(caminho: Union[str, Path]) -> Optional[str]:
+    """
+    Identifica a compressão pela extensão do arquivo
+    
+    Returns:
+        'gzip', 'zstd' ou None
+    """
+    nome = str(caminho)
+    for compressao, extensao in EXTENSOES.items():
+        if nome.endswith(extensao):
+            return compressao
+    return None
+
+
+def resolver_compressao(caminho: Union[str, Path], compressao: Optional[str] = None) -> Optional[str]:
+    """
+    Decide a compressão de um arquivo de saída
+    
+    Ordem: parâmetro explícito, extensão do nome, settings.OUTPUT_COMPRESSION
+    
+    Args:
+        caminho: Nome ou caminho do arquivo
+        compressao: 'gzip', 'zstd', 'none' ou None (automático)
+    
+    Returns:
+        'gzip', 'zstd' ou None (sem compressão)
+    
+    Raises:
+        ValueError: Se a compressão não for suportada
+    """
+    escolhida = compressao or compressao_da_extensao(caminho) or settings.OUTPUT_COMPRESSION
+    
+    if not escolhida or escolhida == 'none':
+        return None
+    
+    if escolhida not in EXTENSOES:
+        raise ValueError(
+            f"Compressão não suportada: {escolhida}. Use: none, {', '.join(EXTENSOES)}"
+        )
+    
+    return escolhida
+
+
+def sem_extensao_compressao(nome: str) -> str:
+    """Remove .gz/.zst do final do nome, se houver"""
+    compressao = compressao_da_extensao(nome)
+    return nome[:-len(EXTENSOES[compressao])] if compressao else nome
+
+
+def com_extensao_compressao(nome: str, compressao: Optional[str]) -> str:
+    """Acrescenta a extensão da compressão ao nome, se ainda não tiver"""
+    if compressao and not nome.endswith(EXTENSOES[compressao]):
+        return nome + EXTENSOES[compressao]
+    return nome
+
+
+def abrir_escrita(
+    caminho: Union[str, Path],
+    modo: str = 'w',
+    compressao: Optional[str] = None,
+    texto: bool = True,
+    encoding: Optional[str] = None,
+    newline: Optional[str] = None,
+    nivel: Optional[int] = None,
+    buffer_bytes: Optional[int] = None
+) -> IO:
+    """
+    Abre um arquivo para escrita, compactando em streaming se necessário
+    
+    Os dados passam pelo buffer e são compactados à medida que são
+    escritos, sem arquivo intermediário nem segunda passada.
+    
+    Args:
+        caminho: Arquivo de destino
+        modo: 'w' (sobrescreve), 'a' (acrescenta) ou 'x' (cria, falha se existir)
+        compressao: 'gzip', 'zstd' ou None (sem compressão)
+        texto: Retorna arquivo de texto (True) ou binário (False)
+        encoding: Encoding do texto (padrão: settings.FILE_ENCODING)
+        newline: Controle de quebra de linha do modo texto ('' para CSV)
+        nivel: Nível de compressão (padrão: settings.COMPRESSION_LEVEL)
+        buffer_bytes: Tamanho do buffer de escrita (padrão: settings.COMPRESSION_BUFFER_SIZE)
+    
+    Returns:
+        Objeto de arquivo; ao fechá-lo, o arquivo em disco também é fechado
+    """
+    buffer_bytes = buffer_bytes or settings.COMPRESSION_BUFFER_SIZE
+    encoding = encoding or settings.FILE_ENCODING
+    
+    if compressao is None:
+        if texto:
+            return open(caminho, modo, encoding=encoding, newline=newline, buffering=buffer_bytes)
+        return open(caminho, modo + 'b', buffering=buffer_bytes)
+    
+    nivel = nivel or settings.COMPRESSION_LEVEL or NIVEIS_PADRAO[compressao]
+    
+    if compressao == 'gzip':
+        compactado = gzip.GzipFile(filename=caminho, mode=modo + 'b', compresslevel=nivel)
+    elif compressao == 'zstd':
+        _verificar_zstandard()
+        bruto = open(caminho, modo + 'b')
+        compactado = zstandard.ZstdCompressor(level=nivel).stream_writer(
+            bruto, write_return_read=True, closefd=True
+        )
+    else:
+        raise ValueError(f"Compressão não suportada: {compressao}")
+    
+    # Agrupa escritas pequenas antes de passar pelo compressor
+    binario = _BufferCompressao(compactado, buffer_size=buffer_bytes)
+    
+    if not texto:
+        return binario
+    
+    return io.TextIOWrapper(binario, encoding=encoding, newline=newline)
+
+
+def abrir_leitura(
+    caminho: Union[str, Path],
+    texto: bool = True,
+    encoding: Optional[str] = None,
+    newline: Optional[str] = None
+) -> IO:
+    """
+    Abre um arquivo para leitura, descompactando em streaming se necessário
+    
+    A compressão é detectada pelo conteúdo (não pela extensão). Arquivos
+    com vários membros gzip / quadros zstd (escritos com modo 'a') são
+    lidos por inteiro.
+    
+    Args:
+        caminho: Arquivo a ler
+        texto: Retorna arquivo de texto (True) ou binário (False)
+        encoding: Encoding do texto (padrão: settings.FILE_ENCODING)
+        newline: Controle de quebra de linha do modo texto ('' para CSV)
+    
+    Returns:
+        Objeto de arquivo
+    """
+    encoding = encoding or settings.FILE_ENCODING
+    
+    with open(caminho, 'rb') as arquivo:
+        inicio = arquivo.read(4)
+    
+    compressao = next(
+        (nome for assinatura, nome in ASSINATURAS.items() if inicio.startswith(assinatura)),
+        None
+    )
+    
+    if compressao is None:
+        if texto:
+            return open(caminho, 'r', encoding=encoding, newline=newline)
+        return open(caminho, 'rb')
+    
+    if compressao == 'gzip':
+        binario = gzip.open(caminho, 'rb')
+    else:
+        _verificar_zstandard()
+        binario = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(
+            open(caminho, 'rb'), read_across_frames=True, closefd=True
+        ))
+    
+    if not texto:
+        return binario
+    
+    return io.TextIOWrapper(binario, encoding=encoding, newline=newline)
+
+
+def tamanho_em_disco(arquivo: IO) -> int:
+    """
+    Bytes já gravados em disco por um arquivo aberto com abrir_escrita()
+    
+    Para arquivos compactados é o tamanho compactado (sem o que ainda
+    está nos buffers do compressor).
+    """
+    return os.fstat(arquivo.fileno()).st_size
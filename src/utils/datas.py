@@ -0,0 +1,148 @@
+"""
+Conversão da data/hora de emissão exibida pela SEFAZ
+"""
+from datetime import datetime
+from typing import Iterable, Optional
+
+
+# Formatos de data/hora aceitos (o primeiro é o usado pela SEFAZ-SP)
+FORMATOS_DATA_HORA = (
+    '%d/%m/%Y - %H:%M:%S',
+    '%d/%m/%Y %H:%M:%S',
+    '%Y-%m-%d %H:%M:%S',
+)
+
+
+def _formato_sefaz(texto: str) -> Optional[datetime]:
+    """
+    Caminho rápido para "dd/mm/aaaa - HH:MM:SS" (posições fixas)
+    
+    Fatia o texto e chama datetime() direto, ~10x mais rápido que
+    strptime. Retorna None se o texto não estiver exatamente nesse layout.
+    """
+    if (len(texto) != 21 or texto[2] != '/' or texto[5] != '/'
+            or texto[10:13] != ' - ' or texto[15] != ':' or texto[18] != ':'):
+        return None
+    
+    digitos = texto[:2] + texto[3:5] + texto[6:10] + texto[13:15] + texto[16:18] + texto[19:]
+    if not (digitos.isascii() and digitos.isdigit()):
+        return None
+    
+    try:
+        return datetime(
+            int(texto[6:10]), int(texto[3:5]), int(texto[:2]),
+            int(texto[13:15]), int(texto[16:18]), int(texto[19:])
+        )
+    except ValueError:
+        return None
+
+
+def para_datetime(valor: Optional[str]) -> Optional[datetime]:
+    """
+    Converte a data/hora da página para datetime
+    
+    Args:
+        valor: Texto da data/hora (ex: "22/01/2026 - 20:03:41")
+    
+    Returns:
+        datetime ou None se vazio/não reconhecido
+    """
+    if not valor:
+        return None
+    
+    valor = valor.strip()
+    
+    data = _formato_sefaz(valor)
+    if data is not None:
+        return data
+    
+    for formato in FORMATOS_DATA_HORA:
+        try:
+            return datetime.strptime(valor, formato)
+        except ValueError:
+            continue
+    
+    return None
+
+
+# Posições dos dígitos em "dd/mm/aaaa - HH:MM:SS" e dos separadores
+_POSICOES_DIGITOS = [0, 1, 3, 4, 6, 7, 8, 9, 13, 14, 16, 17, 19, 20]
+_SEPARADORES_SEFAZ = {2: '/', 5: '/', 10: ' ', 11: '-', 12: ' ', 15: ':', 18: ':'}
+
+
+def _formato_sefaz_lote(textos: list):
+    """
+    Versão vetorizada de _formato_sefaz
+    
+    Os textos viram uma matriz de code points (uma linha por texto): o
+    layout e os dígitos são conferidos por coluna, e a data é montada em
+    datetime64 a partir dos componentes, sem strptime.
+    
+    Returns:
+        Tupla (datas datetime64[s], máscara dos textos reconhecidos)
+    """
+    import numpy as np
+    
+    # U22: um caractere a mais detecta textos maiores que o layout
+    codigos = np.array(textos, dtype='U22').view(np.uint32).reshape(len(textos), 22)
+    digitos = codigos[:, _POSICOES_DIGITOS].astype(np.int64) - ord('0')
+    
+    validos = ((digitos >= 0) & (digitos <= 9)).all(axis=1) & (codigos[:, 21] == 0)
+    for posicao, separador in _SEPARADORES_SEFAZ.items():
+        validos &= codigos[:, posicao] == ord(separador)
+    
+    def numero(inicio: int, fim: int):
+        return digitos[:, inicio:fim] @ (10 ** np.arange(fim - inicio - 1, -1, -1))
+    
+    dia, mes, ano = numero(0, 2), numero(2, 4), numero(4, 8)
+    hora, minuto, segundo = numero(8, 10), numero(10, 12), numero(12, 14)
+    
+    # Limites do datetime64[ns] do pandas (anos 1678 a 2261)
+    validos &= (mes >= 1) & (mes <= 12) & (dia >= 1) & (ano > 1677) & (ano < 2262)
+    validos &= (hora < 24) & (minuto < 60) & (segundo < 60)
+    
+    meses = np.where(validos, (ano - 1970) * 12 + mes - 1, 0).astype('datetime64[M]')
+    inicio_mes = meses.astype('datetime64[D]')
+    validos &= dia <= ((meses + 1).astype('datetime64[D]') - inicio_mes).astype(np.int64)
+    
+    segundos = (dia - 1) * 86400 + hora * 3600 + minuto * 60 + segundo
+    datas = inicio_mes.astype('datetime64[s]') + segundos.astype('timedelta64[s]')
+    
+    return np.where(validos, datas, np.datetime64('NaT')), validos
+
+
+def para_datetimes(valores: Iterable[Optional[str]]):
+    """
+    Converte muitas datas/horas de uma vez (vetorizado com numpy/pandas)
+    
+    O layout da SEFAZ é convertido por posição para o lote inteiro; só os
+    textos restantes passam pelos formatos de FORMATOS_DATA_HORA, cada um
+    aplicado de uma vez com pandas.
+    
+    Args:
+        valores: Textos da data/hora (None/vazio/não reconhecido = NaT)
+    
+    Returns:
+        pandas.Series datetime64[ns], na ordem dos valores
+    """
+    # Importado aqui: pandas demora a carregar e só a conversão em lote precisa dele
+    import pandas as pd
+    
+    textos = [valor.strip() if isinstance(valor, str) else '' for valor in valores]
+    if not textos:
+        return pd.Series([], dtype='datetime64[ns]')
+    
+    datas, reconhecidos = _formato_sefaz_lote(textos)
+    datas = pd.Series(datas.astype('datetime64[ns]'))
+    
+    restantes = pd.Series(textos, dtype=object)[~reconhecidos]
+    restantes = restantes[restantes != '']
+    
+    for formato in FORMATOS_DATA_HORA:
+        if restantes.empty:
+            break
+        convertidas = pd.to_datetime(restantes, format=formato, errors='coerce').dropna()
+        datas[convertidas.index] = convertidas
+        restantes = restantes.drop(convertidas.index)
+    
+    return datas
\ No newline at end of file
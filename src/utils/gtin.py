@@ -0,0 +1,63 @@
+"""
+Validação e normalização de códigos de barras GTIN (EAN/UPC)
+"""
+from typing import Optional
+
+
+# Tamanhos válidos: GTIN-8 (EAN-8), GTIN-12 (UPC-A), GTIN-13 (EAN-13) e GTIN-14 (DUN-14)
+TAMANHOS_GTIN = (8, 12, 13, 14)
+
+# Textos que a página exibe quando o produto não tem código de barras
+SEM_GTIN = ('Não Informado', 'SEM GTIN')
+
+
+def digito_verificador(corpo: str) -> int:
+    """
+    Calcula o dígito verificador (módulo 10, pesos 3 e 1 da direita para a esquerda)
+    
+    Args:
+        corpo: Dígitos do GTIN sem o verificador
+    
+    Returns:
+        Dígito verificador (0 a 9)
+    """
+    soma = 0
+    for posicao, digito in enumerate(reversed(corpo)):
+        soma += int(digito) * (3 if posicao % 2 == 0 else 1)
+    return -soma % 10
+
+
+def gtin_valido(codigo: Optional[str]) -> bool:
+    """
+    Verifica tamanho, dígitos e dígito verificador do GTIN
+    
+    Args:
+        codigo: GTIN-8, 12, 13 ou 14 (sem espaços ou pontuação)
+    
+    Returns:
+        True se o código for um GTIN válido
+    """
+    if not codigo or len(codigo) not in TAMANHOS_GTIN or not codigo.isdigit() or not codigo.isascii():
+        return False
+    return digito_verificador(codigo[:-1]) == int(codigo[-1])
+
+
+def normalizar_gtin(codigo: Optional[str]) -> Optional[str]:
+    """
+    Converte o GTIN para 14 dígitos (zeros à esquerda)
+    
+    GTIN-8, 12 e 13 completados com zeros mantêm o dígito verificador:
+    "7891234567895" e "07891234567895" são o mesmo produto.
+    
+    Args:
+        codigo: GTIN lido da página
+    
+    Returns:
+        GTIN com 14 dígitos ou None se o código não for válido
+    """
+    if codigo is None:
+        return None
+    codigo = codigo.strip()
+    if not gtin_valido(codigo):
+        return None
+    return codigo.zfill(14)
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""
+Conversão de valores numéricos no formato brasileiro
+"""
+import re
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Optional
+
+
+# Textos distintos guardados em cada cache de conversão: valores e
+# quantidades se repetem muito entre produtos ("1,0000", "10,50"...)
+TAMANHO_CACHE = 8192
+
+_RE_NAO_NUMERICO = re.compile(r'[^\d,.\-]')
+_RE_NUMERO = re.compile(r'-?(?:\d+\.?\d*|\.\d+)')
+
+_CASAS = {casas: Decimal(1).scaleb(-casas) for casas in range(7)}
+
+
+def normalizar_numero(texto: str) -> Optional[str]:
+    """
+    Converte o texto para a notação do Python (ponto decimal, sem milhar)
+    
+    Aceita "R$ 1.234,56", "1.234.567", "12,34", "12.34", "-0,50" e
+    "1,234.56". Havendo vírgula, ela é o separador decimal e os pontos
+    são de milhar (padrão da SEFAZ); sem vírgula, um único ponto é o
+    decimal e vários pontos são de milhar.
+    
+    Args:
+        texto: Valor como exibido na página
+    
+    Returns:
+        Texto aceito por float()/Decimal() ou None se não houver número
+    """
+    limpo = _RE_NAO_NUMERICO.sub('', texto)
+    
+    if ',' in limpo:
+        if '.' in limpo and limpo.rfind('.') > limpo.rfind(','):
+            # Notação americana: vírgula de milhar, ponto decimal
+            limpo = limpo.replace(',', '')
+        else:
+            limpo = limpo.replace('.', '').replace(',', '.')
+    elif limpo.count('.') > 1:
+        limpo = limpo.replace('.', '')
+    
+    return limpo if _RE_NUMERO.fullmatch(limpo) else None
+
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def _texto_para_float(texto: str) -> Optional[float]:
+    normalizado = normalizar_numero(texto)
+    return float(normalizado) if normalizado is not None else None
+
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def _texto_para_decimal(texto: str, casas: int) -> Optional[Decimal]:
+    normalizado = normalizar_numero(texto)
+    if normalizado is None:
+        return None
+    try:
+        return Decimal(normalizado).quantize(_CASAS[casas])
+    except InvalidOperation:
+        return None
+
+
+def para_float(valor, padrao: Optional[float] = None) -> Optional[float]:
+    """
+    Converte um valor ou quantidade para float
+    
+    Args:
+        valor: Valor a converter (str, int, float ou None)
+        padrao: Retorno para valores vazios/não numéricos
+    
+    Returns:
+        float ou `padrao`
+    """
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    
+    if valor is None or valor == '':
+        return padrao
+    
+    resultado = _texto_para_float(valor if isinstance(valor, str) else str(valor))
+    return padrao if resultado is None else resultado
+
+
+def para_decimal(valor, casas: int = 2) -> Optional[Decimal]:
+    """
+    Converte um valor monetário para Decimal com 2 casas
+    
+    Aceita "R$ 1.234,56", "12,34", "12.34" e números
+    
+    Args:
+        valor: Valor a converter (str, int, float ou None)
+        casas: Casas decimais do resultado (0 a 6)
+    
+    Returns:
+        Decimal ou None se vazio/não numérico
+    """
+    if valor is None or valor == '':
+        return None
+    
+    if isinstance(valor, (int, float)):
+        return Decimal(str(valor)).quantize(_CASAS[casas])
+    
+    return _texto_para_decimal(valor if isinstance(valor, str) else str(valor), casas)
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+Pool de textos repetidos (internamento limitado)
+"""
+import sys
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from src.config import settings
+
+
+# Campos que se repetem entre cupons de uma mesma rede/loja
+CAMPOS_EMITENTE = ('ie', 'im', 'sat_numero', 'nome', 'cnpj', 'endereco', 'bairro', 'cep', 'uf')
+CAMPOS_LOCAL_ENTREGA = ('endereco', 'bairro', 'municipio', 'uf')
+
+
+class PoolTextos:
+    """
+    Guarda uma única cópia de cada texto repetido
+    
+    Cada leitura da página cria uma string nova, mesmo quando o texto é
+    igual ao do cupom anterior (nome e CNPJ da loja, NCM, descrição).
+    internar() devolve a cópia já guardada, e a nova pode ser liberada:
+    lotes grandes em memória ocupam menos e comparações entre textos
+    internados param na identidade (a is b), sem comparar caractere a
+    caractere.
+    
+    O pool é limitado: ao atingir `limite`, descarta o texto usado há
+    mais tempo (LRU). Diferente de sys.intern, informa acertos e bytes
+    economizados.
+    """
+    
+    def __init__(self, limite: Optional[int] = None):
+        """
+        Args:
+            limite: Máximo de textos distintos guardados
+                (padrão: settings.INTERN_POOL_SIZE; 0 = desativado)
+        """
+        self.limite = settings.INTERN_POOL_SIZE if limite is None else limite
+        self._textos: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.consultas = 0
+        self.acertos = 0
+        self.descartes = 0
+        self.bytes_economizados = 0
+    
+    def internar(self, texto: Optional[str]) -> Optional[str]:
+        """
+        Retorna a cópia guardada do texto (ou guarda esta)
+        
+        Args:
+            texto: Texto lido (None e vazio passam direto)
+        
+        Returns:
+            Texto igual ao recebido, possivelmente outro objeto
+        """
+        if not texto or self.limite <= 0:
+            return texto
+        
+        with self._lock:
+            self.consultas += 1
+            guardado = self._textos.get(texto)
+            
+            if guardado is not None:
+                self._textos.move_to_end(texto)
+                self.acertos += 1
+                if guardado is not texto:
+                    self.bytes_economizados += sys.getsizeof(texto)
+                return guardado
+            
+            self._textos[texto] = texto
+            if len(self._textos) > self.limite:
+                self._textos.popitem(last=False)
+                self.descartes += 1
+            return texto
+    
+    def internar_campos(self, objeto, campos: Iterable[str]):
+        """
+        Interna os atributos de texto de um objeto (ex: Emitente)
+        
+        Args:
+            objeto: Objeto com os atributos (None = nada a fazer)
+            campos: Nomes dos atributos
+        
+        Returns:
+            O próprio objeto
+        """
+        if objeto is None:
+            return None
+        
+        for campo in campos:
+            valor = getattr(objeto, campo)
+            if isinstance(valor, str):
+                setattr(objeto, campo, self.internar(valor))
+        return objeto
+    
+    def __len__(self) -> int:
+        return len(self._textos)
+    
+    def __contains__(self, texto: str) -> bool:
+        return texto in self._textos
+    
+    def limpar(self):
+        """Esvazia o pool e zera as métricas"""
+        with self._lock:
+            self._textos.clear()
+            self.consultas = self.acertos = self.descartes = self.bytes_economizados = 0
+    
+    def metricas(self) -> dict:
+        """
+        Métricas de uso do pool
+        
+        Returns:
+            Dicionário com:
+            - textos: textos distintos guardados
+            - consultas, acertos, descartes
+            - taxa_acerto: acertos / consultas (0 a 1)
+            - bytes_economizados: memória das cópias repetidas que deixaram
+              de ser mantidas
+        """
+        return {
+            'textos': len(self._textos),
+            'consultas': self.consultas,
+            'acertos': self.acertos,
+            'descartes': self.descartes,
+            'taxa_acerto': round(self.acertos / self.consultas, 4) if self.consultas else 0.0,
+            'bytes_economizados': self.bytes_economizados,
+        }
+    
+    def resumo(self) -> str:
+        """Linha de resumo para o console"""
+        metricas = self.metricas()
+        return (f"{metricas['acertos']}/{metricas['consultas']} textos reaproveitados "
+                f"({metricas['taxa_acerto'] * 100:.1f}%), "
+                f"{metricas['bytes_economizados'] / 1024:.1f} KB economizados")
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Testes unitários para a escrita atômica de arquivos
+"""
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.repositories.csv_repository import CSVRepository
+from src.utils.arquivos import GrupoCommit, abrir_atomico, commit_em_grupo
+from tests.conftest import criar_cupom
+
+
+class TestArquivoAtomico:
+    """Testes para abrir_atomico"""
+    
+    def test_publica_apenas_ao_fechar(self):
+        """Testa que o destino só aparece (completo) após o fechamento"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            caminho = Path(tmpdir) / "saida.csv"
+            
+            arquivo = abrir_atomico(caminho)
+            arquivo.write("a;b\n")
+            arquivo.flush()
+            
+            assert not caminho.exists()
+            assert len(list(Path(tmpdir).iterdir())) == 1
+            
+            arquivo.close()
+            
+            assert caminho.read_text(encoding='utf-8-sig') == "a;b\n"
+            assert list(Path(tmpdir).iterdir()) == [caminho]
+    
+    def test_erro_nao_deixa_arquivo_parcial(self):
+        """Testa que uma exceção dentro do with descarta o temporário"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            caminho = Path(tmpdir) / "saida.csv"
+            caminho.write_text("antigo")
+            
+            with pytest.raises(RuntimeError):
+                with abrir_atomico(caminho) as arquivo:
+                    arquivo.write("novo pela metade")
+                    raise RuntimeError("falha no meio")
+            
+            assert caminho.read_text() == "antigo"
+            assert list(Path(tmpdir).iterdir()) == [caminho]
+    
+    def test_modo_exclusivo(self):
+        """Testa que o modo 'x' nunca sobrescreve"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            caminho = Path(tmpdir) / "saida.csv"
+            caminho.write_text("existente")
+            
+            with pytest.raises(FileExistsError):
+                abrir_atomico(caminho, 'x')
+            
+            assert caminho.read_text() == "existente"
+    
+    def test_nome_ocupado_antes_de_publicar(self):
+        """Testa que o arquivo ganha o próximo sufixo se o nome for ocupado depois da abertura"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            caminho = Path(tmpdir) / "saida.csv.gz"
+            
+            arquivo = abrir_atomico(caminho, 'x', 'gzip')
+            arquivo.write("novo")
+            
+            # Outro escritor, que não reserva nomes, cria o arquivo antes do fechamento
+            caminho.write_text("outro processo")
+            arquivo.close()
+            
+            assert caminho.read_text() == "outro processo"
+            assert arquivo.destino == Path(tmpdir) / "saida_2.csv.gz"
+            assert sorted(Path(tmpdir).iterdir()) == [caminho, arquivo.destino]
+    
+    def test_compressao(self):
+        """Testa escrita atômica de arquivo compactado"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            caminho = Path(tmpdir) / "saida.csv.gz"
+            
+            with abrir_atomico(caminho, 'w', 'gzip') as arquivo:
+                arquivo.write("conteudo")
+            
+            assert caminho.read_bytes()[:2] == b'\x1f\x8b'
+
+
+class TestGrupoCommit:
+    """Testes para o commit em grupo"""
+    
+    def test_publica_todos_no_confirmar(self):
+        """Testa que os arquivos do grupo só aparecem em confirmar()"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            caminhos = [Path(tmpdir) / f"arquivo_{i}.txt" for i in range(3)]
+            grupo = GrupoCommit()
+            
+            with commit_em_grupo(grupo):
+                for caminho in caminhos:
+                    with abrir_atomico(caminho) as arquivo:
+                        arquivo.write(caminho.name)
+            
+            assert not any(caminho.exists() for caminho in caminhos)
+            
+            with patch('src.utils.arquivos.sincronizar_diretorio') as mock_dir:
+                assert grupo.confirmar() == caminhos
+            
+            # Um único fsync de diretório para o grupo inteiro
+            assert mock_dir.call_count == 1
+            assert all(caminho.read_text(encoding='utf-8-sig') == caminho.name for caminho in caminhos)
+    
+    def test_nome_reservado_no_grupo(self):
+        """Testa que o modo 'x' considera os nomes pendentes do grupo"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            caminho = Path(tmpdir) / "arquivo.txt"
+            
+            with commit_em_grupo(GrupoCommit()):
+                abrir_atomico(caminho, 'x').close()
+                
+                with pytest.raises(FileExistsError):
+                    abrir_atomico(caminho, 'x')
+    
+    def test_colisao_nao_descarta_o_grupo(self):
+        """Testa que um nome ocupado antes do confirmar() não apaga os arquivos do grupo"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            caminhos = [Path(tmpdir) / f"arquivo_{i}.txt" for i in range(3)]
+            grupo = GrupoCommit(sincronizar=False)
+            
+            with commit_em_grupo(grupo):
+                for caminho in caminhos:
+                    with abrir_atomico(caminho, 'x') as arquivo:
+                        arquivo.write(caminho.name)
+            
+            caminhos[1].write_text("outro processo")
+            publicados = grupo.confirmar()
+            
+            assert publicados == [caminhos[0], Path(tmpdir) / "arquivo_1_2.txt", caminhos[2]]
+            assert [caminho.read_text(encoding='utf-8-sig') for caminho in publicados] == [
+                "arquivo_0.txt", "arquivo_1.txt", "arquivo_2.txt"
+            ]
+            assert caminhos[1].read_text() == "outro processo"
+            assert len(list(Path(tmpdir).glob(".*"))) == 0
+    
+    def test_descartar(self):
+        """Testa que descartar() remove os temporários"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            grupo = GrupoCommit()
+            
+            with commit_em_grupo(grupo):
+                with abrir_atomico(Path(tmpdir) / "arquivo.txt") as arquivo:
+                    arquivo.write("x")
+            
+            grupo.descartar()
+            
+            assert list(Path(tmpdir).iterdir()) == []
+    
+    def test_csv_repository_em_grupo(self):
+        """Testa que cupons salvos no mesmo segundo recebem nomes distintos"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = CSVRepository(diretorio=Path(tmpdir), layout='normalizado')
+            grupo = GrupoCommit(sincronizar=False)
+            
+            with commit_em_grupo(grupo):
+                primeiro = repo.salvar(criar_cupom())
+                segundo = repo.salvar(criar_cupom())
+            
+            assert primeiro != segundo
+            assert not primeiro.exists()
+            
+            grupo.confirmar()
+            
+            assert len(list(Path(tmpdir).glob("*.csv"))) == 4
+            assert len(list(Path(tmpdir).glob(".*.tmp"))) == 0
+            assert len(list(Path(tmpdir).glob(".*.reserva"))) == 0
\ No newline at end of file
@@ -0,0 +1,126 @@
+"""
+Testes unitários para a serialização binária dos modelos
+"""
+import json
+from dataclasses import fields
+
+import pytest
+
+from src.models import binario
+from src.models.consumidor import Consumidor
+from src.models.cupom import Cupom
+from src.models.cupom_completo import CupomCompleto
+from src.models.emitente import Emitente
+from src.models.local_entrega import LocalEntrega
+from src.models.produto import Produto
+from tests.conftest import criar_cupom
+
+
+def criar_cupom_extremo(**campos) -> CupomCompleto:
+    """Cria um cupom de teste com campos None, acentos e emoji"""
+    dados = dict(
+        emitente=Emitente(nome="Padaria São João 🍞", cnpj="12.345.678/0001-90", uf=""),
+        cupom=Cupom(total="1.234,56", data_hora="01/02/2024 - 10:20:30"),
+        produtos=[
+            Produto(codigo_ncm="22021000", valor_liquido=0.1 + 0.2, cod_produto="1",
+                    cod_gtin=None, valor_total="1.234,56", descricao="Café", quantidade=None),
+            Produto(codigo_ncm="19059090", valor_liquido=-0.0, cod_produto="2",
+                    cod_gtin="7891234567895", valor_total=3.5, quantidade="2,5000"),
+        ],
+        chave_acesso="3" * 44,
+    )
+    dados.update(campos)
+    return criar_cupom(**dados)
+
+
+class TestSerializacaoBinaria:
+    """Testes para to_bytes / from_bytes"""
+    
+    def test_ida_e_volta_sem_perdas(self):
+        """Testa que o cupom volta igual, com None e floats exatos"""
+        cupom = criar_cupom_extremo()
+        
+        copia = CupomCompleto.from_bytes(cupom.to_bytes())
+        
+        assert copia == cupom
+        assert copia.emitente.ie is None
+        assert copia.emitente.uf == ""
+        assert copia.produtos[0].quantidade is None
+        assert copia.produtos[0].valor_liquido == 0.1 + 0.2
+        assert copia.consumidor is None and copia.local_entrega is None
+    
+    def test_com_consumidor_e_local_entrega(self):
+        """Testa os submodelos opcionais presentes"""
+        cupom = criar_cupom_extremo(
+            consumidor=Consumidor(cpf_cnpj="123.456.789-00"),
+            local_entrega=LocalEntrega(municipio="São Paulo", uf="SP"),
+        )
+        
+        assert CupomCompleto.from_bytes(cupom.to_bytes()) == cupom
+    
+    def test_cupom_sem_produtos(self):
+        """Testa cupom com lista de produtos vazia"""
+        cupom = criar_cupom_extremo(produtos=[], chave_acesso=None)
+        
+        assert CupomCompleto.from_bytes(cupom.to_bytes()) == cupom
+    
+    @pytest.mark.parametrize("objeto", [
+        Emitente(nome="Loja", cep="01310-100"),
+        Consumidor(nome="Cliente"),
+        Cupom(qr_code="x" * 70000),
+        LocalEntrega(bairro="Centro"),
+        Produto(codigo_ncm="22021000", valor_liquido=1, cod_produto="1",
+                cod_gtin=None, valor_total=1, quantidade=1),
+    ])
+    def test_cada_modelo(self, objeto):
+        """Testa a serialização de cada modelo isolado"""
+        assert type(objeto).from_bytes(objeto.to_bytes()) == objeto
+    
+    def test_modelo_errado(self):
+        """Testa que bytes de um modelo não viram outro"""
+        with pytest.raises(ValueError):
+            Emitente.from_bytes(Consumidor(nome="x").to_bytes())
+    
+    def test_versao_diferente(self):
+        """Testa que dados de outra versão são recusados"""
+        dados = bytearray(criar_cupom_extremo().to_bytes())
+        dados[2] = binario.VERSAO + 1
+        
+        with pytest.raises(ValueError, match="Versão"):
+            CupomCompleto.from_bytes(bytes(dados))
+    
+    @pytest.mark.parametrize("dados", [b"", b"{}", b"CF"])
+    def test_formato_invalido(self, dados):
+        """Testa dados que não estão no formato"""
+        with pytest.raises(ValueError):
+            CupomCompleto.from_bytes(dados)
+    
+    def test_texto_com_nul(self):
+        """Testa textos com o caractere NUL (usa o layout com tamanhos)"""
+        cupom = criar_cupom_extremo(chave_acesso="a\x00b", cupom=Cupom(total="\x00"))
+        
+        assert CupomCompleto.from_bytes(cupom.to_bytes()) == cupom
+    
+    def test_truncado(self):
+        """Testa dados cortados no meio"""
+        dados = criar_cupom_extremo().to_bytes()
+        
+        with pytest.raises(ValueError):
+            CupomCompleto.from_bytes(dados[:-3])
+    
+    def test_campos_do_layout(self):
+        """Testa que o layout cobre todos os campos (ao falhar, incremente VERSAO)"""
+        for modelo, campos in binario.CAMPOS_TEXTO.items():
+            esperados = [campo.name for campo in fields(modelo) if campo.init]
+            if modelo is Produto:
+                esperados = [campo for campo in esperados
+                             if campo not in ('valor_liquido', 'valor_total', 'quantidade')]
+                assert sorted(campos) == sorted(esperados)
+            else:
+                assert list(campos) == esperados
+    
+    def test_menor_que_json(self):
+        """Testa que o binário é mais compacto que o JSON do to_dict"""
+        cupom = criar_cupom_extremo()
+        
+        assert len(cupom.to_bytes()) < len(json.dumps(cupom.to_dict()).encode())
\ No newline at end of file
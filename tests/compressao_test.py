@@ -0,0 +1,121 @@
+"""
+Testes unitários para a compressão em streaming dos arquivos de saída
+"""
+import gzip
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.repositories.csv_repository import CSVRepository
+from src.repositories.jsonl_repository import JSONLRepository
+from src.repositories.xml_repository import XMLRepository
+from src.utils.compressao import abrir_escrita, abrir_leitura, resolver_compressao
+from tests.conftest import criar_cupom
+
+
+class TestCompressao:
+    """Testes para abrir_escrita / abrir_leitura"""
+    
+    def test_resolver_compressao(self):
+        """Testa a ordem: parâmetro, extensão, configuração"""
+        assert resolver_compressao("a.csv.gz") == 'gzip'
+        assert resolver_compressao("a.jsonl.zst") == 'zstd'
+        assert resolver_compressao("a.csv.gz", 'none') is None
+        
+        with patch('src.utils.compressao.settings.OUTPUT_COMPRESSION', 'gzip'):
+            assert resolver_compressao("a.csv") == 'gzip'
+        
+        with pytest.raises(ValueError):
+            resolver_compressao("a.csv", 'bzip2')
+    
+    @pytest.mark.parametrize("compressao", [None, 'gzip', 'zstd'])
+    def test_ida_e_volta(self, compressao):
+        """Testa escrita e leitura em streaming, inclusive com acréscimo"""
+        if compressao == 'zstd':
+            pytest.importorskip("zstandard")
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            caminho = Path(tmpdir) / "dados.txt"
+            
+            with abrir_escrita(caminho, 'w', compressao, texto=False) as arquivo:
+                arquivo.write(b"linha 1\n" * 1000)
+            with abrir_escrita(caminho, 'a', compressao, texto=False) as arquivo:
+                arquivo.write(b"linha 2\n")
+            
+            with abrir_leitura(caminho, texto=False) as arquivo:
+                linhas = arquivo.readlines()
+            
+            tamanho = caminho.stat().st_size
+        
+        assert len(linhas) == 1001
+        assert linhas[-1] == b"linha 2\n"
+        if compressao:
+            assert tamanho < 8000 / 10
+
+
+class TestRepositoriosCompactados:
+    """Testes da compressão aplicada aos repositórios"""
+    
+    def test_csv_gzip_por_extensao(self):
+        """Testa CSV compactado escolhido pelo nome e lido de volta"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = CSVRepository(diretorio=Path(tmpdir))
+            caminho = repo.salvar(criar_cupom(quantidade_produtos=3), nome_arquivo="teste.csv.gz")
+            
+            with gzip.open(caminho, 'rt', encoding='utf-8-sig') as arquivo:
+                cabecalho = arquivo.readline()
+            
+            linhas = list(repo.ler_linhas(caminho))
+        
+        assert caminho.name == "teste.csv.gz"
+        assert cabecalho.startswith("Emitente_Nome;")
+        assert len(linhas) == 3
+        assert linhas[0]['Produto_Descricao'] == "Produto 0"
+    
+    def test_csv_lote_normalizado_zstd(self):
+        """Testa lote normalizado com zstd e rotação pelo tamanho compactado"""
+        pytest.importorskip("zstandard")
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = CSVRepository(diretorio=Path(tmpdir), layout='normalizado', compressao='zstd')
+            
+            with repo.abrir_lote('teste', max_bytes=1) as lote:
+                lote.adicionar(criar_cupom(1, quantidade_produtos=3))
+                lote.flush()
+                lote.adicionar(criar_cupom(2, quantidade_produtos=3))
+            
+            produtos = list(repo.ler_linhas(lote.arquivos_produtos[1]))
+        
+        assert all(c.suffixes[-2:] == ['.csv', '.zst'] for c in lote.arquivos + lote.arquivos_produtos)
+        assert len(lote.arquivos) == 2
+        assert len(produtos) == 3
+    
+    def test_jsonl_zstd(self):
+        """Testa JSON Lines com zstd em vários lotes"""
+        pytest.importorskip("zstandard")
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = JSONLRepository(diretorio=Path(tmpdir), compressao='zstd')
+            repo.salvar(criar_cupom(1))
+            repo.salvar(criar_cupom(2))
+            
+            chaves = [c.chave_acesso[-1] for c in repo.ler()]
+        
+        assert repo.caminho.name == "cupons.jsonl.zst"
+        assert chaves == ["1", "2"]
+    
+    def test_xml_gzip(self):
+        """Testa XML compactado escrito e lido em streaming"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = XMLRepository(diretorio=Path(tmpdir), compressao='gzip')
+            
+            with repo.abrir_lote('lote') as lote:
+                for numero in range(3):
+                    lote.adicionar(criar_cupom(numero, quantidade_produtos=3))
+            
+            cupons = list(repo.ler(lote.caminho))
+        
+        assert lote.caminho.name == "lote.xml.gz"
+        assert [len(c.produtos) for c in cupons] == [3, 3, 3]
@@ -0,0 +1,70 @@
+"""
+Construtores de dados compartilhados pelos testes
+"""
+from typing import List, Optional
+
+from src.models.cupom import Cupom
+from src.models.cupom_completo import CupomCompleto
+from src.models.emitente import Emitente
+from src.models.produto import Produto
+
+
+def chave_teste(numero: int = 1) -> str:
+    """Chave de acesso de teste (44 dígitos) terminada em `numero`"""
+    return f"3526011234567800019059000420207000{numero:010d}"
+
+
+CHAVE = chave_teste(1234567890)
+
+
+def criar_produtos(itens: int = 1, **campos) -> List[Produto]:
+    """
+    Cria produtos de teste numerados a partir de 0
+    
+    Args:
+        itens: Número de produtos
+        **campos: Campos de Produto que substituem os padrões (iguais em
+            todos os produtos)
+    """
+    produtos = []
+    
+    for i in range(itens):
+        dados = dict(
+            codigo_ncm="22021000", descricao=f"Produto {i}", quantidade="1,5000",
+            valor_liquido="10,50", valor_total="10,50", cod_produto=str(i), cod_gtin=None
+        )
+        dados.update(campos)
+        produtos.append(Produto(**dados))
+    
+    return produtos
+
+
+def criar_cupom(
+    numero: Optional[int] = 1,
+    quantidade_produtos: int = 2,
+    emitente: Optional[Emitente] = None,
+    cupom: Optional[Cupom] = None,
+    produtos: Optional[List[Produto]] = None,
+    **campos
+) -> CupomCompleto:
+    """
+    Cria um cupom de teste
+    
+    Args:
+        numero: Final da chave de acesso (None: cupom sem chave)
+        quantidade_produtos: Produtos criados com criar_produtos, se
+            `produtos` não for informado
+        emitente: Emitente (padrão: "Loja", CNPJ 12.345.678/0001-90)
+        cupom: Dados do cupom (padrão: total R$ 1.234,56 em 22/01/2026)
+        produtos: Lista de produtos
+        **campos: Demais campos de CupomCompleto (consumidor, local_entrega,
+            chave_acesso...)
+    """
+    dados = dict(
+        emitente=emitente or Emitente(nome="Loja", cnpj="12.345.678/0001-90"),
+        cupom=cupom or Cupom(total="R$ 1.234,56", data_hora="22/01/2026 - 20:03:41", troco="0,00"),
+        produtos=criar_produtos(quantidade_produtos) if produtos is None else produtos,
+        chave_acesso=chave_teste(numero) if numero is not None else None,
+    )
+    dados.update(campos)
+    return CupomCompleto(**dados)
\ No newline at end of file
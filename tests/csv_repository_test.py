@@ -6,7 +6,9 @@ from pathlib import Path
 from unittest.mock import Mock, patch
 import tempfile
 
-from src.repositories.csv_repository import CSVRepository
+import pytest
+
+from src.repositories.csv_repository import CSVLoteWriter, CSVRepository
 from src.models.cupom_completo import CupomCompleto
 from src.models.emitente import Emitente
 from src.models.consumidor import Consumidor
@@ -160,9 +162,9 @@ class TestCSVRepository:
         cupom = Cupom(total="30,00")
         
         produtos = [
-            Produto(codigo_ncm="111", descricao="P1", quantidade="1", 
+            Produto(codigo_ncm="111", descricao="P1", quantidade="1",
                    valor_liquido="10", valor_total="10", cod_produto="111", cod_gtin=None),
-            Produto(codigo_ncm="222", descricao="P2", quantidade="2", 
+            Produto(codigo_ncm="222", descricao="P2", quantidade="2",
                    valor_liquido="10", valor_total="20", cod_produto="222", cod_gtin=None),
         ]
         
@@ -291,4 +293,204 @@ class TestCSVRepository:
             
             caminho = repo.salvar(cupom_completo, nome_arquivo="arquivo_sem_extensao")
             
-            assert caminho.name == "arquivo_sem_extensao.csv"
\ No newline at end of file
+            assert caminho.name == "arquivo_sem_extensao.csv"
+    
+    def test_salvar_nome_automatico_sem_colisao(self):
+        """Testa que dois cupons do mesmo CNPJ no mesmo segundo não se sobrescrevem"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = CSVRepository(diretorio=Path(tmpdir))
+            
+            cupom_completo = CupomCompleto(
+                emitente=Emitente(nome="Loja", cnpj="12345678000190"),
+                cupom=Cupom(total="10,00"),
+                produtos=[]
+            )
+            
+            with patch('src.repositories.csv_repository.datetime') as mock_datetime:
+                mock_datetime.now.return_value.strftime.return_value = "20260101_120000"
+                
+                caminho_1 = repo.salvar(cupom_completo)
+                caminho_2 = repo.salvar(cupom_completo)
+            
+            assert caminho_1 != caminho_2
+            assert caminho_1.exists() and caminho_2.exists()
+            assert caminho_2.name == "cupom_12345678000190_20260101_120000_2.csv"
+
+
+class TestCSVLoteWriter:
+    """Testes para o arquivo CSV único de lote"""
+    
+    @staticmethod
+    def _criar_cupom(nome: str, quantidade_produtos: int) -> CupomCompleto:
+        produtos = [
+            Produto(codigo_ncm="12345678", descricao=f"{nome}-{i}", quantidade="1",
+                    valor_liquido="1,00", valor_total="1,00", cod_produto="12345678", cod_gtin=None)
+            for i in range(quantidade_produtos)
+        ]
+        return CupomCompleto(
+            emitente=Emitente(nome=nome, cnpj="12345678000190"),
+            cupom=Cupom(total="10,00"),
+            produtos=produtos
+        )
+    
+    def test_lote_cabecalho_unico(self):
+        """Testa que vários cupons vão para um arquivo com um cabeçalho"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = CSVRepository(diretorio=Path(tmpdir))
+            
+            with repo.abrir_lote('teste') as lote:
+                lote.adicionar(self._criar_cupom("A", 2))
+                lote.adicionar(self._criar_cupom("B", 3))
+            
+            assert len(lote.arquivos) == 1
+            
+            with open(lote.arquivos[0], 'r', encoding='utf-8-sig') as f:
+                linhas = list(csv.reader(f, delimiter=';'))
+            
+            assert len(linhas) == 1 + 5
+            assert sum(1 for linha in linhas if linha[0] == 'Emitente_Nome') == 1
+    
+    def test_lote_rotacao_por_linhas(self):
+        """Testa rotação sem dividir as linhas de um cupom"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = CSVRepository(diretorio=Path(tmpdir))
+            
+            with repo.abrir_lote('teste', max_linhas=4) as lote:
+                lote.adicionar(self._criar_cupom("A", 3))
+                lote.adicionar(self._criar_cupom("B", 3))  # Não cabe: novo arquivo
+                lote.adicionar(self._criar_cupom("C", 1))
+            
+            assert len(lote.arquivos) == 2
+            assert lote.cupons_escritos == 3
+            
+            with open(lote.arquivos[1], 'r', encoding='utf-8-sig') as f:
+                linhas = list(csv.reader(f, delimiter=';'))
+            
+            assert linhas[0][0] == 'Emitente_Nome'
+            assert [linha[0] for linha in linhas[1:]] == ["B", "B", "B", "C"]
+    
+    def test_lote_rotacao_por_tamanho(self):
+        """Testa rotação por tamanho de arquivo"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = CSVRepository(diretorio=Path(tmpdir))
+            
+            with repo.abrir_lote('teste', max_bytes=1) as lote:
+                lote.adicionar(self._criar_cupom("A", 1))
+                lote.adicionar(self._criar_cupom("B", 1))
+            
+            assert len(lote.arquivos) == 2
+    
+    def test_lote_tamanho_sem_esvaziar_buffer(self):
+        """Testa que a medição para rotação não força a escrita do buffer e bate com o arquivo"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = CSVRepository(diretorio=Path(tmpdir))
+            
+            with CSVLoteWriter(repo, 'teste', max_bytes=10 ** 6, flush_a_cada=1000,
+                               buffer_bytes=1 << 20) as lote:
+                lote.adicionar(self._criar_cupom("Ação", 2))
+                lote.adicionar(self._criar_cupom("B", 1))
+                
+                assert lote.caminho_atual.stat().st_size == 0
+                medido = lote._tamanho_arquivo()
+            
+            # Inclui os 3 bytes do BOM do utf-8-sig
+            assert medido == lote.arquivos[0].stat().st_size
+
+
+class TestCSVNormalizado:
+    """Testes para o layout normalizado (cupons + produtos)"""
+    
+    CHAVE = "35260112345678000190590004202070001234567890"
+    
+    def _criar_cupom(self, quantidade_produtos: int = 2, chave: str = CHAVE) -> CupomCompleto:
+        produtos = [
+            Produto(codigo_ncm="12345678", descricao=f"Item {i}", quantidade="1,5",
+                    valor_liquido="234,5", valor_total="10,25", cod_produto=str(i), cod_gtin=None)
+            for i in range(quantidade_produtos)
+        ]
+        return CupomCompleto(
+            emitente=Emitente(nome="Loja", cnpj="12345678000190"),
+            cupom=Cupom(total="R$ 1.234,56", troco="0,00"),
+            produtos=produtos,
+            chave_acesso=chave
+        )
+    
+    @staticmethod
+    def _ler(caminho: Path) -> list:
+        with open(caminho, 'r', encoding='utf-8-sig') as f:
+            return list(csv.reader(f, delimiter=';'))
+    
+    def test_layout_invalido(self):
+        """Testa que layout desconhecido é rejeitado"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with pytest.raises(ValueError):
+                CSVRepository(diretorio=Path(tmpdir), layout='colunar')
+    
+    def test_salvar_dois_arquivos(self):
+        """Testa que os dados gerais aparecem uma vez e os produtos levam a chave"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = CSVRepository(diretorio=Path(tmpdir), layout='normalizado')
+            caminho = repo.salvar(self._criar_cupom(3), nome_arquivo="teste")
+            
+            cupons = self._ler(caminho)
+            produtos = self._ler(Path(tmpdir) / "teste_produtos.csv")
+        
+        assert caminho.name == "teste_cupons.csv"
+        assert len(cupons) == 2
+        assert cupons[0][0] == 'Chave_Acesso'
+        assert not any(coluna.startswith('Produto_') for coluna in cupons[0])
+        assert cupons[1][0] == self.CHAVE
+        assert cupons[1][cupons[0].index('Cupom_Total')] == "1234,56"
+        
+        assert len(produtos) == 4
+        assert [linha[0] for linha in produtos[1:]] == [self.CHAVE] * 3
+        assert [linha[1] for linha in produtos[1:]] == ["1", "2", "3"]
+        assert produtos[1][5:8] == ["1,5000", "234,50", "10,25"]
+    
+    def test_decimal_configuravel(self):
+        """Testa que o separador decimal vem de settings.CSV_DECIMAL"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = CSVRepository(diretorio=Path(tmpdir), layout='normalizado')
+            
+            with patch('src.repositories.csv_repository.settings.CSV_DECIMAL', '.'):
+                repo.salvar(self._criar_cupom(1), nome_arquivo="teste")
+            
+            produtos = self._ler(Path(tmpdir) / "teste_produtos.csv")
+        
+        assert produtos[1][6] == "234.50"
+    
+    def test_lote_rotaciona_os_dois_arquivos(self):
+        """Testa lote normalizado com rotação pelo arquivo de produtos"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = CSVRepository(diretorio=Path(tmpdir), layout='normalizado')
+            
+            with repo.abrir_lote('teste', max_linhas=4) as lote:
+                lote.adicionar(self._criar_cupom(3, chave=self.CHAVE[:-1] + "1"))
+                lote.adicionar(self._criar_cupom(3, chave=self.CHAVE[:-1] + "2"))
+                lote.adicionar(self._criar_cupom(1, chave=self.CHAVE[:-1] + "3"))
+            
+            assert len(lote.arquivos) == 2
+            assert len(lote.arquivos_produtos) == 2
+            assert "_parte0002_produtos_" in lote.arquivos_produtos[1].name
+            
+            cupons = self._ler(lote.arquivos[1])
+            produtos = self._ler(lote.arquivos_produtos[1])
+        
+        assert [linha[0][-1] for linha in cupons[1:]] == ["2", "3"]
+        assert [linha[0][-1] for linha in produtos[1:]] == ["2", "2", "2", "3"]
+    
+    def test_lote_nao_sobrescreve_produtos(self):
+        """Testa o nome do arquivo de produtos com "_cupons" no nome do lote e com o nome já ocupado"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = CSVRepository(diretorio=Path(tmpdir), layout='normalizado')
+            ocupado = Path(tmpdir) / "meus_cupons_parte0001_produtos_agora.csv"
+            ocupado.write_text("existente")
+            
+            with patch('src.repositories.csv_repository.settings.DATETIME_FORMAT', 'agora'):
+                with repo.abrir_lote('meus_cupons') as lote:
+                    lote.adicionar(self._criar_cupom(2))
+            
+            assert lote.arquivos[0].name == "meus_cupons_parte0001_cupons_agora_2.csv"
+            assert lote.arquivos_produtos[0].name == "meus_cupons_parte0001_produtos_agora_2.csv"
+            assert len(self._ler(lote.arquivos_produtos[0])) == 3
+            assert ocupado.read_text() == "existente"
\ No newline at end of file
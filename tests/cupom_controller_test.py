@@ -3,12 +3,18 @@ Testes unitários para CupomController
 """
 from unittest.mock import Mock, patch, MagicMock
 from pathlib import Path
+import sqlite3
+import tempfile
+
+import pytest
 
 from src.controller.cupom_controller import CupomController
 from src.models.cupom_completo import CupomCompleto
 from src.models.emitente import Emitente
 from src.models.cupom import Cupom
 from src.models.produto import Produto
+from src.repositories.fila_repository import MemoriaFilaRepository, STATUS_CONCLUIDA, STATUS_PENDENTE
+from src.services.saida_service import DestinoRepositorio, criar_destinos
 
 
 class TestCupomController:
@@ -257,4 +263,182 @@ class TestCupomController:
                     # Verifica que salvou com nome customizado
                     mock_csv.assert_called_once()
                     args, kwargs = mock_csv.call_args
-                    assert kwargs.get('nome_arquivo') == nome_custom
\ No newline at end of file
+                    assert kwargs.get('nome_arquivo') == nome_custom
+    
+    def test_processar_fila(self):
+        """Testa consumo de fila com ack no sucesso e nack no erro"""
+        controller = CupomController()
+        fila = MemoriaFilaRepository()
+        fila.adicionar(["chave_ok", "chave_erro"])
+        
+        with patch.object(controller, 'processar_cupom') as mock_processar:
+            mock_processar.side_effect = [
+                (True, None, Path("/tmp/1.csv"), "Sucesso"),
+                (False, None, None, "Erro"),
+            ]
+            
+            resultados = controller.processar_fila(fila, max_cupons=2)
+        
+        assert resultados['total'] == 2
+        assert resultados['sucesso'] == 1
+        assert resultados['erro'] == 1
+        assert fila.contagem() == {STATUS_CONCLUIDA: 1, STATUS_PENDENTE: 1}
+    
+    def test_processar_fila_confirma_apos_gravar(self):
+        """Testa que, com escrita em segundo plano, a chave só é confirmada após a gravação"""
+        repositorio = Mock()
+        repositorio.salvar.side_effect = [Path("/tmp/1.csv"), Exception("disco cheio")]
+        controller = CupomController(destinos=[DestinoRepositorio('csv', repositorio)])
+        fila = MemoriaFilaRepository()
+        fila.adicionar(["1" * 44, "2" * 44])
+        
+        cupom_mock = CupomCompleto(emitente=Emitente(nome="Loja"), cupom=Cupom(total="10,00"), produtos=[])
+        
+        with patch.object(controller.qrcode_service, 'processar_entrada', side_effect=lambda chave: chave):
+            with patch.object(controller.web_scraper, 'extrair_dados_cupom', return_value=cupom_mock):
+                with patch.object(fila, 'confirmar', wraps=fila.confirmar) as mock_confirmar:
+                    resultados = controller.processar_fila(fila, max_cupons=2)
+        
+        controller.fechar()
+        
+        # A chave cuja gravação falhou volta para a fila
+        assert resultados['sucesso'] == 1
+        assert resultados['erro'] == 1
+        assert "disco cheio" in resultados['cupons'][1]['mensagem']
+        assert mock_confirmar.call_count == 1
+        assert fila.contagem() == {STATUS_CONCLUIDA: 1, STATUS_PENDENTE: 1}
+    
+    def test_processar_fila_confirma_lote_apos_commit(self):
+        """Testa que, com destino de lote, a chave só é confirmada após o commit do cupom"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            banco = Path(tmpdir) / "cupons.db"
+            controller = CupomController(destinos=criar_destinos(['sqlite'], Path(tmpdir)))
+            fila = MemoriaFilaRepository()
+            fila.adicionar([f"3526011234567800019059000420207000{numero:010d}" for numero in range(3)])
+            gravados_no_ack = []
+            
+            def confirmar(tarefa):
+                with sqlite3.connect(banco) as conexao:
+                    try:
+                        gravados_no_ack.append(conexao.execute(
+                            "SELECT COUNT(*) FROM cupom WHERE chave = ?", (tarefa.chave,)
+                        ).fetchone()[0])
+                    except sqlite3.OperationalError:
+                        # Banco ainda sem o schema: nada foi gravado
+                        gravados_no_ack.append(0)
+                return MemoriaFilaRepository.confirmar(fila, tarefa)
+            
+            def extrair(chave):
+                return CupomCompleto(emitente=Emitente(nome="Loja"), cupom=Cupom(total="10,00"),
+                                     produtos=[], chave_acesso=chave)
+            
+            with patch.object(controller.qrcode_service, 'processar_entrada', side_effect=lambda chave: chave):
+                with patch.object(controller.web_scraper, 'extrair_dados_cupom', side_effect=extrair):
+                    with patch.object(fila, 'confirmar', side_effect=confirmar):
+                        resultados = controller.processar_fila(fila, max_cupons=3)
+            
+            controller.fechar()
+        
+        assert resultados['sucesso'] == 3
+        assert gravados_no_ack == [1, 1, 1]
+        assert fila.contagem() == {STATUS_CONCLUIDA: 3}
+    
+    def test_processar_cupons_stream(self):
+        """Testa processamento sob demanda com contadores incrementais"""
+        controller = CupomController()
+        
+        def gerar_chaves():
+            yield "chave_1"
+            yield "chave_2"
+            yield "chave_3"
+        
+        with patch.object(controller, 'processar_cupom') as mock_processar:
+            mock_processar.side_effect = [
+                (True, None, Path("/tmp/1.csv"), "Sucesso"),
+                (False, None, None, "Erro"),
+                (True, None, None, "Sucesso"),
+            ]
+            
+            resultados = list(controller.processar_cupons_stream(gerar_chaves()))
+        
+        assert [r['indice'] for r in resultados] == [1, 2, 3]
+        assert resultados[0]['arquivo'] == "/tmp/1.csv"
+        assert resultados[-1]['total_sucesso'] == 2
+        assert resultados[-1]['total_erro'] == 1
+    
+    def test_processar_cupom_escrita_em_segundo_plano(self):
+        """Testa que o salvamento vai para a thread de escrita sem bloquear"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            controller = CupomController(
+                diretorio_saida=Path(tmpdir),
+                escrita_em_segundo_plano=True
+            )
+            
+            cupom_mock = CupomCompleto(
+                emitente=Emitente(nome="Loja Teste", cnpj="12.345.678/0001-90"),
+                cupom=Cupom(total="100,00"),
+                produtos=[]
+            )
+            
+            with patch.object(controller.qrcode_service, 'processar_entrada') as mock_qr:
+                mock_qr.return_value = "1" * 44
+                
+                with patch.object(controller.web_scraper, 'extrair_dados_cupom') as mock_scraper:
+                    mock_scraper.return_value = cupom_mock
+                    
+                    sucesso, cupom, arquivo, mensagem = controller.processar_cupom("1" * 44)
+            
+            controller.fechar()
+            
+            assert sucesso is True
+            assert arquivo is None
+            assert "segundo plano" in mensagem
+            assert controller.saidas.metricas()['csv']['salvos'] == 1
+            assert len(list(Path(tmpdir).glob("*.csv"))) == 1
+    
+    def test_processar_cupons_stream_interrompido(self):
+        """Testa que o chamador pode interromper o lote no meio"""
+        controller = CupomController()
+        
+        with patch.object(controller, 'processar_cupom') as mock_processar:
+            mock_processar.return_value = (True, None, None, "Sucesso")
+            
+            stream = controller.processar_cupons_stream(iter(["a", "b", "c"]))
+            primeiro = next(stream)
+            stream.close()
+        
+        assert primeiro['indice'] == 1
+        assert mock_processar.call_count == 1
+    
+    def test_arquivo_unico_com_destinos(self):
+        """Testa que arquivo_unico é recusado quando há destinos de saída"""
+        controller = CupomController(destinos=[DestinoRepositorio('csv', Mock())])
+        
+        with patch.object(controller, 'processar_cupom') as mock_processar:
+            with pytest.raises(ValueError, match="csv_lote"):
+                next(controller.processar_cupons_stream(["a"], arquivo_unico=True))
+        
+        controller.fechar()
+        mock_processar.assert_not_called()
+    
+    def test_ler_chaves_arquivo(self):
+        """Testa leitura preguiçosa de chaves de arquivo"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            caminho = Path(tmpdir) / "chaves.txt"
+            caminho.write_text("chave_1\n\n  chave_2  \n", encoding='utf-8')
+            
+            chaves = CupomController.ler_chaves_arquivo(caminho)
+            
+            assert not isinstance(chaves, list)
+            assert list(chaves) == ["chave_1", "chave_2"]
+    
+    def test_ler_chaves_imagens(self):
+        """Testa que as chaves lidas das imagens chegam sem repetição"""
+        chave = "35260112345678000190590004202070001234567890"
+        leituras = {"a.png": (chave, 'ok'), "b.png": (None, 'sem_qrcode'), "c.png": (chave, 'ok')}
+        
+        with patch('src.services.qrcode_lote_service.QRCodeService.decodificar_imagem',
+                   side_effect=lambda caminho, **_: leituras[Path(caminho).name]):
+            chaves = CupomController.ler_chaves_imagens([Path(nome) for nome in leituras], processos=1)
+            
+            assert list(chaves) == [chave]
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Testes unitários para conversão de data/hora de emissão
+"""
+from datetime import datetime
+
+import pandas as pd
+
+from src.utils.datas import para_datetime, para_datetimes
+
+
+class TestParaDatetime:
+    """Testes para conversão da data/hora da página"""
+    
+    def test_formato_sefaz(self):
+        """Testa o formato exibido pela SEFAZ-SP"""
+        assert para_datetime("22/01/2026 - 20:03:41") == datetime(2026, 1, 22, 20, 3, 41)
+    
+    def test_formato_iso(self):
+        """Testa formato ISO"""
+        assert para_datetime("2026-01-22 20:00:00") == datetime(2026, 1, 22, 20, 0, 0)
+    
+    def test_invalido(self):
+        """Testa valores não reconhecidos"""
+        assert para_datetime("invalida") is None
+        assert para_datetime(None) is None
+    
+    def test_formato_sem_hifen(self):
+        """Testa data/hora sem o hífen separador"""
+        assert para_datetime(" 01/02/2024 10:00:00 ") == datetime(2024, 2, 1, 10, 0, 0)
+    
+    def test_caminho_rapido_igual_strptime(self):
+        """Testa que o caminho rápido concorda com strptime"""
+        for texto in ("01/01/2000 - 00:00:00", "31/12/2099 - 23:59:59", "29/02/2024 - 12:30:15"):
+            assert para_datetime(texto) == datetime.strptime(texto, '%d/%m/%Y - %H:%M:%S')
+    
+    def test_data_impossivel(self):
+        """Testa data com o layout da SEFAZ mas inexistente"""
+        assert para_datetime("31/02/2026 - 20:03:41") is None
+        assert para_datetime("22/01/2026 - 25:03:41") is None
+        assert para_datetime("2a/01/2026 - 20:03:41") is None
+
+
+class TestParaDatetimes:
+    """Testes para a conversão em lote"""
+    
+    def test_lote_misto(self):
+        """Testa formatos diferentes, vazios e inválidos no mesmo lote"""
+        datas = para_datetimes([
+            "22/01/2026 - 20:03:41", None, "", "2026-01-22 20:00:00", "invalida", "01/02/2024 10:00:00",
+        ])
+        
+        assert list(datas[[0, 3, 5]]) == [
+            pd.Timestamp(2026, 1, 22, 20, 3, 41),
+            pd.Timestamp(2026, 1, 22, 20, 0, 0),
+            pd.Timestamp(2024, 2, 1, 10, 0, 0),
+        ]
+        assert datas[[1, 2, 4]].isna().all()
+    
+    def test_igual_ao_individual(self):
+        """Testa que o lote concorda com para_datetime"""
+        textos = [f"{dia:02d}/03/2025 - 08:{dia:02d}:00" for dia in range(1, 29)]
+        
+        assert list(para_datetimes(textos)) == [pd.Timestamp(para_datetime(t)) for t in textos]
+    
+    def test_casos_limite_iguais_ao_individual(self):
+        """Testa datas impossíveis, textos maiores/menores e dígitos não ASCII"""
+        textos = [
+            "31/02/2026 - 20:03:41", "29/02/2024 - 23:59:59", "29/02/2023 - 10:00:00",
+            "1/2/2024 - 10:00:00", "01/02/2024 - 10:00:000", "0１/02/2024 - 10:00:00",
+            "01/13/2024 - 10:00:00", " 01/02/2024 - 10:00:00 ",
+        ]
+        
+        esperado = [para_datetime(texto) for texto in textos]
+        obtido = [None if pd.isna(data) else data.to_pydatetime() for data in para_datetimes(textos)]
+        
+        assert obtido == esperado
+    
+    def test_fora_do_intervalo_do_pandas(self):
+        """Testa anos fora do datetime64[ns] (1678 a 2261): NaT"""
+        assert para_datetimes(["01/02/0001 - 10:00:00"]).isna().all()
+    
+    def test_vazio(self):
+        """Testa lote vazio"""
+        assert len(para_datetimes([])) == 0
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Testes unitários para ExcelRepository
+"""
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from src.repositories.excel_repository import ExcelRepository
+from tests.conftest import criar_cupom
+
+
+class TestExcelRepository:
+    """Testes para o repositório Excel"""
+    
+    def test_abas_com_celulas_tipadas(self):
+        """Testa as abas cupons/produtos e os tipos das células"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = ExcelRepository(diretorio=Path(tmpdir))
+            caminho = repo.salvar(criar_cupom(), nome_arquivo="teste")
+            
+            planilha = load_workbook(caminho, read_only=True)
+            cupons = list(planilha['cupons'].iter_rows(values_only=True))
+            produtos = list(planilha['produtos'].iter_rows(values_only=True))
+            planilha.close()
+        
+        assert caminho.name == "teste.xlsx"
+        assert cupons[0][0] == "Chave_Acesso"
+        assert len(cupons) == 2
+        assert cupons[1][7] == datetime(2026, 1, 22, 20, 3, 41)
+        assert cupons[1][8] == 1234.56
+        assert len(produtos) == 3
+        assert produtos[1][0] == cupons[1][0]
+        assert produtos[2][1] == 2
+        assert produtos[1][6] == 1.5
+    
+    def test_divide_abas_no_limite(self):
+        """Testa que novas abas são criadas ao atingir o limite de linhas"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = ExcelRepository(diretorio=Path(tmpdir))
+            
+            with repo.abrir_lote('lote', max_linhas=5) as lote:
+                for numero in range(5):
+                    lote.adicionar(criar_cupom(numero, quantidade_produtos=3))
+            
+            planilha = load_workbook(lote.caminho, read_only=True)
+            linhas = {aba: sum(1 for _ in planilha[aba].iter_rows()) for aba in planilha.sheetnames}
+            planilha.close()
+        
+        # 4 cupons por aba; 1 cupom (3 produtos) por aba, sem dividir o cupom
+        assert linhas == {
+            'cupons': 5, 'cupons_2': 2,
+            'produtos': 4, 'produtos_2': 4, 'produtos_3': 4, 'produtos_4': 4, 'produtos_5': 4,
+        }
+    
+    def test_nao_sobrescreve(self):
+        """Testa que cupons do mesmo segundo e lotes abertos ao mesmo tempo ganham sufixo"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = ExcelRepository(diretorio=Path(tmpdir))
+            primeiro = repo.salvar(criar_cupom(1))
+            segundo = repo.salvar(criar_cupom(2))
+            
+            (Path(tmpdir) / "lote.xlsx").write_text("existente")
+            with repo.abrir_lote('lote') as lote, repo.abrir_lote('lote') as outro:
+                lote.adicionar(criar_cupom(3))
+                outro.adicionar(criar_cupom(4))
+            
+            chaves = []
+            for caminho in (primeiro, segundo, lote.caminho, outro.caminho):
+                planilha = load_workbook(caminho, read_only=True)
+                chaves += [linha[0][-1] for linha in planilha['cupons'].iter_rows(min_row=2, values_only=True)]
+                planilha.close()
+            
+            assert primeiro != segundo
+            assert (lote.caminho.name, outro.caminho.name) == ("lote_2.xlsx", "lote_3.xlsx")
+            assert chaves == ["1", "2", "3", "4"]
+            assert (Path(tmpdir) / "lote.xlsx").read_text() == "existente"
+    
+    def test_lote_vazio(self):
+        """Testa que um lote sem cupons gera planilha válida só com cabeçalhos"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = ExcelRepository(diretorio=Path(tmpdir))
+            
+            with repo.abrir_lote('vazio') as lote:
+                pass
+            
+            planilha = load_workbook(lote.caminho, read_only=True)
+            
+            assert planilha.sheetnames == ['cupons', 'produtos']
+            planilha.close()
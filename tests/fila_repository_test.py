@@ -0,0 +1,133 @@
+"""
+Testes unitários para os repositórios de fila de trabalho
+"""
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from src.repositories.fila_repository import (
+    MemoriaFilaRepository,
+    SQLiteFilaRepository,
+    STATUS_CONCLUIDA,
+    STATUS_FALHA,
+    STATUS_PENDENTE,
+)
+
+
+@pytest.fixture(params=['memoria', 'sqlite'])
+def criar_fila(request):
+    """Fábrica de filas das duas implementações"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filas = []
+        
+        def _criar(**kwargs):
+            if request.param == 'memoria':
+                fila = MemoriaFilaRepository(**kwargs)
+            else:
+                fila = SQLiteFilaRepository(caminho=Path(tmpdir) / "fila.db", **kwargs)
+            filas.append(fila)
+            return fila
+        
+        yield _criar
+        
+        for fila in filas:
+            if isinstance(fila, SQLiteFilaRepository):
+                fila.fechar()
+
+
+class TestFilaRepository:
+    """Testes da semântica de lease, ack e nack"""
+    
+    def test_adicionar_ignora_repetidas(self, criar_fila):
+        """Testa que chaves repetidas não entram duas vezes"""
+        fila = criar_fila()
+        
+        assert fila.adicionar(["A", "B", "A"]) == 2
+        assert fila.adicionar(["B", "C"]) == 1
+        assert fila.contagem()[STATUS_PENDENTE] == 3
+    
+    def test_obter_e_confirmar(self, criar_fila):
+        """Testa lease e ack"""
+        fila = criar_fila()
+        fila.adicionar(["A"])
+        
+        tarefa = fila.obter("worker-1")
+        
+        assert tarefa.chave == "A"
+        assert tarefa.tentativas == 1
+        assert fila.obter("worker-2") is None  # Invisível durante o lease
+        
+        assert fila.confirmar(tarefa) is True
+        assert fila.contagem() == {STATUS_CONCLUIDA: 1}
+        assert fila.possui_trabalho() is False
+    
+    def test_rejeitar_reenfileira(self, criar_fila):
+        """Testa nack devolvendo a tarefa para a fila"""
+        fila = criar_fila()
+        fila.adicionar(["A"])
+        
+        tarefa = fila.obter("worker-1")
+        assert fila.rejeitar(tarefa, erro="falhou") is True
+        
+        nova = fila.obter("worker-2")
+        assert nova.chave == "A"
+        assert nova.tentativas == 2
+    
+    def test_lease_expirado_volta_para_fila(self, criar_fila):
+        """Testa que lease de worker morto expira e vai para outro worker"""
+        fila = criar_fila(visibilidade=0.05)
+        fila.adicionar(["A"])
+        
+        tarefa_morta = fila.obter("worker-morto")
+        time.sleep(0.1)
+        
+        tarefa = fila.obter("worker-vivo")
+        
+        assert tarefa.chave == "A"
+        assert tarefa.token != tarefa_morta.token
+        
+        # O worker morto não pode mais confirmar
+        assert fila.confirmar(tarefa_morta) is False
+        assert fila.confirmar(tarefa) is True
+    
+    def test_max_tentativas(self, criar_fila):
+        """Testa que a tarefa vai para falha após esgotar tentativas"""
+        fila = criar_fila(max_tentativas=2)
+        fila.adicionar(["A"])
+        
+        fila.rejeitar(fila.obter("w"))
+        fila.rejeitar(fila.obter("w"))
+        
+        assert fila.obter("w") is None
+        assert fila.contagem() == {STATUS_FALHA: 1}
+    
+    def test_estender_lease(self, criar_fila):
+        """Testa renovação do lease"""
+        fila = criar_fila(visibilidade=0.05)
+        fila.adicionar(["A"])
+        
+        tarefa = fila.obter("w")
+        assert fila.estender(tarefa, visibilidade=60) is True
+        
+        time.sleep(0.1)
+        assert fila.obter("outro") is None
+    
+    def test_sqlite_compartilhado_entre_conexoes(self):
+        """Testa duas instâncias (nós) usando o mesmo arquivo"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            caminho = Path(tmpdir) / "fila.db"
+            no_1 = SQLiteFilaRepository(caminho=caminho)
+            no_2 = SQLiteFilaRepository(caminho=caminho)
+            
+            no_1.adicionar(["A", "B"])
+            
+            tarefa_1 = no_1.obter("no-1")
+            tarefa_2 = no_2.obter("no-2")
+            
+            assert {tarefa_1.chave, tarefa_2.chave} == {"A", "B"}
+            assert no_2.obter("no-2") is None
+            
+            no_1.fechar()
+            no_2.fechar()
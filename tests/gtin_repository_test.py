@@ -0,0 +1,112 @@
+"""
+Testes unitários para o índice de códigos de barras (GTINRepository)
+"""
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from src.models.cupom_completo import CupomCompleto
+from src.models.produto import Produto
+from src.repositories.gtin_repository import GTINRepository
+from tests.conftest import criar_cupom
+
+
+CHAVE_1 = "35260112345678000190590004202070001234567890"
+CHAVE_2 = "35260112345678000190590004202070001234567891"
+
+
+def criar_cupom_gtins(chave: str, gtins: list) -> CupomCompleto:
+    """Cria um cupom com um produto por GTIN"""
+    produtos = [
+        Produto(codigo_ncm="22021000", valor_liquido="1,00", cod_produto=str(i),
+                cod_gtin=gtin, valor_total="1,00")
+        for i, gtin in enumerate(gtins)
+    ]
+    return criar_cupom(produtos=produtos, chave_acesso=chave)
+
+
+@pytest.fixture
+def indice():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repo = GTINRepository(caminho=Path(tmpdir) / "gtin.db", tamanho_lote=2)
+        yield repo
+        repo.fechar()
+
+
+class TestGTINRepository:
+    """Testes para o índice GTIN -> (chave, item)"""
+    
+    def test_buscar_todas_as_compras(self, indice):
+        """Testa a busca das ocorrências de um GTIN em vários cupons"""
+        indice.salvar_varios([
+            criar_cupom_gtins(CHAVE_1, ["7891234567895", "96385074", "7891234567895"]),
+            criar_cupom_gtins(CHAVE_2, ["96385074", "7891234567895"]),
+        ])
+        
+        assert indice.buscar("7891234567895") == [(CHAVE_1, 1), (CHAVE_1, 3), (CHAVE_2, 2)]
+        assert indice.contar("96385074") == 2
+    
+    def test_gtin_13_e_14_equivalentes(self, indice):
+        """Testa que a busca aceita o GTIN com ou sem zeros à esquerda"""
+        indice.salvar(criar_cupom_gtins(CHAVE_1, ["07891234567895"]))
+        
+        assert indice.buscar("7891234567895") == [(CHAVE_1, 1)]
+    
+    def test_ignora_gtin_ausente_ou_invalido(self, indice):
+        """Testa que só GTINs válidos entram no índice"""
+        indice.salvar(criar_cupom_gtins(CHAVE_1, [None, "7891234567890", "96385074"]))
+        
+        assert indice.gtins(CHAVE_1) == [(3, "00000096385074")]
+        assert indice.buscar("7891234567890") == []
+        assert indice.contar("abc") == 0
+    
+    def test_reindexar_substitui_cupom(self, indice):
+        """Testa que indexar o cupom de novo não duplica ocorrências"""
+        indice.salvar(criar_cupom_gtins(CHAVE_1, ["7891234567895", "96385074"]))
+        indice.salvar(criar_cupom_gtins(CHAVE_1, ["96385074"]))
+        
+        assert indice.buscar("7891234567895") == []
+        assert indice.buscar("96385074") == [(CHAVE_1, 1)]
+    
+    def test_adicionar_em_lote_e_persistir(self):
+        """Testa o acúmulo em lote e a leitura do índice em outra conexão"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            caminho = Path(tmpdir) / "gtin.db"
+            
+            with GTINRepository(caminho=caminho, tamanho_lote=2) as indice:
+                indice.adicionar(criar_cupom_gtins(CHAVE_1, ["96385074"]))
+                assert indice.contar("96385074") == 0
+                indice.adicionar(criar_cupom_gtins(CHAVE_2, ["96385074"]))
+                assert indice.contar("96385074") == 2
+                indice.adicionar(criar_cupom_gtins("3" * 44, ["96385074"]))
+            
+            with GTINRepository(caminho=caminho) as reaberto:
+                assert reaberto.contar("96385074") == 3
+    
+    def test_cupom_sem_chave(self, indice):
+        """Testa que cupom sem chave de acesso não é indexado"""
+        with pytest.raises(ValueError):
+            indice.salvar(criar_cupom_gtins(None, ["96385074"]))
+        
+        with pytest.raises(ValueError):
+            indice.adicionar(criar_cupom_gtins(None, ["96385074"]))
+        
+        assert indice.pendentes == 0
+    
+    def test_flush_isola_cupom_com_erro(self, indice):
+        """Testa que um cupom que falha sai do lote sem bloquear os demais"""
+        invalido = criar_cupom_gtins(None, ["96385074"])
+        indice.adicionar(criar_cupom_gtins(CHAVE_1, ["96385074"]))
+        indice._pendentes.append(invalido)
+        
+        indice.flush()
+        
+        assert indice.pendentes == 0
+        assert indice.buscar("96385074") == [(CHAVE_1, 1)]
+        assert [cupom for cupom, _ in indice.retirar_falhas()] == [invalido]
+        
+        indice.adicionar(criar_cupom_gtins(CHAVE_2, ["96385074"]))
+        indice.flush()
+        
+        assert indice.contar("96385074") == 2
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""
+Testes unitários para a validação de GTIN
+"""
+import pytest
+
+from src.utils.gtin import digito_verificador, gtin_valido, normalizar_gtin
+
+
+class TestGtin:
+    """Testes para gtin_valido e normalizar_gtin"""
+    
+    @pytest.mark.parametrize("codigo", [
+        "96385074",        # GTIN-8
+        "036000291452",    # GTIN-12 (UPC-A)
+        "7891234567895",   # GTIN-13
+        "17891234567892",  # GTIN-14
+    ])
+    def test_tamanhos_validos(self, codigo):
+        """Testa códigos válidos de cada tamanho"""
+        assert gtin_valido(codigo) is True
+    
+    @pytest.mark.parametrize("codigo", [
+        "7891234567890",   # Verificador errado
+        "789123456789",    # GTIN-13 sem um dígito (verificador não confere)
+        "1234567",         # Tamanho não suportado
+        "789123456789A",
+        "７８９１２３４５６７８９５",  # Dígitos fora do ASCII
+        "",
+        None,
+    ])
+    def test_codigos_invalidos(self, codigo):
+        """Testa códigos com verificador, tamanho ou caracteres inválidos"""
+        assert gtin_valido(codigo) is False
+    
+    def test_digito_verificador(self):
+        """Testa o cálculo do módulo 10"""
+        assert digito_verificador("789123456789") == 5
+        assert digito_verificador("9638507") == 4
+    
+    def test_normalizar_para_14_digitos(self):
+        """Testa que GTIN-13 e GTIN-14 do mesmo produto viram o mesmo código"""
+        assert normalizar_gtin(" 7891234567895 ") == "07891234567895"
+        assert normalizar_gtin("07891234567895") == "07891234567895"
+        assert normalizar_gtin("96385074") == "00000096385074"
+    
+    def test_normalizar_invalido(self):
+        """Testa que códigos inválidos não são normalizados"""
+        assert normalizar_gtin("7891234567890") is None
+        assert normalizar_gtin(None) is None
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+Testes unitários para JSONLRepository
+"""
+import gzip
+import importlib
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from src.models.cupom_completo import CupomCompleto
+from src.models.emitente import Emitente
+from src.models.cupom import Cupom
+from src.models.local_entrega import LocalEntrega
+from src.repositories import jsonl_repository
+from src.repositories.jsonl_repository import JSONLRepository
+from tests.conftest import criar_cupom, criar_produtos
+
+
+def criar_cupom_acentuado(numero: int = 1) -> CupomCompleto:
+    """Cupom com acentos, números float e local de entrega, para a ida e volta do JSON"""
+    return criar_cupom(
+        numero,
+        emitente=Emitente(nome="Padaria São João", cnpj="12.345.678/0001-90"),
+        cupom=Cupom(total="R$ 21,00", data_hora="22/01/2026 - 20:03:41"),
+        produtos=criar_produtos(1, codigo_ncm="19052090", descricao="Pão", quantidade=2.0,
+                                valor_liquido=10.5, valor_total=10.5, cod_produto="1"),
+        local_entrega=LocalEntrega(municipio="Campinas", uf="SP")
+    )
+
+
+class TestJSONLRepository:
+    """Testes para o repositório JSON Lines"""
+    
+    def test_uma_linha_por_cupom(self):
+        """Testa que cada salvar acrescenta uma linha ao mesmo arquivo"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = JSONLRepository(diretorio=Path(tmpdir), nome_arquivo="cupons.jsonl")
+            repo.salvar(criar_cupom_acentuado(1))
+            repo.salvar(criar_cupom_acentuado(2))
+            
+            linhas = repo.caminho.read_text(encoding='utf-8').splitlines()
+        
+        assert len(linhas) == 2
+        assert json.loads(linhas[0])['emitente']['nome'] == "Padaria São João"
+        assert json.loads(linhas[1])['chave_acesso'].endswith("0000000002")
+    
+    def test_ida_e_volta_sem_perdas(self):
+        """Testa que None e números sobrevivem (diferente de to_dict)"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = JSONLRepository(diretorio=Path(tmpdir))
+            original = criar_cupom_acentuado()
+            repo.salvar(original)
+            
+            lidos = list(repo.ler())
+        
+        assert lidos == [original]
+        assert lidos[0].consumidor is None
+        assert lidos[0].produtos[0].cod_gtin is None
+    
+    def test_gzip(self):
+        """Testa gravação compactada com vários lotes e leitura transparente"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = JSONLRepository(diretorio=Path(tmpdir), compactar=True)
+            
+            with repo.abrir_lote() as lote:
+                lote.adicionar(criar_cupom_acentuado(1))
+                lote.adicionar(criar_cupom_acentuado(2))
+            repo.salvar(criar_cupom_acentuado(3))
+            
+            with gzip.open(repo.caminho, 'rt', encoding='utf-8') as arquivo:
+                quantidade_linhas = len(arquivo.readlines())
+            
+            chaves = [c.chave_acesso[-1] for c in repo.ler()]
+        
+        assert repo.caminho.name.endswith(".jsonl.gz")
+        assert quantidade_linhas == 3
+        assert chaves == ["1", "2", "3"]
+    
+    def test_serializador_biblioteca_padrao(self, monkeypatch):
+        """Testa o caminho sem orjson (json da biblioteca padrão)"""
+        monkeypatch.setitem(sys.modules, 'orjson', None)
+        modulo = importlib.reload(jsonl_repository)
+        
+        try:
+            original = criar_cupom_acentuado()
+            linha = modulo.serializar(modulo.cupom_para_registro(original))
+            
+            assert modulo.orjson is None
+            assert linha.endswith(b"\n")
+            assert "São João".encode('utf-8') in linha
+            assert modulo.registro_para_cupom(modulo.desserializar(linha)) == original
+        finally:
+            monkeypatch.undo()
+            importlib.reload(jsonl_repository)
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+Testes unitários para o layout compacto (__slots__) dos modelos
+"""
+import pickle
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from src.models.cupom_completo import CupomCompleto
+from src.models.emitente import Emitente
+from src.models.consumidor import Consumidor
+from src.models.cupom import Cupom
+from src.models.local_entrega import LocalEntrega
+from src.models.produto import Produto
+from src.utils.datas import para_datetime
+from tests.conftest import criar_cupom
+
+
+def criar_cupom_completo() -> CupomCompleto:
+    """Cria um cupom de teste com todas as partes"""
+    return criar_cupom(
+        consumidor=Consumidor(cpf_cnpj="123.456.789-00"),
+        local_entrega=LocalEntrega(municipio="São Paulo", uf="SP")
+    )
+
+
+class TestModelosSlots:
+    """Testes para os modelos com __slots__"""
+    
+    @pytest.mark.parametrize("modelo", [Emitente, Consumidor, Cupom, LocalEntrega, Produto, CupomCompleto])
+    def test_sem_dict_por_instancia(self, modelo):
+        """Testa que os modelos não alocam __dict__ por instância"""
+        assert '__slots__' in vars(modelo)
+        assert not hasattr(modelo.__new__(modelo), '__dict__')
+    
+    def test_atributo_desconhecido(self):
+        """Testa que atributos fora dos campos são rejeitados"""
+        cupom = Cupom()
+        
+        with pytest.raises(AttributeError):
+            cupom.campo_inexistente = 1
+    
+    def test_api_preservada(self):
+        """Testa construtor posicional/nomeado, to_dict e comparação"""
+        cupom = criar_cupom_completo()
+        produto = Produto("22021000", "10,50", "1", None, "10,50")
+        
+        assert produto.valor_total == 10.5
+        assert cupom.to_dict()['produtos'][0]['Valor_Total'] == 10.5
+        assert cupom.to_dict()['resumo']['tem_consumidor'] is True
+        assert cupom.obter_chave() == cupom.chave_acesso
+        assert criar_cupom_completo() == cupom
+    
+    def test_pickle(self):
+        """Testa que os modelos continuam serializáveis (multiprocessing)"""
+        cupom = criar_cupom_completo()
+        
+        assert pickle.loads(pickle.dumps(cupom)) == cupom
+
+
+class TestCupomValores:
+    """Testes para os valores tipados do Cupom"""
+    
+    def test_valores_decimal(self):
+        """Testa total, troco e tributos como Decimal"""
+        cupom = Cupom(total="R$ 1.234,56", troco="0,44", tributos="N/A")
+        
+        assert cupom.valor_total == Decimal("1234.56")
+        assert cupom.valor_troco == Decimal("0.44")
+        assert cupom.valor_tributos is None
+        assert Cupom().valor_total is None
+
+class TestCupomEmissao:
+    """Testes para a data/hora de emissão convertida e guardada"""
+    
+    def test_emissao(self):
+        """Testa a conversão da data/hora da página"""
+        assert Cupom(data_hora="22/01/2026 - 20:03:41").emissao == datetime(2026, 1, 22, 20, 3, 41)
+        assert Cupom(data_hora="invalida").emissao is None
+        assert Cupom().emissao is None
+    
+    def test_convertida_uma_vez(self):
+        """Testa que a segunda leitura usa o valor guardado"""
+        cupom = Cupom(data_hora="22/01/2026 - 20:03:41")
+        
+        with patch('src.models.cupom.para_datetime', wraps=para_datetime) as conversao:
+            primeira = cupom.emissao
+            segunda = cupom.emissao
+        
+        assert primeira is segunda
+        assert conversao.call_count == 1
+    
+    def test_refaz_ao_alterar_texto(self):
+        """Testa que alterar data_hora invalida o valor guardado"""
+        cupom = Cupom(data_hora="22/01/2026 - 20:03:41")
+        cupom.emissao
+        
+        cupom.data_hora = "01/02/2024 - 10:00:00"
+        
+        assert cupom.emissao == datetime(2024, 2, 1, 10, 0, 0)
+    
+    def test_cache_fora_da_comparacao(self):
+        """Testa que o valor guardado não afeta ==, repr nem o construtor"""
+        cupom = Cupom(data_hora="22/01/2026 - 20:03:41")
+        cupom.emissao
+        
+        assert cupom == Cupom(data_hora="22/01/2026 - 20:03:41")
+        assert '_emissao' not in repr(cupom)
+        assert pickle.loads(pickle.dumps(cupom)).emissao == cupom.emissao
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+Testes unitários para a tabela NCM
+"""
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from src.models.produto import Produto
+from src.models.produto_batch import ProdutoBatch
+from src.services.ncm_service import TabelaNCM, normalizar_codigo
+
+
+REGISTROS = [
+    ("22", "Bebidas, líquidos alcoólicos e vinagres"),
+    ("22.02", "Águas, incluindo as águas minerais e as águas gaseificadas, adicionadas de açúcar"),
+    ("2202.10.00", "- Águas, incluindo as águas minerais e as águas gaseificadas"),
+    ("19", "Preparações à base de cereais"),
+    ("1905.90.90", "-- Outros"),
+]
+
+
+def criar_produto(ncm: str, valor: str) -> Produto:
+    """Cria um produto de teste"""
+    return Produto(codigo_ncm=ncm, valor_liquido=valor, cod_produto="1",
+                   cod_gtin=None, valor_total=valor)
+
+
+class TestTabelaNCM:
+    """Testes para TabelaNCM"""
+    
+    def test_csv_latin1_com_cabecalho(self):
+        """Testa a leitura do CSV "codigo;descricao" em latin-1"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            caminho = Path(tmpdir) / "ncm.csv"
+            linhas = ["codigo;descricao"] + [f"{codigo};{descricao}" for codigo, descricao in REGISTROS]
+            caminho.write_text("\n".join(linhas), encoding="latin-1")
+            
+            tabela = TabelaNCM(caminho)
+            
+            assert not tabela.carregada
+            assert tabela.descricao("22021000").startswith("Águas")
+            assert tabela.carregada
+            assert len(tabela) == 5
+    
+    def test_json_siscomex(self):
+        """Testa a leitura do JSON da tabela vigente do Siscomex"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            caminho = Path(tmpdir) / "ncm.json"
+            caminho.write_text(json.dumps({
+                "Data_Ultima_Atualizacao_NCM": "Vigente em 01/01/2026",
+                "Nomenclaturas": [
+                    {"Codigo": codigo, "Descricao": descricao, "Data_Inicio": "01/04/2022"}
+                    for codigo, descricao in REGISTROS
+                ] + [{"Codigo": "1905.9", "Descricao": "<i>- Outros</i>"}],
+            }), encoding="utf-8")
+            
+            tabela = TabelaNCM(caminho)
+            
+            assert tabela.descricao("19059090") == "Outros"
+            assert tabela.capitulo("19059090") == "Preparações à base de cereais"
+            assert ("19059", "Outros") in tabela.hierarquia("1905.90.90")
+    
+    def test_consultas(self):
+        """Testa descrição, níveis e códigos ausentes"""
+        tabela = TabelaNCM.de_registros(REGISTROS)
+        
+        assert tabela.capitulo("22021000") == "Bebidas, líquidos alcoólicos e vinagres"
+        assert tabela.posicao("2202.10.00").startswith("Águas")
+        assert tabela.descricao("99999999") is None
+        assert tabela.descricao(None) is None
+        assert tabela.capitulo("2") is None
+        assert "22021000" in tabela
+        assert [codigo for codigo, _ in tabela.hierarquia("22021000")] == ["22", "2202", "22021000"]
+    
+    def test_sem_arquivo(self):
+        """Testa o erro quando a tabela não existe ou não foi configurada"""
+        with pytest.raises(FileNotFoundError):
+            TabelaNCM("/nao/existe/ncm.csv").descricao("22021000")
+        
+        with pytest.raises(FileNotFoundError):
+            TabelaNCM(caminho="").descricao("22021000")
+    
+    def test_enriquecer_lote(self):
+        """Testa as colunas de classificação acrescentadas ao lote"""
+        tabela = TabelaNCM.de_registros(REGISTROS)
+        lote = ProdutoBatch.de_produtos([
+            criar_produto("22021000", "1,00"),
+            criar_produto("19059090", "2,00"),
+            criar_produto("22021000", "3,00"),
+            criar_produto("84713012", "4,00"),
+        ])
+        
+        tabela.enriquecer(lote, niveis=('capitulo', 'posicao'))
+        
+        assert lote['ncm_capitulo'].tolist() == ["22", "19", "22", "84"]
+        assert lote['ncm_capitulo_descricao'][1] == "Preparações à base de cereais"
+        assert lote['ncm_descricao'][3] is None
+        assert lote['ncm_posicao'].tolist() == ["2202", "1905", "2202", "8471"]
+        assert lote['ncm_capitulo'].codigos is lote['codigo_ncm'].codigos
+    
+    def test_totais_por_capitulo(self):
+        """Testa a soma por capítulo com NCMs diferentes no mesmo capítulo"""
+        tabela = TabelaNCM.de_registros(REGISTROS + [("2201.10.00", "- Águas minerais")])
+        lote = ProdutoBatch.de_produtos([
+            criar_produto("22021000", "1,00"),
+            criar_produto("22011000", "2,50"),
+            criar_produto("19059090", "4,00"),
+        ])
+        
+        totais = tabela.totais_por_nivel(lote, 'capitulo')
+        
+        assert totais["22"] == ("Bebidas, líquidos alcoólicos e vinagres", 3.5)
+        assert totais["19"][1] == 4.0
+    
+    def test_normalizar_codigo(self):
+        """Testa a remoção de pontos e espaços do código"""
+        assert normalizar_codigo(" 2202.10.00 ") == "22021000"
+        assert normalizar_codigo(None) == ""
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+Testes unitários para conversão de valores numéricos
+"""
+from decimal import Decimal
+
+import pytest
+
+from src.utils.numeros import normalizar_numero, para_decimal, para_float
+
+
+class TestParaDecimal:
+    """Testes para conversão de valores monetários"""
+    
+    def test_formato_brasileiro(self):
+        """Testa valores com R$, milhar e vírgula decimal"""
+        assert para_decimal("R$ 1.234,56") == Decimal("1234.56")
+        assert para_decimal("12,3") == Decimal("12.30")
+    
+    def test_numeros(self):
+        """Testa valores já numéricos"""
+        assert para_decimal(10.5) == Decimal("10.50")
+        assert para_decimal(3) == Decimal("3.00")
+    
+    def test_valores_vazios(self):
+        """Testa valores ausentes ou não numéricos"""
+        assert para_decimal(None) is None
+        assert para_decimal("") is None
+        assert para_decimal("N/A") is None
+    
+    def test_casas_decimais(self):
+        """Testa a quantidade de casas do resultado"""
+        assert para_decimal("1,23456", casas=4) == Decimal("1.2346")
+        assert para_decimal("0,5000", casas=0) == Decimal("0")
+
+
+class TestParaFloat:
+    """Testes para conversão de valores e quantidades em float"""
+    
+    @pytest.mark.parametrize("texto, esperado", [
+        ("R$ 1.234,56", 1234.56),
+        ("1.234,5", 1234.5),
+        ("1.234.567", 1234567.0),
+        ("12,34", 12.34),
+        ("12.34", 12.34),
+        ("1,0000", 1.0),
+        ("-0,50", -0.5),
+        ("R$ -3,00", -3.0),
+        ("1,234.56", 1234.56),
+        (" 10,50 ", 10.5),
+    ])
+    def test_formatos(self, texto, esperado):
+        """Testa os formatos encontrados na página e em arquivos"""
+        assert para_float(texto) == esperado
+    
+    def test_valores_invalidos(self):
+        """Testa o valor padrão para vazios e não numéricos"""
+        assert para_float(None) is None
+        assert para_float("N/A") is None
+        assert para_float("-", padrao=0.0) == 0.0
+        assert para_float("", padrao=0.0) == 0.0
+    
+    def test_numeros(self):
+        """Testa valores já numéricos"""
+        assert para_float(3) == 3.0
+        assert para_float(2.5) == 2.5
+    
+    def test_normalizar_numero(self):
+        """Testa a notação intermediária"""
+        assert normalizar_numero("R$ 1.234,56") == "1234.56"
+        assert normalizar_numero("abc") is None
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+Testes unitários para ParquetRepository
+"""
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import criar_cupom
+
+
+class TestParquetRepository:
+    """Testes para o repositório colunar"""
+    
+    def test_salvar_parquet_tipado(self):
+        """Testa que as colunas são gravadas com tipo"""
+        pq = pytest.importorskip("pyarrow.parquet")
+        from src.repositories.parquet_repository import ParquetRepository
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = ParquetRepository(diretorio=Path(tmpdir))
+            caminho = repo.salvar(criar_cupom(), nome_arquivo="teste")
+            
+            tabela = pq.read_table(caminho)
+            
+            assert caminho.name == "teste.parquet"
+            assert tabela.num_rows == 2
+            assert tabela.column('cupom_total')[0].as_py() == Decimal("1234.56")
+            assert tabela.column('produto_quantidade')[0].as_py() == 1.5
+            assert tabela.column('cupom_data_hora')[0].as_py() == datetime(2026, 1, 22, 20, 3, 41)
+    
+    def test_lote_row_groups(self):
+        """Testa gravação em row groups durante o lote"""
+        pq = pytest.importorskip("pyarrow.parquet")
+        from src.repositories.parquet_repository import ParquetRepository
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = ParquetRepository(diretorio=Path(tmpdir), tamanho_row_group=4)
+            
+            with repo.abrir_lote('lote') as lote:
+                for _ in range(3):
+                    lote.adicionar(criar_cupom())
+            
+            arquivo = pq.ParquetFile(lote.caminho)
+            
+            assert arquivo.metadata.num_rows == 6
+            assert arquivo.metadata.num_row_groups == 2
+    
+    def test_lote_arrow(self):
+        """Testa exportação em Arrow IPC"""
+        pa = pytest.importorskip("pyarrow")
+        from src.repositories.parquet_repository import ParquetRepository
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = ParquetRepository(diretorio=Path(tmpdir), formato='arrow')
+            caminho = repo.salvar(criar_cupom(), nome_arquivo="teste")
+            
+            tabela = pa.ipc.open_file(str(caminho)).read_all()
+            
+            assert caminho.suffix == ".arrow"
+            assert tabela.num_rows == 2
+            assert pa.types.is_dictionary(tabela.schema.field('emitente_nome').type)
+    
+    def test_lote_arrow_varios_batches(self):
+        """Testa lote Arrow com vários batches e valores novos no dicionário a cada um"""
+        pa = pytest.importorskip("pyarrow")
+        from src.repositories.parquet_repository import ParquetRepository
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = ParquetRepository(diretorio=Path(tmpdir), formato='arrow', tamanho_row_group=2)
+            
+            with repo.abrir_lote('lote') as lote:
+                for numero in range(3):
+                    cupom = criar_cupom()
+                    cupom.emitente.nome = f"Loja {numero}"
+                    lote.adicionar(cupom)
+            
+            leitor = pa.ipc.open_file(str(lote.caminho))
+            tabela = leitor.read_all()
+            
+            assert leitor.num_record_batches == 3
+            assert tabela.num_rows == 6
+            assert tabela.column('emitente_nome').to_pylist() == [
+                "Loja 0", "Loja 0", "Loja 1", "Loja 1", "Loja 2", "Loja 2"
+            ]
\ No newline at end of file
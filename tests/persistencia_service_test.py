@@ -0,0 +1,102 @@
+"""
+Testes unitários para a persistência em segundo plano
+"""
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.models.emitente import Emitente
+from src.repositories.csv_repository import CSVRepository
+from src.services.persistencia_service import PersistenciaAssincrona
+from tests.conftest import criar_cupom
+
+
+class TestPersistenciaAssincrona:
+    """Testes para PersistenciaAssincrona"""
+    
+    def test_salva_em_segundo_plano(self):
+        """Testa que os cupons enfileirados são gravados e publicados"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = CSVRepository(diretorio=Path(tmpdir))
+            
+            with PersistenciaAssincrona(repo, tamanho_fila=10, tamanho_lote=5) as persistencia:
+                futuros = [persistencia.salvar(criar_cupom()) for _ in range(12)]
+            
+            caminhos = [futuro.result(timeout=5) for futuro in futuros]
+            
+            assert persistencia.salvos == 12
+            assert persistencia.erros == 0
+            assert len(set(caminhos)) == 12
+            assert all(caminho.exists() for caminho in caminhos)
+            assert len(list(Path(tmpdir).glob(".*.tmp"))) == 0
+    
+    def test_agrupa_em_lotes(self):
+        """Testa que cupons acumulados na fila saem no mesmo lote"""
+        liberar = threading.Event()
+        repo = Mock()
+        repo.salvar.side_effect = lambda cupom, nome: liberar.wait(5) and Path("x.csv")
+        
+        persistencia = PersistenciaAssincrona(repo, tamanho_fila=10, tamanho_lote=10)
+        
+        # O primeiro cupom segura a thread; os outros 5 acumulam na fila
+        for _ in range(6):
+            persistencia.salvar(criar_cupom())
+        liberar.set()
+        persistencia.fechar()
+        
+        assert persistencia.salvos == 6
+        assert persistencia.lotes <= 2
+    
+    def test_fila_cheia_bloqueia(self):
+        """Testa a contrapressão quando a escrita fica para trás"""
+        liberar = threading.Event()
+        repo = Mock()
+        repo.salvar.side_effect = lambda cupom, nome: liberar.wait(5) and Path("x.csv")
+        
+        persistencia = PersistenciaAssincrona(repo, tamanho_fila=1, tamanho_lote=1)
+        persistencia.salvar(criar_cupom())
+        persistencia.salvar(criar_cupom())
+        
+        terceiro = threading.Thread(target=persistencia.salvar, args=(criar_cupom(),))
+        terceiro.start()
+        terceiro.join(0.2)
+        
+        assert terceiro.is_alive()
+        
+        liberar.set()
+        terceiro.join(5)
+        persistencia.fechar()
+        
+        assert persistencia.salvos == 3
+    
+    def test_erro_isolado_no_futuro(self):
+        """Testa que a falha de um cupom não afeta os demais"""
+        def salvar(cupom, nome):
+            if cupom.emitente.nome == "Falha":
+                raise OSError("disco cheio")
+            return Path("ok.csv")
+        
+        repo = Mock()
+        repo.salvar.side_effect = salvar
+        
+        with PersistenciaAssincrona(repo) as persistencia:
+            ok = persistencia.salvar(criar_cupom())
+            falha = persistencia.salvar(criar_cupom(emitente=Emitente(nome="Falha")))
+        
+        assert ok.result() == Path("ok.csv")
+        with pytest.raises(OSError):
+            falha.result()
+        assert persistencia.salvos == 1
+        assert persistencia.erros == 1
+    
+    def test_salvar_apos_fechar(self):
+        """Testa que não é possível enfileirar após fechar"""
+        persistencia = PersistenciaAssincrona(Mock())
+        persistencia.fechar()
+        persistencia.fechar()  # idempotente
+        
+        with pytest.raises(RuntimeError):
+            persistencia.salvar(criar_cupom())
\ No newline at end of file
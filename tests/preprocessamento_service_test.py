@@ -0,0 +1,201 @@
+"""
+Testes unitários para o PreprocessadorQR
+"""
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from PIL import Image, ImageDraw
+
+from src.services.preprocessamento_service import PreprocessadorQR, dhash, regiao_provavel
+
+
+def criar_foto(caminho, tamanho=(600, 400), quadro=None):
+    """Cria uma foto clara com um quadriculado (imitando o QR Code) na caixa `quadro`"""
+    imagem = Image.new('RGB', tamanho, (235, 235, 235))
+    if quadro:
+        desenho = ImageDraw.Draw(imagem)
+        esquerda, topo, direita, base = quadro
+        passo = max((direita - esquerda) // 20, 1)
+        for x in range(esquerda, direita, passo):
+            for y in range(topo, base, passo):
+                if (x // passo + y // passo) % 2:
+                    desenho.rectangle([x, y, x + passo - 1, y + passo - 1], fill=(0, 0, 0))
+    imagem.save(caminho)
+    return caminho
+
+
+def binaria(imagem) -> bool:
+    """True se a imagem só tiver preto e branco"""
+    return set(imagem.getdata()) <= {0, 255}
+
+
+class TestPreprocessadorQR:
+    """Testes para o pré-processamento das fotos"""
+    
+    def test_abrir_jpeg_reduzido_em_cinza(self, tmp_path):
+        """Testa que a foto grande é aberta em tons de cinza e reduzida"""
+        caminho = criar_foto(tmp_path / "foto.jpg", (4000, 3000))
+        
+        imagem, reduzida = PreprocessadorQR(max_lado=1600).abrir(caminho)
+        
+        assert reduzida is True
+        assert imagem.mode == 'L'
+        assert imagem.size == (1600, 1200)
+    
+    def test_abrir_sem_reducao(self, tmp_path):
+        """Testa que imagem menor que max_lado mantém o tamanho"""
+        caminho = criar_foto(tmp_path / "foto.png")
+        
+        imagem, reduzida = PreprocessadorQR(max_lado=1600).abrir(caminho)
+        
+        assert reduzida is False
+        assert imagem.size == (600, 400)
+    
+    def test_para_na_primeira_leitura(self, tmp_path):
+        """Testa a sequência de transformações até a primeira que lê o QR Code"""
+        caminho = criar_foto(tmp_path / "foto.png", quadro=(400, 200, 560, 360))
+        tentadas = []
+        
+        def decodificar(imagem):
+            tentadas.append(imagem)
+            return ['qr'] if binaria(imagem) else []
+        
+        preprocessador = PreprocessadorQR(max_lado=1600, decodificar=decodificar)
+        resultado = preprocessador.decodificar(caminho)
+        
+        # reduzida, recorte, limiar ('original' não se aplica: a imagem não foi reduzida)
+        assert resultado.codigos == ['qr']
+        assert resultado.transformacao == 'limiar'
+        assert resultado.tentativas == 3
+        assert len(tentadas) == 3
+        assert resultado.duracao > 0
+    
+    def test_recorte_na_resolucao_original(self, tmp_path):
+        """Testa que o recorte de uma foto reduzida vem da imagem original"""
+        caminho = criar_foto(tmp_path / "foto.jpg", (3200, 3200), quadro=(2200, 2200, 3000, 3000))
+        tamanhos = []
+        
+        def decodificar(imagem):
+            tamanhos.append(imagem.size)
+            return []
+        
+        PreprocessadorQR(max_lado=800, transformacoes=['reduzida', 'recorte'],
+                         decodificar=decodificar).decodificar(caminho)
+        
+        assert tamanhos[0] == (800, 800)
+        assert tamanhos[1] == (1200, 1200)
+    
+    def test_regiao_provavel(self):
+        """Testa que a região estimada contém o quadriculado"""
+        imagem = Image.new('L', (800, 800), 235)
+        desenho = ImageDraw.Draw(imagem)
+        for x in range(550, 750, 10):
+            for y in range(550, 750, 10):
+                if (x // 10 + y // 10) % 2:
+                    desenho.rectangle([x, y, x + 9, y + 9], fill=0)
+        
+        esquerda, topo, direita, base = regiao_provavel(imagem)
+        
+        assert esquerda <= 550 and topo <= 550
+        assert direita >= 700 and base >= 700
+        assert (direita - esquerda) * (base - topo) < 800 * 800 / 4
+    
+    def test_metricas(self, tmp_path):
+        """Testa taxa de sucesso e leituras por transformação"""
+        lida = criar_foto(tmp_path / "lida.png")
+        ilegivel = criar_foto(tmp_path / "ilegivel.png", (300, 300))
+        
+        preprocessador = PreprocessadorQR(
+            transformacoes=['reduzida', 'nitidez'],
+            decodificar=lambda imagem: ['qr'] if imagem.width == 600 else []
+        )
+        preprocessador.decodificar(lida)
+        preprocessador.decodificar(ilegivel)
+        metricas = preprocessador.metricas()
+        
+        assert metricas['imagens'] == 2
+        assert metricas['sucessos'] == 1
+        assert metricas['taxa_sucesso'] == 0.5
+        assert metricas['por_transformacao'] == {'reduzida': 1}
+        assert preprocessador.ultima.tentativas == 2
+        assert "1/2 lidas" in preprocessador.resumo()
+    
+    def test_dhash(self):
+        """Testa que o hash perceptual resiste à redução e distingue outra imagem"""
+        imagem = Image.linear_gradient('L').resize((400, 300))
+        ImageDraw.Draw(imagem).ellipse([50, 50, 200, 250], fill=0)
+        outra = imagem.transpose(Image.FLIP_LEFT_RIGHT)
+        
+        assert len(dhash(imagem)) == 16
+        assert dhash(imagem) == dhash(imagem.resize((200, 150)))
+        assert dhash(imagem) != dhash(outra)
+    
+    def test_transformacao_desconhecida(self):
+        """Testa que nomes inválidos em transformacoes são recusados"""
+        with pytest.raises(ValueError):
+            PreprocessadorQR(transformacoes=['reduzida', 'girar'])
+
+
+class TestVariosQRCodes:
+    """Testes para folhas digitalizadas (vários quadros e vários QR Codes)"""
+    
+    def test_paginas_do_tiff(self, tmp_path):
+        """Testa que cada quadro do TIFF é uma página e que a leitura informa a página"""
+        caminho = tmp_path / "folhas.tif"
+        quadros = [Image.new('L', (largura, 100), 255) for largura in (300, 310, 320)]
+        quadros[0].save(caminho, save_all=True, append_images=quadros[1:])
+        
+        preprocessador = PreprocessadorQR(
+            transformacoes=['reduzida'],
+            decodificar=lambda imagem: ['qr'] if imagem.width == 310 else []
+        )
+        
+        assert [numero for numero, _ in preprocessador.paginas(caminho)] == [1, 2, 3]
+        resultado = preprocessador.decodificar(caminho)
+        assert resultado.pagina == 2
+        assert resultado.tentativas == 2
+    
+    def test_decodificar_todos(self, tmp_path):
+        """Testa a soma dos QR Codes de todas as transformações, sem repetir, com a posição original"""
+        caminho = criar_foto(tmp_path / "folha.png", (3200, 1600))
+        
+        def decodificar(imagem):
+            primeiro = SimpleNamespace(data=b'A', rect=(10, 10, 20, 20), polygon=[])
+            if binaria(imagem):
+                return [primeiro, SimpleNamespace(data=b'C', rect=(100, 50, 20, 20), polygon=[])]
+            return [primeiro, SimpleNamespace(data=b'B', rect=(300, 10, 20, 20), polygon=[])]
+        
+        preprocessador = PreprocessadorQR(max_lado=800, transformacoes=['reduzida', 'recorte', 'limiar'],
+                                          decodificar=decodificar)
+        resultado = preprocessador.decodificar_todos(caminho)
+        
+        # 'recorte' procura um único QR Code e fica de fora
+        assert resultado.tentativas == 2
+        assert resultado.transformacao == 'reduzida'
+        assert [simbolo.dados for simbolo in resultado.codigos] == [b'A', b'B', b'C']
+        assert {simbolo.pagina for simbolo in resultado.codigos} == {1}
+        # Imagem reduzida 4x: a caixa volta para os pixels da foto original
+        assert resultado.codigos[0].caixa == (40, 40, 80, 80)
+    
+    def test_posicao_na_rotacao(self, tmp_path):
+        """Testa que o ponto central da imagem girada volta ao centro da página"""
+        caminho = criar_foto(tmp_path / "folha.png", (400, 200))
+        
+        def decodificar(imagem):
+            centro_x, centro_y = imagem.width / 2, imagem.height / 2
+            return [SimpleNamespace(data=b'A', polygon=[(centro_x, centro_y)])]
+        
+        resultado = PreprocessadorQR(transformacoes=['rotacao'], decodificar=decodificar).decodificar_todos(caminho)
+        
+        assert resultado.codigos[0].caixa == (200, 100, 0, 0)
+    
+    def test_pdf_sem_biblioteca(self, tmp_path):
+        """Testa que ler PDF sem PyMuPDF nem pdf2image gera ImportError com a instrução"""
+        caminho = tmp_path / "folhas.pdf"
+        caminho.write_bytes(b"%PDF-1.4")
+        
+        with patch('src.services.preprocessamento_service.fitz', None), \
+                patch('src.services.preprocessamento_service.convert_from_path', None):
+            with pytest.raises(ImportError, match="pymupdf"):
+                PreprocessadorQR().decodificar_todos(caminho)
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+Testes unitários para o ProdutoBatch (produtos por coluna)
+"""
+import math
+from unittest.mock import patch
+
+import pytest
+
+from src.models.produto import Produto
+from src.models.produto_batch import ProdutoBatch
+from tests.conftest import criar_cupom
+
+
+def criar_produto(ncm="22021000", valor="10,50", quantidade="1,0000", codigo="1") -> Produto:
+    """Cria um produto de teste"""
+    return Produto(codigo_ncm=ncm, valor_liquido=valor, cod_produto=codigo,
+                   cod_gtin="7891234567895", valor_total=valor,
+                   descricao="Refrigerante", quantidade=quantidade)
+
+
+@pytest.fixture(params=['numpy', 'sem_numpy'])
+def modo(request):
+    """Executa cada teste com numpy e com o fallback em array"""
+    if request.param == 'numpy':
+        yield request.param
+    else:
+        with patch('src.models.produto_batch.np', None):
+            yield request.param
+
+
+class TestProdutoBatch:
+    """Testes para ProdutoBatch"""
+    
+    def test_de_produtos_ida_e_volta(self, modo):
+        """Testa que os produtos reconstruídos são iguais aos originais"""
+        produtos = [criar_produto(), criar_produto("84713012", "1.234,56", None, "2")]
+        lote = ProdutoBatch.de_produtos(produtos)
+        
+        assert len(lote) == 2
+        assert list(lote) == produtos
+        assert lote['codigo_ncm'].tolist() == ["22021000", "84713012"]
+        assert math.isnan(lote['quantidade'][1])
+    
+    def test_texto_codificado_por_dicionario(self, modo):
+        """Testa que valores repetidos são guardados uma única vez"""
+        lote = ProdutoBatch.de_produtos([criar_produto() for _ in range(100)])
+        
+        assert lote['descricao'].valores == ["Refrigerante"]
+        assert len(lote['descricao']) == 100
+    
+    def test_validar_igual_ao_produto(self, modo):
+        """Testa que a validação em lote segue as regras de Produto.validar"""
+        produtos = [
+            criar_produto(),
+            criar_produto(ncm="2202"),
+            criar_produto(valor="-1,00"),
+            criar_produto(quantidade="0"),
+            criar_produto(codigo=""),
+            criar_produto(quantidade=None),
+            Produto(codigo_ncm="22021000", valor_liquido="1,00", cod_produto="1",
+                    cod_gtin="7891234567890", valor_total="1,00"),
+        ]
+        
+        validos, erros = ProdutoBatch.de_produtos(produtos).validar()
+        
+        assert list(validos) == [produto.validar()[0] for produto in produtos]
+        assert list(erros['ncm_invalido']) == [False, True, False, False, False, False, False]
+        assert list(erros['valor_total_negativo']) == [False, False, True, False, False, False, False]
+        assert list(erros['quantidade_invalida']) == [False, False, False, True, False, False, False]
+        assert list(erros['cod_produto_vazio']) == [False, False, False, False, True, False, False]
+        assert list(erros['gtin_invalido']) == [False, False, False, False, False, False, True]
+    
+    def test_totais_por_cupom(self, modo):
+        """Testa as somas por cupom, incluindo cupom sem produtos"""
+        cupons = [
+            criar_cupom(chave_acesso="1" * 44, produtos=[criar_produto(valor="10,00"), criar_produto(valor="2,50")]),
+            criar_cupom(chave_acesso="2" * 44, produtos=[]),
+            criar_cupom(chave_acesso="3" * 44, produtos=[criar_produto(valor="1.000,00")]),
+        ]
+        
+        lote = ProdutoBatch.de_cupons(cupons)
+        
+        assert lote.chaves == ["1" * 44, "2" * 44, "3" * 44]
+        assert lote.totais_por_cupom() == [12.5, 0.0, 1000.0]
+        assert lote.quantidade_por_cupom() == [2, 0, 1]
+    
+    def test_totais_por_ncm(self, modo):
+        """Testa a soma agrupada por uma coluna de texto"""
+        lote = ProdutoBatch.de_produtos([
+            criar_produto("22021000", "1,00"),
+            criar_produto("84713012", "5,00"),
+            criar_produto("22021000", "2,00"),
+        ])
+        
+        assert lote.totais_por('codigo_ncm') == {"22021000": 3.0, "84713012": 5.0}
+    
+    def test_selecionar_validos(self, modo):
+        """Testa o filtro por máscara mantendo os cupons"""
+        cupons = [
+            criar_cupom(chave_acesso="1" * 44, produtos=[criar_produto(), criar_produto(ncm="x")]),
+            criar_cupom(chave_acesso="2" * 44, produtos=[criar_produto(ncm="y")]),
+        ]
+        lote = ProdutoBatch.de_cupons(cupons)
+        
+        validos, _ = lote.validar()
+        filtrado = lote.selecionar(validos)
+        
+        assert len(filtrado) == 1
+        assert filtrado.quantidade_por_cupom() == [1, 0]
+        assert filtrado.produto(0) == criar_produto()
+    
+    def test_de_registros_sem_criar_produtos(self, modo):
+        """Testa a criação a partir dos textos lidos da página"""
+        registros = [
+            {'codigo_ncm': ' 22021000 ', 'valor_liquido': '1.234,56', 'valor_total': '1.234,56',
+             'cod_produto': '1', 'cod_gtin': '', 'descricao': 'Item', 'quantidade': '2,0000'},
+            {'codigo_ncm': '22021000', 'valor_liquido': 'abc', 'valor_total': None,
+             'cod_produto': '2', 'quantidade': None},
+        ]
+        
+        lote = ProdutoBatch.de_registros(registros)
+        
+        assert lote['codigo_ncm'].valores == ["22021000"]
+        assert lote['cod_gtin'].tolist() == [None, None]
+        assert list(lote['valor_total']) == [1234.56, 0.0]
+        assert lote.produto(0).quantidade == 2.0
+        assert lote.produto(1).quantidade is None
+    
+    def test_lote_vazio(self, modo):
+        """Testa operações sobre um lote sem produtos"""
+        lote = ProdutoBatch.de_produtos([])
+        validos, _ = lote.validar()
+        
+        assert len(lote) == 0
+        assert list(validos) == []
+        assert lote.totais_por_cupom() == []
+    
+    def test_para_dict(self, modo):
+        """Testa a exportação das colunas com a chave de cada produto"""
+        lote = ProdutoBatch.de_cupons([criar_cupom(chave_acesso="1" * 44, produtos=[criar_produto()])])
+        colunas = lote.para_dict()
+        
+        assert colunas['chave_acesso'] == ["1" * 44]
+        assert colunas['valor_total'] == [10.5]
\ No newline at end of file
@@ -68,6 +68,34 @@ class TestProduto:
         assert produto.valor_liquido == 10.50
         assert produto.valor_total == 12.00
     
+    def test_conversao_valor_com_milhar(self):
+        """Testa valores com separador de milhar (antes viravam 0.0)"""
+        produto = Produto(
+            codigo_ncm="12345678",
+            valor_liquido="1.234,56",
+            cod_produto="PROD001",
+            cod_gtin=None,
+            valor_total="R$ 12.345,60",
+            quantidade="1.000,0000"
+        )
+        
+        assert produto.valor_liquido == 1234.56
+        assert produto.valor_total == 12345.60
+        assert produto.quantidade == 1000.0
+    
+    def test_conversao_valor_invalido(self):
+        """Testa que valores não numéricos continuam virando 0.0"""
+        produto = Produto(
+            codigo_ncm="12345678",
+            valor_liquido="N/A",
+            cod_produto="PROD001",
+            cod_gtin=None,
+            valor_total=""
+        )
+        
+        assert produto.valor_liquido == 0.0
+        assert produto.valor_total == 0.0
+    
     def test_to_dict(self):
         """Testa conversão de produto para dicionário"""
         produto = Produto(
@@ -143,7 +171,7 @@ class TestProduto:
             codigo_ncm="12345678",
             valor_liquido=10.50,
             cod_produto="PROD001",
-            cod_gtin="7891234567890",
+            cod_gtin="7891234567895",
             valor_total=12.00,
             quantidade=1.0
         )
@@ -200,6 +228,33 @@ class TestProduto:
         assert valido is False
         assert any("Quantidade inválida" in erro for erro in erros)
     
+    def test_validar_gtin_digito_verificador(self):
+        """Testa validação do dígito verificador do GTIN"""
+        produto = Produto(
+            codigo_ncm="12345678",
+            valor_liquido=10.50,
+            cod_produto="PROD001",
+            cod_gtin="7891234567890",  # Verificador correto: 5
+            valor_total=12.00
+        )
+        
+        valido, erros = produto.validar()
+        
+        assert valido is False
+        assert erros == ["GTIN inválido: 7891234567890 (dígito verificador ou tamanho)"]
+    
+    def test_validar_sem_gtin(self):
+        """Testa que produto sem GTIN continua válido"""
+        produto = Produto(
+            codigo_ncm="12345678",
+            valor_liquido=10.50,
+            cod_produto="PROD001",
+            cod_gtin=None,
+            valor_total=12.00
+        )
+        
+        assert produto.validar() == (True, [])
+    
     def test_limpeza_de_espacos(self):
         """Testa remoção de espaços extras"""
         produto = Produto(
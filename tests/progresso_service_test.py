@@ -0,0 +1,86 @@
+"""
+Testes unitários para ProgressoLote
+"""
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from src.services.progresso_service import ProgressoLote
+
+
+class TestProgressoLote:
+    """Testes para o acompanhamento de progresso do lote"""
+    
+    def test_contadores(self):
+        """Testa contagem de sucesso e erro"""
+        progresso = ProgressoLote(total=3)
+        
+        progresso.registrar(True)
+        progresso.registrar(False)
+        
+        assert progresso.processados == 2
+        assert progresso.sucesso == 1
+        assert progresso.erro == 1
+    
+    def test_taxa_e_eta(self):
+        """Testa taxa por minuto e ETA com relógio controlado"""
+        with patch('src.services.progresso_service.time.monotonic', return_value=0.0):
+            progresso = ProgressoLote(total=10)
+        
+        # Um cupom a cada 30 segundos = 2 cupons/min
+        for instante in (30.0, 60.0):
+            with patch('src.services.progresso_service.time.monotonic', return_value=instante):
+                progresso.registrar(True)
+        
+        assert progresso.taxa_por_minuto() == 2.0
+        assert progresso.eta_segundos() == 8 * 30.0
+    
+    def test_eta_total_desconhecido(self):
+        """Testa que ETA é None sem total"""
+        progresso = ProgressoLote(total=None)
+        progresso.registrar(True)
+        
+        assert progresso.eta_segundos() is None
+    
+    def test_percentis_por_etapa(self):
+        """Testa p50/p95 do tempo de cada etapa"""
+        progresso = ProgressoLote(total=100, janela=100)
+        
+        for segundos in range(1, 101):
+            progresso.registrar(True, {'captcha': float(segundos)})
+        
+        percentis = progresso.percentis('captcha')
+        
+        assert percentis['p50'] == 50.0
+        assert percentis['p95'] == 95.0
+        assert progresso.percentis('salvamento') == {'p50': None, 'p95': None}
+    
+    def test_linha_status(self):
+        """Testa linha de status compacta"""
+        progresso = ProgressoLote(total=5)
+        progresso.registrar(True, {'extracao': 2.0})
+        
+        linha = progresso.linha_status()
+        
+        assert linha.startswith("[1/5] ok=1 err=0")
+        assert "extracao p50=2.0s" in linha
+    
+    def test_arquivo_progresso(self):
+        """Testa gravação do arquivo JSON de progresso"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            arquivo = Path(tmpdir) / "progresso.json"
+            progresso = ProgressoLote(total=2, arquivo=arquivo, intervalo_escrita=3600)
+            
+            progresso.registrar(True)
+            progresso.registrar(False)  # Dentro do intervalo: não grava
+            
+            dados = json.loads(arquivo.read_text(encoding='utf-8'))
+            assert dados['processados'] == 1
+            
+            progresso.finalizar()
+            
+            dados = json.loads(arquivo.read_text(encoding='utf-8'))
+            assert dados['processados'] == 2
+            assert dados['erro'] == 1
+            assert not arquivo.with_name(arquivo.name + '.tmp').exists()
@@ -0,0 +1,99 @@
+"""
+Testes unitários para o cache de leituras de QR Code (QRCodeCacheRepository)
+"""
+import pytest
+
+from src.repositories.qrcode_cache_repository import (
+    QRCodeCacheRepository,
+    distancia_hamming,
+    sha256_arquivo,
+)
+
+
+CHAVE = "35260112345678000190590004202070001234567890"
+PHASH = "0f" * 8
+
+
+@pytest.fixture
+def cache(tmp_path):
+    repo = QRCodeCacheRepository(tmp_path / "cache.db", phash=True, distancia=6)
+    yield repo
+    repo.fechar()
+
+
+def inverter_bits(phash: str, bits: int) -> str:
+    """Hash com os `bits` primeiros bits invertidos"""
+    valor = int(phash, 16) ^ (((1 << bits) - 1) << (len(phash) * 4 - bits))
+    return f"{valor:0{len(phash)}x}"
+
+
+class TestQRCodeCacheRepository:
+    """Testes para o cache endereçado pelo conteúdo"""
+    
+    def test_sha256_pelo_conteudo(self, tmp_path):
+        """Testa que arquivos com o mesmo conteúdo têm o mesmo hash, independente do nome"""
+        (tmp_path / "a.jpg").write_bytes(b"foto")
+        (tmp_path / "b.jpg").write_bytes(b"foto")
+        (tmp_path / "c.jpg").write_bytes(b"outra")
+        
+        assert sha256_arquivo(tmp_path / "a.jpg") == sha256_arquivo(tmp_path / "b.jpg")
+        assert sha256_arquivo(tmp_path / "a.jpg") != sha256_arquivo(tmp_path / "c.jpg")
+    
+    def test_salvar_e_buscar(self, cache):
+        """Testa a leitura guardada, com página e caixa"""
+        cache.salvar("abc", 'todas', "config", 'ok', [(CHAVE, 2, (10, 20, 30, 30))])
+        
+        assert cache.buscar("abc", 'todas', "outra config") == ([(CHAVE, 2, (10, 20, 30, 30))], 'ok')
+        assert cache.buscar("abc", 'uma', "config") is None
+        assert cache.ultimo_acerto is None
+        assert cache.acertos['conteudo'] == 1
+    
+    def test_falha_so_vale_para_a_mesma_configuracao(self, cache):
+        """Testa que leitura sem chave é refeita com outras transformações"""
+        cache.salvar("abc", 'uma', "reduzida|1600|200", 'sem_qrcode', [])
+        
+        assert cache.buscar("abc", 'uma', "reduzida|1600|200") == ([], 'sem_qrcode')
+        assert cache.buscar("abc", 'uma', "reduzida,limiar|1600|200") is None
+    
+    def test_buscar_semelhante(self, cache):
+        """Testa o hash perceptual: próximo é encontrado, distante não"""
+        cache.salvar("abc", 'uma', "config", 'ok', [(CHAVE, 1, None)], phash=PHASH)
+        
+        assert cache.buscar_semelhante(inverter_bits(PHASH, 5), 'uma') == ([(CHAVE, 1, None)], 'ok')
+        assert cache.buscar_semelhante(inverter_bits(PHASH, 20), 'uma') is None
+        assert cache.buscar_semelhante(PHASH, 'todas') is None
+    
+    def test_semelhante_so_conta_apos_confirmar(self, cache):
+        """Testa que a candidata do hash perceptual não é acerto até registrar_acerto"""
+        cache.salvar("abc", 'uma', "config", 'ok', [(CHAVE, 1, None)], phash=PHASH)
+        
+        assert cache.buscar("outro", 'uma', "config") is None
+        assert cache.buscar_semelhante(PHASH, 'uma') is not None
+        assert cache.ultimo_acerto is None
+        assert cache.acertos['phash'] == 0
+        
+        cache.registrar_acerto('phash')
+        assert cache.ultimo_acerto == 'phash'
+        assert cache.acertos['phash'] == 1
+    
+    def test_falha_nao_entra_no_indice_perceptual(self, cache):
+        """Testa que leitura sem chave não é reaproveitada por semelhança"""
+        cache.salvar("abc", 'uma', "config", 'sem_chave', [], phash=PHASH)
+        
+        assert cache.buscar_semelhante(PHASH, 'uma') is None
+    
+    def test_substituir_e_limpar(self, cache):
+        """Testa que salvar de novo substitui a leitura e limpar apaga tudo"""
+        cache.salvar("abc", 'uma', "config", 'sem_qrcode', [])
+        cache.salvar("abc", 'uma', "config", 'ok', [(CHAVE, 1, None)])
+        
+        assert cache.contar() == 1
+        assert cache.buscar("abc", 'uma', "config")[1] == 'ok'
+        
+        cache.limpar()
+        assert cache.contar() == 0
+    
+    def test_distancia_hamming(self):
+        """Testa a contagem de bits diferentes"""
+        assert distancia_hamming("ff00", "ff00") == 0
+        assert distancia_hamming("ff00", "0f01") == 5
\ No newline at end of file
@@ -0,0 +1,319 @@
+"""
+Testes unitários para QRCodeLoteService (leitura de pastas de imagens)
+"""
+import os
+import sqlite3
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from PIL import Image, ImageDraw
+
+from src.services.qrcode_lote_service import (
+    STATUS_DUPLICADA,
+    QRCodeLoteService,
+    _ler_imagem,
+    listar_imagens,
+)
+from src.services.qrcode_service import (
+    STATUS_ERRO,
+    STATUS_OK,
+    STATUS_SEM_CHAVE,
+    STATUS_SEM_QRCODE,
+)
+
+
+CHAVE_1 = "35260112345678000190590004202070001234567890"
+CHAVE_2 = "35260112345678000190590004202070001234567891"
+
+
+# Conteúdo do QR Code simulado pela largura da imagem
+CONTEUDOS = {
+    130: f"https://satsp.fazenda.sp.gov.br/?p={CHAVE_1}|20260122",
+    140: CHAVE_2,
+    150: "https://exemplo.com",
+}
+
+
+@pytest.fixture
+def pasta(tmp_path):
+    """Pasta com imagens cuja largura indica o conteúdo do QR Code"""
+    imagens = {"a_chave1.png": 130, "b_chave2.jpg": 140, "c_chave1.png": 130,
+               "d_vazia.png": 20, "e_texto.bmp": 150}
+    for nome, largura in imagens.items():
+        Image.new('L', (largura, 20), 255).save(tmp_path / nome)
+    (tmp_path / "sub").mkdir()
+    Image.new('L', (140, 20), 255).save(tmp_path / "sub" / "f_chave2.png")
+    (tmp_path / "notas.txt").write_text("não é imagem")
+    return tmp_path
+
+
+def decode_pela_largura(imagem, symbols=None):
+    """Simula a pyzbar"""
+    conteudo = CONTEUDOS.get(imagem.width)
+    return [SimpleNamespace(data=conteudo.encode())] if conteudo else []
+
+
+def ler_derrubando_processo(caminho, cache=None, phash=False):
+    """Leitor que derruba o processo do pool na imagem "d_vazia" (como um crash da zbar)"""
+    if Path(caminho).name == "d_vazia.png":
+        os._exit(1)
+    time.sleep(0.2)
+    return _ler_imagem(caminho, cache, phash)
+
+
+def ler_com_cache_travado(caminho, cache=None, phash=False):
+    """Leitor cujo cache falha na imagem "b_chave2" """
+    if Path(caminho).name == "b_chave2.jpg":
+        raise sqlite3.OperationalError("database is locked")
+    return _ler_imagem(caminho, cache, phash)
+
+
+class TestQRCodeLoteService:
+    """Testes para a leitura em lote"""
+    
+    def test_listar_pasta_recursiva(self, pasta):
+        """Testa que só imagens suportadas são listadas, incluindo subpastas"""
+        nomes = [caminho.name for caminho in listar_imagens(pasta)]
+        
+        assert nomes == ["a_chave1.png", "b_chave2.jpg", "c_chave1.png", "d_vazia.png",
+                         "e_texto.bmp", "f_chave2.png"]
+        assert len(list(listar_imagens(pasta, recursivo=False))) == 5
+    
+    def test_listar_padrao_glob(self, pasta):
+        """Testa a seleção por padrão glob"""
+        nomes = [caminho.name for caminho in listar_imagens(str(pasta / "**" / "*.png"))]
+        
+        assert nomes == ["a_chave1.png", "c_chave1.png", "d_vazia.png", "f_chave2.png"]
+    
+    def test_status_e_chaves_duplicadas(self, pasta):
+        """Testa o status de cada imagem e a remoção de chaves repetidas"""
+        leitor = QRCodeLoteService(processos=1)
+        
+        with patch('src.services.preprocessamento_service.pyzbar.decode', side_effect=decode_pela_largura):
+            leituras = {leitura.caminho.name: leitura for leitura in leitor.decodificar(pasta)}
+        
+        assert leituras["a_chave1.png"].chave == CHAVE_1
+        assert leituras["a_chave1.png"].status == STATUS_OK
+        assert leituras["c_chave1.png"].status == STATUS_DUPLICADA
+        assert leituras["d_vazia.png"].status == STATUS_SEM_QRCODE
+        assert leituras["e_texto.bmp"].status == STATUS_SEM_CHAVE
+        assert leituras["f_chave2.png"].status == STATUS_DUPLICADA
+        assert leitor.metricas()['imagens'] == 6
+        assert leitor.metricas()[STATUS_OK] == 2
+    
+    def test_chaves_distintas(self, pasta):
+        """Testa que chaves() entrega cada chave uma única vez"""
+        leitor = QRCodeLoteService(processos=1)
+        
+        with patch('src.services.preprocessamento_service.pyzbar.decode', side_effect=decode_pela_largura):
+            chaves = list(leitor.chaves(pasta))
+        
+        assert chaves == [CHAVE_1, CHAVE_2]
+    
+    def test_arquivo_ilegivel(self, tmp_path):
+        """Testa que imagem corrompida vira status de erro em vez de exceção"""
+        corrompida = tmp_path / "corrompida.png"
+        corrompida.write_bytes(b"nao e png")
+        
+        leituras = list(QRCodeLoteService(processos=1).decodificar([corrompida, tmp_path / "falta.png"]))
+        
+        assert [leitura.status for leitura in leituras] == [STATUS_ERRO, STATUS_ERRO]
+    
+    def test_pool_de_processos(self, pasta):
+        """Testa que o pool lê todas as imagens, com janela menor que a pasta"""
+        leitor = QRCodeLoteService(processos=2, janela=1)
+        
+        leituras = list(leitor.decodificar(pasta))
+        
+        assert sorted(leitura.caminho.name for leitura in leituras) == [
+            "a_chave1.png", "b_chave2.jpg", "c_chave1.png", "d_vazia.png",
+            "e_texto.bmp", "f_chave2.png",
+        ]
+        assert all(leitura.status == STATUS_SEM_QRCODE for leitura in leituras)
+    
+    def test_erro_de_uma_imagem_nao_interrompe_o_lote(self, pasta):
+        """Testa que uma exceção do leitor vira status de erro daquela imagem"""
+        leitor = QRCodeLoteService(processos=1)
+        leitor._ler = ler_com_cache_travado
+        
+        leituras = {leitura.caminho.name: leitura for leitura in leitor.decodificar(pasta)}
+        
+        assert len(leituras) == 6
+        assert leituras["b_chave2.jpg"].status == STATUS_ERRO
+        assert leituras["c_chave1.png"].status == STATUS_SEM_QRCODE
+    
+    def test_pool_quebrado_e_recriado(self, pasta):
+        """Testa que um processo derrubado não interrompe o lote: um novo pool lê o restante"""
+        leitor = QRCodeLoteService(processos=2, janela=1)
+        leitor._ler = ler_derrubando_processo
+        caminhos = [pasta / nome for nome in ("d_vazia.png", "a_chave1.png", "b_chave2.jpg", "c_chave1.png")]
+        
+        leituras = {leitura.caminho.name: leitura for leitura in leitor.decodificar(caminhos)}
+        
+        assert len(leituras) == 4
+        assert leituras["d_vazia.png"].status == STATUS_ERRO
+        assert leituras["b_chave2.jpg"].status == STATUS_SEM_QRCODE
+        assert leituras["c_chave1.png"].status == STATUS_SEM_QRCODE
+    
+    def test_interromper_leitura(self, pasta):
+        """Testa que parar de consumir encerra o pool"""
+        leitor = QRCodeLoteService(processos=2, janela=1)
+        leituras = leitor.decodificar(pasta)
+        
+        next(leituras)
+        leituras.close()
+        
+        assert leitor.metricas()['imagens'] == 1
+    
+    def test_varios_cupons_por_arquivo(self, tmp_path):
+        """Testa o modo todas: uma leitura por chave, com a página de cada uma"""
+        quadros = [Image.new('L', (largura, 20), 255) for largura in (130, 140, 20)]
+        quadros[0].save(tmp_path / "a_folhas.tif", save_all=True, append_images=quadros[1:])
+        Image.new('L', (130, 20), 255).save(tmp_path / "b_chave1.png")
+        leitor = QRCodeLoteService(processos=1, todas=True)
+        
+        with patch('src.services.preprocessamento_service.pyzbar.decode', side_effect=decode_pela_largura):
+            leituras = list(leitor.decodificar(tmp_path))
+        
+        assert [(leitura.caminho.name, leitura.chave, leitura.pagina, leitura.status) for leitura in leituras] == [
+            ("a_folhas.tif", CHAVE_1, 1, STATUS_OK),
+            ("a_folhas.tif", CHAVE_2, 2, STATUS_OK),
+            ("b_chave1.png", CHAVE_1, 1, STATUS_DUPLICADA),
+        ]
+        assert leitor.metricas()['imagens'] == 2
+        assert "2 chaves, 1 duplicadas, 0 imagens sem chave" in leitor.resumo()
+
+
+def cupom_com_qr(caminho, tom):
+    """Cupom com o mesmo leiaute (linhas de texto e um "QR Code" xadrez); o tom do xadrez indica a chave"""
+    imagem = Image.linear_gradient('L').resize((400, 300)).point(lambda pixel: 100 + pixel * 155 // 255)
+    desenho = ImageDraw.Draw(imagem)
+    for linha in range(8):
+        desenho.line([(20, 20 + linha * 14), (200, 20 + linha * 14)], fill=120, width=3)
+    for linha in range(8):
+        for coluna in range(linha % 2, 8, 2):
+            x, y = 240 + coluna * 16, 120 + linha * 16
+            desenho.rectangle([x, y, x + 15, y + 15], fill=tom)
+    imagem.save(caminho)
+    return caminho
+
+
+def decode_pelo_tom(imagem, symbols=None):
+    """Simula a pyzbar: o pixel mais escuro indica o conteúdo do QR Code"""
+    escuro = imagem.getextrema()[0]
+    if escuro < 25:
+        return [SimpleNamespace(data=CONTEUDOS[130].encode())]
+    if escuro < 70:
+        return [SimpleNamespace(data=CONTEUDOS[140].encode())]
+    return []
+
+
+def decode_pelo_tom_com_posicao(imagem, symbols=None):
+    """Como decode_pelo_tom, informando a imagem inteira como posição do QR Code"""
+    return [SimpleNamespace(data=simbolo.data, rect=(0, 0, imagem.width, imagem.height))
+            for simbolo in decode_pelo_tom(imagem)]
+
+
+class TestCacheDoLote:
+    """Testes para a leitura em lote com QRCodeCacheRepository"""
+    
+    def test_segunda_execucao_vem_do_cache(self, pasta, tmp_path_factory):
+        """Testa que imagens já lidas (inclusive renomeadas) não são decodificadas de novo"""
+        arquivo_cache = tmp_path_factory.mktemp("cache") / "qr.db"
+        
+        with patch('src.services.preprocessamento_service.pyzbar.decode', side_effect=decode_pela_largura):
+            primeira = list(QRCodeLoteService(processos=1, cache=arquivo_cache).decodificar(pasta))
+        
+        (pasta / "g_copia.png").write_bytes((pasta / "a_chave1.png").read_bytes())
+        leitor = QRCodeLoteService(processos=1, cache=arquivo_cache)
+        
+        with patch('src.services.preprocessamento_service.pyzbar.decode') as decode:
+            segunda = {leitura.caminho.name: leitura for leitura in leitor.decodificar(pasta)}
+        
+        decode.assert_not_called()
+        assert len(segunda) == len(primeira) + 1
+        assert segunda["a_chave1.png"].chave == CHAVE_1
+        assert segunda["g_copia.png"].cache == 'conteudo'
+        assert segunda["g_copia.png"].status == STATUS_DUPLICADA
+        assert segunda["e_texto.bmp"].status == STATUS_SEM_CHAVE
+        assert leitor.metricas()['cache'] == {'conteudo': 7}
+        assert "7 do cache" in leitor.resumo()
+    
+    def test_erro_nao_vai_para_o_cache(self, tmp_path):
+        """Testa que arquivo ilegível é tentado de novo na próxima execução"""
+        corrompida = tmp_path / "corrompida.png"
+        corrompida.write_bytes(b"nao e png")
+        
+        for _ in range(2):
+            leitor = QRCodeLoteService(processos=1, cache=tmp_path / "qr.db")
+            assert [leitura.status for leitura in leitor.decodificar([corrompida])] == [STATUS_ERRO]
+        
+        assert leitor.metricas()['cache'] == {}
+    
+    def test_foto_reduzida_pelo_hash_perceptual(self, tmp_path):
+        """Testa que a mesma foto em outro tamanho e formato reaproveita a leitura, confirmada pelo recorte"""
+        original = cupom_com_qr(tmp_path / "original.png", tom=10)
+        with Image.open(original) as imagem:
+            imagem.resize((320, 240)).save(tmp_path / "reduzida.jpg", quality=85)
+        
+        leitor = QRCodeLoteService(processos=1, cache=tmp_path / "qr.db", phash=True)
+        with patch('src.services.preprocessamento_service.pyzbar.decode', side_effect=decode_pelo_tom):
+            leituras = list(leitor.decodificar([original, tmp_path / "reduzida.jpg"]))
+        
+        assert [(leitura.chave, leitura.status, leitura.cache) for leitura in leituras] == [
+            (CHAVE_1, STATUS_OK, None),
+            (CHAVE_1, STATUS_DUPLICADA, 'phash'),
+        ]
+    
+    def test_hash_perceptual_guarda_a_posicao_desta_imagem(self, tmp_path):
+        """Testa que a leitura aproveitada pelo hash perceptual tem a posição do QR Code da própria imagem"""
+        original = cupom_com_qr(tmp_path / "original.png", tom=10)
+        with Image.open(original) as imagem:
+            imagem.resize((320, 240)).save(tmp_path / "reduzida.jpg", quality=85)
+        
+        leitor = QRCodeLoteService(processos=1, cache=tmp_path / "qr.db", phash=True, todas=True)
+        with patch('src.services.preprocessamento_service.pyzbar.decode',
+                   side_effect=decode_pelo_tom_com_posicao):
+            primeira, reduzida = leitor.decodificar([original, tmp_path / "reduzida.jpg"])
+        
+        esquerda, topo, largura, altura = reduzida.caixa
+        assert reduzida.cache == 'phash'
+        assert primeira.caixa == (0, 0, 400, 300)
+        assert esquerda > 0 and esquerda + largura <= 320 and topo + altura <= 240
+        
+        # A leitura guardada para a foto reduzida é a dela
+        leitor = QRCodeLoteService(processos=1, cache=tmp_path / "qr.db", phash=True, todas=True)
+        assert next(leitor.decodificar([tmp_path / "reduzida.jpg"])).caixa == reduzida.caixa
+    
+    def test_acerto_nao_passa_para_a_proxima_imagem(self, tmp_path):
+        """Testa que uma imagem que não chega ao cache não herda o acerto da anterior"""
+        original = cupom_com_qr(tmp_path / "original.png", tom=10)
+        
+        with patch('src.services.preprocessamento_service.pyzbar.decode', side_effect=decode_pelo_tom):
+            for todas in (False, True):
+                leitor = QRCodeLoteService(processos=1, cache=tmp_path / "qr.db", todas=todas)
+                list(leitor.decodificar([original]))
+                leituras = list(leitor.decodificar([original, tmp_path / "falta.png"]))
+                
+                assert [(leitura.status, leitura.cache) for leitura in leituras] == [
+                    (STATUS_DUPLICADA, 'conteudo'),
+                    (STATUS_ERRO, None),
+                ]
+    
+    def test_cupons_com_o_mesmo_leiaute(self, tmp_path):
+        """Testa que dois cupons diferentes com o mesmo leiaute não trocam de chave pelo hash perceptual"""
+        primeiro = cupom_com_qr(tmp_path / "primeiro.png", tom=10)
+        segundo = cupom_com_qr(tmp_path / "segundo.png", tom=45)
+        
+        leitor = QRCodeLoteService(processos=1, cache=tmp_path / "qr.db", phash=True)
+        with patch('src.services.preprocessamento_service.pyzbar.decode', side_effect=decode_pelo_tom):
+            leituras = list(leitor.decodificar([primeiro, segundo]))
+        
+        assert [(leitura.chave, leitura.status, leitura.cache) for leitura in leituras] == [
+            (CHAVE_1, STATUS_OK, None),
+            (CHAVE_2, STATUS_OK, None),
+        ]
+        assert leitor.metricas()['cache'] == {}
\ No newline at end of file
@@ -1,7 +1,14 @@
 """
 Testes unitários para QRCodeService
 """
-from src.services.qrcode_service import QRCodeService
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from PIL import Image
+
+from src.repositories.qrcode_cache_repository import QRCodeCacheRepository
+from src.services.preprocessamento_service import PreprocessadorQR
+from src.services.qrcode_service import STATUS_OK, STATUS_SEM_CHAVE, QRCodeService
 
 
 class TestQRCodeService:
@@ -192,4 +199,62 @@ class TestQRCodeService:
         assert '.png' in formatos
         assert '.jpg' in formatos
         assert '.jpeg' in formatos
-        assert len(formatos) > 0
\ No newline at end of file
+        assert len(formatos) > 0
+    
+    # Testes de folhas com vários cupons
+    def test_extrair_chaves_ordem_e_repetidas(self, tmp_path):
+        """Testa a ordem de leitura (de cima para baixo) e a remoção de chaves repetidas na folha"""
+        caminho = tmp_path / "folha.png"
+        Image.new('L', (400, 400), 255).save(caminho)
+        chave_1 = "35260112345678000190590004202070001234567890"
+        chave_2 = "35260112345678000190590004202070001234567891"
+        simbolos = [
+            SimpleNamespace(data=chave_2.encode(), rect=(10, 300, 50, 50), polygon=[]),
+            SimpleNamespace(data=f"https://sat.sef.sp.gov.br/?p={chave_1}".encode(), rect=(200, 20, 50, 50), polygon=[]),
+            SimpleNamespace(data=b"https://exemplo.com", rect=(10, 10, 50, 50), polygon=[]),
+            SimpleNamespace(data=chave_1.encode(), rect=(10, 150, 50, 50), polygon=[]),
+        ]
+        preprocessador = PreprocessadorQR(transformacoes=['reduzida'], decodificar=lambda imagem: simbolos)
+        
+        chaves, status = QRCodeService.extrair_chaves(caminho, preprocessador=preprocessador)
+        
+        assert status == STATUS_OK
+        assert [(item.chave, item.pagina) for item in chaves] == [(chave_1, 1), (chave_2, 1)]
+        assert chaves[0].caixa == (200, 20, 50, 50)
+    
+    def test_extrair_chaves_sem_chave(self, tmp_path):
+        """Testa folha com QR Codes que não são de cupom"""
+        caminho = tmp_path / "folha.png"
+        Image.new('L', (100, 100), 255).save(caminho)
+        preprocessador = PreprocessadorQR(
+            transformacoes=['reduzida'],
+            decodificar=lambda imagem: [SimpleNamespace(data=b"texto", rect=(0, 0, 10, 10))]
+        )
+        
+        assert QRCodeService.extrair_chaves(caminho, preprocessador=preprocessador) == ([], STATUS_SEM_CHAVE)
+    
+    # Testes do cache de leituras
+    def test_extrair_chave_acesso_com_cache(self, tmp_path):
+        """Testa que a mesma imagem, com outro nome, vem do cache sem ser decodificada"""
+        chave = "35260112345678000190590004202070001234567890"
+        Image.new('L', (100, 100), 255).save(tmp_path / "cupom.png")
+        (tmp_path / "reenviado.png").write_bytes((tmp_path / "cupom.png").read_bytes())
+        
+        with QRCodeCacheRepository(tmp_path / "cache.db") as cache:
+            with patch('src.services.preprocessamento_service.pyzbar.decode',
+                       return_value=[SimpleNamespace(data=chave.encode())]) as decode:
+                assert QRCodeService.extrair_chave_acesso(tmp_path / "cupom.png", cache=cache) == chave
+                chamadas = decode.call_count
+                assert QRCodeService.extrair_chave_acesso(tmp_path / "reenviado.png", cache=cache) == chave
+            
+            assert decode.call_count == chamadas
+            assert cache.ultimo_acerto == 'conteudo'
+    
+    def test_decodificar_imagem_guarda_falha(self, tmp_path):
+        """Testa que imagem sem QR Code é guardada no cache com o status"""
+        Image.new('L', (100, 100), 255).save(tmp_path / "vazia.png")
+        
+        with QRCodeCacheRepository(tmp_path / "cache.db") as cache:
+            assert QRCodeService.decodificar_imagem(tmp_path / "vazia.png", cache=cache) == (None, 'sem_qrcode')
+            assert QRCodeService.decodificar_imagem(tmp_path / "vazia.png", cache=cache) == (None, 'sem_qrcode')
+            assert cache.acertos['conteudo'] == 1
\ No newline at end of file
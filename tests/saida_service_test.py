@@ -0,0 +1,185 @@
+"""
+Testes unitários para o envio de cupons a vários destinos
+"""
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import pyarrow.parquet as pq
+import pytest
+
+from src.services.saida_service import (
+    Destino,
+    DestinoLote,
+    DistribuidorSaidas,
+    criar_destinos,
+)
+from tests.conftest import criar_cupom
+
+
+class DestinoMemoria(Destino):
+    """Destino de teste que guarda os cupons em uma lista"""
+    
+    def __init__(self, nome: str, atraso: float = 0.0, falhar: bool = False):
+        super().__init__(nome)
+        self.atraso = atraso
+        self.falhar = falhar
+        self.cupons = []
+        self.threads = set()
+        self.fechado = False
+    
+    def salvar(self, cupom, nome_arquivo=None):
+        self.threads.add(threading.get_ident())
+        time.sleep(self.atraso)
+        if self.falhar:
+            raise OSError("destino indisponível")
+        self.cupons.append(cupom)
+        return Path(f"{self.nome}.out")
+    
+    def fechar(self):
+        self.threads.add(threading.get_ident())
+        self.fechado = True
+
+
+class TestDistribuidorSaidas:
+    """Testes para DistribuidorSaidas"""
+    
+    def test_envia_para_todos_os_destinos(self):
+        """Testa que cada cupom chega uma vez a cada destino"""
+        a, b = DestinoMemoria('a'), DestinoMemoria('b')
+        
+        with DistribuidorSaidas([a, b]) as saidas:
+            for numero in range(5):
+                futuros = saidas.enviar(criar_cupom(numero))
+        
+        assert futuros['a'].result() == Path("a.out")
+        assert len(a.cupons) == len(b.cupons) == 5
+        assert a.cupons[0] is b.cupons[0]
+        assert a.fechado and b.fechado
+    
+    def test_destino_usado_por_uma_unica_thread(self):
+        """Testa que salvar() e fechar() rodam na mesma thread, fora da principal"""
+        destino = DestinoMemoria('a')
+        
+        with DistribuidorSaidas([destino]) as saidas:
+            saidas.enviar(criar_cupom())
+        
+        assert len(destino.threads) == 1
+        assert threading.get_ident() not in destino.threads
+    
+    def test_isolamento_de_erros(self):
+        """Testa que um destino com erro não afeta os outros"""
+        ok, falho = DestinoMemoria('ok'), DestinoMemoria('falho', falhar=True)
+        
+        with DistribuidorSaidas([ok, falho]) as saidas:
+            futuros = [saidas.enviar(criar_cupom(numero)) for numero in range(3)]
+        
+        metricas = saidas.metricas()
+        
+        assert len(ok.cupons) == 3
+        assert metricas['ok']['salvos'] == 3
+        assert metricas['falho']['erros'] == 3
+        with pytest.raises(OSError):
+            futuros[0]['falho'].result()
+    
+    def test_destino_lento_nao_bloqueia_envio(self):
+        """Testa que o envio só enfileira enquanto houver espaço na fila"""
+        lento = DestinoMemoria('lento', atraso=0.05)
+        
+        with DistribuidorSaidas([lento], tamanho_fila=20) as saidas:
+            inicio = time.perf_counter()
+            for numero in range(10):
+                saidas.enviar(criar_cupom(numero))
+            duracao = time.perf_counter() - inicio
+        
+        assert duracao < 0.25
+        assert len(lento.cupons) == 10
+    
+    def test_nomes_repetidos(self):
+        """Testa a validação dos destinos"""
+        with pytest.raises(ValueError):
+            DistribuidorSaidas([DestinoMemoria('a'), DestinoMemoria('a')])
+        
+        with pytest.raises(ValueError):
+            DistribuidorSaidas([])
+
+
+class TestCriarDestinos:
+    """Testes para os destinos de repositório"""
+    
+    def test_destino_desconhecido(self):
+        """Testa erro para nome não suportado"""
+        with pytest.raises(ValueError):
+            criar_destinos(['csv', 'pdf'])
+    
+    def test_destino_lote_aberto_sob_demanda(self):
+        """Testa que o escritor só é criado no primeiro cupom"""
+        aberturas = []
+        destino = DestinoLote('x', lambda: aberturas.append(1))
+        destino.fechar()
+        
+        assert aberturas == []
+    
+    def test_lote_resolvido_apos_flush(self):
+        """Testa que o Future de um destino de lote espera o flush que grava o cupom"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            diretorio = Path(tmpdir)
+            
+            with DistribuidorSaidas(criar_destinos(['sqlite'], diretorio)) as saidas:
+                futuros = [saidas.enviar(criar_cupom(numero))['sqlite'] for numero in range(3)]
+                saidas.aguardar()
+                
+                # Aceitos pelo SQLiteRepository, mas ainda fora de um commit
+                assert not any(futuro.done() for futuro in futuros)
+                
+                saidas.sincronizar()['sqlite'].result(timeout=5)
+                assert all(futuro.done() for futuro in futuros)
+                
+                with sqlite3.connect(diretorio / "cupons.db") as conexao:
+                    assert conexao.execute("SELECT COUNT(*) FROM cupom").fetchone()[0] == 3
+            
+            assert saidas.metricas()['sqlite']['salvos'] == 3
+    
+    def test_sincronizar_escritor_sem_flush(self):
+        """Testa que sincronizar fecha o escritor sem flush e o próximo cupom abre outro"""
+        escritores = []
+        
+        def abrir():
+            escritor = Mock(spec=['adicionar', 'fechar'])
+            escritores.append(escritor)
+            return escritor
+        
+        destino = DestinoLote('x', abrir)
+        destino.salvar(criar_cupom(1))
+        destino.salvar(criar_cupom(2))
+        assert destino.pendentes == 2
+        
+        destino.sincronizar()
+        assert destino.pendentes == 0
+        escritores[0].fechar.assert_called_once()
+        
+        destino.salvar(criar_cupom(3))
+        assert len(escritores) == 2
+        assert destino.pendentes == 1
+    
+    def test_csv_parquet_sqlite_em_uma_passada(self):
+        """Testa a gravação simultânea em CSV, Parquet e SQLite"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            diretorio = Path(tmpdir)
+            destinos = criar_destinos(['csv', 'parquet', 'sqlite'], diretorio)
+            
+            with DistribuidorSaidas(destinos) as saidas:
+                for numero in range(4):
+                    saidas.enviar(criar_cupom(numero))
+            
+            assert all(m['erros'] == 0 for m in saidas.metricas().values())
+            assert len(list(diretorio.glob("cupom_*.csv"))) == 4
+            
+            parquet = next(diretorio.glob("*.parquet"))
+            assert pq.read_table(parquet).num_rows == 8
+            
+            with sqlite3.connect(diretorio / "cupons.db") as conexao:
+                assert conexao.execute("SELECT COUNT(*) FROM cupom").fetchone()[0] == 4
\ No newline at end of file
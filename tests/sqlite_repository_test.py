@@ -0,0 +1,147 @@
+"""
+Testes unitários para SQLiteRepository
+"""
+import sqlite3
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from src.models.cupom_completo import CupomCompleto
+from src.models.cupom import Cupom
+from src.models.consumidor import Consumidor
+from src.repositories.sqlite_repository import SQLiteRepository
+from tests.conftest import CHAVE, criar_cupom, criar_produtos
+
+
+def criar_cupom_completo(
+    chave: str = CHAVE,
+    quantidade_produtos: int = 2,
+    data_hora: str = "22/01/2026 - 20:03:41"
+) -> CupomCompleto:
+    """Cria um cupom de teste com GTIN e consumidor (preenche todas as tabelas)"""
+    return criar_cupom(
+        cupom=Cupom(total="R$ 1.234,56", data_hora=data_hora, troco="0,00"),
+        produtos=criar_produtos(quantidade_produtos, cod_gtin="7891234567895"),
+        consumidor=Consumidor(cpf_cnpj="123.456.789-00"),
+        chave_acesso=chave
+    )
+
+
+@pytest.fixture
+def repositorio():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repo = SQLiteRepository(caminho=Path(tmpdir) / "cupons.db", tamanho_lote=2)
+        yield repo
+        repo.fechar()
+
+
+class TestSQLiteRepository:
+    """Testes para o repositório SQLite"""
+    
+    def test_salvar_normalizado(self, repositorio):
+        """Testa gravação nas tabelas normalizadas com valores tipados"""
+        repositorio.salvar(criar_cupom_completo())
+        
+        cupons = repositorio.buscar_cupons_por_cnpj("12345678000190")
+        
+        assert len(cupons) == 1
+        assert cupons[0]['total'] == 1234.56
+        assert cupons[0]['data_hora'] == "2026-01-22 20:03:41"
+        assert repositorio.conexao.execute("SELECT COUNT(*) FROM produto").fetchone()[0] == 2
+        assert repositorio.conexao.execute("SELECT COUNT(*) FROM consumidor").fetchone()[0] == 1
+        assert repositorio.conexao.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    
+    def test_upsert_por_chave(self, repositorio):
+        """Testa que reprocessar a mesma chave substitui o cupom e seus itens"""
+        repositorio.salvar(criar_cupom_completo(quantidade_produtos=3))
+        repositorio.salvar(criar_cupom_completo(quantidade_produtos=1))
+        
+        assert repositorio.conexao.execute("SELECT COUNT(*) FROM cupom").fetchone()[0] == 1
+        assert repositorio.conexao.execute("SELECT COUNT(*) FROM produto").fetchone()[0] == 1
+        assert repositorio.conexao.execute("SELECT COUNT(*) FROM emitente").fetchone()[0] == 1
+    
+    def test_chave_repetida_no_mesmo_lote(self, repositorio):
+        """Testa que a mesma chave duas vezes no lote grava só a última versão"""
+        salvos = repositorio.salvar_varios([criar_cupom_completo(quantidade_produtos=3), criar_cupom_completo(quantidade_produtos=1)])
+        
+        assert salvos == 1
+        assert repositorio.conexao.execute("SELECT COUNT(*) FROM cupom").fetchone()[0] == 1
+        assert repositorio.conexao.execute("SELECT COUNT(*) FROM produto").fetchone()[0] == 1
+    
+    def test_adicionar_sem_chave(self, repositorio):
+        """Testa que cupom sem chave é rejeitado já em adicionar, sem entrar no lote"""
+        with pytest.raises(ValueError):
+            repositorio.adicionar(criar_cupom_completo(chave=None))
+        
+        assert repositorio.pendentes == 0
+    
+    def test_flush_isola_cupom_com_erro(self, repositorio):
+        """Testa que um cupom que falha sai do lote sem bloquear os demais"""
+        invalido = criar_cupom_completo(chave=None)
+        repositorio.adicionar(criar_cupom_completo(chave=CHAVE[:-1] + "1"))
+        repositorio._pendentes.append(invalido)
+        repositorio.adicionar(criar_cupom_completo(chave=CHAVE[:-1] + "2"))
+        
+        repositorio.flush()
+        
+        assert repositorio.pendentes == 0
+        assert repositorio.conexao.execute("SELECT COUNT(*) FROM cupom").fetchone()[0] == 2
+        
+        falhas = repositorio.retirar_falhas()
+        assert [cupom for cupom, _ in falhas] == [invalido]
+        assert isinstance(falhas[0][1], ValueError)
+        assert repositorio.retirar_falhas() == []
+        
+        repositorio.adicionar(criar_cupom_completo(chave=CHAVE[:-1] + "3"))
+        repositorio.flush()
+        
+        assert repositorio.conexao.execute("SELECT COUNT(*) FROM cupom").fetchone()[0] == 3
+    
+    def test_adicionar_em_lote(self, repositorio):
+        """Testa que o lote só é gravado ao atingir o tamanho ou no flush"""
+        repositorio.adicionar(criar_cupom_completo(chave=CHAVE[:-1] + "1"))
+        
+        assert repositorio.conexao.execute("SELECT COUNT(*) FROM cupom").fetchone()[0] == 0
+        
+        repositorio.adicionar(criar_cupom_completo(chave=CHAVE[:-1] + "2"))
+        repositorio.adicionar(criar_cupom_completo(chave=CHAVE[:-1] + "3"))
+        
+        assert repositorio.conexao.execute("SELECT COUNT(*) FROM cupom").fetchone()[0] == 2
+        
+        repositorio.flush()
+        
+        assert repositorio.conexao.execute("SELECT COUNT(*) FROM cupom").fetchone()[0] == 3
+    
+    def test_consultas(self, repositorio):
+        """Testa consultas por NCM, GTIN e período"""
+        repositorio.salvar_varios([
+            criar_cupom_completo(chave=CHAVE[:-1] + "1", data_hora="01/01/2026 - 10:00:00"),
+            criar_cupom_completo(chave=CHAVE[:-1] + "2", data_hora="15/02/2026 - 10:00:00"),
+        ])
+        
+        janeiro = repositorio.buscar_cupons_por_periodo(datetime(2026, 1, 1), datetime(2026, 1, 31, 23, 59, 59))
+        
+        assert [c['chave'] for c in janeiro] == [CHAVE[:-1] + "1"]
+        assert len(repositorio.buscar_produtos_por_ncm("22021000")) == 4
+        assert len(repositorio.buscar_produtos_por_gtin("7891234567895")) == 4
+    
+    def test_cupom_sem_chave(self, repositorio):
+        """Testa que cupom sem chave de acesso é rejeitado"""
+        cupom = criar_cupom_completo(chave=None)
+        
+        with pytest.raises(ValueError):
+            repositorio.salvar(cupom)
+    
+    def test_persistencia(self):
+        """Testa que os dados sobrevivem ao fechar e reabrir o banco"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            caminho = Path(tmpdir) / "cupons.db"
+            
+            with SQLiteRepository(caminho=caminho) as repo:
+                repo.adicionar(criar_cupom_completo())
+            
+            conexao = sqlite3.connect(str(caminho))
+            assert conexao.execute("SELECT COUNT(*) FROM produto").fetchone()[0] == 2
+            conexao.close()
\ No newline at end of file
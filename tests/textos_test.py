@@ -0,0 +1,102 @@
+"""
+Testes unitários para o pool de textos repetidos
+"""
+import sys
+import threading
+
+from src.models.emitente import Emitente
+from src.utils.textos import CAMPOS_EMITENTE, PoolTextos
+
+
+def texto_novo(texto: str) -> str:
+    """Cria um objeto str novo com o mesmo conteúdo (como lido da página)"""
+    return "".join(list(texto))
+
+
+class TestPoolTextos:
+    """Testes para PoolTextos"""
+    
+    def test_retorna_copia_guardada(self):
+        """Testa que textos iguais passam a ser o mesmo objeto"""
+        pool = PoolTextos(limite=10)
+        primeiro = pool.internar(texto_novo("SUPERMERCADO EXEMPLO"))
+        repetido = texto_novo("SUPERMERCADO EXEMPLO")
+        
+        assert repetido is not primeiro
+        assert pool.internar(repetido) is primeiro
+    
+    def test_metricas(self):
+        """Testa acertos, taxa e bytes economizados"""
+        pool = PoolTextos(limite=10)
+        repetido = texto_novo("PAO FRANCES KG")
+        
+        pool.internar(texto_novo("PAO FRANCES KG"))
+        pool.internar(repetido)
+        pool.internar(texto_novo("LEITE 1L"))
+        
+        metricas = pool.metricas()
+        assert metricas['consultas'] == 3
+        assert metricas['acertos'] == 1
+        assert metricas['taxa_acerto'] == round(1 / 3, 4)
+        assert metricas['bytes_economizados'] == sys.getsizeof(repetido)
+        assert "1/3" in pool.resumo()
+    
+    def test_limite_descarta_menos_usado(self):
+        """Testa que o pool não passa do limite (LRU)"""
+        pool = PoolTextos(limite=2)
+        
+        pool.internar("a1")
+        pool.internar("b2")
+        pool.internar("a1")          # a1 passa a ser o mais recente
+        pool.internar("c3")          # descarta b2
+        
+        assert len(pool) == 2
+        assert "a1" in pool and "c3" in pool and "b2" not in pool
+        assert pool.metricas()['descartes'] == 1
+    
+    def test_vazio_e_none_passam_direto(self):
+        """Testa que None e texto vazio não entram no pool"""
+        pool = PoolTextos(limite=10)
+        
+        assert pool.internar(None) is None
+        assert pool.internar("") == ""
+        assert pool.metricas()['consultas'] == 0
+    
+    def test_desativado(self):
+        """Testa limite 0 (pool desativado)"""
+        pool = PoolTextos(limite=0)
+        texto = texto_novo("LOJA")
+        
+        assert pool.internar(texto) is texto
+        assert len(pool) == 0
+    
+    def test_internar_campos(self):
+        """Testa o internamento dos campos do emitente"""
+        pool = PoolTextos(limite=100)
+        primeiro = Emitente(nome=texto_novo("LOJA"), cnpj=texto_novo("12.345.678/0001-90"))
+        segundo = Emitente(nome=texto_novo("LOJA"), cnpj=texto_novo("12.345.678/0001-90"))
+        
+        pool.internar_campos(primeiro, CAMPOS_EMITENTE)
+        pool.internar_campos(segundo, CAMPOS_EMITENTE)
+        
+        assert segundo.nome is primeiro.nome
+        assert segundo.cnpj is primeiro.cnpj
+        assert segundo.ie is None
+        assert pool.internar_campos(None, CAMPOS_EMITENTE) is None
+    
+    def test_threads(self):
+        """Testa o uso concorrente do mesmo pool"""
+        pool = PoolTextos(limite=50)
+        
+        def internar():
+            for i in range(1000):
+                pool.internar(texto_novo(f"NCM {i % 100}"))
+        
+        threads = [threading.Thread(target=internar) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(pool) == 50
+        assert pool.metricas()['consultas'] == 4000
\ No newline at end of file
@@ -116,6 +116,24 @@ class TestWebScraperService:
         
         assert isinstance(emitente, Emitente)
     
+    def test_extrair_emitente_compartilha_textos(self):
+        """Testa que cupons da mesma loja reaproveitam os textos do emitente"""
+        service = WebScraperService()
+        service.driver = Mock()
+        
+        def elemento(*args):
+            # Cada leitura da página gera uma string nova
+            return Mock(text="".join(["Estabelecimento ", "Teste"]))
+        
+        service.driver.find_element = Mock(side_effect=elemento)
+        
+        with patch('src.config.campos_extracao.EXTRAIR_EMITENTE', {'nome': True}):
+            primeiro = service.extrair_emitente()
+            segundo = service.extrair_emitente()
+        
+        assert primeiro.nome is segundo.nome
+        assert service.textos.metricas()['acertos'] == 1
+    
     def test_extrair_consumidor(self):
         """Testa extração de dados do consumidor"""
         service = WebScraperService()
@@ -218,6 +236,32 @@ class TestWebScraperService:
         
         assert isinstance(produtos, list)
     
+    def test_extrair_produtos_gtin_invalido(self):
+        """Testa que GTIN com dígito verificador errado é mantido e apontado pela validação"""
+        service = WebScraperService()
+        service.driver = Mock()
+        
+        textos = ["39174090", "Produto Teste", "1,0000", "10,00", "7891234567890"]
+        service.driver.find_element = Mock(side_effect=[Mock(text=texto) for texto in textos])
+        
+        mock_linha = Mock()
+        mock_linha.find_elements = Mock(return_value=[Mock(), Mock()])
+        
+        mock_tabela = Mock()
+        mock_tabela.find_elements = Mock(return_value=[Mock(), mock_linha])
+        
+        service.wait = Mock()
+        service.wait.until.return_value = mock_tabela
+        
+        produtos = service.extrair_produtos()
+        
+        assert len(produtos) == 1
+        assert produtos[0].cod_gtin == "7891234567890"
+        
+        valido, erros = produtos[0].validar()
+        assert valido is False
+        assert "GTIN inválido" in erros[0]
+    
     def test_extrair_produtos_tabela_vazia(self):
         """Testa extração com tabela vazia"""
         service = WebScraperService()
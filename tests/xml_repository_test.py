@@ -0,0 +1,122 @@
+"""
+Testes unitários para XMLRepository
+"""
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from lxml import etree
+
+from src.config import settings
+from src.models.cupom_completo import CupomCompleto
+from src.models.emitente import Emitente
+from src.models.cupom import Cupom
+from src.models.consumidor import Consumidor
+from src.repositories.xml_repository import XMLRepository
+from src.utils.arquivos import caminho_reserva
+from tests.conftest import CHAVE, criar_cupom, criar_produtos
+
+
+def criar_cupom_xml(chave: str = CHAVE, quantidade_produtos: int = 2) -> CupomCompleto:
+    """Cria um cupom de teste com todos os campos do layout e caracteres a escapar"""
+    return criar_cupom(
+        emitente=Emitente(nome="Loja & Cia", cnpj="12.345.678/0001-90", sat_numero="900042020"),
+        cupom=Cupom(total="R$ 1.234,56", data_hora="22/01/2026 - 20:03:41", troco="0,00",
+                    forma_pagamento="Cartão de Crédito"),
+        produtos=criar_produtos(quantidade_produtos, valor_total="9,90", cod_gtin="7891234567895"),
+        consumidor=Consumidor(cpf_cnpj="123.456.789-00", nome="Fulano"),
+        chave_acesso=chave
+    )
+
+
+class TestXMLRepository:
+    """Testes para o repositório XML"""
+    
+    def test_salvar_layout_cfe(self):
+        """Testa a estrutura do XML gerado"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = XMLRepository(diretorio=Path(tmpdir))
+            caminho = repo.salvar(criar_cupom_xml(), nome_arquivo="teste")
+            
+            raiz = etree.parse(str(caminho)).getroot()
+            inf = raiz.find('CFe/infCFe')
+            
+            assert caminho.name == "teste.xml"
+            assert raiz.tag == "CFes"
+            assert inf.get('Id') == f"CFe{CHAVE}"
+            assert inf.findtext('emit/CNPJ') == "12345678000190"
+            assert inf.findtext('emit/xNome') == "Loja & Cia"
+            assert inf.findtext('ide/dEmi') == "20260122"
+            assert inf.findtext('total/vCFe') == "1234.56"
+            assert inf.findtext('dest/CPF') == "12345678900"
+            assert [d.get('nItem') for d in inf.iterfind('det')] == ["1", "2"]
+    
+    def test_ida_e_volta(self):
+        """Testa que o leitor reconstrói os modelos gravados"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = XMLRepository(diretorio=Path(tmpdir))
+            
+            with repo.abrir_lote('lote') as lote:
+                for i in range(3):
+                    lote.adicionar(criar_cupom_xml(chave=CHAVE[:-1] + str(i)))
+            
+            cupons = list(repo.ler(lote.caminho))
+        
+        assert lote.cupons_escritos == 3
+        assert [c.chave_acesso for c in cupons] == [CHAVE[:-1] + str(i) for i in range(3)]
+        
+        cupom = cupons[0]
+        assert cupom.cupom.total == "1.234,56"
+        assert cupom.cupom.data_hora == "22/01/2026 - 20:03:41"
+        assert cupom.cupom.forma_pagamento == "Cartão de Crédito"
+        assert cupom.emitente.nome == "Loja & Cia"
+        assert cupom.consumidor.nome == "Fulano"
+        assert cupom.local_entrega is None
+        assert len(cupom.produtos) == 2
+        assert cupom.produtos[0].quantidade == 1.5
+        assert cupom.produtos[0].valor_liquido == 10.5
+        assert cupom.produtos[0].valor_total == 9.9
+    
+    def test_nao_sobrescreve(self):
+        """Testa que cupons salvos no mesmo segundo e nomes ocupados ganham sufixo"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = XMLRepository(diretorio=Path(tmpdir))
+            primeiro = repo.salvar(criar_cupom_xml(chave=CHAVE[:-1] + "1"))
+            segundo = repo.salvar(criar_cupom_xml(chave=CHAVE[:-1] + "2"))
+            
+            caminho_reserva(Path(tmpdir) / "lote_2.xml").touch()
+            (Path(tmpdir) / "lote.xml").write_text("existente")
+            with repo.abrir_lote('lote') as lote:
+                lote.adicionar(criar_cupom_xml())
+            
+            assert primeiro != segundo
+            assert [c.chave_acesso for c in repo.ler(primeiro)] == [CHAVE[:-1] + "1"]
+            assert [c.chave_acesso for c in repo.ler(segundo)] == [CHAVE[:-1] + "2"]
+            assert lote.caminho.name == "lote_3.xml"
+            assert (Path(tmpdir) / "lote.xml").read_text() == "existente"
+    
+    def test_memoria_constante(self):
+        """Testa que escrita e leitura não acumulam o documento em memória"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = XMLRepository(diretorio=Path(tmpdir))
+            cupom = criar_cupom_xml(quantidade_produtos=30)
+            repo.salvar(cupom, nome_arquivo="aquecimento")
+            
+            tracemalloc.start()
+            with repo.abrir_lote('grande') as lote:
+                for _ in range(200):
+                    lote.adicionar(cupom)
+            _, pico_escrita = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            tracemalloc.start()
+            quantidade = sum(1 for _ in repo.ler(lote.caminho))
+            _, pico_leitura = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            tamanho = lote.caminho.stat().st_size
+        
+        assert quantidade == 200
+        # O buffer de escrita tem tamanho fixo (settings.COMPRESSION_BUFFER_SIZE)
+        assert pico_escrita - settings.COMPRESSION_BUFFER_SIZE < tamanho / 4
+        assert pico_leitura < tamanho / 4